@@ -2,15 +2,23 @@
 Base agent interface for the Aika AI System.
 """
 
+import time
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
 from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
 
 # Get logger
 logger = get_logger(__name__)
 
+# Metrics
+ROUTING_SECONDS = histogram("aika_agent_routing_seconds", "Time to find an agent for a request")
+ROUTING_MISSES = counter(
+    "aika_agent_routing_misses_total", "Requests no registered agent could handle"
+)
+
 
 class BaseAgent(ABC):
     """
@@ -138,11 +146,16 @@ class AgentRegistry:
         Returns:
             Agent instance or None if no agent can handle the request
         """
-        for agent in self.agents.values():
-            if await agent.can_handle(request):
-                return agent
-                
-        return None
+        started = time.perf_counter()
+        try:
+            for agent in self.agents.values():
+                if await agent.can_handle(request):
+                    return agent
+                    
+            ROUTING_MISSES.inc()
+            return None
+        finally:
+            ROUTING_SECONDS.observe(time.perf_counter() - started)
 
 
 # Singleton instance
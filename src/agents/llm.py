@@ -0,0 +1,568 @@
+"""
+Shared LLM client for the Aika AI System agents.
+
+``get_llm_client()`` returns one client per worker that every agent uses to
+call the Anthropic Messages API, so model traffic is coordinated in one place:
+
+- One pooled keep-alive HTTP connection pool (``httpx``, imported on first use).
+- A global (``LLM_MAX_CONCURRENCY``) and per-model
+  (``LLM_MAX_CONCURRENCY_PER_MODEL``) cap on requests in flight.
+- Token-bucket pacing per model against the provider's request and token
+  rate limits (``LLM_REQUESTS_PER_MINUTE``, ``LLM_TOKENS_PER_MINUTE``);
+  a 429 with ``retry-after`` pauses the model's bucket.
+- Retries of 429, 5xx, overload and connection errors with jittered
+  exponential backoff, limited by a retry budget so that retries can never
+  amplify an outage: only ``LLM_RETRY_BUDGET_RATIO`` of recent requests (plus
+  a small floor) may be retried.
+- Optional hedging: a request still running after ``LLM_HEDGE_AFTER_MS`` is
+  sent a second time and the first answer wins. Hedges spend retry budget.
+
+``src.bench.llm_stub`` serves a local stand-in for the API for tests and
+benchmarks.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
+from ..utils.tracing import start_span
+
+if TYPE_CHECKING:
+    import httpx
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+# Status codes worth retrying (529: overloaded)
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504, 529})
+
+# Metrics
+REQUEST_SECONDS = histogram(
+    "aika_llm_request_seconds",
+    "Time to get a model response, including retries",
+    ["model", "status"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+RETRIES = counter("aika_llm_retries_total", "Retried model requests", ["model", "reason"])
+RETRY_BUDGET_EXHAUSTED = counter(
+    "aika_llm_retry_budget_exhausted_total",
+    "Failed model requests not retried for lack of budget",
+    ["model"],
+)
+HEDGES = counter("aika_llm_hedges_total", "Hedged model requests", ["model", "outcome"])
+PACING_SECONDS = histogram(
+    "aika_llm_pacing_seconds", "Time model requests waited for rate-limit pacing", ["model"]
+)
+
+
+class LLMError(Exception):
+    """Raised when a model request fails."""
+
+    def __init__(
+        self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None
+    ):
+        """
+        Initialize the error.
+
+        Args:
+            message: Error description
+            status: HTTP status (None for connection errors and timeouts)
+            retry_after: Seconds the server asked to wait before retrying
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the request may succeed when retried."""
+        return self.status is None or self.status in RETRYABLE_STATUSES
+
+
+class LLMResponse(BaseModel):
+    """Model response."""
+
+    id: str
+    model: str
+    text: str
+    content: List[Dict[str, Any]]
+    stop_reason: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    attempts: int = 1
+    hedged: bool = False
+    service_seconds: float = 0.0
+
+    @classmethod
+    def from_api(
+        cls,
+        data: Dict[str, Any],
+        attempts: int = 1,
+        hedged: bool = False,
+        service_seconds: float = 0.0,
+    ) -> "LLMResponse":
+        """
+        Build a response from a Messages API response body.
+
+        Args:
+            data: Response body
+            attempts: Requests sent, including retries
+            hedged: Whether the answer came from a hedged request
+            service_seconds: Duration of the request that answered, without
+                pacing, queueing for the concurrency caps, backoff or failed attempts
+
+        Returns:
+            Response
+        """
+        content = data.get("content") or []
+        usage = data.get("usage") or {}
+        return cls(
+            id=data.get("id", ""),
+            model=data.get("model", ""),
+            text="".join(block.get("text", "") for block in content if block.get("type") == "text"),
+            content=content,
+            stop_reason=data.get("stop_reason"),
+            input_tokens=usage.get("input_tokens", 0),
+            output_tokens=usage.get("output_tokens", 0),
+            attempts=attempts,
+            service_seconds=service_seconds,
+            hedged=hedged,
+        )
+
+
+class TokenBucket:
+    """
+    Async token bucket pacing requests to a sustained rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst (defaults to one second of tokens)
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens accrued since the last update."""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Take tokens, waiting until they are available.
+
+        Requests larger than the capacity wait for a full bucket and leave it
+        in debt, so they are paced rather than blocked forever.
+
+        Args:
+            amount: Tokens to take
+
+        Returns:
+            Seconds waited
+        """
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                needed = min(amount, self.capacity)
+                if self._tokens >= needed and now >= self._paused_until:
+                    self._tokens -= amount
+                    return now - started
+                delay = max(self._paused_until - now, (needed - self._tokens) / self.rate)
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hand out no tokens for a while, e.g. after a 429 response.
+
+        Args:
+            seconds: Pause length
+        """
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RetryBudget:
+    """
+    Limits retries to a fraction of the requests in a sliding window.
+
+    Retries are allowed while they stay below ``ratio`` times the requests
+    in the window plus ``min_per_second`` per second of window, so a failing
+    dependency sees at most that much extra load.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_per_second: float = 1.0, window: float = 10.0):
+        """
+        Initialize the budget.
+
+        Args:
+            ratio: Retries allowed per request
+            min_per_second: Retries always allowed per second
+            window: Window length in seconds
+        """
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._requests: Deque[float] = deque()
+        self._retries: Deque[float] = deque()
+
+    def _prune(self, now: float) -> None:
+        """Forget events that left the window."""
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Record a new (non-retry) request."""
+        now = time.monotonic()
+        self._prune(now)
+        self._requests.append(now)
+
+    def try_retry(self) -> bool:
+        """
+        Spend budget on a retry.
+
+        Returns:
+            True if the retry is allowed
+        """
+        now = time.monotonic()
+        self._prune(now)
+        allowed = self.ratio * len(self._requests) + self.min_per_second * self.window
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+class LLMClient:
+    """
+    Pooled, rate-paced Messages API client with retries and hedging.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_concurrency_per_model: Optional[int] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_base_delay: Optional[float] = None,
+        retry_max_delay: Optional[float] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        hedge_after: Optional[float] = None,
+        transport: Any = None,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            api_key: API key (defaults to settings.ANTHROPIC_API_KEY)
+            base_url: API base URL (defaults to settings.LLM_BASE_URL)
+            timeout: Per-request timeout in seconds (defaults to settings.LLM_TIMEOUT)
+            max_concurrency: Requests in flight (defaults to settings.LLM_MAX_CONCURRENCY)
+            max_concurrency_per_model: Requests in flight per model
+                (defaults to settings.LLM_MAX_CONCURRENCY_PER_MODEL)
+            requests_per_minute: Request pacing per model, 0 for none
+                (defaults to settings.LLM_REQUESTS_PER_MINUTE)
+            tokens_per_minute: Token pacing per model, 0 for none
+                (defaults to settings.LLM_TOKENS_PER_MINUTE)
+            max_retries: Retries per request (defaults to settings.LLM_MAX_RETRIES)
+            retry_base_delay: First backoff in seconds (defaults to settings.LLM_RETRY_BASE_DELAY)
+            retry_max_delay: Backoff cap in seconds (defaults to settings.LLM_RETRY_MAX_DELAY)
+            retry_budget: Retry budget (defaults to one from the LLM_RETRY_BUDGET_* settings)
+            hedge_after: Seconds before a request is hedged, 0 for never
+                (defaults to settings.LLM_HEDGE_AFTER_MS)
+            transport: ``httpx`` transport, e.g. an ASGI transport for the local stub
+        """
+        def default(value: Any, name: str) -> Any:
+            return getattr(settings, name) if value is None else value
+
+        self.api_key = api_key
+        self.base_url = default(base_url, "LLM_BASE_URL")
+        self.timeout = default(timeout, "LLM_TIMEOUT")
+        self.requests_per_minute = default(requests_per_minute, "LLM_REQUESTS_PER_MINUTE")
+        self.tokens_per_minute = default(tokens_per_minute, "LLM_TOKENS_PER_MINUTE")
+        self.max_retries = default(max_retries, "LLM_MAX_RETRIES")
+        self.retry_base_delay = default(retry_base_delay, "LLM_RETRY_BASE_DELAY")
+        self.retry_max_delay = default(retry_max_delay, "LLM_RETRY_MAX_DELAY")
+        self.hedge_after = (
+            settings.LLM_HEDGE_AFTER_MS / 1000 if hedge_after is None else hedge_after
+        )
+        self.retry_budget = retry_budget or RetryBudget(
+            settings.LLM_RETRY_BUDGET_RATIO, settings.LLM_RETRY_BUDGET_MIN_PER_SECOND
+        )
+        self.max_concurrency_per_model = default(
+            max_concurrency_per_model, "LLM_MAX_CONCURRENCY_PER_MODEL"
+        )
+        self._concurrency = asyncio.Semaphore(default(max_concurrency, "LLM_MAX_CONCURRENCY"))
+        self._model_concurrency: Dict[str, asyncio.Semaphore] = {}
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._transport = transport
+        self._http: Optional["httpx.AsyncClient"] = None
+        self._random = random.Random()
+
+    def _get_http(self) -> "httpx.AsyncClient":
+        """Create the pooled HTTP client on first use."""
+        if self._http is None:
+            import httpx
+
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={
+                    "x-api-key": self.api_key or settings.ANTHROPIC_API_KEY,
+                    "anthropic-version": settings.LLM_API_VERSION,
+                    "content-type": "application/json",
+                },
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 10.0)),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY,
+                ),
+                transport=self._transport,
+            )
+        return self._http
+
+    def _model_semaphore(self, model: str) -> asyncio.Semaphore:
+        """Get the concurrency cap of a model."""
+        semaphore = self._model_concurrency.get(model)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency_per_model)
+            self._model_concurrency[model] = semaphore
+        return semaphore
+
+    async def _pace(self, model: str, tokens: int) -> None:
+        """Wait for the model's request and token buckets."""
+        waited = 0.0
+        if self.requests_per_minute:
+            bucket = self._request_buckets.get(model)
+            if bucket is None:
+                bucket = self._request_buckets[model] = TokenBucket(self.requests_per_minute / 60)
+            waited += await bucket.acquire()
+        if self.tokens_per_minute:
+            bucket = self._token_buckets.get(model)
+            if bucket is None:
+                bucket = self._token_buckets[model] = TokenBucket(self.tokens_per_minute / 60)
+            waited += await bucket.acquire(tokens)
+        if waited:
+            PACING_SECONDS.labels(model).observe(waited)
+
+    async def _send(
+        self, payload: Dict[str, Any], tokens: int, timeout: Optional[float]
+    ) -> Tuple[Dict[str, Any], float]:
+        """
+        Send one request, paced and within the concurrency caps.
+
+        Returns:
+            Response body and the seconds the request itself took
+
+        Raises:
+            LLMError: If the request fails
+        """
+        import httpx
+
+        model = payload["model"]
+        await self._pace(model, tokens)
+        async with self._concurrency, self._model_semaphore(model):
+            sent = time.perf_counter()
+            try:
+                response = await self._get_http().post(
+                    "/v1/messages",
+                    json=payload,
+                    timeout=self.timeout if timeout is None else timeout,
+                )
+            except httpx.HTTPError as e:
+                raise LLMError(f"{type(e).__name__}: {e}") from e
+            seconds = time.perf_counter() - sent
+
+        if response.status_code != 200:
+            retry_after: Optional[float] = None
+            try:
+                retry_after = float(response.headers["retry-after"])
+            except (KeyError, ValueError):
+                pass
+            if response.status_code == 429 and retry_after and model in self._request_buckets:
+                self._request_buckets[model].pause(retry_after)
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text[:200]
+            raise LLMError(
+                f"HTTP {response.status_code}: {message}", response.status_code, retry_after
+            )
+
+        return response.json(), seconds
+
+    async def _attempt(
+        self, payload: Dict[str, Any], tokens: int, timeout: Optional[float], hedge_after: float
+    ) -> Tuple[Dict[str, Any], float, bool]:
+        """
+        Send a request, hedging it if it is slow.
+
+        Returns:
+            Response body, the seconds its request took and whether it came
+            from the hedged request
+        """
+        if not hedge_after:
+            return (*await self._send(payload, tokens, timeout), False)
+
+        model = payload["model"]
+        primary = asyncio.ensure_future(self._send(payload, tokens, timeout))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done or not self.retry_budget.try_retry():
+            return (*await primary, False)
+
+        HEDGES.labels(model, "sent").inc()
+        hedge = asyncio.ensure_future(self._send(payload, tokens, timeout))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            HEDGES.labels(model, "won").inc()
+                        return (*task.result(), task is hedge)
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full-jitter exponential backoff, at least as long as the server asked."""
+        ceiling = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1))
+        delay = self._random.uniform(0, ceiling)
+        return max(delay, retry_after or 0.0)
+
+    async def create_message(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        system: Optional[str] = None,
+        timeout: Optional[float] = None,
+        hedge_after: Optional[float] = None,
+        **params: Any,
+    ) -> LLMResponse:
+        """
+        Create a message with the Messages API.
+
+        Args:
+            model: Model name
+            messages: Conversation messages (``role``/``content`` dicts)
+            max_tokens: Maximum tokens to generate
+            system: System prompt
+            timeout: Per-attempt timeout override in seconds
+            hedge_after: Hedging delay override in seconds (0 disables hedging)
+            **params: Further request parameters (``temperature``, ``stop_sequences``, ...)
+
+        Returns:
+            Model response
+
+        Raises:
+            LLMError: If the request fails after the retries allowed
+        """
+        payload: Dict[str, Any] = {
+            "model": model, "max_tokens": max_tokens, "messages": messages, **params
+        }
+        if system:
+            payload["system"] = system
+        # Rough token cost for pacing: four characters per token plus the output cap
+        characters = len(system or "") + sum(len(str(m.get("content", ""))) for m in messages)
+        tokens = characters // 4 + max_tokens
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+
+        started = time.perf_counter()
+        status = "error"
+        self.retry_budget.record_request()
+        with start_span("llm.request", kind="client", attributes={"llm.model": model}) as span:
+            try:
+                attempt = 1
+                while True:
+                    try:
+                        data, seconds, hedged = await self._attempt(
+                            payload, tokens, timeout, hedge_after
+                        )
+                        break
+                    except LLMError as e:
+                        if not e.retryable or attempt > self.max_retries:
+                            raise
+                        if not self.retry_budget.try_retry():
+                            RETRY_BUDGET_EXHAUSTED.labels(model).inc()
+                            raise
+                        delay = self._backoff(attempt, e.retry_after)
+                        RETRIES.labels(model, str(e.status or "connection")).inc()
+                        logger.warning(
+                            "Model request to %s failed (%s), retrying in %.2fs", model, e, delay
+                        )
+                        await asyncio.sleep(delay)
+                        attempt += 1
+
+                response = LLMResponse.from_api(
+                    data, attempts=attempt, hedged=hedged, service_seconds=seconds
+                )
+                span.set_attribute("llm.attempts", attempt)
+                span.set_attribute("llm.output_tokens", response.output_tokens)
+                status = "ok"
+                return response
+            finally:
+                REQUEST_SECONDS.labels(model, status).observe(time.perf_counter() - started)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+
+# Singleton instance
+_llm_client: Optional[LLMClient] = None
+
+
+def get_llm_client() -> LLMClient:
+    """
+    Get the shared LLM client.
+
+    Returns:
+        LLM client instance
+    """
+    global _llm_client
+
+    if _llm_client is None:
+        _llm_client = LLMClient()
+
+    return _llm_client
+
+
+async def close_llm_client() -> None:
+    """Close the shared LLM client if it was created."""
+    global _llm_client
+
+    if _llm_client is not None:
+        await _llm_client.aclose()
+        _llm_client = None
@@ -0,0 +1,508 @@
+"""
+Latency- and cost-tiered model selection for the Aika AI System agents.
+
+The configured models form three tiers: ``small`` (``SUMMARIZER_MODEL``),
+``medium`` (``REASONER_MODEL``) and ``large`` (``PRIMARY_MODEL``).
+``ModelRouter`` picks a tier for each call:
+
+- The task type sets the target tier (``TASK_TIERS``): classification,
+  routing, extraction and summarization go to the small tier, planning to
+  the large one and everything else to the medium one.
+- Each tier's latency is predicted from the prompt size and output cap, with
+  a correction learned from the service time of observed calls (the request
+  that answered, without pacing, queueing, backoff or failed attempts). Under a latency SLO
+  (``MODEL_ROUTER_LATENCY_SLO_MS``) the largest tier up to the target that is
+  predicted to meet it is used.
+- With the cascade (``MODEL_ROUTER_CASCADE``) the small tier answers first
+  and the call escalates to the selected tier only when the answer's
+  confidence is below ``MODEL_ROUTER_CONFIDENCE_THRESHOLD``. By default
+  the small model is asked to state its confidence on a last line, which is
+  removed from the answer; answers without one are taken at
+  ``MODEL_ROUTER_MISSING_CONFIDENCE`` (the threshold unless set).
+
+Calls go through the shared LLM client. Latency, tokens, estimated cost and
+escalations are recorded per tier (``get_stats``, ``GET /admin/models``).
+"""
+
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
+from .llm import LLMClient, LLMError, LLMResponse, get_llm_client
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+# Tiers from smallest to largest
+TIER_ORDER = ("small", "medium", "large")
+
+# Target tier by task type (other tasks use DEFAULT_TIER)
+TASK_TIERS = {
+    "classification": "small",
+    "routing": "small",
+    "extraction": "small",
+    "summarization": "small",
+    "reasoning": "medium",
+    "analysis": "medium",
+    "drafting": "medium",
+    "planning": "large",
+}
+DEFAULT_TIER = "medium"
+
+CONFIDENCE_INSTRUCTION = (
+    "After your answer, add a last line 'Confidence: X', where X is a number between 0 and 1 "
+    "stating how likely your answer is correct and complete."
+)
+CONFIDENCE_LINE = re.compile(r"\s*confidence:\s*([0-9]*\.?[0-9]+)\s*$", re.IGNORECASE)
+
+# Metrics
+REQUEST_SECONDS = histogram(
+    "aika_model_router_seconds",
+    "Model call time per tier",
+    ["tier", "status"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+TOKENS = counter(
+    "aika_model_router_tokens_total", "Model tokens per tier", ["tier", "direction"]
+)
+ESCALATIONS = counter(
+    "aika_model_router_escalations_total", "Cascade escalations", ["from_tier", "to_tier"]
+)
+
+ConfidenceScorer = Callable[[LLMResponse], Tuple[str, Optional[float]]]
+
+
+class ModelTier(BaseModel):
+    """
+    A model tier with its latency and cost profile.
+
+    The latency priors are typical of the tier's model class and are
+    corrected from observed calls.
+    """
+
+    name: str
+    model: str
+    overhead_seconds: float
+    seconds_per_input_token: float
+    seconds_per_output_token: float
+    input_cost_per_mtok: float
+    output_cost_per_mtok: float
+
+
+def default_tiers() -> Dict[str, ModelTier]:
+    """
+    Build the tiers from the configured models.
+
+    Returns:
+        Tiers by name
+    """
+    return {
+        "small": ModelTier(
+            name="small", model=settings.SUMMARIZER_MODEL, overhead_seconds=0.4,
+            seconds_per_input_token=0.00002, seconds_per_output_token=0.006,
+            input_cost_per_mtok=0.25, output_cost_per_mtok=1.25,
+        ),
+        "medium": ModelTier(
+            name="medium", model=settings.REASONER_MODEL, overhead_seconds=0.8,
+            seconds_per_input_token=0.00005, seconds_per_output_token=0.015,
+            input_cost_per_mtok=3.0, output_cost_per_mtok=15.0,
+        ),
+        "large": ModelTier(
+            name="large", model=settings.PRIMARY_MODEL, overhead_seconds=1.5,
+            seconds_per_input_token=0.0001, seconds_per_output_token=0.04,
+            input_cost_per_mtok=15.0, output_cost_per_mtok=75.0,
+        ),
+    }
+
+
+def parse_confidence(response: LLMResponse) -> Tuple[str, Optional[float]]:
+    """
+    Read the stated confidence from the last line of a response.
+
+    Answers cut off at the output cap score 0; answers without a
+    confidence line have an unknown confidence.
+
+    Args:
+        response: Model response
+
+    Returns:
+        Answer without the confidence line, and the confidence or None if unknown
+    """
+    text = response.text.rstrip()
+    head, _, last = text.rpartition("\n")
+    match = CONFIDENCE_LINE.match(last)
+    if match:
+        text = head.rstrip()
+        confidence = min(1.0, float(match.group(1)))
+    else:
+        confidence = None
+    if response.stop_reason == "max_tokens":
+        confidence = 0.0
+    return text, confidence
+
+
+class RoutingDecision(BaseModel):
+    """Tier selected for a call."""
+
+    tier: str
+    model: str
+    cascade: List[str]
+    predicted_seconds: float
+    reason: str
+
+
+class RoutedResponse(BaseModel):
+    """Response of a routed call."""
+
+    text: str
+    tier: str
+    model: str
+    confidence: Optional[float] = None
+    tiers_tried: List[str]
+    seconds: float
+    response: LLMResponse
+
+
+class TierStats:
+    """
+    Call statistics of one tier.
+    """
+
+    def __init__(self, tier: ModelTier, window: int = 1000):
+        """
+        Initialize the statistics.
+
+        Args:
+            tier: Tier
+            window: Latencies kept for percentiles
+        """
+        self.tier = tier
+        self.requests = 0
+        self.errors = 0
+        self.escalations = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the statistics to a dictionary.
+
+        Returns:
+            Dictionary of counters, latency percentiles and estimated cost
+        """
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+
+        return {
+            "model": self.tier.model,
+            "requests": self.requests,
+            "errors": self.errors,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "estimated_cost": (
+                self.input_tokens * self.tier.input_cost_per_mtok
+                + self.output_tokens * self.tier.output_cost_per_mtok
+            ) / 1_000_000,
+            "p50_ms": percentile(0.5),
+            "p95_ms": percentile(0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Selects a model tier per call and runs the call, cascading if enabled.
+    """
+
+    def __init__(
+        self,
+        tiers: Optional[Dict[str, ModelTier]] = None,
+        client: Optional[LLMClient] = None,
+        latency_slo: Optional[float] = None,
+        cascade: Optional[bool] = None,
+        confidence_threshold: Optional[float] = None,
+        missing_confidence: Optional[float] = None,
+        smoothing: float = 0.1,
+    ):
+        """
+        Initialize the router.
+
+        Args:
+            tiers: Tiers by name (defaults to the configured models)
+            client: LLM client (defaults to the shared one)
+            latency_slo: Default latency SLO in seconds, 0 for none
+                (defaults to settings.MODEL_ROUTER_LATENCY_SLO_MS)
+            cascade: Try the small tier first (defaults to settings.MODEL_ROUTER_CASCADE)
+            confidence_threshold: Confidence below which the cascade escalates
+                (defaults to settings.MODEL_ROUTER_CONFIDENCE_THRESHOLD)
+            missing_confidence: Confidence assumed when the scorer cannot tell
+                (defaults to settings.MODEL_ROUTER_MISSING_CONFIDENCE, else the threshold)
+            smoothing: Weight of each observed call in the latency correction
+        """
+        self.tiers = tiers or default_tiers()
+        if latency_slo is None:
+            latency_slo = settings.MODEL_ROUTER_LATENCY_SLO_MS / 1000
+        if confidence_threshold is None:
+            confidence_threshold = settings.MODEL_ROUTER_CONFIDENCE_THRESHOLD
+        self.latency_slo = latency_slo
+        self.cascade = settings.MODEL_ROUTER_CASCADE if cascade is None else cascade
+        self.confidence_threshold = confidence_threshold
+        if missing_confidence is None:
+            missing_confidence = settings.MODEL_ROUTER_MISSING_CONFIDENCE
+        self.missing_confidence = (
+            self.confidence_threshold if missing_confidence is None else missing_confidence
+        )
+        self.smoothing = smoothing
+        self._client = client
+        self._corrections: Dict[str, float] = {name: 1.0 for name in self.tiers}
+        self._stats: Dict[str, TierStats] = {
+            name: TierStats(tier) for name, tier in self.tiers.items()
+        }
+
+    def _base_seconds(self, tier: ModelTier, input_tokens: int, output_tokens: int) -> float:
+        """Latency predicted by the tier's profile alone."""
+        return (
+            tier.overhead_seconds
+            + input_tokens * tier.seconds_per_input_token
+            + output_tokens * tier.seconds_per_output_token
+        )
+
+    def predict_seconds(self, tier: str, input_tokens: int, output_tokens: int) -> float:
+        """
+        Predict the latency of a call.
+
+        Args:
+            tier: Tier name
+            input_tokens: Prompt size in tokens
+            output_tokens: Output tokens (the output cap for a worst case)
+
+        Returns:
+            Predicted seconds
+        """
+        base = self._base_seconds(self.tiers[tier], input_tokens, output_tokens)
+        return base * self._corrections[tier]
+
+    def select(
+        self,
+        task: str,
+        input_tokens: int,
+        max_tokens: int,
+        latency_slo: Optional[float] = None,
+        tier: Optional[str] = None,
+        cascade: Optional[bool] = None,
+    ) -> RoutingDecision:
+        """
+        Select the tier for a call.
+
+        Args:
+            task: Task type (see ``TASK_TIERS``)
+            input_tokens: Prompt size in tokens
+            max_tokens: Output cap
+            latency_slo: Latency SLO in seconds, 0 for none (defaults to the router's)
+            tier: Target tier overriding the task type
+            cascade: Whether to try the small tier first (defaults to the router's)
+
+        Returns:
+            Routing decision
+        """
+        slo = self.latency_slo if latency_slo is None else latency_slo
+        target = tier or TASK_TIERS.get(task, DEFAULT_TIER)
+        candidates = [
+            name for name in TIER_ORDER[: TIER_ORDER.index(target) + 1] if name in self.tiers
+        ]
+
+        chosen, reason = candidates[-1], "task"
+        if slo:
+            fitting = [
+                name for name in candidates
+                if self.predict_seconds(name, input_tokens, max_tokens) <= slo
+            ]
+            if not fitting:
+                chosen, reason = candidates[0], "slo_unreachable"
+            elif fitting[-1] != chosen:
+                chosen, reason = fitting[-1], "slo"
+
+        tiers = [chosen]
+        first = candidates[0]
+        if (self.cascade if cascade is None else cascade) and chosen != first:
+            # Only cascade if the worst case of both calls still meets the SLO
+            both = self.predict_seconds(first, input_tokens, max_tokens) + self.predict_seconds(
+                chosen, input_tokens, max_tokens
+            )
+            if not slo or both <= slo:
+                tiers = [first, chosen]
+
+        return RoutingDecision(
+            tier=chosen,
+            model=self.tiers[chosen].model,
+            cascade=tiers,
+            predicted_seconds=self.predict_seconds(chosen, input_tokens, max_tokens),
+            reason=reason,
+        )
+
+    def _record(
+        self, tier: str, seconds: float, response: Optional[LLMResponse], error: bool = False
+    ) -> None:
+        """Record a call in the tier's statistics and latency correction."""
+        stats = self._stats[tier]
+        stats.requests += 1
+        if error or response is None:
+            stats.errors += 1
+            REQUEST_SECONDS.labels(tier, "error").observe(seconds)
+            return
+
+        REQUEST_SECONDS.labels(tier, "ok").observe(seconds)
+        stats.latencies.append(seconds)
+        stats.input_tokens += response.input_tokens
+        stats.output_tokens += response.output_tokens
+        TOKENS.labels(tier, "input").inc(response.input_tokens)
+        TOKENS.labels(tier, "output").inc(response.output_tokens)
+
+        # Correct the profile from the time the model took to answer; pacing,
+        # queueing and retries are not a property of the tier
+        service = response.service_seconds or seconds
+        expected = self._base_seconds(
+            self.tiers[tier], response.input_tokens, response.output_tokens
+        )
+        if expected > 0:
+            correction = self._corrections[tier]
+            correction += self.smoothing * (service / expected - correction)
+            self._corrections[tier] = correction
+
+    async def complete(
+        self,
+        task: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        system: Optional[str] = None,
+        latency_slo: Optional[float] = None,
+        tier: Optional[str] = None,
+        cascade: Optional[bool] = None,
+        confidence: Optional[ConfidenceScorer] = None,
+        **params: Any,
+    ) -> RoutedResponse:
+        """
+        Run a call on the selected tier.
+
+        Args:
+            task: Task type (see ``TASK_TIERS``)
+            messages: Conversation messages (``role``/``content`` dicts)
+            max_tokens: Output cap
+            system: System prompt
+            latency_slo: Latency SLO in seconds, 0 for none (defaults to the router's)
+            tier: Target tier overriding the task type
+            cascade: Whether to try the small tier first (defaults to the router's)
+            confidence: Scorer returning the answer and its confidence; by default
+                the model is asked to state its confidence (see ``parse_confidence``)
+            **params: Further request parameters for the LLM client
+
+        Returns:
+            Routed response
+
+        Raises:
+            LLMError: If the call on the last tier fails
+        """
+        characters = len(system or "") + sum(len(str(m.get("content", ""))) for m in messages)
+        input_tokens = characters // 4
+        decision = self.select(task, input_tokens, max_tokens, latency_slo, tier, cascade)
+        slo = self.latency_slo if latency_slo is None else latency_slo
+        client = self._client or get_llm_client()
+
+        started = time.perf_counter()
+        tried: List[str] = []
+        for index, name in enumerate(decision.cascade):
+            last = index == len(decision.cascade) - 1
+            ask_confidence = not last and confidence is None
+            prompt = system
+            if ask_confidence:
+                prompt = "\n\n".join(filter(None, [system, CONFIDENCE_INSTRUCTION]))
+            tried.append(name)
+
+            call_started = time.perf_counter()
+            try:
+                response = await client.create_message(
+                    self.tiers[name].model, messages, max_tokens, system=prompt, **params
+                )
+            except LLMError:
+                self._record(name, time.perf_counter() - call_started, None, error=True)
+                if last:
+                    raise
+                logger.warning("Model tier '%s' failed for %s, escalating", name, task)
+                self._escalate(name, decision.cascade[index + 1])
+                continue
+            self._record(name, time.perf_counter() - call_started, response)
+
+            if last:
+                text, score = (response.text, None) if confidence is None else confidence(response)
+            else:
+                text, score = (confidence or parse_confidence)(response)
+                next_tier = decision.cascade[index + 1]
+                elapsed = time.perf_counter() - started
+                known = self.missing_confidence if score is None else score
+                remaining = self.predict_seconds(next_tier, input_tokens, max_tokens)
+                if known < self.confidence_threshold and not (slo and elapsed + remaining > slo):
+                    self._escalate(name, next_tier)
+                    continue
+
+            return RoutedResponse(
+                text=text,
+                tier=name,
+                model=self.tiers[name].model,
+                confidence=score,
+                tiers_tried=tried,
+                seconds=time.perf_counter() - started,
+                response=response,
+            )
+
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def _escalate(self, from_tier: str, to_tier: str) -> None:
+        """Record a cascade escalation."""
+        self._stats[from_tier].escalations += 1
+        ESCALATIONS.labels(from_tier, to_tier).inc()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get per-tier statistics.
+
+        Returns:
+            Statistics by tier name, with the current latency correction
+        """
+        return {
+            name: {**stats.to_dict(), "latency_correction": self._corrections[name]}
+            for name, stats in self._stats.items()
+        }
+
+
+# Singleton instance
+_model_router: Optional[ModelRouter] = None
+
+
+def get_model_router() -> ModelRouter:
+    """
+    Get the shared model router.
+
+    Returns:
+        Model router instance
+    """
+    global _model_router
+
+    if _model_router is None:
+        _model_router = ModelRouter()
+
+    return _model_router
@@ -0,0 +1,288 @@
+"""
+Health probes for the Aika AI System.
+
+Liveness (``/health/live``) only says that the process can serve requests.
+Readiness (``/health/ready``) depends on Kafka, the database and the agent
+registry, but probing them per request would put load-balancer traffic on
+every dependency. ``HealthProber`` instead checks each dependency on a
+background interval and caches the outcome together with its latency, so a
+probe request only reads a pre-rendered response. Readiness is withheld
+until the first round completes and again if the results go stale. With
+``HEALTH_PROBE_ENABLED=False`` there is no background loop, and a readiness
+request runs a round itself when the cached one is older than the interval.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+HealthCheck = Callable[[], Awaitable[Dict[str, Any]]]
+
+
+class CheckResult(BaseModel):
+    """Outcome of one dependency check."""
+    name: str
+    healthy: bool
+    latency_ms: float
+    checked_at: float
+    error: Optional[str] = None
+    details: Dict[str, Any] = {}
+
+
+async def check_database() -> Dict[str, Any]:
+    """
+    Check database connectivity with a trivial query.
+
+    Returns:
+        Backend and pool statistics
+    """
+    from ..database.connection import get_database_pool
+    from ..database.pool import PostgresPool
+    from ..database.query import Query
+
+    pool = await get_database_pool()
+    if isinstance(pool, PostgresPool):
+        await pool.fetch("SELECT 1", timeout=settings.HEALTH_PROBE_TIMEOUT)
+    else:
+        query = Query(settings.HEALTH_DATABASE_TABLE).select("id").limit(1)
+        await pool.run_query(query, timeout=settings.HEALTH_PROBE_TIMEOUT)
+
+    stats = pool.get_stats()
+    return {
+        "backend": pool.backend,
+        "size": pool.size(),
+        "in_use": stats["in_use"],
+        "waiting": stats["waiting"],
+    }
+
+
+async def check_kafka() -> Dict[str, Any]:
+    """
+    Check Kafka by fetching cluster metadata.
+
+    Returns:
+        Broker and topic counts
+
+    Raises:
+        RuntimeError: If required topics are missing
+    """
+    from ..messaging.kafka import REQUIRED_TOPICS, get_admin_client
+
+    metadata = await asyncio.to_thread(
+        get_admin_client().list_topics, timeout=settings.HEALTH_PROBE_TIMEOUT
+    )
+    missing = [topic for topic in REQUIRED_TOPICS if topic not in metadata.topics]
+    if missing:
+        raise RuntimeError(f"Missing topics: {', '.join(missing)}")
+    return {"brokers": len(metadata.brokers), "topics": len(metadata.topics)}
+
+
+async def check_agents() -> Dict[str, Any]:
+    """
+    Check that enough agents are registered.
+
+    Returns:
+        Registered agent count
+
+    Raises:
+        RuntimeError: If fewer than settings.HEALTH_MIN_AGENTS agents are registered
+    """
+    from ..agents.base import get_agent_registry
+
+    count = len(get_agent_registry().list())
+    if count < settings.HEALTH_MIN_AGENTS:
+        raise RuntimeError(f"{count} agents registered, {settings.HEALTH_MIN_AGENTS} required")
+    return {"registered": count}
+
+
+DEFAULT_CHECKS: Dict[str, HealthCheck] = {
+    "database": check_database,
+    "kafka": check_kafka,
+    "agents": check_agents,
+}
+
+
+class HealthProber:
+    """
+    Runs dependency checks in the background and caches the results.
+    """
+
+    def __init__(
+        self,
+        checks: Dict[str, HealthCheck],
+        interval: float = 5.0,
+        timeout: float = 2.0,
+        stale_after: Optional[float] = None,
+    ):
+        """
+        Initialize the prober.
+
+        Args:
+            checks: Check functions by name; each returns details or raises
+            interval: Seconds between probe rounds
+            timeout: Seconds each check may take
+            stale_after: Seconds after which results no longer count (defaults to 3 intervals)
+        """
+        self.checks = checks
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after if stale_after is not None else 3 * interval
+
+        self._results: Dict[str, CheckResult] = {}
+        self._ready = False
+        self._body = self._render("starting", {})
+        self._updated = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._probing: Optional[asyncio.Lock] = None
+
+        # Metrics
+        self.rounds = 0
+
+    async def _run_check(self, name: str, check: HealthCheck) -> CheckResult:
+        """Run one check with a timeout and time it."""
+        started = time.perf_counter()
+        error = None
+        details: Dict[str, Any] = {}
+        try:
+            details = await asyncio.wait_for(check(), timeout=self.timeout) or {}
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        return CheckResult(
+            name=name,
+            healthy=error is None,
+            latency_ms=round((time.perf_counter() - started) * 1000, 3),
+            checked_at=time.time(),
+            error=error,
+            details=details,
+        )
+
+    async def probe(self) -> Dict[str, CheckResult]:
+        """
+        Run every check once, concurrently, and cache the results.
+
+        Returns:
+            Results by check name
+        """
+        results = await asyncio.gather(*(self._run_check(n, c) for n, c in self.checks.items()))
+        self._results = {result.name: result for result in results}
+        self._ready = all(result.healthy for result in results)
+        self._body = self._render("ready" if self._ready else "not_ready", self._results)
+        self._updated = time.monotonic()
+        self.rounds += 1
+
+        for result in results:
+            if not result.healthy:
+                logger.warning(f"Health check '{result.name}' failed: {result.error}")
+        return self._results
+
+    @staticmethod
+    def _render(status: str, results: Dict[str, CheckResult]) -> bytes:
+        """Render a readiness response body."""
+        return json.dumps({
+            "status": status,
+            "checks": {name: result.dict(exclude={"name"}) for name, result in results.items()},
+        }).encode("utf-8")
+
+    def readiness(self) -> Tuple[bool, bytes]:
+        """
+        Get the cached readiness without running any checks.
+
+        Returns:
+            Whether the service is ready, and the rendered response body
+        """
+        if self._updated and time.monotonic() - self._updated > self.stale_after:
+            return False, self._render("stale", self._results)
+        return self._ready, self._body
+
+    async def refresh(self) -> Tuple[bool, bytes]:
+        """
+        Get the readiness, first running a round if the last one is older than the interval.
+
+        For use without the background loop; concurrent callers share one round.
+
+        Returns:
+            Whether the service is ready, and the rendered response body
+        """
+        if self._probing is None:
+            self._probing = asyncio.Lock()
+        async with self._probing:
+            if not self._updated or time.monotonic() - self._updated > self.interval:
+                await self.probe()
+        return self.readiness()
+
+    def get_results(self) -> List[CheckResult]:
+        """
+        Get the cached check results.
+
+        Returns:
+            Results of the last round
+        """
+        return list(self._results.values())
+
+    async def _loop(self) -> None:
+        """Probe on the interval until cancelled."""
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error(f"Health probe round failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start probing in the background on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+            logger.info(f"Health prober started ({', '.join(self.checks)} every {self.interval}s)")
+
+    async def stop(self) -> None:
+        """Stop background probing."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Singleton instance
+_health_prober: Optional[HealthProber] = None
+
+
+def get_health_prober() -> HealthProber:
+    """
+    Get the health prober instance.
+
+    Returns:
+        Health prober instance
+    """
+    global _health_prober
+
+    if _health_prober is None:
+        names = [n.strip() for n in settings.HEALTH_CHECKS.split(",") if n.strip()]
+        unknown = [n for n in names if n not in DEFAULT_CHECKS]
+        if unknown:
+            raise ValueError(f"Unknown health checks: {', '.join(unknown)}")
+
+        _health_prober = HealthProber(
+            {name: DEFAULT_CHECKS[name] for name in names},
+            interval=settings.HEALTH_PROBE_INTERVAL,
+            timeout=settings.HEALTH_PROBE_TIMEOUT,
+        )
+
+    return _health_prober
@@ -3,17 +3,104 @@ Aika API - Main entry point for the FastAPI application.
 """
 
 import os
-from typing import Dict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from ..agents.llm import close_llm_client
+from ..utils.config import get_settings
+from ..utils.logging import configure_logging, shutdown_logging
+from ..utils.metrics import get_metrics_registry
+from ..utils.tracing import get_tracer
+from .health import get_health_prober
+from .metrics import MetricsMiddleware
+from .profiling import RequestProfilingMiddleware
+from .rate_limit import RateLimitMiddleware
+from .recorder import TraceRecorderMiddleware, get_trace_recorder
+from .responses import CompressionMiddleware, ETagMiddleware, FastJSONResponse
+from .tracing import TracingMiddleware
+from .workers import WorkerStatsMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Start background services for the lifetime of the application.
+    """
+    configure_logging()
+
+    # No-op in workers forked from a preloaded master
+    from .server import warm_up
+    warm_up()
+
+    if get_settings().AUTH_REVOCATION_LISTENER:
+        from ..auth.revocation import get_revocation_list
+        get_revocation_list().start_listener()
+
+    prober = get_health_prober() if get_settings().HEALTH_PROBE_ENABLED else None
+    if prober is not None:
+        prober.start()
+
+    if get_settings().METRICS_MULTIPROC_DIR:
+        get_metrics_registry().start_multiprocess(
+            get_settings().METRICS_MULTIPROC_DIR, get_settings().METRICS_SNAPSHOT_INTERVAL
+        )
+
+    yield
+
+    if prober is not None:
+        await prober.stop()
+    await close_llm_client()
+    get_metrics_registry().stop_multiprocess()
+    if get_settings().TRACE_RECORD_PATH:
+        get_trace_recorder().close()
+    get_tracer().shutdown()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="Aika AI System",
     description="AI-powered insurance platform orchestration system",
     version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Middleware added first runs innermost: ETags are computed on the
+# uncompressed body, 304s still count against rate limits, every response
+# (including 429s) is compressed, timed and carries CORS headers.
+if get_settings().RESPONSE_ETAGS_ENABLED:
+    app.add_middleware(ETagMiddleware)
+
+# Configure rate limiting
+if get_settings().RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+
+# Configure response compression
+if get_settings().RESPONSE_COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Configure request metrics
+if get_settings().METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Count requests per worker
+app.add_middleware(WorkerStatsMiddleware)
+
+# Configure distributed tracing (always installed: without an exporter it
+# records nothing but still passes received trace context on)
+app.add_middleware(TracingMiddleware)
+
+# Record request traces for load testing
+if get_settings().TRACE_RECORD_PATH:
+    app.add_middleware(TraceRecorderMiddleware)
+
+# Configure per-request profiling (only with an admin key)
+if get_settings().ADMIN_API_KEY:
+    app.add_middleware(RequestProfilingMiddleware)
+
 # Configure CORS
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:8000").split(",")
 app.add_middleware(
@@ -42,12 +129,52 @@ async def health_check() -> Dict[str, str]:
     """
     return {"status": "healthy"}
 
+@app.get("/health/live")
+async def liveness() -> Response:
+    """
+    Liveness probe - the process is up and serving requests.
+    """
+    return Response(content=b'{"status":"alive"}', media_type="application/json")
+
+@app.get("/health/ready")
+async def readiness() -> Response:
+    """
+    Readiness probe - cached results of the dependency checks.
+    """
+    prober = get_health_prober()
+    if get_settings().HEALTH_PROBE_ENABLED:
+        ready, body = prober.readiness()
+    else:
+        # No background loop, so check on demand at most once per interval
+        ready, body = await prober.refresh()
+    return Response(
+        content=body,
+        status_code=200 if ready else 503,
+        media_type="application/json",
+        headers={"Cache-Control": "no-store"},
+    )
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """
+    Metrics in the Prometheus text format, aggregated across workers.
+    """
+    if not get_settings().METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(
+        content=get_metrics_registry().render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
 # Import and include routers
+from .routers import admin, agents, orchestrator
+app.include_router(orchestrator.router, prefix="/orchestrator", tags=["Orchestrator"])
+app.include_router(agents.router, prefix="/agents", tags=["Agents"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+
 # These will be implemented in future versions
-# from .routers import agents, orchestrator, auth
+# from .routers import auth
 # app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-# app.include_router(orchestrator.router, prefix="/orchestrator", tags=["Orchestrator"])
-# app.include_router(agents.router, prefix="/agents", tags=["Agents"])
 
 if __name__ == "__main__":
     import uvicorn
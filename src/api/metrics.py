@@ -0,0 +1,60 @@
+"""
+HTTP metrics for the Aika AI System API.
+
+``MetricsMiddleware`` times every HTTP request and counts requests in flight.
+Requests are labelled with the route template (``/agents/{agent_id}``) rather
+than the raw path, so label cardinality stays bounded; unmatched paths share
+one label.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from ..utils.metrics import gauge, histogram
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+# Metrics
+REQUEST_SECONDS = histogram(
+    "aika_http_request_seconds", "HTTP request handling time", ["method", "route", "status"]
+)
+IN_PROGRESS = gauge("aika_http_requests_in_progress", "HTTP requests being handled")
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording HTTP request latency.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            IN_PROGRESS.dec()
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), status
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,144 @@
+"""
+On-demand profiling of API workers.
+
+Both entry points require ``ADMIN_API_KEY``. Without it the endpoints answer
+404 and the header middleware is not installed, so requests pay nothing:
+
+- ``POST /admin/profile`` samples the whole worker (every thread and asyncio
+  task) for a number of seconds and returns collapsed stacks.
+- Sending ``X-Aika-Profile: <admin key>`` with any request profiles just that
+  request's task. The response carries ``X-Aika-Profile-Id``, and the
+  profile can be fetched from ``GET /admin/profile/requests/{id}`` on the
+  same worker (``X-Aika-Worker`` names it).
+"""
+
+import asyncio
+import collections
+import hmac
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Header, HTTPException, status
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from ..utils.profiler import Profile, SamplingProfiler
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+PROFILE_HEADER = b"x-aika-profile"
+
+# Profiles of individual requests, newest last
+_request_profiles: "collections.OrderedDict[str, Profile]" = collections.OrderedDict()
+
+
+def is_admin_key(key: Optional[str]) -> bool:
+    """
+    Check a key against the configured admin key.
+
+    Args:
+        key: Presented key
+
+    Returns:
+        True if admin access is configured and the key matches
+    """
+    if not settings.ADMIN_API_KEY or not key:
+        return False
+    return hmac.compare_digest(key.encode("utf-8"), settings.ADMIN_API_KEY.encode("utf-8"))
+
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)) -> None:
+    """
+    Require the admin key in the ``X-Admin-Key`` header.
+
+    Raises:
+        HTTPException: 404 if admin access is not configured, 403 for a wrong key
+    """
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin key required")
+
+
+def get_request_profile(profile_id: str) -> Optional[Profile]:
+    """
+    Get the profile of a request profiled on this worker.
+
+    Args:
+        profile_id: Id from the ``X-Aika-Profile-Id`` response header
+
+    Returns:
+        Profile, or None if unknown or already evicted
+    """
+    return _request_profiles.get(profile_id)
+
+
+def list_request_profiles() -> List[Dict[str, Any]]:
+    """
+    List the request profiles kept on this worker.
+
+    Returns:
+        Profile ids with their statistics, newest first
+    """
+    return [
+        {"id": pid, **profile.get_stats()} for pid, profile in reversed(_request_profiles.items())
+    ]
+
+
+class RequestProfilingMiddleware:
+    """
+    ASGI middleware profiling requests that carry the admin profiling header.
+    """
+
+    def __init__(self, app: ASGIApp, interval: Optional[float] = None):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            interval: Seconds between samples (defaults to settings.PROFILER_INTERVAL)
+        """
+        self.app = app
+        self.interval = interval or settings.PROFILER_INTERVAL
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = None
+        for name, value in scope.get("headers") or ():
+            if name == PROFILE_HEADER:
+                key = value.decode("latin-1")
+                break
+        if key is None or not is_admin_key(key):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        extra = [
+            (b"x-aika-profile-id", profile_id.encode("latin-1")),
+            (b"x-aika-worker", str(os.getpid()).encode("latin-1")),
+        ]
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers") or []) + extra}
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval, task=asyncio.current_task())
+        profiler.start()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _request_profiles[profile_id] = await profiler.stop_async()
+            while len(_request_profiles) > settings.PROFILER_KEEP:
+                _request_profiles.popitem(last=False)
+            logger.info("Profiled %s %s as '%s'", scope["method"], scope["path"], profile_id)
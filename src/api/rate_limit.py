@@ -0,0 +1,415 @@
+"""
+Rate limiting middleware for the Aika AI System.
+
+Requests are metered with token buckets at three scopes:
+
+- per user, identified through ``get_current_user`` (anonymous requests are
+  identified by client address),
+- per API key, from the ``X-API-Key`` header, and
+- per client on routes with their own limit (e.g. the orchestrator).
+
+Limits are written as ``rate:burst``: ``rate`` tokens are added per second up
+to ``burst``, and each request takes one from every bucket it draws from
+(tokens already taken are returned when a later bucket rejects it). Buckets
+live in a sharded in-memory table by default, one per worker process, so with
+N workers each limit is effectively N times its setting;
+``RATE_LIMIT_BACKEND=postgres`` keeps them in a shared table instead so that
+every worker enforces the same budget. Rejected
+requests get a ``429 Too Many Requests`` with a ``Retry-After`` header.
+"""
+
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from ..auth.jwt import get_current_user
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+
+class RateLimit(BaseModel):
+    """A token-bucket limit."""
+    rate: float
+    burst: float
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["RateLimit"]:
+        """
+        Parse a ``rate:burst`` string.
+
+        Args:
+            value: Limit such as ``"10:40"`` (empty disables the limit)
+
+        Returns:
+            Rate limit, or None if disabled
+        """
+        if not value.strip():
+            return None
+        rate, _, burst = value.partition(":")
+        return cls(rate=float(rate), burst=float(burst or rate))
+
+
+def parse_route_limits(value: str) -> Dict[str, RateLimit]:
+    """
+    Parse per-route limits from a ``path=rate:burst`` comma-separated string.
+
+    Args:
+        value: String such as ``"/orchestrator/request=5:10,/orchestrator/batch=0.2:2"``
+
+    Returns:
+        Mapping of route path to limit
+    """
+    limits = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        path, _, limit = item.partition("=")
+        limits[path.strip()] = RateLimit.parse(limit)
+    return limits
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for token buckets.
+    """
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key: Bucket key
+            limit: Bucket limit
+            cost: Tokens to take
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        pass
+
+    @abstractmethod
+    async def refund(self, key: str, limit: RateLimit, cost: float = 1.0) -> None:
+        """
+        Return tokens taken for a request that was rejected by another bucket.
+
+        Args:
+            key: Bucket key
+            limit: Bucket limit
+            cost: Tokens to return
+        """
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in process memory, sharded to keep lock contention low.
+    """
+
+    def __init__(self, shards: int = 64, max_keys_per_shard: int = 10000):
+        """
+        Initialize the backend.
+
+        Args:
+            shards: Number of independently locked shards
+            max_keys_per_shard: Bucket count above which idle buckets are dropped
+        """
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards: List[Tuple[threading.Lock, Dict[str, List[float]]]] = [
+            (threading.Lock(), {}) for _ in range(shards)
+        ]
+
+    def try_acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        """
+        Take tokens from a bucket without awaiting.
+
+        Args:
+            key: Bucket key
+            limit: Bucket limit
+            cost: Tokens to take
+
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they will be available
+        """
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                if len(buckets) >= self.max_keys_per_shard:
+                    self._sweep(buckets, now, limit)
+                bucket = buckets[key] = [limit.burst, now]
+
+            tokens = bucket[0] + (now - bucket[1]) * limit.rate
+            if tokens > limit.burst:
+                tokens = limit.burst
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / limit.rate if limit.rate > 0 else math.inf
+
+    @staticmethod
+    def _sweep(buckets: Dict[str, List[float]], now: float, limit: RateLimit) -> None:
+        """Drop buckets that have refilled completely; they hold no state."""
+        refill = limit.burst / limit.rate if limit.rate > 0 else math.inf
+        for key in [k for k, (_, updated) in buckets.items() if now - updated >= refill]:
+            del buckets[key]
+
+    def try_refund(self, key: str, limit: RateLimit, cost: float = 1.0) -> None:
+        """
+        Return tokens to a bucket without awaiting.
+
+        Args:
+            key: Bucket key
+            limit: Bucket limit
+            cost: Tokens to return
+        """
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            bucket = buckets.get(key)
+            if bucket is not None:
+                bucket[0] = min(limit.burst, bucket[0] + cost)
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        return self.try_acquire(key, limit, cost)
+
+    async def refund(self, key: str, limit: RateLimit, cost: float = 1.0) -> None:
+        self.try_refund(key, limit, cost)
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets in a shared Postgres table, for multi-worker deployments.
+
+    Expects::
+
+        CREATE UNLOGGED TABLE rate_limits (
+            key text PRIMARY KEY,
+            tokens double precision NOT NULL,
+            updated_at double precision NOT NULL
+        );
+
+    The database clock is used so that workers on different hosts agree.
+    """
+
+    # Parameters are cast explicitly because Postgres cannot infer the types of
+    # bare parameters in expressions such as ``$3 - $4`` when preparing
+    ACQUIRE_SQL = (
+        "WITH now AS (SELECT extract(epoch FROM clock_timestamp())::float8 AS t) "
+        "INSERT INTO {table} AS b (key, tokens, updated_at) "
+        "SELECT $1::text, $3::float8 - $4::float8, now.t FROM now "
+        "ON CONFLICT (key) DO UPDATE SET "
+        "tokens = LEAST($3::float8, b.tokens + (EXCLUDED.updated_at - b.updated_at) * $2::float8) "
+        "- $4::float8, "
+        "updated_at = EXCLUDED.updated_at "
+        "WHERE LEAST($3::float8, b.tokens + (EXCLUDED.updated_at - b.updated_at) * $2::float8) "
+        ">= $4::float8 "
+        "RETURNING tokens"
+    )
+
+    WAIT_SQL = (
+        "SELECT ($3::float8 - LEAST($2::float8, tokens + "
+        "(extract(epoch FROM clock_timestamp())::float8 - updated_at) * $4::float8)) "
+        "/ NULLIF($4::float8, 0) AS wait FROM {table} WHERE key = $1::text"
+    )
+
+    REFUND_SQL = (
+        "UPDATE {table} SET tokens = LEAST($2::float8, tokens + $3::float8) "
+        "WHERE key = $1::text"
+    )
+
+    def __init__(self, pool: Any = None, table: str = "rate_limits"):
+        """
+        Initialize the backend.
+
+        Args:
+            pool: Postgres database pool (defaults to the shared pool)
+            table: Bucket table
+        """
+        from ..database.query import quote_ident
+
+        self.pool = pool
+        self._acquire_sql = self.ACQUIRE_SQL.format(table=quote_ident(table))
+        self._wait_sql = self.WAIT_SQL.format(table=quote_ident(table))
+        self._refund_sql = self.REFUND_SQL.format(table=quote_ident(table))
+
+    async def acquire(self, key: str, limit: RateLimit, cost: float = 1.0) -> float:
+        if self.pool is None:
+            from ..database.connection import get_database_pool
+            self.pool = await get_database_pool()
+
+        rows = await self.pool.fetch(self._acquire_sql, key, limit.rate, limit.burst, cost)
+        if rows:
+            return 0.0
+
+        rows = await self.pool.fetch(self._wait_sql, key, limit.burst, cost, limit.rate)
+        wait = rows[0]["wait"] if rows else None
+        return max(float(wait), 0.001) if wait is not None else math.inf
+
+    async def refund(self, key: str, limit: RateLimit, cost: float = 1.0) -> None:
+        if self.pool is None:
+            from ..database.connection import get_database_pool
+            self.pool = await get_database_pool()
+
+        await self.pool.execute(self._refund_sql, key, limit.burst, cost)
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-user, per-API-key and per-route limits.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Optional[RateLimitBackend] = None,
+        user_limit: Optional[RateLimit] = None,
+        api_key_limit: Optional[RateLimit] = None,
+        route_limits: Optional[Dict[str, RateLimit]] = None,
+        exempt_paths: Optional[List[str]] = None,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            backend: Bucket storage (defaults to the configured backend)
+            user_limit: Limit per user (defaults to settings.RATE_LIMIT_USER)
+            api_key_limit: Limit per API key (defaults to settings.RATE_LIMIT_API_KEY)
+            route_limits: Limits per route and client (defaults to settings.RATE_LIMIT_ROUTES)
+            exempt_paths: Path prefixes that are never limited
+                (defaults to settings.RATE_LIMIT_EXEMPT_PATHS)
+        """
+        self.app = app
+        self.backend = backend or create_rate_limit_backend()
+        if user_limit is None:
+            user_limit = RateLimit.parse(settings.RATE_LIMIT_USER)
+        if api_key_limit is None:
+            api_key_limit = RateLimit.parse(settings.RATE_LIMIT_API_KEY)
+        if route_limits is None:
+            route_limits = parse_route_limits(settings.RATE_LIMIT_ROUTES)
+        self.user_limit = user_limit
+        self.api_key_limit = api_key_limit
+        self.route_limits = route_limits
+        self.exempt_paths = tuple(
+            exempt_paths if exempt_paths is not None
+            else [p.strip() for p in settings.RATE_LIMIT_EXEMPT_PATHS.split(",") if p.strip()]
+        )
+
+        # The in-memory backend is called directly to skip a coroutine per bucket
+        memory = isinstance(self.backend, MemoryRateLimitBackend)
+        self._try_acquire = self.backend.try_acquire if memory else None
+        self._try_refund = self.backend.try_refund if memory else None
+
+        # Metrics
+        self.allowed_total = 0
+        self.limited_total = 0
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        identity = await self._identify(headers, scope)
+
+        taken: List[Tuple[str, RateLimit]] = []
+        for key, limit in self._buckets(scope["path"], identity, headers):
+            if self._try_acquire is not None:
+                wait = self._try_acquire(key, limit)
+            else:
+                wait = await self.backend.acquire(key, limit)
+            if wait > 0:
+                # A rejected request does not count against the other buckets
+                for taken_key, taken_limit in taken:
+                    if self._try_refund is not None:
+                        self._try_refund(taken_key, taken_limit)
+                    else:
+                        await self.backend.refund(taken_key, taken_limit)
+                self.limited_total += 1
+                await self._reject(send, key.partition(":")[0], wait)
+                return
+            taken.append((key, limit))
+
+        self.allowed_total += 1
+        await self.app(scope, receive, send)
+
+    async def _identify(self, headers: Dict[bytes, bytes], scope: Dict[str, Any]) -> str:
+        """Identify the caller by user name, falling back to the client address."""
+        authorization = headers.get(b"authorization", b"").decode("latin-1")
+        scheme, _, token = authorization.partition(" ")
+        if token and scheme.lower() == "bearer":
+            try:
+                user = await get_current_user(token)
+                return f"u:{user['username']}"
+            except Exception:
+                # Invalid tokens are rejected by the route itself
+                pass
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _buckets(
+        self, path: str, identity: str, headers: Dict[bytes, bytes]
+    ) -> List[Tuple[str, RateLimit]]:
+        """List the buckets a request draws from, most specific first."""
+        buckets = []
+        for route, limit in self.route_limits.items():
+            if limit is not None and (path == route or path.startswith(route + "/")):
+                buckets.append((f"route:{route}:{identity}", limit))
+                break
+
+        api_key = headers.get(b"x-api-key")
+        if api_key and self.api_key_limit is not None:
+            buckets.append((f"api_key:{api_key.decode('latin-1')}", self.api_key_limit))
+
+        if self.user_limit is not None:
+            buckets.append((f"user:{identity}", self.user_limit))
+        return buckets
+
+    @staticmethod
+    async def _reject(send: Any, scope_name: str, wait: float) -> None:
+        """Send a 429 response."""
+        retry_after = str(max(1, math.ceil(wait))) if math.isfinite(wait) else "3600"
+        body = json.dumps({"detail": "Rate limit exceeded", "scope": scope_name}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", retry_after.encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    """
+    Create the rate limit backend from the application settings.
+
+    Returns:
+        Rate limit backend
+    """
+    if settings.RATE_LIMIT_BACKEND == "postgres":
+        if not settings.DATABASE_URL:
+            raise ValueError("The postgres rate limit backend requires DATABASE_URL")
+        return PostgresRateLimitBackend()
+    if settings.RATE_LIMIT_BACKEND != "memory":
+        raise ValueError(f"Unknown rate limit backend '{settings.RATE_LIMIT_BACKEND}'")
+    return MemoryRateLimitBackend(shards=settings.RATE_LIMIT_SHARDS)
@@ -0,0 +1,300 @@
+"""
+Request trace recording for the Aika AI System API.
+
+With ``TRACE_RECORD_PATH`` set, ``TraceRecorderMiddleware`` appends one JSON
+line per sampled HTTP request to that file: arrival time, method, path,
+query, content headers, response status and duration. The file is the input
+of ``aika loadtest``, which replays it with the recorded arrival pattern.
+
+Request bodies hold customer data (claims, policies, messages) and are not
+recorded unless ``TRACE_RECORD_BODIES`` is enabled, optionally only for the
+path prefixes in ``TRACE_RECORD_BODY_PATHS``. Recorded bodies must be JSON or
+form-encoded; fields named in ``TRACE_RECORD_REDACT_FIELDS`` are replaced at
+any depth and other bodies are dropped. Query parameters with those names are
+redacted too, whether or not bodies are recorded. Redaction is by field name
+only, so free text can still carry personal data: treat trace files as
+production data, and keep them out of shared storage.
+
+Credential headers (``Authorization``, cookies, API keys) are never recorded; the
+load generator authenticates with its own tokens. Lines are written by a
+background thread so requests do not wait on the file.
+"""
+
+import json
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Sequence
+from urllib.parse import parse_qsl, urlencode
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+# Request headers kept in traces
+RECORDED_HEADERS = (b"content-type", b"accept", b"accept-encoding", b"if-none-match", b"user-agent")
+
+# Replacement for redacted field values
+REDACTED = "[REDACTED]"
+
+
+def _redact_value(value: Any, fields: FrozenSet[str]) -> Any:
+    """Replace the values of named fields in nested JSON data."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key.lower() in fields else _redact_value(item, fields)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact_value(item, fields) for item in value]
+    return value
+
+
+def redact_body(body: bytes, content_type: str, fields: FrozenSet[str]) -> Optional[str]:
+    """
+    Redact a request body for recording.
+
+    Args:
+        body: Raw request body
+        content_type: Request content type
+        fields: Lower-case field names whose values are replaced
+
+    Returns:
+        Redacted body, or None if it is neither JSON nor form-encoded
+    """
+    try:
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            pairs = parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+            return urlencode([(k, REDACTED if k.lower() in fields else v) for k, v in pairs])
+        return json.dumps(_redact_value(json.loads(body), fields), separators=(",", ":"))
+    except ValueError:
+        return None
+
+
+def redact_query(query: str, fields: FrozenSet[str]) -> str:
+    """
+    Redact a query string for recording.
+
+    Args:
+        query: Raw query string
+        fields: Lower-case parameter names whose values are replaced
+
+    Returns:
+        Query string, unchanged unless it has a named parameter
+    """
+    pairs = parse_qsl(query, keep_blank_values=True)
+    if not any(k.lower() in fields for k, _ in pairs):
+        return query
+    return urlencode([(k, REDACTED if k.lower() in fields else v) for k, v in pairs])
+
+
+class TraceRecorder:
+    """
+    Appends trace entries to a JSONL file from a background thread.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5):
+        """
+        Initialize the recorder.
+
+        Args:
+            path: Trace file, appended to
+            flush_interval: Seconds between writes
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        """
+        Queue a trace entry.
+
+        Args:
+            entry: Entry to write
+        """
+        with self._lock:
+            self._buffer.append(entry)
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="aika-trace-recorder", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Write queued entries to the file."""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(
+                    json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries
+                ))
+            self.recorded += len(entries)
+        except OSError as e:
+            logger.error(f"Failed to write {len(entries)} trace entries to '{self.path}': {e}")
+
+    def close(self) -> None:
+        """Stop the writer thread and write what is queued."""
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        """Write queued entries until stopped."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+
+class TraceRecorderMiddleware:
+    """
+    ASGI middleware recording sampled requests to a trace file.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        recorder: Optional[TraceRecorder] = None,
+        sample_rate: Optional[float] = None,
+        max_body_bytes: Optional[int] = None,
+        record_bodies: Optional[bool] = None,
+        body_paths: Optional[Sequence[str]] = None,
+        redact_fields: Optional[Sequence[str]] = None,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            recorder: Trace recorder (defaults to the one writing settings.TRACE_RECORD_PATH)
+            sample_rate: Fraction of requests recorded
+                (defaults to settings.TRACE_RECORD_SAMPLE_RATE)
+            max_body_bytes: Larger request bodies are not recorded
+                (defaults to settings.TRACE_RECORD_MAX_BODY_BYTES)
+            record_bodies: Record request bodies (defaults to settings.TRACE_RECORD_BODIES)
+            body_paths: Path prefixes whose bodies are recorded, all if empty
+                (defaults to settings.TRACE_RECORD_BODY_PATHS)
+            redact_fields: Body fields and query parameters whose values are replaced
+                (defaults to settings.TRACE_RECORD_REDACT_FIELDS)
+        """
+        self.app = app
+        self.recorder = recorder or get_trace_recorder()
+        self.sample_rate = settings.TRACE_RECORD_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_body_bytes = (
+            settings.TRACE_RECORD_MAX_BODY_BYTES if max_body_bytes is None else max_body_bytes
+        )
+        self.record_bodies = (
+            settings.TRACE_RECORD_BODIES if record_bodies is None else record_bodies
+        )
+        self.body_paths = tuple(
+            body_paths if body_paths is not None
+            else [p.strip() for p in settings.TRACE_RECORD_BODY_PATHS.split(",") if p.strip()]
+        )
+        self.redact_fields = frozenset(
+            f.strip().lower() for f in (
+                redact_fields if redact_fields is not None
+                else settings.TRACE_RECORD_REDACT_FIELDS.split(",")
+            ) if f.strip()
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        skipped = self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        if scope["type"] != "http" or skipped:
+            await self.app(scope, receive, send)
+            return
+
+        arrived = time.time()
+        started = time.perf_counter()
+        body = bytearray()
+        capture = self.record_bodies and (
+            not self.body_paths or scope["path"].startswith(self.body_paths)
+        )
+        truncated = False
+        status = 500
+
+        async def _receive() -> Dict[str, Any]:
+            nonlocal truncated
+            message = await receive()
+            if capture and message["type"] == "http.request" and not truncated:
+                chunk = message.get("body", b"")
+                if len(body) + len(chunk) > self.max_body_bytes:
+                    truncated = True
+                    body.clear()
+                else:
+                    body.extend(chunk)
+            return message
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, _receive, _send)
+        finally:
+            headers = {
+                name.decode("latin-1"): value.decode("latin-1")
+                for name, value in scope.get("headers") or ()
+                if name in RECORDED_HEADERS
+            }
+            entry: Dict[str, Any] = {
+                "ts": round(arrived, 6),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": redact_query(
+                    scope.get("query_string", b"").decode("latin-1"), self.redact_fields
+                ),
+                "headers": headers,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            if truncated:
+                entry["body_truncated"] = True
+            elif capture and not body:
+                # Tells the load generator the request really had no body
+                entry["body"] = ""
+            elif body:
+                redacted = redact_body(
+                    bytes(body), headers.get("content-type", ""), self.redact_fields
+                )
+                if redacted is None:
+                    entry["body_dropped"] = True
+                else:
+                    entry["body"] = redacted
+            self.recorder.record(entry)
+
+
+# Singleton instance
+_trace_recorder: Optional[TraceRecorder] = None
+
+
+def get_trace_recorder() -> TraceRecorder:
+    """
+    Get the trace recorder writing to settings.TRACE_RECORD_PATH.
+
+    Returns:
+        Trace recorder instance
+    """
+    global _trace_recorder
+
+    if _trace_recorder is None:
+        _trace_recorder = TraceRecorder(settings.TRACE_RECORD_PATH)
+
+    return _trace_recorder
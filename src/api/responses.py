@@ -0,0 +1,326 @@
+"""
+Response encoding for the Aika AI System API.
+
+- ``FastJSONResponse`` renders with ``orjson`` when it is installed (falling
+  back to the standard library) and is the application's default response
+  class. Endpoints on hot paths can return it directly to skip FastAPI's
+  ``jsonable_encoder`` pass, since ``orjson`` serializes UUIDs, datetimes and
+  models itself.
+- ``CompressionMiddleware`` compresses responses above a size threshold with
+  brotli (when the ``brotli`` package is installed) or gzip, streaming
+  responses chunk by chunk. Already-encoded bodies and streaming media types
+  such as NDJSON and server-sent events are left alone.
+- ``ETagMiddleware`` gives ``GET`` responses a weak ``ETag`` derived from the
+  body and answers a matching ``If-None-Match`` with ``304 Not Modified``, so
+  polling clients skip the body transfer.
+"""
+
+import gzip
+import hashlib
+import json
+import zlib
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.responses import JSONResponse
+
+from ..utils.config import lazy_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Get settings
+settings = lazy_settings()
+
+ASGIApp = Callable[..., Awaitable[None]]
+Headers = List[Tuple[bytes, bytes]]
+
+# Media types whose bodies are streamed incrementally to the client
+UNCOMPRESSED_MEDIA_TYPES = ("application/x-ndjson", "text/event-stream")
+
+
+def _default(value: Any) -> Any:
+    """Serialize values orjson does not handle natively."""
+    if hasattr(value, "dict"):
+        return value.dict()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when available.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        text = json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+
+def _header(headers: Headers, name: bytes) -> Optional[bytes]:
+    """Find a header value by lower-case name."""
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _without(headers: Headers, *names: bytes) -> Headers:
+    """Drop headers by lower-case name."""
+    return [(k, v) for k, v in headers if k.lower() not in names]
+
+
+@lru_cache(maxsize=256)
+def choose_encoding(accept_encoding: bytes) -> Optional[str]:
+    """
+    Pick a content encoding from an ``Accept-Encoding`` header.
+
+    Args:
+        accept_encoding: Raw header value
+
+    Returns:
+        ``"br"``, ``"gzip"`` or None
+    """
+    accepted = set()
+    for item in accept_encoding.decode("latin-1").lower().split(","):
+        coding, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+
+    if brotli is not None and ("br" in accepted or "*" in accepted):
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _StreamCompressor:
+    """Incremental compressor that flushes after every chunk."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._compressor.process(data)
+            return out + (self._compressor.finish() if final else self._compressor.flush())
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        excluded_media_types: Sequence[str] = UNCOMPRESSED_MEDIA_TYPES,
+    ):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+            minimum_size: Smallest body compressed
+                (defaults to settings.RESPONSE_COMPRESSION_MIN_SIZE)
+            gzip_level: gzip level 1-9 (defaults to settings.RESPONSE_GZIP_LEVEL)
+            brotli_quality: brotli quality 0-11 (defaults to settings.RESPONSE_BROTLI_QUALITY)
+            excluded_media_types: Media types that are never compressed
+        """
+        self.app = app
+        self.minimum_size = (
+            minimum_size if minimum_size is not None else settings.RESPONSE_COMPRESSION_MIN_SIZE
+        )
+        self.gzip_level = gzip_level if gzip_level is not None else settings.RESPONSE_GZIP_LEVEL
+        self.brotli_quality = (
+            brotli_quality if brotli_quality is not None else settings.RESPONSE_BROTLI_QUALITY
+        )
+        self.excluded_media_types = tuple(t.encode("latin-1") for t in excluded_media_types)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(_header(scope.get("headers") or [], b"accept-encoding") or b"")
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Dict[str, Any]] = None
+        compressor: Optional[_StreamCompressor] = None
+        passthrough = False
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is not None:
+                await send({
+                    "type": "http.response.body",
+                    "body": compressor.compress(body, final=not more_body),
+                    "more_body": more_body,
+                })
+                return
+
+            headers = list(start.get("headers") or [])
+            if not self._compressible(start["status"], headers) or (
+                not more_body and len(body) < self.minimum_size
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            headers = _without(headers, b"content-length")
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+            vary = _header(headers, b"vary")
+            if vary is None:
+                headers.append((b"vary", b"Accept-Encoding"))
+            elif b"accept-encoding" not in vary.lower():
+                headers = _without(headers, b"vary") + [(b"vary", vary + b", Accept-Encoding")]
+
+            if more_body:
+                compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+                body = compressor.compress(body, final=False)
+            else:
+                body = self._compress(encoding, body)
+                headers.append((b"content-length", str(len(body)).encode("latin-1")))
+
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, _send)
+
+    def _compressible(self, status: int, headers: Headers) -> bool:
+        """Check whether a response may be compressed."""
+        if status < 200 or status in (204, 304):
+            return False
+        if _header(headers, b"content-encoding") is not None:
+            return False
+        content_type = _header(headers, b"content-type") or b""
+        return not content_type.startswith(self.excluded_media_types)
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        """Compress a complete body."""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+
+def _etag_matches(if_none_match: bytes, etag: bytes) -> bool:
+    """Weakly compare an ``If-None-Match`` header against an ETag."""
+    if if_none_match.strip() == b"*":
+        return True
+    opaque = etag[2:] if etag.startswith(b"W/") else etag
+    for candidate in if_none_match.split(b","):
+        candidate = candidate.strip()
+        if candidate.startswith(b"W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ETagMiddleware:
+    """
+    ASGI middleware adding ETags to ``GET`` responses and answering conditional requests.
+
+    Responses without a ``Cache-Control`` header get ``no-cache``, which lets
+    clients keep the body but makes them revalidate it on every use.
+    """
+
+    # Headers kept on a 304 response
+    NOT_MODIFIED_HEADERS = {
+        b"etag", b"cache-control", b"vary", b"expires", b"content-location", b"date"
+    }
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = _header(scope.get("headers") or [], b"if-none-match")
+        start: Optional[Dict[str, Any]] = None
+        passthrough = False
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal start, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            # Streamed and non-200 responses are sent unchanged
+            if start["status"] != 200 or message.get("more_body", False):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = list(start.get("headers") or [])
+            etag = _header(headers, b"etag")
+            if etag is None:
+                digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+                etag = b'W/"' + digest.encode("latin-1") + b'"'
+                headers.append((b"etag", etag))
+            if _header(headers, b"cache-control") is None:
+                headers.append((b"cache-control", b"no-cache"))
+
+            if if_none_match is not None and _etag_matches(if_none_match, etag):
+                headers = [(k, v) for k, v in headers if k.lower() in self.NOT_MODIFIED_HEADERS]
+                await send({"type": "http.response.start", "status": 304, "headers": headers})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send({**start, "headers": headers})
+            await send(message)
+
+        await self.app(scope, receive, _send)
@@ -0,0 +1,3 @@
+"""
+API routers for the Aika AI System.
+"""
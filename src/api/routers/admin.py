@@ -0,0 +1,106 @@
+"""
+Admin API routes for the Aika AI System.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from ...agents.model_router import get_model_router
+from ...utils.config import lazy_settings
+from ...utils.logging import get_logging_stats
+from ...utils.profiler import MIN_INTERVAL, SamplingProfiler
+from ..profiling import get_request_profile, list_request_profiles, require_admin
+from ..workers import list_workers
+
+# Get settings
+settings = lazy_settings()
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+# Only one worker-wide profile runs at a time
+_active_profiler: Optional[SamplingProfiler] = None
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10.0, gt=0),
+    interval: Optional[float] = Query(None, ge=MIN_INTERVAL),
+    threads: bool = Query(True),
+) -> PlainTextResponse:
+    """
+    Sample this worker for a number of seconds and return collapsed stacks.
+    """
+    global _active_profiler
+
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"seconds must not exceed {settings.PROFILER_MAX_SECONDS}",
+        )
+    if _active_profiler is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="A profile is already running"
+        )
+
+    _active_profiler = SamplingProfiler(
+        interval or settings.PROFILER_INTERVAL, include_threads=threads
+    )
+    try:
+        profile = await _active_profiler.profile_for(seconds)
+    finally:
+        _active_profiler = None
+
+    stats = profile.get_stats()
+    return PlainTextResponse(
+        profile.collapsed(),
+        headers={
+            "X-Aika-Worker": str(os.getpid()),
+            "X-Aika-Profile-Samples": str(stats["samples"]),
+        },
+    )
+
+
+@router.get("/profile/requests")
+async def list_profiles() -> List[Dict[str, Any]]:
+    """
+    List the request profiles kept on this worker.
+    """
+    return list_request_profiles()
+
+
+@router.get("/profile/requests/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str) -> PlainTextResponse:
+    """
+    Get a request profile as collapsed stacks.
+    """
+    profile = get_request_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed(), headers={"X-Aika-Worker": str(os.getpid())})
+
+
+@router.get("/workers")
+async def get_workers() -> List[Dict[str, Any]]:
+    """
+    List the live API workers with their request counts, uptime and memory.
+    """
+    return list_workers()
+
+
+@router.get("/logging")
+async def get_logging() -> Dict[str, Any]:
+    """
+    Get this worker's logging pipeline statistics, including dropped records.
+    """
+    return get_logging_stats()
+
+
+@router.get("/models")
+async def get_models() -> Dict[str, Dict[str, Any]]:
+    """
+    Get this worker's per-tier model latency, token, cost and escalation statistics.
+    """
+    return get_model_router().get_stats()
@@ -0,0 +1,37 @@
+"""
+Agent API routes for the Aika AI System.
+"""
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from ...agents.base import get_agent_registry
+from ...auth.jwt import get_current_user
+from ..responses import FastJSONResponse
+
+router = APIRouter()
+
+
+def _agent_infos() -> List[Dict[str, Any]]:
+    """Describe every registered agent."""
+    return [agent.get_info() for agent in get_agent_registry().list()]
+
+
+@router.get("", response_class=FastJSONResponse)
+async def list_agents(user: Dict = Depends(get_current_user)) -> FastJSONResponse:
+    """
+    List the registered agents.
+    """
+    return FastJSONResponse(_agent_infos())
+
+
+@router.get("/{agent_id}", response_class=FastJSONResponse)
+async def get_agent(agent_id: str, user: Dict = Depends(get_current_user)) -> FastJSONResponse:
+    """
+    Get a registered agent.
+    """
+    agent = get_agent_registry().get(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found")
+    return FastJSONResponse(agent.get_info())
@@ -0,0 +1,226 @@
+"""
+Orchestrator API routes for the Aika AI System.
+
+``POST /orchestrator/batch`` takes a stream of newline-delimited JSON
+requests and streams newline-delimited JSON results back as items complete.
+Each input line is a request object with an optional ``id``; each output line
+is ``{"id", "status", "result"}`` or ``{"id", "status", "error"}``. At most
+``ORCHESTRATOR_BATCH_CONCURRENCY`` items are in flight, and the request body
+is only read as fast as items complete, so a batch is never held in memory
+as a whole. When the client disconnects, items still in flight are cancelled.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+
+from ...auth.jwt import get_current_user
+from ...orchestrator.core import get_orchestrator
+from ...utils.config import lazy_settings
+from ...utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+router = APIRouter()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    Streaming response that leaves ``receive`` to the request body reader.
+
+    ``StreamingResponse`` may listen for disconnects on ``receive`` while it
+    streams, which would swallow request body chunks that have not been read
+    yet. Here the body reader notices disconnects until it sets ``body_read``;
+    after that the response listens for them and cancels the stream.
+    """
+
+    def __init__(self, content: Any, body_read: Optional[asyncio.Event] = None, **kwargs: Any):
+        """
+        Initialize the response.
+
+        Args:
+            content: Async iterator of response chunks
+            body_read: Event set once the request body has been read
+            **kwargs: Arguments for ``StreamingResponse``
+        """
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if self.body_read is None:
+            await self.stream_response(send)
+            return
+
+        stream = asyncio.ensure_future(self.stream_response(send))
+        listener = asyncio.ensure_future(self._listen_for_disconnect(receive))
+        try:
+            await asyncio.wait({stream, listener}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stream.cancel()
+            listener.cancel()
+            await asyncio.gather(stream, listener, return_exceptions=True)
+
+        if not stream.cancelled():
+            stream.result()
+
+    async def _listen_for_disconnect(self, receive: Any) -> None:
+        """Return once the client disconnects after sending its body."""
+        await self.body_read.wait()
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+
+async def _read_lines(request: Request, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Split a streamed request body into lines without buffering it."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+        if len(buffer) > max_line_bytes:
+            raise ValueError(f"Batch item exceeds {max_line_bytes} bytes")
+    if buffer:
+        yield buffer
+
+
+def _encode(result: Dict[str, Any]) -> bytes:
+    """Serialize one result line."""
+    return json.dumps(result, default=str).encode("utf-8") + b"\n"
+
+
+async def _run_item(item_id: Any, line: bytes, user: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one batch item through the orchestrator."""
+    try:
+        payload = json.loads(line)
+        if not isinstance(payload, dict):
+            raise ValueError("Batch items must be JSON objects")
+    except ValueError as e:
+        return {"id": item_id, "status": "error", "error": f"Invalid item: {e}"}
+
+    item_id = payload.pop("id", item_id)
+    payload["user"] = user["username"]
+    try:
+        result = await get_orchestrator().handle_request(payload)
+        return {"id": item_id, "status": "ok", "result": result}
+    except Exception as e:
+        logger.error(f"Batch item {item_id} failed: {e}")
+        return {"id": item_id, "status": "error", "error": str(e)}
+
+
+async def stream_batch(
+    request: Request,
+    user: Dict[str, Any],
+    concurrency: Optional[int] = None,
+    max_line_bytes: Optional[int] = None,
+    body_read: Optional[asyncio.Event] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Run a streamed NDJSON batch and yield NDJSON results in completion order.
+
+    Args:
+        request: Request whose body holds one JSON request per line
+        user: Authenticated user
+        concurrency: Items in flight (defaults to settings.ORCHESTRATOR_BATCH_CONCURRENCY)
+        max_line_bytes: Largest accepted item
+            (defaults to settings.ORCHESTRATOR_BATCH_MAX_LINE_BYTES)
+        body_read: Event to set once the request body has been read
+
+    Yields:
+        Encoded result lines
+    """
+    concurrency = concurrency or settings.ORCHESTRATOR_BATCH_CONCURRENCY
+    max_line_bytes = max_line_bytes or settings.ORCHESTRATOR_BATCH_MAX_LINE_BYTES
+
+    # Workers hold a slot until their result is queued, so a slow reader
+    # pauses both dispatch and reading of the request body.
+    slots = asyncio.Semaphore(concurrency)
+    results: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=concurrency)
+    tasks = set()
+    done = object()
+
+    async def _work(item_id: int, line: bytes) -> None:
+        try:
+            await results.put(_encode(await _run_item(item_id, line, user)))
+        finally:
+            slots.release()
+
+    async def _dispatch() -> None:
+        index = 0
+        try:
+            async for line in _read_lines(request, max_line_bytes):
+                if not line.strip():
+                    continue
+                await slots.acquire()
+                task = asyncio.ensure_future(_work(index, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                index += 1
+            if body_read is not None:
+                body_read.set()
+        except ClientDisconnect:
+            logger.info(f"Batch client disconnected, cancelling {len(tasks)} items")
+            for task in list(tasks):
+                task.cancel()
+        except Exception as e:
+            logger.error(f"Batch request body failed: {e}")
+            await results.put(_encode({"id": None, "status": "error", "error": str(e)}))
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await results.put(done)
+
+    dispatcher = asyncio.ensure_future(_dispatch())
+    try:
+        while True:
+            line = await results.get()
+            if line is done:
+                break
+            yield line
+    finally:
+        if not dispatcher.done():
+            dispatcher.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+
+@router.post("/batch")
+async def submit_batch(
+    request: Request, user: Dict = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Submit a batch of requests as NDJSON and stream the results as NDJSON.
+    """
+    body_read = asyncio.Event()
+    return DuplexStreamingResponse(
+        stream_batch(request, user, body_read=body_read),
+        body_read=body_read,
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/request")
+async def submit_request(
+    payload: Dict[str, Any], user: Dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Submit a single request to the orchestrator.
+    """
+    payload["user"] = user["username"]
+    try:
+        return await get_orchestrator().handle_request(payload)
+    except Exception as e:
+        logger.error(f"Request failed: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Request failed"
+        )
@@ -0,0 +1,326 @@
+"""
+Production server for the Aika AI System API.
+
+``aika start`` runs the API in one or more worker processes:
+
+- With several workers and gunicorn installed, the app is imported and
+  warmed up once in the master (preload) and the workers are forked from it,
+  sharing its memory. Workers are recycled gracefully after
+  ``SERVER_MAX_REQUESTS`` requests, staggered by up to
+  ``SERVER_MAX_REQUESTS_JITTER`` so that they do not all restart at once.
+- Without gunicorn, uvicorn manages the workers itself: each imports and
+  warms up the app on its own and ``SERVER_MAX_REQUESTS`` applies without
+  jitter.
+
+uvloop and httptools are used when installed. With several workers, metrics
+are shared through ``METRICS_MULTIPROC_DIR`` (a fresh temporary directory if
+unset) so that ``/metrics`` and ``/admin/workers`` cover every worker.
+"""
+
+import importlib
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional, Union
+
+from pydantic import BaseModel
+
+from ..utils.config import get_settings
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# App import string for process managers that import it themselves
+APP = "src.api.main:app"
+
+# Whether this process has warmed up the app
+_warmed_up = False
+
+
+class ServerConfig(BaseModel):
+    """Resolved settings of the API server."""
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    loop: str = "asyncio"
+    http: str = "h11"
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    graceful_timeout: float = 30.0
+    preload: bool = True
+    reload: bool = False
+
+
+def usable_cpus() -> int:
+    """
+    Count the CPUs this process may run on.
+
+    Returns:
+        CPU count, honouring CPU affinity where supported
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def resolve_workers(value: Union[str, int]) -> int:
+    """
+    Resolve a worker count.
+
+    Args:
+        value: Number of workers, or ``auto`` for one per usable CPU
+
+    Returns:
+        Number of workers
+
+    Raises:
+        ValueError: If the value is neither ``auto`` nor a positive integer
+    """
+    if isinstance(value, str) and value.strip().lower() == "auto":
+        return usable_cpus()
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(f"Worker count must be positive, got {workers}")
+    return workers
+
+
+def choose_loop(value: str = "auto") -> str:
+    """
+    Choose the event loop implementation.
+
+    Args:
+        value: ``auto``, ``uvloop`` or ``asyncio``
+
+    Returns:
+        ``uvloop`` if requested or installed (for ``auto``), else ``asyncio``
+    """
+    if value != "auto":
+        return value
+    return "uvloop" if importlib.util.find_spec("uvloop") is not None else "asyncio"
+
+
+def choose_http(value: str = "auto") -> str:
+    """
+    Choose the HTTP/1.1 parser.
+
+    Args:
+        value: ``auto``, ``httptools`` or ``h11``
+
+    Returns:
+        ``httptools`` if requested or installed (for ``auto``), else ``h11``
+    """
+    if value != "auto":
+        return value
+    return "httptools" if importlib.util.find_spec("httptools") is not None else "h11"
+
+
+def build_config(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: Optional[str] = None,
+    max_requests: Optional[int] = None,
+    max_requests_jitter: Optional[int] = None,
+    reload: bool = False,
+) -> ServerConfig:
+    """
+    Resolve the server settings, command-line values taking precedence.
+
+    Args:
+        host: Host to bind to
+        port: Port to bind to
+        workers: Number of workers or ``auto`` (defaults to settings.SERVER_WORKERS)
+        max_requests: Requests before a worker is recycled
+            (defaults to settings.SERVER_MAX_REQUESTS)
+        max_requests_jitter: Random extra requests per worker
+            (defaults to settings.SERVER_MAX_REQUESTS_JITTER)
+        reload: Whether to reload on code changes (forces a single worker)
+
+    Returns:
+        Server configuration
+    """
+    settings = get_settings()
+    count = resolve_workers(workers if workers is not None else settings.SERVER_WORKERS)
+
+    if reload and count > 1:
+        logger.warning("Auto-reload runs a single worker")
+        count = 1
+
+    if count > 1 and settings.RATE_LIMIT_ENABLED and settings.RATE_LIMIT_BACKEND == "memory":
+        logger.warning(
+            f"Rate limits are enforced per worker by the memory backend, so {count} workers allow "
+            f"{count} times the configured limits; set RATE_LIMIT_BACKEND=postgres to share them"
+        )
+
+    if count > 1 and not settings.AUTH_REVOCATION_LISTENER:
+        logger.warning(
+            f"AUTH_REVOCATION_LISTENER is disabled, so a revoked token stays valid on the other "
+            f"{count - 1} workers until it expires; enable it to share revocations"
+        )
+
+    return ServerConfig(
+        host=host,
+        port=port,
+        workers=count,
+        loop=choose_loop(settings.SERVER_LOOP),
+        http=choose_http(settings.SERVER_HTTP),
+        max_requests=settings.SERVER_MAX_REQUESTS if max_requests is None else max_requests,
+        max_requests_jitter=(
+            settings.SERVER_MAX_REQUESTS_JITTER
+            if max_requests_jitter is None
+            else max_requests_jitter
+        ),
+        graceful_timeout=settings.SERVER_GRACEFUL_TIMEOUT,
+        preload=settings.SERVER_PRELOAD,
+        reload=reload,
+    )
+
+
+def warm_up() -> Dict[str, Any]:
+    """
+    Prepare the app so that the first requests do not pay for it.
+
+    Resolves the settings, builds the agent registry and the agents'
+    descriptions, renders the OpenAPI schema and imports the token library.
+    Starts no threads or connections, so it is safe to run before forking.
+    Runs once per process.
+
+    Returns:
+        Dictionary with the number of agents and the time taken
+    """
+    global _warmed_up
+
+    from ..agents.base import get_agent_registry
+    from .main import app
+
+    registry = get_agent_registry()
+    if _warmed_up:
+        return {"agents": len(registry.list()), "seconds": 0.0}
+
+    started = time.perf_counter()
+    get_settings()
+    for agent in registry.list():
+        agent.get_info()
+    app.openapi()
+    try:
+        importlib.import_module("jose.jwt")
+    except ImportError:
+        pass
+
+    _warmed_up = True
+    seconds = time.perf_counter() - started
+    logger.info(f"Warmed up the app with {len(registry.list())} agents in {seconds:.3f}s")
+    return {"agents": len(registry.list()), "seconds": round(seconds, 3)}
+
+
+def _prepare_multiprocess_metrics() -> None:
+    """Point every worker at an empty shared metrics directory."""
+    directory = os.environ.get("METRICS_MULTIPROC_DIR") or get_settings().METRICS_MULTIPROC_DIR
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+    else:
+        directory = tempfile.mkdtemp(prefix="aika-metrics-")
+    os.makedirs(directory, exist_ok=True)
+    os.environ["METRICS_MULTIPROC_DIR"] = directory
+    get_settings().METRICS_MULTIPROC_DIR = directory
+
+
+def _export(config: ServerConfig) -> None:
+    """Pass the resolved settings to worker processes through the environment."""
+    values = {
+        "SERVER_WORKERS": str(config.workers),
+        "SERVER_LOOP": config.loop,
+        "SERVER_HTTP": config.http,
+        "SERVER_MAX_REQUESTS": str(config.max_requests),
+        "SERVER_MAX_REQUESTS_JITTER": str(config.max_requests_jitter),
+    }
+    os.environ.update(values)
+    settings = get_settings()
+    for name, value in values.items():
+        setattr(settings, name, type(getattr(settings, name))(value))
+
+
+def run(config: ServerConfig) -> None:
+    """
+    Run the API server until it is stopped.
+
+    Args:
+        config: Server configuration
+    """
+    _export(config)
+    logger.info(
+        f"Starting Aika API on {config.host}:{config.port} with {config.workers} worker(s), "
+        f"loop={config.loop}, http={config.http}, max_requests={config.max_requests or 'unlimited'}"
+    )
+
+    if config.workers > 1:
+        _prepare_multiprocess_metrics()
+        if importlib.util.find_spec("gunicorn") is not None:
+            _run_gunicorn(config)
+            return
+        logger.warning(
+            "gunicorn is not installed: workers import the app separately "
+            "and restart without jitter"
+        )
+
+    _run_uvicorn(config)
+
+
+def _run_uvicorn(config: ServerConfig) -> None:
+    """Serve with uvicorn, which manages any workers itself."""
+    import uvicorn
+
+    options: Dict[str, Any] = {
+        "host": config.host,
+        "port": config.port,
+        "loop": config.loop,
+        "http": config.http,
+        "timeout_graceful_shutdown": config.graceful_timeout,
+        "log_level": "info",
+    }
+    if config.workers > 1:
+        # A lone worker that stopped after max_requests would not be restarted
+        options["limit_max_requests"] = config.max_requests or None
+        uvicorn.run(APP, workers=config.workers, **options)
+    elif config.reload:
+        uvicorn.run(APP, reload=True, **options)
+    else:
+        warm_up()
+        from .main import app
+
+        uvicorn.run(app, **options)
+
+
+def _run_gunicorn(config: ServerConfig) -> None:
+    """Serve with gunicorn, forking uvicorn workers from a preloaded master."""
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class AikaWorker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": config.loop, "http": config.http}
+
+    options = {
+        "bind": f"{config.host}:{config.port}",
+        "workers": config.workers,
+        "worker_class": AikaWorker,
+        "preload_app": config.preload,
+        "max_requests": config.max_requests,
+        "max_requests_jitter": config.max_requests_jitter,
+        "graceful_timeout": config.graceful_timeout,
+    }
+
+    class AikaApplication(BaseApplication):
+        def load_config(self) -> None:
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self) -> Any:
+            # Runs in the master before forking when preloading
+            warm_up()
+            from .main import app
+
+            return app
+
+    AikaApplication().run()
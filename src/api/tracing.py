@@ -0,0 +1,59 @@
+"""
+HTTP tracing for the Aika AI System API.
+
+``TracingMiddleware`` opens a server span for every HTTP request, continuing
+the trace of an incoming ``traceparent`` header. The span is named after the
+route template (``POST /orchestrator/request``), like the HTTP metrics, and
+fails for 5xx responses, so such requests are kept by tail sampling.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from ..utils.tracing import extract, start_span
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing HTTP requests.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def _send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        method = scope["method"]
+        with start_span(
+            f"{method} {scope['path']}",
+            kind="server",
+            attributes={"http.method": method, "http.target": scope["path"]},
+            parent=extract(scope.get("headers")),
+        ) as span:
+            try:
+                await self.app(scope, receive, _send)
+            finally:
+                if span.is_recording:
+                    route = scope.get("route")
+                    span.name = f"{method} {getattr(route, 'path', 'unmatched')}"
+                    span.set_attribute("http.status_code", status)
+                    if status >= 500:
+                        span.set_error(f"HTTP {status}")
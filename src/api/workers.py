@@ -0,0 +1,165 @@
+"""
+Per-worker statistics for the Aika AI System API.
+
+Every worker counts the requests it has served and publishes them, with its
+uptime, memory and server settings, as per-pid gauges. With
+``METRICS_MULTIPROC_DIR`` set (``aika start`` sets it for several workers)
+``GET /admin/workers`` therefore reports every live worker, whichever one
+answers the request.
+"""
+
+import os
+import resource
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..utils.config import lazy_settings
+from ..utils.metrics import gauge, get_metrics_registry
+
+# Get settings
+settings = lazy_settings()
+
+ASGIApp = Callable[..., Awaitable[None]]
+
+# Gauge names by the worker field they carry
+WORKER_GAUGES = {
+    "requests": "aika_worker_requests",
+    "uptime_seconds": "aika_worker_uptime_seconds",
+    "rss_bytes": "aika_worker_rss_bytes",
+    "max_requests": "aika_worker_max_requests",
+}
+
+
+def _rss_bytes() -> int:
+    """Resident memory of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current, in KiB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class WorkerStats:
+    """
+    Statistics of the current worker process.
+    """
+
+    def __init__(self):
+        """Initialize the statistics."""
+        self.started = time.time()
+        self.requests = 0
+
+    def record_request(self) -> None:
+        """Count a served request."""
+        self.requests += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the worker statistics.
+
+        Returns:
+            Dictionary with the worker's pid, load, memory and server settings
+        """
+        from .server import choose_http, choose_loop
+
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started,
+            "uptime_seconds": round(time.time() - self.started, 3),
+            "requests": self.requests,
+            "max_requests": settings.SERVER_MAX_REQUESTS,
+            "rss_bytes": _rss_bytes(),
+            "loop": choose_loop(settings.SERVER_LOOP),
+            "http": choose_http(settings.SERVER_HTTP),
+        }
+
+
+class WorkerStatsMiddleware:
+    """
+    ASGI middleware counting the requests served by this worker.
+    """
+
+    def __init__(self, app: ASGIApp):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application
+        """
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] == "http":
+            get_worker_stats().record_request()
+        await self.app(scope, receive, send)
+
+
+def list_workers() -> List[Dict[str, Any]]:
+    """
+    List the statistics of every live worker.
+
+    This worker reports in full; peers report the values of their gauges.
+
+    Returns:
+        Worker statistics ordered by pid
+    """
+    own = get_worker_stats().get_stats()
+    workers: Dict[int, Dict[str, Any]] = {own["pid"]: own}
+    snapshot = get_metrics_registry().collect()
+
+    for field, name in WORKER_GAUGES.items():
+        entry = snapshot.get(name)
+        if entry is None:
+            continue
+        for labels, value in entry["samples"]:
+            # Gauges only carry a pid label once merged across workers
+            pid = int(labels[-1]) if labels else own["pid"]
+            if pid != own["pid"]:
+                workers.setdefault(pid, {"pid": pid})[field] = value
+
+    return [workers[pid] for pid in sorted(workers)]
+
+
+# Singleton instance
+_worker_stats: Optional[WorkerStats] = None
+
+
+def get_worker_stats() -> WorkerStats:
+    """
+    Get the worker statistics instance.
+
+    Returns:
+        Worker statistics instance
+    """
+    global _worker_stats
+
+    if _worker_stats is None:
+        _worker_stats = WorkerStats()
+
+    return _worker_stats
+
+
+def _reset_after_fork() -> None:
+    """Start a worker forked from a preloaded master with fresh statistics."""
+    global _worker_stats
+    _worker_stats = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+# Metrics (one series per worker)
+gauge(
+    WORKER_GAUGES["requests"], "Requests served by the worker", multiprocess_mode="all"
+).set_function(lambda: get_worker_stats().requests)
+gauge(
+    WORKER_GAUGES["uptime_seconds"], "Seconds since the worker started", multiprocess_mode="all"
+).set_function(lambda: time.time() - get_worker_stats().started)
+gauge(
+    WORKER_GAUGES["rss_bytes"], "Resident memory of the worker", multiprocess_mode="all"
+).set_function(_rss_bytes)
+gauge(
+    WORKER_GAUGES["max_requests"],
+    "Requests after which the worker is recycled (0 = never)",
+    multiprocess_mode="all",
+).set_function(lambda: settings.SERVER_MAX_REQUESTS)
@@ -0,0 +1,165 @@
+"""
+Authentication caches for the Aika AI System.
+
+Verifying a JWT means an HMAC, JSON parsing and claims checks on every
+request. ``ExpiringLRUCache`` keeps verified token claims, keyed by a digest
+of the token so raw bearer tokens are never held in memory, until the
+token's ``exp``; a second instance caches user records for a short TTL.
+Both are bounded and safe to share between threads.
+"""
+
+import collections
+import hashlib
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from ..utils.config import lazy_settings
+
+# Get settings
+settings = lazy_settings()
+
+
+def token_digest(token: str) -> bytes:
+    """
+    Get the cache key for a token.
+
+    Args:
+        token: Encoded JWT
+
+    Returns:
+        SHA-256 digest of the token
+    """
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class ExpiringLRUCache:
+    """
+    Size-bounded LRU cache whose entries expire at an absolute time.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries
+        """
+        self.max_entries = max_entries
+
+        self._entries: "collections.OrderedDict[Hashable, Tuple[float, Any]]" = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up an unexpired entry.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, expires_at: float) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            expires_at: Expiry as a Unix timestamp
+        """
+        if expires_at <= time.time():
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        Drop an entry.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with size and hit rate
+        """
+        total = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / total if total else 0.0,
+            "evictions": self._evictions,
+        }
+
+
+# Singleton instances
+_token_cache: Optional[ExpiringLRUCache] = None
+_user_cache: Optional[ExpiringLRUCache] = None
+
+
+def get_token_cache() -> ExpiringLRUCache:
+    """
+    Get the verified-token cache instance.
+
+    Returns:
+        Token cache instance
+    """
+    global _token_cache
+
+    if _token_cache is None:
+        _token_cache = ExpiringLRUCache(settings.AUTH_TOKEN_CACHE_SIZE)
+
+    return _token_cache
+
+
+def get_user_cache() -> ExpiringLRUCache:
+    """
+    Get the user-record cache instance.
+
+    Returns:
+        User cache instance
+    """
+    global _user_cache
+
+    if _user_cache is None:
+        _user_cache = ExpiringLRUCache(settings.AUTH_USER_CACHE_SIZE)
+
+    return _user_cache
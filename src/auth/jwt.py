@@ -1,23 +1,38 @@
 """
 JWT authentication utilities for the Aika AI System.
+
+``jose`` is imported when a token is first created or verified, not when this
+module is imported.
 """
 
+import asyncio
+import time
 from datetime import datetime, timedelta
 from typing import Dict, Optional
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from pydantic import BaseModel
 
-from ..utils.config import get_settings
+from ..utils.config import lazy_settings
 from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
+from .cache import get_token_cache, get_user_cache, token_digest
+from .revocation import get_revocation_list
 
 # Get logger
 logger = get_logger(__name__)
 
 # Get settings
-settings = get_settings()
+settings = lazy_settings()
+
+# Metrics
+VERIFY_SECONDS = histogram(
+    "aika_auth_verify_seconds", "Time to authenticate a bearer token", ["cache"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+REJECTED = counter("aika_auth_rejected_total", "Rejected bearer tokens", ["reason"])
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -36,6 +51,7 @@ class Token(BaseModel):
 class TokenData(BaseModel):
     """Token data model."""
     username: Optional[str] = None
+    jti: Optional[str] = None
 
 
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -49,6 +65,8 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     Returns:
         JWT token
     """
+    from jose import jwt
+    
     to_encode = data.copy()
     
     if expires_delta:
@@ -57,6 +75,7 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid4().hex)
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     
@@ -82,21 +101,90 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> Dict:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
+    started = time.perf_counter()
+    key = token_digest(token)
+    token_cache = get_token_cache()
+    token_data = token_cache.get(key)
+    cache = "hit"
+    
+    if token_data is None:
+        from jose import JWTError, jwt
         
-        if username is None:
+        cache = "miss"
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+            username: str = payload.get("sub")
+            
+            if username is None:
+                REJECTED.labels("invalid").inc()
+                raise credentials_exception
+                
+            token_data = TokenData(username=username, jti=payload.get("jti"))
+        except JWTError:
+            REJECTED.labels("invalid").inc()
             raise credentials_exception
             
-        token_data = TokenData(username=username)
-    except JWTError:
+        # Verified claims stay valid until the token expires
+        expires_at = payload.get("exp") or time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        token_cache.put(key, token_data, expires_at)
+        
+    if get_revocation_list().is_revoked(token_data.jti):
+        REJECTED.labels("revoked").inc()
         raise credentials_exception
         
-    # In a real implementation, this would look up the user in the database
-    user = {"username": token_data.username}
+    user_cache = get_user_cache()
+    user = user_cache.get(token_data.username)
+    
+    if user is None:
+        # In a real implementation, this would look up the user in the database
+        user = {"username": token_data.username}
+        user_cache.put(token_data.username, user, time.time() + settings.AUTH_USER_CACHE_TTL)
     
     if user is None:
         raise credentials_exception
         
-    return user
+    VERIFY_SECONDS.labels(cache).observe(time.perf_counter() - started)
+    return dict(user)
+
+
+def revoke_token(token: str) -> None:
+    """
+    Revoke a token on every worker before it expires.
+    
+    Other workers apply the revocation through their revocation listener
+    (``AUTH_REVOCATION_LISTENER``). Blocks until the revocation is published to Kafka; use
+    ``revoke_token_async`` from async code.
+    
+    Args:
+        token: JWT token
+        
+    Raises:
+        HTTPException: If the token is invalid or has no ``jti``
+    """
+    from jose import JWTError, jwt
+    
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid token")
+        
+    if not payload.get("jti"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Token cannot be revoked"
+        )
+        
+    get_revocation_list().publish(payload["jti"], payload["exp"])
+    logger.info(f"Revoked token {payload['jti']}")
+
+
+async def revoke_token_async(token: str) -> None:
+    """
+    Revoke a token without blocking the event loop.
+    
+    Args:
+        token: JWT token
+        
+    Raises:
+        HTTPException: If the token is invalid or has no ``jti``
+    """
+    await asyncio.to_thread(revoke_token, token)
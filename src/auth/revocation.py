@@ -0,0 +1,251 @@
+"""
+Token revocation for the Aika AI System.
+
+Every access token carries a unique ``jti`` claim. Revoked ``jti`` values are
+held in memory in a Bloom filter backed by an exact map of ``jti`` to token
+expiry: the filter answers "definitely not revoked" for almost every request
+without touching the map, and the map confirms the rare positives so false
+positives never reject a valid token. Entries are dropped once the token they
+revoke has expired anyway, which keeps both structures small.
+
+Revocations are published to the ``auth.revocations`` Kafka topic. Each
+worker reads every partition of the topic directly, without joining a
+consumer group, so every process sees every revocation. On startup it
+replays the last ``AUTH_REVOCATION_REPLAY_SECONDS`` of the topic, which must
+cover the longest token lifetime; older revocations are for tokens that have
+expired anyway.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+REVOCATION_TOPIC = "auth.revocations"
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        """
+        Initialize an empty filter.
+
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: False-positive rate at capacity
+        """
+        self.capacity = capacity
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    @staticmethod
+    def _hashes(item: str) -> Tuple[int, int]:
+        """Derive two hashes from one digest; bit ``i`` is at ``h1 + i * h2``."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def add(self, item: str) -> None:
+        """
+        Add an item.
+
+        Args:
+            item: Item to add
+        """
+        h1, h2 = self._hashes(item)
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % self.num_bits
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        h1, h2 = self._hashes(item)
+        bits, num_bits = self._bits, self.num_bits
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationList:
+    """
+    In-memory set of revoked token ids with cross-worker propagation.
+    """
+
+    def __init__(
+        self, capacity: int = 100000, error_rate: float = 0.01, prune_interval: float = 60.0
+    ):
+        """
+        Initialize the revocation list.
+
+        Args:
+            capacity: Initial Bloom filter capacity (grows when exceeded)
+            error_rate: Bloom filter false-positive rate
+            prune_interval: Minimum seconds between removals of expired entries
+        """
+        self.error_rate = error_rate
+        self.prune_interval = prune_interval
+
+        self._revoked: Dict[str, float] = {}
+        self._filter = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._last_prune = time.time()
+        self._listener: Optional[threading.Thread] = None
+
+        # Metrics
+        self._checks = 0
+        self._filter_positives = 0
+        self._false_positives = 0
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        """
+        Check whether a token id has been revoked.
+
+        Args:
+            jti: Token id (tokens without one cannot be revoked)
+
+        Returns:
+            True if the token is revoked
+        """
+        self._checks += 1
+        if not jti or jti not in self._filter:
+            return False
+
+        self._filter_positives += 1
+        if jti in self._revoked:
+            return True
+        self._false_positives += 1
+        return False
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token id in this process.
+
+        Args:
+            jti: Token id
+            expires_at: Token expiry as a Unix timestamp
+        """
+        now = time.time()
+        if expires_at <= now:
+            return
+
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._filter.add(jti)
+            full = len(self._revoked) > self._filter.capacity
+            if full or now - self._last_prune > self.prune_interval:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        """Drop expired revocations and rebuild the filter from the rest."""
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        capacity = self._filter.capacity
+        while len(self._revoked) > capacity // 2:
+            capacity *= 2
+
+        rebuilt = BloomFilter(capacity, self.error_rate)
+        for jti in self._revoked:
+            rebuilt.add(jti)
+        self._filter = rebuilt
+        self._last_prune = now
+
+    def publish(self, jti: str, expires_at: float) -> None:
+        """
+        Revoke a token id in this process and broadcast it to every worker.
+
+        Args:
+            jti: Token id
+            expires_at: Token expiry as a Unix timestamp
+        """
+        from ..messaging.kafka import publish_message
+
+        self.revoke(jti, expires_at)
+        publish_message(REVOCATION_TOPIC, {"jti": jti, "exp": expires_at}, key=jti)
+
+    def start_listener(self, replay_seconds: Optional[float] = None) -> None:
+        """
+        Apply revocations published by other workers on a background thread.
+
+        Args:
+            replay_seconds: Age of the oldest revocation to replay on startup
+                (defaults to settings.AUTH_REVOCATION_REPLAY_SECONDS)
+        """
+        if self._listener is not None:
+            return
+
+        from ..messaging.kafka import consume_since
+
+        if replay_seconds is None:
+            replay_seconds = settings.AUTH_REVOCATION_REPLAY_SECONDS
+
+        def _apply(message: Dict[str, Any], key: Optional[str]) -> None:
+            self.revoke(message["jti"], float(message["exp"]))
+
+        def _listen(since: float) -> None:
+            try:
+                consume_since(REVOCATION_TOPIC, since, _apply)
+            except Exception as e:
+                logger.error(
+                    f"Token revocation listener stopped, revocations from other workers "
+                    f"are not applied: {e}"
+                )
+
+        self._listener = threading.Thread(
+            target=_listen,
+            args=(time.time() - replay_seconds,),
+            name="aika-revocations",
+            daemon=True,
+        )
+        self._listener.start()
+        logger.info(f"Listening for token revocations on '{REVOCATION_TOPIC}'")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get revocation statistics.
+
+        Returns:
+            Dictionary with sizes and filter effectiveness
+        """
+        return {
+            "revoked": len(self._revoked),
+            "filter_bits": self._filter.num_bits,
+            "filter_hashes": self._filter.num_hashes,
+            "checks": self._checks,
+            "filter_positives": self._filter_positives,
+            "false_positives": self._false_positives,
+        }
+
+
+# Singleton instance
+_revocation_list: Optional[RevocationList] = None
+
+
+def get_revocation_list() -> RevocationList:
+    """
+    Get the revocation list instance.
+
+    Returns:
+        Revocation list instance
+    """
+    global _revocation_list
+
+    if _revocation_list is None:
+        _revocation_list = RevocationList(
+            capacity=settings.AUTH_REVOCATION_CAPACITY,
+            error_rate=settings.AUTH_REVOCATION_ERROR_RATE,
+        )
+
+    return _revocation_list
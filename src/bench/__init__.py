@@ -0,0 +1,7 @@
+"""
+Benchmarks for the Aika AI System.
+
+Each module can be run directly, e.g. ``python -m src.bench.db_pool``.
+``aika bench`` runs the suite in ``src.bench.suite`` and compares it against
+stored baselines.
+"""
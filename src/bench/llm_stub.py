@@ -0,0 +1,147 @@
+"""
+Local stand-in for the Anthropic Messages API.
+
+``create_app`` serves ``POST /v1/messages`` with Messages API shaped
+responses after a simulated latency, and fails a configurable fraction of
+requests with 429 (with ``retry-after``) or 529 (overloaded). Tests and
+benchmarks use it in-process through an ``httpx`` ASGI transport; run it as
+a server to point ``LLM_BASE_URL`` at it::
+
+    python -m src.bench.llm_stub --port 8089 --latency lognormal:0.8,0.5 --error-rate 0.05
+
+``app.state.stats`` counts requests, failures and the peak number of
+requests in flight.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from .loadtest import LatencyDistribution
+
+
+def _error(
+    status: int, kind: str, message: str, headers: Optional[Dict[str, str]] = None
+) -> JSONResponse:
+    """Build an API error response."""
+    return JSONResponse(
+        {"type": "error", "error": {"type": kind, "message": message}},
+        status_code=status,
+        headers=headers,
+    )
+
+
+def create_app(
+    latency: str = "lognormal:0.8,0.5",
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float = 1.0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    """
+    Create the stub API.
+
+    Args:
+        latency: Latency distribution spec (see ``LatencyDistribution``)
+        error_rate: Fraction of requests failing with 529 (overloaded)
+        rate_limit_rate: Fraction of requests failing with 429
+        retry_after: ``retry-after`` seconds sent with 429 responses
+        seed: Random seed
+
+    Returns:
+        ASGI application
+    """
+    app = FastAPI(title="Aika LLM stub")
+    distribution = LatencyDistribution(latency, seed=seed)
+    rng = random.Random(seed)
+    stats = app.state.stats = {
+        "requests": 0, "errors": 0, "rate_limited": 0, "in_flight": 0, "max_in_flight": 0
+    }
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request) -> Any:
+        body = await request.json()
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(distribution.sample())
+        finally:
+            stats["in_flight"] -= 1
+
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            return _error(
+                429, "rate_limit_error", "Rate limited by stub", {"retry-after": str(retry_after)}
+            )
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return _error(529, "overloaded_error", "Overloaded stub")
+
+        messages: List[Dict[str, Any]] = body.get("messages") or [{}]
+        prompt = str(messages[-1].get("content", ""))
+        text = f"Stub reply: {prompt}"[: max(1, body.get("max_tokens", 1)) * 4]
+        return {
+            "id": f"msg_stub_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "stub"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4 + 1, "output_tokens": len(text) // 4 + 1},
+        }
+
+    return app
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        args: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src.bench.llm_stub", description="Serve a stub Messages API"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8089, help="Port to bind to")
+    parser.add_argument(
+        "--latency", default="lognormal:0.8,0.5", help="Response latency distribution"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 529 responses")
+    parser.add_argument(
+        "--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses"
+    )
+    parser.add_argument(
+        "--retry-after", type=float, default=1.0, help="retry-after seconds of 429 responses"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed")
+    parsed = parser.parse_args(args)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("uvicorn is not installed. Please install it with 'pip install uvicorn'.")
+        return 1
+
+    app = create_app(
+        parsed.latency, parsed.error_rate, parsed.rate_limit_rate, parsed.retry_after, parsed.seed
+    )
+    uvicorn.run(app, host=parsed.host, port=parsed.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,615 @@
+"""
+Trace-replay load generator for the Aika AI System, run by ``aika loadtest``.
+
+Replays a JSONL request trace (as written by ``TraceRecorderMiddleware``:
+one object per line with ``ts``, ``method``, ``path`` and optionally
+``query``, ``headers`` and ``body``) against the ASGI app in-process or
+against a running server. Requests are sent open-loop: each is issued at its
+scheduled time whether or not earlier ones have completed, so a slow server
+builds a queue instead of slowing the load down. The schedule is either the
+trace's own arrival times, stretched or compressed by ``--time-scale``, or a
+Poisson process at ``--rate`` requests per second cycling through the trace.
+``--concurrency`` caps requests in flight; requests waiting for a slot keep
+their scheduled start, so queueing shows up in latency.
+
+In-process runs can register stub agents that answer orchestrator requests
+after a delay drawn from a latency distribution, standing in for LLM calls.
+Every request is authenticated with a token minted from ``SECRET_KEY`` for
+one of ``--users`` users.
+
+Traces record bodies only with ``TRACE_RECORD_BODIES`` enabled. POST, PUT and
+PATCH entries without a body would fail validation on replay, so they are
+skipped and counted in the report, or sent with ``--default-body`` instead.
+
+The report has latency percentiles (p50/p90/p99/p99.9, from the scheduled
+start) and service-time percentiles (from the actual send), throughput and
+error rates.
+
+Usage:
+    python -m src.bench.loadtest trace.jsonl --time-scale 0.5
+    python -m src.bench.loadtest trace.jsonl --rate 200 --duration 60 --agent-latency none
+    python -m src.bench.loadtest trace.jsonl --url http://localhost:8000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib
+import itertools
+import json
+import math
+import random
+import sys
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..agents.base import BaseAgent
+
+# Default application replayed in-process
+DEFAULT_APP = "src.api.main:app"
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+# Methods whose requests carry a body
+BODY_METHODS = {"POST", "PUT", "PATCH"}
+
+
+class LatencyDistribution:
+    """
+    Random delays from a named distribution.
+
+    Specs are ``name:params`` with seconds as the unit:
+
+    - ``constant:0.5``
+    - ``uniform:0.2,1.5`` (low, high)
+    - ``exponential:0.8`` (mean)
+    - ``lognormal:0.8,0.5`` (median, sigma), the usual shape of LLM latency
+    """
+
+    def __init__(self, spec: str, seed: Optional[int] = None):
+        """
+        Initialize the distribution.
+
+        Args:
+            spec: Distribution spec
+            seed: Random seed
+
+        Raises:
+            ValueError: If the spec is malformed
+        """
+        name, _, params = spec.partition(":")
+        try:
+            values = [float(p) for p in params.split(",")] if params else []
+        except ValueError:
+            raise ValueError(f"Invalid latency distribution '{spec}'")
+
+        arity = {"constant": 1, "uniform": 2, "exponential": 1, "lognormal": 2}
+        if name not in arity or len(values) != arity[name] or any(v < 0 for v in values):
+            raise ValueError(f"Invalid latency distribution '{spec}'")
+
+        self.spec = spec
+        self.name = name
+        self.params = values
+        self._random = random.Random(seed)
+
+    def sample(self) -> float:
+        """
+        Draw a delay.
+
+        Returns:
+            Seconds
+        """
+        if self.name == "constant":
+            return self.params[0]
+        if self.name == "uniform":
+            return self._random.uniform(*self.params)
+        if self.name == "exponential":
+            return self._random.expovariate(1 / self.params[0]) if self.params[0] else 0.0
+        median, sigma = self.params
+        return self._random.lognormvariate(math.log(median), sigma) if median else 0.0
+
+
+class StubAgent(BaseAgent):
+    """
+    Agent answering after a simulated model latency.
+    """
+
+    def __init__(
+        self,
+        agent_id: str,
+        latency: LatencyDistribution,
+        request_type: Optional[str] = None,
+        error_rate: float = 0.0,
+    ):
+        """
+        Initialize the agent.
+
+        Args:
+            agent_id: Agent ID
+            latency: Distribution of processing delays
+            request_type: Request ``type`` handled (any request if None)
+            error_rate: Fraction of requests that fail
+        """
+        super().__init__(
+            agent_id,
+            f"Stub agent ({request_type or 'any'})",
+            f"Simulates {latency.spec} latency",
+            [request_type] if request_type else [],
+        )
+        self.latency = latency
+        self.request_type = request_type
+        self.error_rate = error_rate
+        self._random = random.Random()
+
+    async def process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        await asyncio.sleep(self.latency.sample())
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise RuntimeError("Simulated agent failure")
+        return {"agent_id": self.agent_id, "status": "completed", "result": "stub"}
+
+    async def can_handle(self, request: Dict[str, Any]) -> bool:
+        return self.request_type is None or request.get("type") == self.request_type
+
+
+def load_trace(path: str) -> List[Dict[str, Any]]:
+    """
+    Load a request trace.
+
+    Args:
+        path: JSONL trace file
+
+    Returns:
+        Entries ordered by arrival time
+
+    Raises:
+        ValueError: If the trace is empty or an entry lacks a method or path
+    """
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "method" not in entry or "path" not in entry:
+                raise ValueError(f"Trace line {number} has no method or path")
+            entries.append(entry)
+    if not entries:
+        raise ValueError(f"Trace '{path}' is empty")
+    return sorted(entries, key=lambda e: e.get("ts", 0))
+
+
+def fill_missing_bodies(
+    entries: List[Dict[str, Any]], default_body: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Handle body-carrying requests recorded without their body.
+
+    Args:
+        entries: Trace entries
+        default_body: JSON body sent instead of the missing ones (None to skip those entries)
+
+    Returns:
+        Replayable entries and the number of entries skipped
+    """
+    replayable = []
+    skipped = 0
+    for entry in entries:
+        missing = entry["method"].upper() in BODY_METHODS and not (
+            "body" in entry or "body_b64" in entry
+        )
+        if not missing:
+            replayable.append(entry)
+        elif default_body is None:
+            skipped += 1
+        else:
+            headers = {"content-type": "application/json", **entry.get("headers", {})}
+            replayable.append({**entry, "body": default_body, "headers": headers})
+    return replayable, skipped
+
+
+def build_schedule(
+    entries: List[Dict[str, Any]],
+    time_scale: float = 1.0,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    limit: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> List[Tuple[float, Dict[str, Any]]]:
+    """
+    Plan when each request is sent.
+
+    Args:
+        entries: Trace entries in arrival order
+        time_scale: Factor applied to the trace's inter-arrival times
+        rate: Poisson arrival rate per second instead of the trace's times
+        duration: Seconds of load (for ``rate``; defaults to one pass over the trace)
+        limit: Maximum number of requests
+        seed: Random seed for Poisson arrivals
+
+    Returns:
+        Pairs of (offset in seconds, entry)
+    """
+    schedule = []
+    if rate:
+        arrivals = random.Random(seed)
+        offset = 0.0
+        for entry in itertools.cycle(entries):
+            offset += arrivals.expovariate(rate)
+            if duration is not None and offset > duration:
+                break
+            if duration is None and len(schedule) == len(entries):
+                break
+            schedule.append((offset, entry))
+            if limit is not None and len(schedule) >= limit:
+                break
+        return schedule
+
+    first = entries[0].get("ts", 0)
+    for entry in entries[:limit]:
+        schedule.append(((entry.get("ts", first) - first) * time_scale, entry))
+    return schedule
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+
+    Args:
+        values: Sorted values
+        p: Percentile (0-100)
+
+    Returns:
+        Value at the percentile (0 if there are none)
+    """
+    if not values:
+        return 0.0
+    # Rounded so that floating-point error does not push the rank up by one
+    rank = max(1, math.ceil(round(p / 100 * len(values), 9)))
+    return values[min(rank, len(values)) - 1]
+
+
+def _distribution(values: Iterable[float]) -> Dict[str, float]:
+    """Summarize latencies in milliseconds."""
+    ordered = sorted(v * 1000 for v in values)
+    summary = {f"p{p:g}": round(percentile(ordered, p), 3) for p in PERCENTILES}
+    summary["mean"] = round(sum(ordered) / len(ordered), 3) if ordered else 0.0
+    summary["max"] = round(ordered[-1], 3) if ordered else 0.0
+    return summary
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, offered: float) -> Dict[str, Any]:
+    """
+    Summarize request outcomes.
+
+    Args:
+        results: One outcome per request (``status``, ``latency``, ``service``, optional ``error``)
+        elapsed: Seconds from the first scheduled request to the last completion
+        offered: Seconds over which requests were scheduled
+
+    Returns:
+        Report with counts, rates and latency percentiles in milliseconds
+    """
+    statuses: Dict[str, int] = {}
+    errors = 0
+    for result in results:
+        key = str(result["status"]) if result["status"] else "exception"
+        statuses[key] = statuses.get(key, 0) + 1
+        if not result["status"] or result["status"] >= 400:
+            errors += 1
+
+    total = len(results)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "elapsed_seconds": round(elapsed, 3),
+        "offered_rate": round(total / offered, 2) if offered else None,
+        "throughput": round((total - errors) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": _distribution(r["latency"] for r in results),
+        "service_ms": _distribution(r["service"] for r in results),
+    }
+
+
+Sender = Callable[[Dict[str, Any], Dict[str, str]], Any]
+
+
+async def replay(
+    schedule: List[Tuple[float, Dict[str, Any]]],
+    send: Sender,
+    tokens: List[str],
+    concurrency: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Send scheduled requests open-loop.
+
+    Args:
+        schedule: Pairs of (offset in seconds, entry)
+        send: Coroutine function sending an entry with extra headers and returning the status
+        tokens: Bearer tokens used round-robin
+        concurrency: Maximum requests in flight (unbounded if None)
+
+    Returns:
+        Summary of the run
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency) if concurrency else None
+    results: List[Dict[str, Any]] = []
+
+    async def _one(entry: Dict[str, Any], scheduled: float, token: Optional[str]) -> None:
+        headers = {"authorization": f"Bearer {token}"} if token else {}
+        if slots is not None:
+            await slots.acquire()
+        sent = loop.time()
+        outcome: Dict[str, Any] = {"status": 0}
+        try:
+            outcome["status"] = await send(entry, headers)
+        except Exception as e:
+            outcome["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            if slots is not None:
+                slots.release()
+        done = loop.time()
+        outcome["latency"] = done - scheduled
+        outcome["service"] = done - sent
+        results.append(outcome)
+
+    start = loop.time()
+    tasks = []
+    for i, (offset, entry) in enumerate(schedule):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        token = tokens[i % len(tokens)] if tokens else None
+        tasks.append(asyncio.create_task(_one(entry, start + offset, token)))
+    await asyncio.gather(*tasks)
+
+    offered = schedule[-1][0] if schedule else 0.0
+    return summarize(results, loop.time() - start, offered)
+
+
+def _request_args(entry: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    """Build httpx request arguments for a trace entry."""
+    url = entry["path"] + (f"?{entry['query']}" if entry.get("query") else "")
+    if "body_b64" in entry:
+        content = base64.b64decode(entry["body_b64"])
+    else:
+        content = entry.get("body", "").encode("utf-8")
+    return {
+        "method": entry["method"],
+        "url": url,
+        "headers": {**entry.get("headers", {}), **headers},
+        "content": content or None,
+    }
+
+
+def load_app(spec: str) -> Any:
+    """
+    Import an ASGI application.
+
+    Args:
+        spec: ``module:attribute``
+
+    Returns:
+        Application
+    """
+    module, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module), attribute or "app")
+
+
+def register_stub_agents(
+    entries: List[Dict[str, Any]], latency: LatencyDistribution, error_rate: float = 0.0
+) -> List[StubAgent]:
+    """
+    Register a stub agent for each request type in the trace, plus a catch-all.
+
+    Args:
+        entries: Trace entries
+        latency: Distribution of agent processing delays
+        error_rate: Fraction of agent requests that fail
+
+    Returns:
+        Registered agents
+    """
+    from ..agents.base import get_agent_registry
+
+    types = []
+    for entry in entries:
+        try:
+            request_type = json.loads(entry.get("body") or "{}").get("type")
+        except (ValueError, AttributeError):
+            continue
+        if isinstance(request_type, str) and request_type not in types:
+            types.append(request_type)
+
+    registry = get_agent_registry()
+    agents = [StubAgent(f"stub-{t}", latency, t, error_rate) for t in types]
+    agents.append(StubAgent("stub-any", latency, None, error_rate))
+    for agent in agents:
+        registry.register(agent)
+    return agents
+
+
+async def run(
+    trace: str,
+    url: Optional[str] = None,
+    app: str = DEFAULT_APP,
+    time_scale: float = 1.0,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    limit: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    users: int = 100,
+    agent_latency: Optional[str] = "lognormal:0.8,0.5",
+    agent_error_rate: float = 0.0,
+    seed: Optional[int] = None,
+    default_body: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Replay a trace and report latency, throughput and errors.
+
+    Args:
+        trace: JSONL trace file
+        url: Base URL of a running server (in-process if None)
+        app: ASGI application replayed in-process
+        time_scale: Factor applied to the trace's inter-arrival times
+        rate: Poisson arrival rate per second instead of the trace's times
+        duration: Seconds of load for ``rate``
+        limit: Maximum number of requests
+        concurrency: Maximum requests in flight
+        users: Distinct users to authenticate as (0 to send no token)
+        agent_latency: Stub agent latency distribution for in-process runs (None for no stub agents)
+        agent_error_rate: Fraction of stub agent requests that fail
+        seed: Random seed
+        default_body: JSON body for POST/PUT/PATCH entries recorded without one
+            (they are skipped if None)
+
+    Returns:
+        Report of the run
+
+    Raises:
+        ValueError: If no entry of the trace can be replayed
+    """
+    import httpx
+
+    from ..auth.jwt import create_access_token
+
+    entries, skipped = fill_missing_bodies(load_trace(trace), default_body)
+    if not entries:
+        raise ValueError(
+            f"Every request in '{trace}' lacks its body; record with TRACE_RECORD_BODIES=True "
+            f"or pass a default body"
+        )
+    schedule = build_schedule(entries, time_scale, rate, duration, limit, seed)
+    tokens = [create_access_token({"sub": f"loadtest-{i}"}) for i in range(users)]
+
+    agents: List[StubAgent] = []
+    if url:
+        connections = concurrency or 100
+        limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+        client = httpx.AsyncClient(base_url=url, limits=limits, timeout=None)
+    else:
+        if agent_latency:
+            distribution = LatencyDistribution(agent_latency, seed)
+            agents = register_stub_agents(entries, distribution, agent_error_rate)
+        transport = httpx.ASGITransport(app=load_app(app))
+        client = httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+    async def send(entry: Dict[str, Any], headers: Dict[str, str]) -> int:
+        response = await client.request(**_request_args(entry, headers))
+        return response.status_code
+
+    try:
+        report = await replay(schedule, send, tokens, concurrency)
+    finally:
+        await client.aclose()
+        if agents:
+            from ..agents.base import get_agent_registry
+
+            for agent in agents:
+                get_agent_registry().unregister(agent.agent_id)
+
+    report["target"] = url or f"in-process {app}"
+    report["trace"] = trace
+    report["skipped"] = skipped
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format a report as text."""
+    latency, service = report["latency_ms"], report["service_ms"]
+    columns = ["p50", "p90", "p99", "p99.9", "mean", "max"]
+    lines = [
+        f"Replayed {report['requests']} requests from {report['trace']} against {report['target']}",
+        f"  elapsed:     {report['elapsed_seconds']:.3f} s "
+        f"(offered {report['offered_rate'] or '-'} req/s)",
+        f"  throughput:  {report['throughput']:.2f} successful req/s",
+        f"  errors:      {report['errors']} ({report['error_rate']:.2%})",
+        f"  statuses:    {', '.join(f'{k}: {v}' for k, v in report['statuses'].items())}",
+        "",
+        f"  {'ms':<8}" + "".join(f"{c:>10}" for c in columns),
+        f"  {'latency':<8}" + "".join(f"{latency[c]:>10.2f}" for c in columns),
+        f"  {'service':<8}" + "".join(f"{service[c]:>10.2f}" for c in columns),
+    ]
+    if report.get("skipped"):
+        lines.insert(1, (
+            f"  skipped:     {report['skipped']} POST/PUT/PATCH requests recorded without a body "
+            f"(record with TRACE_RECORD_BODIES=True or pass --default-body)"
+        ))
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        args: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit code (1 if the error rate exceeds --max-error-rate)
+    """
+    parser = argparse.ArgumentParser(
+        prog="aika loadtest", description="Replay a request trace as load"
+    )
+    parser.add_argument("trace", help="JSONL trace file")
+    parser.add_argument(
+        "--url", help="Base URL of a running server (default: the app in-process)"
+    )
+    parser.add_argument("--app", default=DEFAULT_APP, help="ASGI application replayed in-process")
+    parser.add_argument(
+        "--time-scale", type=float, default=1.0, help="Factor applied to inter-arrival times"
+    )
+    parser.add_argument(
+        "--rate", type=float, help="Open-loop Poisson arrival rate (req/s) instead of trace times"
+    )
+    parser.add_argument("--duration", type=float, help="Seconds of load with --rate")
+    parser.add_argument("--limit", type=int, help="Maximum number of requests")
+    parser.add_argument("--concurrency", type=int, help="Maximum requests in flight")
+    parser.add_argument("--users", type=int, default=100, help="Distinct users to authenticate as")
+    parser.add_argument(
+        "--agent-latency",
+        default="lognormal:0.8,0.5",
+        help="Stub agent latency (constant:S, uniform:LO,HI, exponential:MEAN, "
+        "lognormal:MEDIAN,SIGMA or none)",
+    )
+    parser.add_argument(
+        "--agent-error-rate", type=float, default=0.0, help="Fraction of stub agent failures"
+    )
+    parser.add_argument("--seed", type=int, help="Random seed")
+    parser.add_argument(
+        "--default-body",
+        help="JSON body for POST/PUT/PATCH requests recorded without one (default: skip them)",
+    )
+    parser.add_argument("--output", help="Write the report as JSON to this file")
+    parser.add_argument("--max-error-rate", type=float, help="Fail if the error rate is higher")
+    parsed = parser.parse_args(args)
+
+    report = asyncio.run(run(
+        parsed.trace,
+        url=parsed.url,
+        app=parsed.app,
+        time_scale=parsed.time_scale,
+        rate=parsed.rate,
+        duration=parsed.duration,
+        limit=parsed.limit,
+        concurrency=parsed.concurrency,
+        users=parsed.users,
+        agent_latency=None if parsed.agent_latency == "none" else parsed.agent_latency,
+        agent_error_rate=parsed.agent_error_rate,
+        seed=parsed.seed,
+        default_body=parsed.default_body,
+    ))
+    print(format_report(report))
+
+    if parsed.output:
+        with open(parsed.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {parsed.output}")
+
+    if parsed.max_error_rate is not None and report["error_rate"] > parsed.max_error_rate:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
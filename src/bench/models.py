@@ -0,0 +1,114 @@
+"""
+Construction throughput and memory benchmark for message models.
+
+Compares building ``Message`` objects from database-style rows (string UUIDs
+and ISO timestamps) through full validation, the trusted ``Message.trusted``
+path and the compact ``MessageRecord`` tuple, reporting objects per second
+and retained bytes per object.
+
+Usage:
+    python -m src.bench.models --objects 100000
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from ..database.models import Message, MessageRecord
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """
+    Generate message rows as they come back from the database.
+
+    Args:
+        count: Number of rows
+
+    Returns:
+        Row dictionaries
+    """
+    conversation_id = str(uuid4())
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": str(uuid4()),
+            "conversation_id": conversation_id,
+            "sender_id": str(uuid4()) if i % 2 else "user-1",
+            "sender_type": "agent" if i % 2 else "user",
+            "content": f"message {i}",
+            "created_at": (start + timedelta(seconds=i)).isoformat(),
+            "metadata": {"turn": i},
+        }
+        for i in range(count)
+    ]
+
+
+def _measure(
+    build: Callable[[Dict[str, Any]], Any], rows: List[Dict[str, Any]]
+) -> Dict[str, float]:
+    """Time building every row and measure the memory the objects retain."""
+    gc.collect()
+    started = time.perf_counter()
+    objects = [build(row) for row in rows]
+    elapsed = time.perf_counter() - started
+    del objects
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    objects = [build(row) for row in rows]
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del objects
+
+    return {
+        "objects_per_sec": round(len(rows) / elapsed),
+        "bytes_per_object": round(retained / len(rows)),
+    }
+
+
+def run(num_objects: int = 100_000) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        num_objects: Objects built per variant
+
+    Returns:
+        Benchmark results per construction path
+    """
+    rows = make_rows(num_objects)
+    return {
+        "objects": num_objects,
+        "validated": _measure(Message.parse_obj, rows),
+        "trusted": _measure(Message.trusted, rows),
+        "record": _measure(MessageRecord.trusted, rows),
+    }
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        args: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(description="Benchmark message model construction")
+    parser.add_argument("--objects", type=int, default=100_000, help="Objects per variant")
+    parsed = parser.parse_args(args)
+
+    print(json.dumps(run(parsed.objects), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
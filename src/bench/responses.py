@@ -0,0 +1,173 @@
+"""
+Throughput benchmark for API response encoding.
+
+Serves the same listing payload (agent-like records) from two applications
+and drives them over ASGI in-process:
+
+- ``baseline``: the endpoint returns plain data, encoded by FastAPI's
+  ``jsonable_encoder`` and default ``JSONResponse``, with no middleware,
+- ``optimized``: the endpoint returns a ``FastJSONResponse`` directly (as the
+  listing routes in ``src.api.routers`` do) behind ``CompressionMiddleware``
+  and ``ETagMiddleware``, as configured in ``src.api.main``.
+
+The optimized application is measured for a first fetch (full, compressed
+body) and for polling with ``If-None-Match`` (``304``). Results are responses
+per second and bytes sent per response.
+
+Usage:
+    python -m src.bench.responses --items 200 --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI
+
+from ..api.responses import CompressionMiddleware, ETagMiddleware, FastJSONResponse
+
+
+def _payload(items: int) -> List[Dict[str, Any]]:
+    """Build a listing of agent-like records."""
+    return [
+        {
+            "agent_id": f"agent-{i:05d}",
+            "name": f"Claims Agent {i}",
+            "description": "Handles first notice of loss, triage and status updates for claims.",
+            "capabilities": ["claims.intake", "claims.status", "policy.lookup"],
+            "metadata": {
+                "region": ["eu", "us", "apac"][i % 3], "version": i % 7, "active": i % 5 != 0
+            },
+        }
+        for i in range(items)
+    ]
+
+
+def _app(payload: List[Dict[str, Any]], optimized: bool) -> Any:
+    """Build an application serving the payload."""
+    if not optimized:
+        app = FastAPI()
+
+        @app.get("/agents")
+        async def agents():
+            return payload
+
+        return app
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/agents", response_class=FastJSONResponse)
+    async def fast_agents() -> FastJSONResponse:
+        return FastJSONResponse(payload)
+
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware)
+    return app
+
+
+async def _measure(app: Any, requests: int, headers: List[Any]) -> Dict[str, Any]:
+    """Send GET requests through the app and measure throughput and bytes sent."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/agents",
+        "raw_path": b"/agents",
+        "query_string": b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+    sent: Dict[str, Any] = {"bytes": 0, "status": 0, "etag": None}
+
+    async def receive() -> Dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+            sent["etag"] = dict(message["headers"]).get(b"etag")
+        else:
+            sent["bytes"] += len(message.get("body", b""))
+
+    # Warm up routing and caches
+    for _ in range(10):
+        await app(dict(scope), receive, send)
+    sent["bytes"] = 0
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "status": sent["status"],
+        "responses_per_sec": round(requests / elapsed, 1),
+        "bytes_per_response": sent["bytes"] // requests,
+        "etag": sent["etag"],
+    }
+
+
+async def run(items: int = 200, requests: int = 2000) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        items: Records in the listing
+        requests: Requests per variant
+
+    Returns:
+        Throughput and response size for each variant
+    """
+    payload = _payload(items)
+    baseline = _app(payload, optimized=False)
+    optimized = _app(payload, optimized=True)
+    accept = [(b"accept-encoding", b"gzip, deflate, br")]
+
+    results = {
+        "items": items,
+        "requests": requests,
+        "baseline": await _measure(baseline, requests, accept),
+        "optimized": await _measure(optimized, requests, accept),
+    }
+    etag = results["optimized"]["etag"]
+    results["optimized_not_modified"] = await _measure(
+        optimized, requests, accept + [(b"if-none-match", etag)]
+    )
+    for variant in ("baseline", "optimized", "optimized_not_modified"):
+        results[variant].pop("etag")
+    results["speedup"] = round(
+        results["optimized"]["responses_per_sec"] / results["baseline"]["responses_per_sec"], 2
+    )
+    optimized = results["optimized"]["bytes_per_response"]
+    results["bytes_saved"] = round(1 - optimized / results["baseline"]["bytes_per_response"], 3)
+    return results
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        args: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(description="Benchmark API response encoding")
+    parser.add_argument("--items", type=int, default=200, help="Records in the listing")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per variant")
+    parsed = parser.parse_args(args)
+
+    print(json.dumps(asyncio.run(run(parsed.items, parsed.requests)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
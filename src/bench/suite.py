@@ -0,0 +1,575 @@
+"""
+Benchmark suite for the Aika AI System, run by ``aika bench``.
+
+Microbenchmarks time single operations on hot paths (the Kafka message
+codec, publishing, agent routing, JWT handling, model construction);
+macrobenchmarks drive whole requests through the ASGI app in-process,
+including its middleware and the authentication dependency, and concurrent
+model calls through the LLM client to the stub API. Each benchmark
+is run ``repeat`` times after a warm-up round and reported as time per
+operation (median, mean, min and spread) and operations per second.
+
+Results are written as JSON. Given a stored baseline, the run is compared
+benchmark by benchmark on the median and fails if any is slower by more
+than the threshold.
+
+Usage:
+    python -m src.bench.suite --output bench.json
+    python -m src.bench.suite --baseline bench.json --threshold 0.1
+    python -m src.bench.suite --results new.json --baseline bench.json
+"""
+
+import argparse
+import asyncio
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Benchmark functions take an operation count and return the seconds they took
+BenchmarkFunction = Callable[[int], Awaitable[float]]
+
+# Registered benchmarks: name -> (kind, default operations per round, function)
+BENCHMARKS: Dict[str, Tuple[str, int, BenchmarkFunction]] = {}
+
+SAMPLE_MESSAGE = {
+    "type": "agent.request",
+    "request_id": "4f9c1d0e-8a51-4e0f-9a47-0d2c1b7f3e21",
+    "user": "user-1",
+    "agent_id": "policy-agent",
+    "payload": {
+        "query": "What does my policy cover for equipment damage while travelling?",
+        "policy_ids": ["POL-1001", "POL-1002"],
+        "context": {"locale": "en-GB", "channel": "web", "turn": 3},
+    },
+    "created_at": "2024-01-01T12:00:00Z",
+}
+
+
+def benchmark(
+    name: str, kind: str, operations: int
+) -> Callable[[BenchmarkFunction], BenchmarkFunction]:
+    """
+    Register a benchmark.
+
+    Args:
+        name: Benchmark name (``group.case``)
+        kind: ``micro`` or ``macro``
+        operations: Operations per round by default
+
+    Returns:
+        Decorator registering the function
+    """
+    def decorator(function: BenchmarkFunction) -> BenchmarkFunction:
+        BENCHMARKS[name] = (kind, operations, function)
+        return function
+    return decorator
+
+
+@benchmark("codec.encode", "micro", 100_000)
+async def bench_codec_encode(n: int) -> float:
+    """Encode a typical message."""
+    from ..messaging.kafka import encode_message
+
+    started = time.perf_counter()
+    for _ in range(n):
+        encode_message(SAMPLE_MESSAGE)
+    return time.perf_counter() - started
+
+
+@benchmark("codec.decode", "micro", 100_000)
+async def bench_codec_decode(n: int) -> float:
+    """Decode a typical message."""
+    from ..messaging.kafka import decode_message, encode_message
+
+    value = encode_message(SAMPLE_MESSAGE)
+    started = time.perf_counter()
+    for _ in range(n):
+        decode_message(value)
+    return time.perf_counter() - started
+
+
+class _InMemoryProducer:
+    """Producer keeping messages in memory, with confluent_kafka's interface."""
+
+    def __init__(self):
+        self.messages: List[Tuple[str, bytes, Optional[bytes]]] = []
+        self._callbacks: List[Callable[[Any, Any], None]] = []
+
+    def produce(
+        self,
+        topic: str,
+        value: bytes,
+        key: Optional[bytes] = None,
+        headers: Optional[List[Tuple[str, Any]]] = None,
+        callback: Any = None,
+    ) -> None:
+        self.messages.append((topic, value, key))
+        if callback is not None:
+            self._callbacks.append(callback)
+
+    def poll(self, timeout: float = 0) -> int:
+        served, self._callbacks = len(self._callbacks), []
+        return served
+
+    def flush(self, timeout: float = -1) -> int:
+        self.poll()
+        return 0
+
+
+@benchmark("kafka.publish", "micro", 20_000)
+async def bench_kafka_publish(n: int) -> float:
+    """Publish messages through ``publish_message`` to an in-memory producer."""
+    from ..messaging import kafka
+
+    previous, kafka._producer = kafka._producer, _InMemoryProducer()
+    try:
+        started = time.perf_counter()
+        for i in range(n):
+            kafka.publish_message("agent.requests", SAMPLE_MESSAGE, key=str(i))
+        return time.perf_counter() - started
+    finally:
+        kafka._producer = previous
+
+
+@benchmark("tracing.spans", "micro", 20_000)
+async def bench_tracing_spans(n: int) -> float:
+    """Trace a root span with two children, unsampled up front and dropped by tail sampling."""
+    from ..utils.tracing import InMemoryExporter, Tracer
+
+    tracer = Tracer(InMemoryExporter(), sample_rate=0.0, tail_latency_ms=1000.0)
+    started = time.perf_counter()
+    for _ in range(n):
+        with tracer.start_span("root"):
+            with tracer.start_span("route"):
+                pass
+            with tracer.start_span("process"):
+                pass
+    elapsed = time.perf_counter() - started
+    tracer.shutdown()
+    return elapsed
+
+
+def _keyword_agent(index: int) -> Any:
+    """Build an agent handling one request type."""
+    from ..agents.base import BaseAgent
+
+    class _KeywordAgent(BaseAgent):
+        async def process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+            return {"agent_id": self.agent_id, "request_id": request.get("request_id")}
+
+        async def can_handle(self, request: Dict[str, Any]) -> bool:
+            return request.get("type") in self.capabilities
+
+    return _KeywordAgent(f"agent-{index}", f"Agent {index}", "Benchmark agent", [f"type-{index}"])
+
+
+@benchmark("agents.routing", "micro", 2_000)
+async def bench_agent_routing(n: int, agents: int = 500) -> float:
+    """Find the agent for requests spread evenly over a large registry."""
+    from ..agents.base import AgentRegistry
+
+    registry = AgentRegistry()
+    for i in range(agents):
+        registry.register(_keyword_agent(i))
+    requests = [{"type": f"type-{i % agents}"} for i in range(n)]
+
+    started = time.perf_counter()
+    for request in requests:
+        await registry.find_agent_for_request(request)
+    return time.perf_counter() - started
+
+
+@benchmark("auth.create_token", "micro", 10_000)
+async def bench_create_token(n: int) -> float:
+    """Create access tokens."""
+    from ..auth.jwt import create_access_token
+
+    started = time.perf_counter()
+    for i in range(n):
+        create_access_token({"sub": f"user-{i}"})
+    return time.perf_counter() - started
+
+
+@benchmark("auth.verify_token", "micro", 10_000)
+async def bench_verify_token(n: int) -> float:
+    """Verify access tokens that are not in the token cache."""
+    from ..auth.cache import get_token_cache
+    from ..auth.jwt import create_access_token, get_current_user
+
+    tokens = [create_access_token({"sub": f"user-{i}"}) for i in range(n)]
+    cache = get_token_cache()
+    cache.clear()
+
+    started = time.perf_counter()
+    for token in tokens:
+        await get_current_user(token)
+    elapsed = time.perf_counter() - started
+    cache.clear()
+    return elapsed
+
+
+@benchmark("auth.verify_token_cached", "micro", 50_000)
+async def bench_verify_token_cached(n: int) -> float:
+    """Verify an access token from the token cache."""
+    from ..auth.jwt import create_access_token, get_current_user
+
+    token = create_access_token({"sub": "user-cached"})
+    await get_current_user(token)
+
+    started = time.perf_counter()
+    for _ in range(n):
+        await get_current_user(token)
+    return time.perf_counter() - started
+
+
+@benchmark("models.message", "micro", 20_000)
+async def bench_model_message(n: int) -> float:
+    """Construct validated ``Message`` models from database rows."""
+    from ..database.models import Message
+    from .models import make_rows
+
+    rows = make_rows(n)
+    started = time.perf_counter()
+    for row in rows:
+        Message(**row)
+    return time.perf_counter() - started
+
+
+async def _asgi_request(app: Any, scope: Dict[str, Any], body: bytes = b"") -> int:
+    """Send one request through an ASGI app and return the response status."""
+    status = 0
+    sent = False
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def _scope(method: str, path: str, headers: List[Tuple[bytes, bytes]]) -> Dict[str, Any]:
+    """Build an HTTP request scope."""
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")] + headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+
+
+async def _run_requests(app: Any, requests: List[Tuple[Dict[str, Any], bytes]]) -> float:
+    """Send requests through the app, failing on any error response."""
+    started = time.perf_counter()
+    for scope, body in requests:
+        status = await _asgi_request(app, scope, body)
+        if status >= 400:
+            raise RuntimeError(f"{scope['method']} {scope['path']} answered {status}")
+    return time.perf_counter() - started
+
+
+@benchmark("api.health", "macro", 5_000)
+async def bench_api_health(n: int) -> float:
+    """Serve ``GET /health`` through the full application."""
+    from ..api.main import app
+
+    return await _run_requests(app, [(_scope("GET", "/health", []), b"")] * n)
+
+
+@benchmark("api.orchestrator_request", "macro", 2_000)
+async def bench_api_orchestrator_request(n: int, users: int = 200) -> float:
+    """Serve authenticated ``POST /orchestrator/request`` calls routed to an agent."""
+    from ..agents.base import get_agent_registry
+    from ..api.main import app
+    from ..auth.jwt import create_access_token
+
+    registry = get_agent_registry()
+    agent = _keyword_agent(0)
+    registry.register(agent)
+
+    # Requests are spread over users so that per-user rate limits are not hit
+    tokens = [create_access_token({"sub": f"bench-{i}"}) for i in range(users)]
+    body = json.dumps({"type": "type-0", "query": "What does my policy cover?"}).encode("utf-8")
+    requests = [
+        (
+            _scope("POST", "/orchestrator/request", [
+                (b"authorization", f"Bearer {tokens[i % users]}".encode("latin-1")),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+            ]),
+            body,
+        )
+        for i in range(n)
+    ]
+    try:
+        return await _run_requests(app, requests)
+    finally:
+        registry.unregister(agent.agent_id)
+
+
+@benchmark("llm.client", "macro", 2_000)
+async def bench_llm_client(n: int, concurrency: int = 64) -> float:
+    """Send concurrent model requests through the shared client to the in-process stub API."""
+    import httpx
+
+    from ..agents.llm import LLMClient
+    from .llm_stub import create_app
+
+    client = LLMClient(
+        api_key="bench",
+        max_concurrency=concurrency,
+        max_concurrency_per_model=concurrency,
+        hedge_after=0,
+        transport=httpx.ASGITransport(app=create_app(latency="constant:0")),
+    )
+    messages = [{"role": "user", "content": "Summarize my policy coverage."}]
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            client.create_message("stub-model", messages, max_tokens=64) for _ in range(n)
+        ))
+        return time.perf_counter() - started
+    finally:
+        await client.aclose()
+
+
+def select(patterns: Optional[List[str]] = None, kind: Optional[str] = None) -> List[str]:
+    """
+    Select benchmarks by name pattern and kind.
+
+    Args:
+        patterns: Shell-style name patterns (all benchmarks if empty)
+        kind: ``micro`` or ``macro`` (both if None)
+
+    Returns:
+        Selected benchmark names in registration order
+    """
+    return [
+        name for name, (bench_kind, _, _) in BENCHMARKS.items()
+        if (not patterns or any(fnmatch.fnmatch(name, p) for p in patterns))
+        and (kind is None or bench_kind == kind)
+    ]
+
+
+async def run_benchmark(name: str, repeat: int = 5, scale: float = 1.0) -> Dict[str, Any]:
+    """
+    Run one benchmark.
+
+    Args:
+        name: Benchmark name
+        repeat: Timed rounds
+        scale: Factor applied to the default operations per round
+
+    Returns:
+        Per-operation timings in microseconds and operations per second
+    """
+    kind, default_operations, function = BENCHMARKS[name]
+    operations = max(1, int(default_operations * scale))
+
+    await function(max(1, operations // 10))
+    rounds = [await function(operations) / operations * 1e6 for _ in range(repeat)]
+
+    median = statistics.median(rounds)
+    return {
+        "kind": kind,
+        "operations": operations,
+        "repeat": repeat,
+        "median_us": round(median, 3),
+        "mean_us": round(statistics.fmean(rounds), 3),
+        "min_us": round(min(rounds), 3),
+        "stdev_us": round(statistics.stdev(rounds), 3) if repeat > 1 else 0.0,
+        "ops_per_sec": round(1e6 / median, 1) if median else None,
+    }
+
+
+async def run(
+    names: Optional[List[str]] = None, repeat: int = 5, scale: float = 1.0
+) -> Dict[str, Any]:
+    """
+    Run benchmarks.
+
+    Args:
+        names: Benchmarks to run (defaults to all)
+        repeat: Timed rounds per benchmark
+        scale: Factor applied to every benchmark's operations per round
+
+    Returns:
+        Results with the environment they were measured in
+    """
+    results = {}
+    for name in names if names is not None else list(BENCHMARKS):
+        results[name] = await run_benchmark(name, repeat, scale)
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "benchmarks": results,
+    }
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    Compare results against a baseline on median time per operation.
+
+    Args:
+        baseline: Stored results
+        current: New results
+        threshold: Relative slowdown flagged as a regression (0.1 = 10%)
+
+    Returns:
+        One row per benchmark with its status: ``regression``, ``improvement``,
+        ``unchanged``, ``new`` or ``missing``
+    """
+    rows = []
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    for name in list(old) + [n for n in new if n not in old]:
+        if name not in new:
+            rows.append({"name": name, "status": "missing", "baseline_us": old[name]["median_us"]})
+            continue
+        if name not in old:
+            rows.append({"name": name, "status": "new", "current_us": new[name]["median_us"]})
+            continue
+
+        before, after = old[name]["median_us"], new[name]["median_us"]
+        change = after / before - 1 if before else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        rows.append({
+            "name": name,
+            "status": status,
+            "baseline_us": before,
+            "current_us": after,
+            "change": round(change, 4),
+        })
+    return rows
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    """Format results as a table."""
+    lines = [
+        f"{'benchmark':<28} {'kind':<6} {'median us':>11} {'min us':>11} "
+        f"{'stdev us':>10} {'ops/s':>12}"
+    ]
+    for name, result in results["benchmarks"].items():
+        lines.append(
+            f"{name:<28} {result['kind']:<6} {result['median_us']:>11.3f} "
+            f"{result['min_us']:>11.3f} {result['stdev_us']:>10.3f} "
+            f"{result['ops_per_sec'] or 0:>12,.0f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    """Format a comparison as a table."""
+    lines = [f"{'benchmark':<28} {'baseline us':>12} {'current us':>12} {'change':>9}  status"]
+    for row in rows:
+        before = f"{row['baseline_us']:.3f}" if "baseline_us" in row else "-"
+        after = f"{row['current_us']:.3f}" if "current_us" in row else "-"
+        change = f"{row['change']:+.1%}" if "change" in row else "-"
+        lines.append(f"{row['name']:<28} {before:>12} {after:>12} {change:>9}  {row['status']}")
+    return "\n".join(lines)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    """
+    Command-line entry point.
+
+    Args:
+        args: Command line arguments (defaults to sys.argv[1:])
+
+    Returns:
+        Exit code (1 if a regression against the baseline was found)
+    """
+    parser = argparse.ArgumentParser(prog="aika bench", description="Run the Aika benchmark suite")
+    parser.add_argument(
+        "patterns", nargs="*", help="Benchmark name patterns, e.g. 'auth.*' (default: all)"
+    )
+    parser.add_argument(
+        "--kind", choices=("micro", "macro"), help="Only run micro- or macrobenchmarks"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Timed rounds per benchmark")
+    parser.add_argument(
+        "--quick", action="store_true", help="Run a tenth of the operations per round"
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against results stored in this file")
+    parser.add_argument("--results", help="Compare these stored results instead of running")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="Slowdown flagged as a regression"
+    )
+    parser.add_argument("--list", action="store_true", help="List the benchmarks and exit")
+    parsed = parser.parse_args(args)
+
+    names = select(parsed.patterns, parsed.kind)
+    if parsed.list:
+        for name in names:
+            kind, operations, function = BENCHMARKS[name]
+            print(f"{name:<28} {kind:<6} {function.__doc__}")
+        return 0
+    if not names and not parsed.results:
+        print("No benchmarks match")
+        return 1
+
+    if parsed.results:
+        with open(parsed.results) as f:
+            results = json.load(f)
+    else:
+        results = asyncio.run(run(names, parsed.repeat, 0.1 if parsed.quick else 1.0))
+        print(format_results(results))
+
+    if parsed.output:
+        with open(parsed.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {parsed.output}")
+
+    if parsed.baseline:
+        with open(parsed.baseline) as f:
+            baseline = json.load(f)
+        if not parsed.results:
+            # Only compare what was run
+            baseline["benchmarks"] = {n: r for n, r in baseline["benchmarks"].items() if n in names}
+        rows = compare(baseline, results, parsed.threshold)
+        print()
+        print(format_comparison(rows))
+        regressions = [row["name"] for row in rows if row["status"] == "regression"]
+        if regressions:
+            print(f"\nRegressions beyond {parsed.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
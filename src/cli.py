@@ -45,27 +45,116 @@ def main(args: Optional[List[str]] = None) -> int:
         action="store_true", 
         help="Enable auto-reload for development"
     )
+    start_parser.add_argument(
+        "--workers", 
+        type=str, 
+        default=None, 
+        help="Number of worker processes, or 'auto' for one per CPU (defaults to SERVER_WORKERS)"
+    )
+    start_parser.add_argument(
+        "--max-requests", 
+        type=int, 
+        default=None, 
+        help="Restart a worker after this many requests, 0 for never "
+        "(defaults to SERVER_MAX_REQUESTS)"
+    )
+    start_parser.add_argument(
+        "--max-requests-jitter", 
+        type=int, 
+        default=None, 
+        help="Random extra requests per worker before restarting "
+        "(defaults to SERVER_MAX_REQUESTS_JITTER)"
+    )
     
     # Version command
     version_parser = subparsers.add_parser("version", help="Show version information")
     
-    # Parse arguments
-    parsed_args = parser.parse_args(args)
+    # Startup profile command
+    startup_parser = subparsers.add_parser(
+        "startup-profile",
+        help="Report import time per module for a cold start"
+    )
+    startup_parser.add_argument(
+        "--module", 
+        type=str, 
+        default="src.api.main", 
+        help="Module to import"
+    )
+    startup_parser.add_argument(
+        "--top", 
+        type=int, 
+        default=20, 
+        help="Number of slowest modules to list"
+    )
+    startup_parser.add_argument(
+        "--json", 
+        action="store_true", 
+        help="Print the full report as JSON"
+    )
+    
+    # Bench command
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Run the benchmark suite (see 'aika bench --help')",
+        add_help=False
+    )
+    bench_parser.add_argument(
+        "bench_args", 
+        nargs=argparse.REMAINDER, 
+        help="Arguments for the benchmark suite"
+    )
+    
+    # Loadtest command
+    loadtest_parser = subparsers.add_parser(
+        "loadtest",
+        help="Replay a recorded request trace as load (see 'aika loadtest --help')",
+        add_help=False
+    )
+    loadtest_parser.add_argument(
+        "loadtest_args", 
+        nargs=argparse.REMAINDER, 
+        help="Arguments for the load generator"
+    )
+    
+    # Parse arguments (bench and loadtest pass their own through)
+    parsed_args, extra_args = parser.parse_known_args(args)
+    if extra_args and parsed_args.command not in ("bench", "loadtest"):
+        parser.error(f"unrecognized arguments: {' '.join(extra_args)}")
     
     # Handle commands
     if parsed_args.command == "start":
         return start_server(
             host=parsed_args.host,
             port=parsed_args.port,
-            reload=parsed_args.reload
+            reload=parsed_args.reload,
+            workers=parsed_args.workers,
+            max_requests=parsed_args.max_requests,
+            max_requests_jitter=parsed_args.max_requests_jitter
         )
     elif parsed_args.command == "version":
         return show_version()
+    elif parsed_args.command == "bench":
+        return run_benchmarks(parsed_args.bench_args + extra_args)
+    elif parsed_args.command == "loadtest":
+        return run_loadtest(parsed_args.loadtest_args + extra_args)
+    elif parsed_args.command == "startup-profile":
+        return show_startup_profile(
+            module=parsed_args.module,
+            top=parsed_args.top,
+            as_json=parsed_args.json
+        )
     else:
         parser.print_help()
         return 1
 
-def start_server(host: str, port: int, reload: bool) -> int:
+def start_server(
+    host: str,
+    port: int,
+    reload: bool,
+    workers: Optional[str] = None,
+    max_requests: Optional[int] = None,
+    max_requests_jitter: Optional[int] = None
+) -> int:
     """
     Start the Aika API server.
     
@@ -73,24 +162,32 @@ def start_server(host: str, port: int, reload: bool) -> int:
         host: Host to bind the server to
         port: Port to bind the server to
         reload: Whether to enable auto-reload
+        workers: Number of worker processes or 'auto'
+        max_requests: Requests after which a worker is restarted
+        max_requests_jitter: Random extra requests per worker before restarting
         
     Returns:
         Exit code
     """
+    import importlib.util
+    
+    if importlib.util.find_spec("uvicorn") is None:
+        print("Error: uvicorn is not installed. Please install it with 'pip install uvicorn'.")
+        return 1
+        
     try:
-        import uvicorn
-        print(f"Starting Aika API server on {host}:{port}")
-        uvicorn.run(
-            "src.api.main:app",
+        from src.api.server import build_config, run
+        config = build_config(
             host=host,
             port=port,
-            reload=reload,
-            log_level="info"
+            workers=workers,
+            max_requests=max_requests,
+            max_requests_jitter=max_requests_jitter,
+            reload=reload
         )
+        print(f"Starting Aika API server on {host}:{port} with {config.workers} worker(s)")
+        run(config)
         return 0
-    except ImportError:
-        print("Error: uvicorn is not installed. Please install it with 'pip install uvicorn'.")
-        return 1
     except Exception as e:
         print(f"Error starting server: {e}")
         return 1
@@ -106,5 +203,59 @@ def show_version() -> int:
     print(f"Aika AI System v{__version__}")
     return 0
 
+def show_startup_profile(module: str, top: int, as_json: bool) -> int:
+    """
+    Show how long a cold import of a module takes, per module.
+    
+    Args:
+        module: Module to import
+        top: Number of slowest modules to list
+        as_json: Whether to print the full report as JSON
+        
+    Returns:
+        Exit code
+    """
+    from src.utils.startup import format_report, profile_imports
+    
+    try:
+        report = profile_imports(module)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+        
+    if as_json:
+        import json
+        report["modules"] = [timing.to_dict() for timing in report["modules"]]
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report, top=top))
+    return 0
+
+def run_benchmarks(args: List[str]) -> int:
+    """
+    Run the benchmark suite.
+    
+    Args:
+        args: Arguments for the suite
+        
+    Returns:
+        Exit code (1 if a regression against the baseline was found)
+    """
+    from src.bench.suite import main as bench_main
+    return bench_main(args)
+
+def run_loadtest(args: List[str]) -> int:
+    """
+    Replay a request trace as load.
+    
+    Args:
+        args: Arguments for the load generator
+        
+    Returns:
+        Exit code (1 if the error rate exceeds the allowed maximum)
+    """
+    from src.bench.loadtest import main as loadtest_main
+    return loadtest_main(args)
+
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,367 @@
+"""
+Read-through query cache for the Aika AI System.
+
+Select results for near-static tables (agent configuration, user preferences,
+policy reference data) are cached in process, keyed on
+``(table, columns, filters, order, limit)``. Only tables with a configured
+TTL are cached. Entries are evicted least-recently-used once the cache is
+full, concurrent misses for the same key share a single load, and writes made
+through ``src.database.writes`` invalidate every entry for the table they
+touch. With a direct Postgres connection, invalidations can also be broadcast
+to other processes over ``LISTEN``/``NOTIFY``.
+
+Cached rows are shared between callers and must not be mutated.
+"""
+
+import asyncio
+import collections
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from ..utils.metrics import counter, gauge
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+CacheKey = Tuple[Hashable, ...]
+
+# Metrics
+CACHE_HITS = counter("aika_query_cache_hits_total", "Query cache hits", ["table"])
+CACHE_MISSES = counter("aika_query_cache_misses_total", "Query cache misses", ["table"])
+CACHE_EVICTIONS = counter(
+    "aika_query_cache_evictions_total", "Query cache entries evicted to make room"
+)
+gauge("aika_query_cache_entries", "Entries in the query cache").set_function(
+    lambda: _query_cache.get_stats()["entries"] if _query_cache is not None else 0
+)
+
+
+def parse_table_ttls(value: str) -> Dict[str, float]:
+    """
+    Parse per-table TTLs from a ``table:seconds`` comma-separated string.
+
+    Args:
+        value: String such as ``"agents:300,policies:600"``
+
+    Returns:
+        Mapping of table name to TTL in seconds
+    """
+    ttls = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        table, _, ttl = item.partition(":")
+        ttls[table.strip()] = float(ttl)
+    return ttls
+
+
+def _freeze(value: Any) -> Hashable:
+    """Convert filter values into a hashable form."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class QueryCache:
+    """
+    Size-bounded LRU cache of query results with per-table TTLs.
+    """
+
+    def __init__(self, table_ttls: Optional[Dict[str, float]] = None, max_entries: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            table_ttls: TTL in seconds for each cacheable table
+            max_entries: Maximum number of cached results
+        """
+        self.table_ttls = dict(table_ttls or {})
+        self.max_entries = max_entries
+
+        self._entries: "collections.OrderedDict[CacheKey, Tuple[float, str, Any]]" = (
+            collections.OrderedDict()
+        )
+        self._generations: Dict[str, int] = collections.defaultdict(int)
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._listener = None
+
+        # Metrics
+        self._hits: Dict[str, int] = collections.defaultdict(int)
+        self._misses: Dict[str, int] = collections.defaultdict(int)
+        self._coalesced = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        namespace: str = "rows",
+    ) -> CacheKey:
+        """
+        Build a cache key for a query.
+
+        Args:
+            table: Table name
+            columns: Columns selected
+            filters: Query filters
+            order: Order by clause
+            limit: Result limit
+            namespace: Distinguishes result representations for the same query
+
+        Returns:
+            Hashable cache key
+        """
+        return (namespace, table, columns, _freeze(filters or {}), order, limit)
+
+    @staticmethod
+    def make_query_key(query: Any) -> CacheKey:
+        """
+        Build a cache key for a ``Query``.
+
+        Args:
+            query: Query instance
+
+        Returns:
+            Hashable cache key
+        """
+        return ("query", query.table, query.shape(), _freeze(query.params()))
+
+    def is_cacheable(self, table: str) -> bool:
+        """
+        Check whether results for a table are cached.
+
+        Args:
+            table: Table name
+
+        Returns:
+            True if the table has a positive TTL
+        """
+        return self.table_ttls.get(table, 0) > 0
+
+    def get(self, key: CacheKey) -> Tuple[bool, Any]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Tuple of (found, value)
+        """
+        table = key[1]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, _, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits[table] += 1
+                    CACHE_HITS.labels(table).inc()
+                    return True, value
+                del self._entries[key]
+            self._misses[table] += 1
+            CACHE_MISSES.labels(table).inc()
+            return False, None
+
+    def generation(self, table: str) -> int:
+        """
+        Get a table's generation, which every invalidation advances.
+
+        Read it before loading and pass it to ``put`` so a result loaded
+        across an invalidation is not cached.
+
+        Args:
+            table: Table name
+
+        Returns:
+            Current generation
+        """
+        with self._lock:
+            return self._generations[table]
+
+    def put(self, key: CacheKey, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a result.
+
+        Args:
+            key: Cache key
+            value: Result to cache
+            generation: Table generation observed before loading; the value is
+                dropped if the table was invalidated since
+        """
+        table = key[1]
+        ttl = self.table_ttls.get(table, 0)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self._generations[table]:
+                return
+            self._entries[key] = (time.monotonic() + ttl, table, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+                CACHE_EVICTIONS.inc()
+
+    async def get_or_load(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return a cached result or load it, sharing one load between concurrent misses.
+
+        Args:
+            key: Cache key
+            loader: Coroutine function producing the result on a miss
+
+        Returns:
+            Query result
+        """
+        found, value = self.get(key)
+        if found:
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self._coalesced += 1
+            return await asyncio.shield(inflight)
+
+        generation = self.generation(key[1])
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            self.put(key, value, generation)
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, table: str) -> int:
+        """
+        Drop every cached result for a table.
+
+        Args:
+            table: Table name
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            self._generations[table] += 1
+            stale = [key for key, entry in self._entries.items() if entry[1] == table]
+            for key in stale:
+                del self._entries[key]
+            self._invalidations += 1
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop every cached result."""
+        with self._lock:
+            for table in list(self._generations):
+                self._generations[table] += 1
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics.
+
+        Returns:
+            Dictionary with overall and per-table hit rates
+        """
+        hits = sum(self._hits.values())
+        misses = sum(self._misses.values())
+        tables = {}
+        for table in set(self._hits) | set(self._misses):
+            table_total = self._hits[table] + self._misses[table]
+            tables[table] = {
+                "hits": self._hits[table],
+                "misses": self._misses[table],
+                "hit_rate": self._hits[table] / table_total if table_total else 0.0,
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "coalesced": self._coalesced,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+            "tables": tables,
+        }
+
+    async def start_listener(self, dsn: str, channel: str) -> None:
+        """
+        Invalidate entries when table names are published on a Postgres channel.
+
+        Args:
+            dsn: Postgres connection string
+            channel: ``LISTEN`` channel carrying table names as payloads
+        """
+        if self._listener is not None:
+            return
+
+        import asyncpg
+
+        def _on_notify(connection: Any, pid: int, channel: str, payload: str) -> None:
+            removed = self.invalidate(payload)
+            logger.debug(
+                "Invalidated %d cached results for '%s' from pid %s", removed, payload, pid
+            )
+
+        self._listener = await asyncpg.connect(dsn)
+        await self._listener.add_listener(channel, _on_notify)
+        logger.info(f"Listening for cache invalidations on channel '{channel}'")
+
+    async def stop_listener(self) -> None:
+        """Stop listening for invalidation notifications."""
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+
+# Singleton instance
+_query_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """
+    Get the query cache instance.
+
+    Returns:
+        Query cache instance
+    """
+    global _query_cache
+
+    if _query_cache is None:
+        _query_cache = QueryCache(
+            table_ttls=parse_table_ttls(settings.QUERY_CACHE_TABLES),
+            max_entries=settings.QUERY_CACHE_MAX_ENTRIES,
+        )
+
+    return _query_cache
@@ -1,26 +1,54 @@
 """
 Database connection utilities for the Aika AI System.
+
+``supabase`` is imported when the first client is created, not when this
+module is imported.
 """
 
+import asyncio
 import os
-from typing import Any, Dict, Optional
-
-from supabase import Client, create_client
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from ..utils.config import get_settings
+from ..utils.config import lazy_settings
 from ..utils.logging import get_logger
+from ..utils.metrics import gauge
+from .cache import get_query_cache
+from .pool import QUERY_ERRORS, QUERY_SECONDS, DatabasePool, PostgresPool, SupabasePool
+from .query import Query
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 # Get logger
 logger = get_logger(__name__)
 
 # Get settings
-settings = get_settings()
+settings = lazy_settings()
 
 # Supabase client instance
-_supabase_client: Optional[Client] = None
+_supabase_client: Optional["Client"] = None
+
+# Async database pool instance
+_database_pool: Optional[DatabasePool] = None
+_database_pool_lock: Optional[asyncio.Lock] = None
+
+
+def _pool_stat(name: str) -> float:
+    """Read a statistic of the async database pool, if it is open."""
+    return _database_pool.get_stats()[name] if _database_pool is not None else 0
 
 
-def get_supabase_client() -> Client:
+# Metrics
+gauge("aika_db_pool_in_use", "Database connections checked out").set_function(
+    lambda: _pool_stat("in_use")
+)
+gauge("aika_db_pool_waiting", "Tasks waiting for a database connection").set_function(
+    lambda: _pool_stat("waiting")
+)
+
+
+def get_supabase_client() -> "Client":
     """
     Get the Supabase client instance.
     
@@ -30,6 +58,8 @@ def get_supabase_client() -> Client:
     global _supabase_client
     
     if _supabase_client is None:
+        from supabase import create_client
+        
         try:
             url = settings.SUPABASE_URL
             key = settings.SUPABASE_SERVICE_KEY
@@ -70,6 +100,18 @@ def execute_query(
     
     try:
         if query_type == "select":
+            cache = get_query_cache()
+            cache_key = None
+            generation = None
+            if cache.is_cacheable(table):
+                cache_key = cache.make_key(
+                    table, columns, filters, order, limit, namespace="response"
+                )
+                found, cached = cache.get(cache_key)
+                if found:
+                    return cached
+                generation = cache.generation(table)
+
             query = client.table(table).select(columns)
             
             if filters:
@@ -82,10 +124,198 @@ def execute_query(
             if limit:
                 query = query.limit(limit)
                 
-            return query.execute()
+            started = time.perf_counter()
+            result = query.execute()
+            QUERY_SECONDS.labels("supabase_sync").observe(time.perf_counter() - started)
+
+            if cache_key is not None:
+                cache.put(cache_key, result, generation)
+
+            return result
         else:
             # Other query types will be implemented as needed
             raise NotImplementedError(f"Query type '{query_type}' not implemented")
+    except Exception as e:
+        QUERY_ERRORS.labels("supabase_sync", "error").inc()
+        logger.error(f"Database query error: {e}")
+        raise
+
+
+def create_database_pool() -> DatabasePool:
+    """
+    Create a database pool from the application settings.
+
+    A direct Postgres pool is used when ``DATABASE_URL`` is set, otherwise the
+    pool wraps Supabase REST clients.
+
+    Returns:
+        Unopened database pool
+    """
+    options = {
+        "min_size": settings.DB_POOL_MIN_SIZE,
+        "max_size": settings.DB_POOL_MAX_SIZE,
+        "query_timeout": settings.DB_QUERY_TIMEOUT,
+        "acquire_timeout": settings.DB_POOL_ACQUIRE_TIMEOUT,
+    }
+
+    if settings.DATABASE_URL:
+        return PostgresPool(settings.DATABASE_URL, **options)
+
+    return SupabasePool(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_KEY,
+        **options,
+    )
+
+
+async def get_database_pool() -> DatabasePool:
+    """
+    Get the async database pool instance, opening it on first use.
+
+    Returns:
+        Database pool
+    """
+    global _database_pool, _database_pool_lock
+
+    if _database_pool is not None:
+        return _database_pool
+
+    if _database_pool_lock is None:
+        _database_pool_lock = asyncio.Lock()
+
+    async with _database_pool_lock:
+        if _database_pool is None:
+            try:
+                pool = create_database_pool()
+                logger.info(f"Initializing {pool.backend} database pool")
+                await pool.open()
+                _database_pool = pool
+
+                if settings.DATABASE_URL and settings.QUERY_CACHE_NOTIFY_CHANNEL:
+                    await get_query_cache().start_listener(
+                        settings.DATABASE_URL, settings.QUERY_CACHE_NOTIFY_CHANNEL
+                    )
+                logger.info("Database pool initialized successfully")
+            except Exception as e:
+                logger.error(f"Failed to initialize database pool: {e}")
+                raise
+
+    return _database_pool
+
+
+async def close_database_pool() -> None:
+    """Close the async database pool if it is open."""
+    global _database_pool
+
+    if _database_pool is not None:
+        await get_query_cache().stop_listener()
+        await _database_pool.close()
+        _database_pool = None
+
+
+async def execute_query_async(
+    table: str,
+    query_type: str = "select",
+    columns: str = "*",
+    filters: Optional[Dict[str, Any]] = None,
+    limit: Optional[int] = None,
+    order: Optional[str] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Execute a query on the specified table without blocking the event loop.
+
+    Args:
+        table: Table name
+        query_type: Query type (select)
+        columns: Columns to select
+        filters: Query filters
+        limit: Result limit
+        order: Order by clause
+        timeout: Per-query timeout in seconds (defaults to settings.DB_QUERY_TIMEOUT)
+        use_cache: Read through the query cache for tables with a configured TTL
+
+    Returns:
+        List of result rows (shared with the cache for cached tables; do not mutate)
+
+    Raises:
+        QueryTimeoutError: If the query does not finish within the timeout
+    """
+    pool = await get_database_pool()
+
+    try:
+        if query_type == "select":
+
+            async def _load() -> List[Dict[str, Any]]:
+                return await pool.select(
+                    table,
+                    columns=columns,
+                    filters=filters,
+                    order=order,
+                    limit=limit,
+                    timeout=timeout,
+                )
+
+            cache = get_query_cache()
+            if use_cache and cache.is_cacheable(table):
+                return await cache.get_or_load(
+                    cache.make_key(table, columns, filters, order, limit), _load
+                )
+
+            return await _load()
+        else:
+            # Other query types will be implemented as needed
+            raise NotImplementedError(f"Query type '{query_type}' not implemented")
+    except Exception as e:
+        logger.error(f"Database query error: {e}")
+        raise
+
+
+async def run_query(query: Query, timeout: Optional[float] = None, use_cache: bool = True) -> Any:
+    """
+    Run a ``Query`` without blocking the event loop.
+
+    Filters, projection, ordering and counting are all evaluated server-side.
+
+    Args:
+        query: Query to run
+        timeout: Per-query timeout in seconds (defaults to settings.DB_QUERY_TIMEOUT)
+        use_cache: Read through the query cache for tables with a configured TTL
+
+    Returns:
+        List of result rows, or the row count for count-only queries
+    """
+    pool = await get_database_pool()
+
+    try:
+        cache = get_query_cache()
+        if use_cache and cache.is_cacheable(query.table):
+            return await cache.get_or_load(
+                cache.make_query_key(query), lambda: pool.run_query(query, timeout=timeout)
+            )
+
+        return await pool.run_query(query, timeout=timeout)
+    except Exception as e:
+        logger.error(f"Database query error: {e}")
+        raise
+
+
+def run_query_sync(query: Query) -> Any:
+    """
+    Run a ``Query`` with the synchronous Supabase client.
+
+    Args:
+        query: Query to run
+
+    Returns:
+        List of result rows, or the row count for count-only queries
+    """
+    client = get_supabase_client()
+
+    try:
+        response = query.apply(client).execute()
+        return response.count if query.count_mode else response.data
     except Exception as e:
         logger.error(f"Database query error: {e}")
         raise
@@ -0,0 +1,385 @@
+"""
+Windowed conversation history for the Aika AI System.
+
+``Conversation.messages`` holds every message of a conversation. For long
+chats ``ConversationHistory`` is used instead: it keeps only the most recent
+messages that fit a message count and token budget, pages older messages in
+from the database on demand, and folds messages that fall out of the window
+into a rolling summary so that the context they carried is not lost.
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from ..agents.llm import LLMClient, get_llm_client
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from .connection import run_query
+from .models import Message
+from .pool import DatabasePool
+from .query import Query
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text.
+
+    Uses the common approximation of four characters per token, which is
+    close enough for budgeting without calling a tokenizer.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    return len(text) // 4 + 1
+
+
+def format_transcript(messages: Sequence[Message]) -> str:
+    """
+    Format messages as a plain-text transcript.
+
+    Args:
+        messages: Messages in chronological order
+
+    Returns:
+        One ``sender_type: content`` line per message
+    """
+    return "\n".join(f"{m.sender_type}: {m.content}" for m in messages)
+
+
+class Summarizer(ABC):
+    """
+    Folds evicted messages into a rolling summary.
+    """
+
+    @abstractmethod
+    async def summarize(self, summary: Optional[str], messages: Sequence[Message]) -> str:
+        """
+        Produce an updated summary.
+
+        Args:
+            summary: Current summary, if any
+            messages: Messages leaving the window, in chronological order
+
+        Returns:
+            New summary covering both
+        """
+        pass
+
+
+class TruncatingSummarizer(Summarizer):
+    """
+    Summarizer that keeps the tail of the transcript, without calling a model.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None):
+        """
+        Initialize the summarizer.
+
+        Args:
+            max_tokens: Summary size cap (defaults to settings.HISTORY_SUMMARY_MAX_TOKENS)
+        """
+        self.max_chars = (max_tokens or settings.HISTORY_SUMMARY_MAX_TOKENS) * 4
+
+    async def summarize(self, summary: Optional[str], messages: Sequence[Message]) -> str:
+        text = "\n".join(filter(None, [summary, format_transcript(messages)]))
+        return text[-self.max_chars:]
+
+
+class ModelSummarizer(Summarizer):
+    """
+    Summarizer backed by the configured summarizer model, called through the
+    shared LLM client.
+    """
+
+    PROMPT = (
+        "Update the running summary of a conversation with the new messages below. "
+        "Keep facts, decisions, open questions and user preferences; drop small talk. "
+        "Reply with the updated summary only.\n\n"
+        "Current summary:\n{summary}\n\nNew messages:\n{transcript}"
+    )
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        max_tokens: Optional[int] = None,
+        client: Optional[LLMClient] = None,
+        fallback: Optional[Summarizer] = None,
+    ):
+        """
+        Initialize the summarizer.
+
+        Args:
+            model: Model name (defaults to settings.SUMMARIZER_MODEL)
+            max_tokens: Summary size cap (defaults to settings.HISTORY_SUMMARY_MAX_TOKENS)
+            client: LLM client (defaults to the shared one)
+            fallback: Summarizer used when the model call fails
+        """
+        self.model = model or settings.SUMMARIZER_MODEL
+        self.max_tokens = max_tokens or settings.HISTORY_SUMMARY_MAX_TOKENS
+        self.fallback = fallback or TruncatingSummarizer(self.max_tokens)
+        self._client = client
+
+    async def summarize(self, summary: Optional[str], messages: Sequence[Message]) -> str:
+        prompt = self.PROMPT.format(
+            summary=summary or "(none)", transcript=format_transcript(messages)
+        )
+        try:
+            response = await (self._client or get_llm_client()).create_message(
+                model=self.model,
+                max_tokens=self.max_tokens,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return response.text
+        except Exception as e:
+            logger.warning(f"Summarizer model call failed, truncating instead: {e}")
+            return await self.fallback.summarize(summary, messages)
+
+
+class HistoryContext(BaseModel):
+    """Context handed to an agent for a conversation."""
+    summary: Optional[str] = None
+    messages: List[Message] = []
+    tokens: int = 0
+    has_older: bool = False
+
+    def to_prompt_messages(self) -> List[Dict[str, str]]:
+        """
+        Convert to chat-completion messages, with the summary first.
+
+        Returns:
+            List of ``{"role", "content"}`` dictionaries
+        """
+        prompt = []
+        if self.summary:
+            prompt.append(
+                {"role": "user", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+            )
+        for message in self.messages:
+            role = "user" if message.sender_type == "user" else "assistant"
+            prompt.append({"role": role, "content": message.content})
+        return prompt
+
+
+class ConversationHistory:
+    """
+    Bounded window over a conversation's messages with a rolling summary.
+    """
+
+    def __init__(
+        self,
+        conversation_id: UUID,
+        max_messages: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+        page_size: Optional[int] = None,
+        summarizer: Optional[Summarizer] = None,
+        summary: Optional[str] = None,
+        table: str = "messages",
+        pool: Optional[DatabasePool] = None,
+    ):
+        """
+        Initialize the history.
+
+        Args:
+            conversation_id: Conversation ID
+            max_messages: Messages kept in the window (defaults to settings.HISTORY_MAX_MESSAGES)
+            max_tokens: Token budget of the window (defaults to settings.HISTORY_MAX_TOKENS)
+            page_size: Messages per page when paging older history
+                (defaults to settings.HISTORY_PAGE_SIZE)
+            summarizer: Summarizer for evicted messages (defaults to ``ModelSummarizer``)
+            summary: Previously stored summary to continue from
+            table: Messages table
+            pool: Database pool (defaults to the shared pool)
+        """
+        self.conversation_id = conversation_id
+        self.max_messages = max_messages or settings.HISTORY_MAX_MESSAGES
+        self.max_tokens = max_tokens or settings.HISTORY_MAX_TOKENS
+        self.page_size = page_size or settings.HISTORY_PAGE_SIZE
+        self.summarizer = summarizer or ModelSummarizer()
+        self.summary = summary
+        self.table = table
+        self.pool = pool
+
+        self._window: Deque[Message] = deque()
+        self._window_tokens: Deque[int] = deque()
+        self._tokens = 0
+        self._evicted: List[Message] = []
+        self._summary_lock = asyncio.Lock()
+
+        # Keyset cursor for paging older messages
+        self._oldest: Optional[Message] = None
+        self._has_older = True
+
+    @property
+    def messages(self) -> List[Message]:
+        """Messages currently in the window, oldest first."""
+        return list(self._window)
+
+    @property
+    def tokens(self) -> int:
+        """Estimated tokens in the window."""
+        return self._tokens
+
+    @property
+    def has_older(self) -> bool:
+        """Whether older messages may exist in the database."""
+        return self._has_older
+
+    async def _fetch_page(self, before: Optional[Message], limit: int) -> List[Message]:
+        """Fetch up to ``limit`` messages older than ``before``, newest first."""
+        query = (
+            Query(self.table)
+            .eq("conversation_id", str(self.conversation_id))
+            .order_by("created_at", desc=True)
+            .order_by("id", desc=True)
+            .limit(limit)
+        )
+        if before is not None:
+            # Messages can share a timestamp, so the id breaks ties
+            query.row_lt(("created_at", "id"), (before.created_at, before.id))
+
+        if self.pool is not None:
+            rows = await self.pool.run_query(query)
+        else:
+            rows = await run_query(query, use_cache=False)
+        return [Message.trusted(row) for row in rows]
+
+    async def load(self) -> "ConversationHistory":
+        """
+        Load the most recent messages that fit the window.
+
+        Returns:
+            This history
+        """
+        page = await self._fetch_page(None, self.max_messages)
+        self._has_older = len(page) == self.max_messages
+
+        # Walk back from the newest message until the token budget is spent
+        kept: List[Message] = []
+        tokens = 0
+        for message in page:
+            cost = estimate_tokens(message.content)
+            if kept and tokens + cost > self.max_tokens:
+                self._has_older = True
+                break
+            kept.append(message)
+            tokens += cost
+
+        self._window.clear()
+        self._window_tokens.clear()
+        self._tokens = 0
+        for message in reversed(kept):
+            self._push(message)
+        self._oldest = kept[-1] if kept else None
+
+        logger.debug(
+            "Loaded %d messages (%d tokens) of conversation %s",
+            len(kept),
+            tokens,
+            self.conversation_id,
+        )
+        return self
+
+    def _push(self, message: Message) -> None:
+        """Append a message to the window without enforcing limits."""
+        cost = estimate_tokens(message.content)
+        self._window.append(message)
+        self._window_tokens.append(cost)
+        self._tokens += cost
+
+    def add(self, message: Message) -> None:
+        """
+        Add a new message, evicting the oldest ones beyond the window limits.
+
+        Evicted messages are summarized on the next ``summarize`` or
+        ``get_context`` call.
+
+        Args:
+            message: New message
+        """
+        self._push(message)
+        if self._oldest is None:
+            self._oldest = message
+
+        while len(self._window) > 1 and (
+            len(self._window) > self.max_messages or self._tokens > self.max_tokens
+        ):
+            self._evicted.append(self._window.popleft())
+            self._tokens -= self._window_tokens.popleft()
+
+    async def summarize(self) -> Optional[str]:
+        """
+        Fold evicted messages into the rolling summary.
+
+        Returns:
+            Current summary
+        """
+        async with self._summary_lock:
+            if self._evicted:
+                evicted, self._evicted = self._evicted, []
+                self.summary = await self.summarizer.summarize(self.summary, evicted)
+        return self.summary
+
+    async def get_context(self) -> HistoryContext:
+        """
+        Get the summary and window for an agent request.
+
+        Returns:
+            History context
+        """
+        summary = await self.summarize()
+        return HistoryContext(
+            summary=summary,
+            messages=list(self._window),
+            tokens=self._tokens + (estimate_tokens(summary) if summary else 0),
+            has_older=self._has_older,
+        )
+
+    async def load_older(self, limit: Optional[int] = None) -> List[Message]:
+        """
+        Page in messages older than any loaded so far.
+
+        The messages are returned to the caller and do not enter the window.
+
+        Args:
+            limit: Maximum messages to fetch (defaults to the page size)
+
+        Returns:
+            Older messages, oldest first (empty when the start is reached)
+        """
+        if not self._has_older or self._oldest is None:
+            return []
+
+        limit = limit or self.page_size
+        page = await self._fetch_page(self._oldest, limit)
+        self._has_older = len(page) == limit
+        if page:
+            self._oldest = page[-1]
+        return list(reversed(page))
+
+
+async def get_conversation_history(conversation_id: UUID, **kwargs: Any) -> ConversationHistory:
+    """
+    Load the windowed history of a conversation.
+
+    Args:
+        conversation_id: Conversation ID
+        **kwargs: Options forwarded to ``ConversationHistory``
+
+    Returns:
+        Loaded conversation history
+    """
+    return await ConversationHistory(conversation_id, **kwargs).load()
@@ -0,0 +1,339 @@
+"""
+Knowledge store for the Aika AI System.
+
+Embeddings live in a pgvector-enabled table::
+
+    CREATE TABLE knowledge (
+        id text PRIMARY KEY,
+        content text NOT NULL,
+        metadata jsonb NOT NULL DEFAULT '{}',
+        embedding vector(1536) NOT NULL
+    );
+    CREATE INDEX ON knowledge USING hnsw (embedding vector_cosine_ops);
+
+Top-k search runs server-side. On a direct Postgres connection a batch of
+query vectors is answered in a single round trip with a ``LATERAL`` join;
+through the Supabase REST API each query calls the ``match_knowledge``
+function (``query_embedding vector, match_count int, filter jsonb``
+returning ``id, content, metadata, similarity``). When
+``KNOWLEDGE_INDEX_PATH`` is set, searches use a memory-mapped
+``LocalVectorIndex`` instead, for offline and development use.
+
+Metadata filters mean the same on every backend: each key must equal the
+given value or, for a list, tuple or set, any of its members. The
+``filter`` argument of ``match_knowledge`` maps each key to the list of
+accepted values (see ``accepted_values``) and is applied as::
+
+    WHERE NOT EXISTS (
+        SELECT 1 FROM jsonb_each(filter) f
+        WHERE NOT f.value @> jsonb_build_array(metadata -> f.key)
+    )
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from .connection import get_database_pool
+from .pool import DatabasePool, PostgresPool
+from .query import quote_ident
+from .vector_index import LocalVectorIndex
+from .writes import BulkWriteResult, bulk_upsert_rows
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+
+class KnowledgeItem(BaseModel):
+    """A document chunk and its embedding."""
+    id: str
+    content: str
+    embedding: List[float]
+    metadata: Dict[str, Any] = {}
+
+
+class KnowledgeMatch(BaseModel):
+    """A search result."""
+    id: str
+    score: float
+    content: Optional[str] = None
+    metadata: Dict[str, Any] = {}
+
+
+def vector_literal(embedding: Any) -> str:
+    """
+    Format an embedding in pgvector's text representation.
+
+    pgvector accepts ``'[x,y,...]'`` for ``vector`` columns and parameters
+    both over the REST API and from asyncpg, so no type codec is needed.
+
+    Args:
+        embedding: Sequence or array of floats
+
+    Returns:
+        Vector literal
+    """
+    return "[" + ",".join(map(str, np.asarray(embedding, dtype=np.float32).tolist())) + "]"
+
+
+def split_filters(filters: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, List[Any]]]:
+    """
+    Split metadata filters into equality and match-any filters.
+
+    Args:
+        filters: Metadata filters; a list, tuple or set value matches any of its members
+
+    Returns:
+        Tuple of single-value filters and accepted values by key for the others
+    """
+    equal: Dict[str, Any] = {}
+    any_of: Dict[str, List[Any]] = {}
+    for key, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            any_of[key] = list(value)
+        else:
+            equal[key] = value
+    return equal, any_of
+
+
+def accepted_values(filters: Optional[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    """
+    Convert metadata filters to the accepted values of each key.
+
+    Args:
+        filters: Metadata filters; a list, tuple or set value matches any of its members
+
+    Returns:
+        Accepted values by key
+    """
+    equal, any_of = split_filters(filters)
+    return {**{key: [value] for key, value in equal.items()}, **any_of}
+
+
+def _search_sql(table: str) -> str:
+    """Build the batched top-k statement for a direct Postgres connection."""
+    table = quote_ident(table)
+    # Single values use containment, which a GIN index on metadata serves
+    return (
+        "SELECT q.ord - 1 AS query_index, m.id, m.content, m.metadata, 1 - m.distance AS score "
+        "FROM unnest($1::text[]) WITH ORDINALITY AS q(embedding, ord) "
+        "CROSS JOIN LATERAL ("
+        'SELECT k."id", k."content", k."metadata", '
+        'k."embedding" <=> q.embedding::vector AS distance '
+        f'FROM {table} k WHERE k."metadata" @> $2::jsonb '
+        "AND NOT EXISTS (SELECT 1 FROM jsonb_each($4::jsonb) f "
+        'WHERE NOT f.value @> jsonb_build_array(k."metadata" -> f.key)) '
+        'ORDER BY k."embedding" <=> q.embedding::vector LIMIT $3'
+        ") m ORDER BY q.ord, m.distance"
+    )
+
+
+async def upsert_embeddings(
+    items: Sequence[KnowledgeItem],
+    table: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Insert or replace embeddings in batches.
+
+    Args:
+        items: Knowledge items to store
+        table: Table name (defaults to settings.KNOWLEDGE_TABLE)
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    table = table or settings.KNOWLEDGE_TABLE
+    is_postgres = isinstance(pool, PostgresPool)
+
+    rows = [
+        {
+            "id": item.id,
+            "content": item.content,
+            "metadata": json.dumps(item.metadata) if is_postgres else item.metadata,
+            "embedding": vector_literal(item.embedding),
+        }
+        for item in items
+    ]
+    return await bulk_upsert_rows(rows, table, batch_size=batch_size, timeout=timeout, pool=pool)
+
+
+async def search_knowledge(
+    embedding: Any,
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    table: Optional[str] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+    index: Optional[LocalVectorIndex] = None,
+) -> List[KnowledgeMatch]:
+    """
+    Find the items most similar to an embedding.
+
+    Args:
+        embedding: Query embedding
+        k: Number of results
+        filters: Metadata filters applied before ranking (see ``search_knowledge_batch``)
+        table: Table name (defaults to settings.KNOWLEDGE_TABLE)
+        timeout: Query timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+        index: Local index to search instead of the database
+
+    Returns:
+        Matches, most similar first
+    """
+    results = await search_knowledge_batch([embedding], k, filters, table, timeout, pool, index)
+    return results[0]
+
+
+async def search_knowledge_batch(
+    embeddings: Sequence[Any],
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    table: Optional[str] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+    index: Optional[LocalVectorIndex] = None,
+) -> List[List[KnowledgeMatch]]:
+    """
+    Find the items most similar to each of a batch of embeddings.
+
+    Args:
+        embeddings: Query embeddings
+        k: Number of results per query
+        filters: Metadata filters applied before ranking; a list, tuple or
+            set value matches any of its members
+        table: Table name (defaults to settings.KNOWLEDGE_TABLE)
+        timeout: Query timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+        index: Local index to search instead of the database (defaults to
+            the index at settings.KNOWLEDGE_INDEX_PATH, if set)
+
+    Returns:
+        Matches per query, most similar first
+    """
+    if len(embeddings) == 0:
+        return []
+
+    if index is None and pool is None:
+        index = get_local_index()
+    if index is not None:
+        return search_local(index, embeddings, k, filters)
+
+    pool = pool or await get_database_pool()
+    table = table or settings.KNOWLEDGE_TABLE
+    literals = [vector_literal(e) for e in embeddings]
+
+    if isinstance(pool, PostgresPool):
+        equal, any_of = split_filters(filters)
+        rows = await pool.fetch(
+            _search_sql(table), literals, json.dumps(equal), k, json.dumps(any_of), timeout=timeout
+        )
+        results: List[List[KnowledgeMatch]] = [[] for _ in literals]
+        for row in rows:
+            metadata = row["metadata"]
+            results[row["query_index"]].append(KnowledgeMatch(
+                id=row["id"],
+                score=row["score"],
+                content=row["content"],
+                metadata=json.loads(metadata) if isinstance(metadata, str) else metadata or {},
+            ))
+        return results
+
+    def _match(client: Any) -> List[List[Dict[str, Any]]]:
+        return [
+            client.rpc(
+                settings.KNOWLEDGE_MATCH_FUNCTION,
+                {"query_embedding": literal, "match_count": k, "filter": accepted_values(filters)},
+            ).execute().data
+            for literal in literals
+        ]
+
+    responses = await pool.run(_match, timeout=timeout)
+    return [
+        [
+            KnowledgeMatch(
+                id=row["id"],
+                score=row["similarity"],
+                content=row.get("content"),
+                metadata=row.get("metadata") or {},
+            )
+            for row in data
+        ]
+        for data in responses
+    ]
+
+
+def search_local(
+    index: LocalVectorIndex,
+    embeddings: Sequence[Any],
+    k: int = 5,
+    filters: Optional[Dict[str, Any]] = None,
+    nprobe: Optional[int] = None,
+) -> List[List[KnowledgeMatch]]:
+    """
+    Search a local vector index.
+
+    Item content is returned when it was stored under the ``content``
+    metadata key.
+
+    Args:
+        index: Local index
+        embeddings: Query embeddings
+        k: Number of results per query
+        filters: Metadata filters applied before ranking (see ``search_knowledge_batch``)
+        nprobe: Inverted lists scanned per query (defaults to settings.KNOWLEDGE_NPROBE)
+
+    Returns:
+        Matches per query, most similar first
+    """
+    scores, rows = index.search(embeddings, k, filters, nprobe or settings.KNOWLEDGE_NPROBE)
+    ids = index.ids
+
+    results = []
+    for query_scores, query_rows in zip(scores, rows):
+        matches = []
+        for score, row in zip(query_scores, query_rows):
+            if row < 0:
+                break
+            metadata = index.metadata(row)
+            matches.append(KnowledgeMatch(
+                id=str(ids[row]),
+                score=float(score),
+                content=metadata.pop("content", None),
+                metadata=metadata,
+            ))
+        results.append(matches)
+    return results
+
+
+# Singleton instance
+_local_index: Optional[LocalVectorIndex] = None
+
+
+def get_local_index() -> Optional[LocalVectorIndex]:
+    """
+    Get the local vector index configured by settings.KNOWLEDGE_INDEX_PATH.
+
+    Returns:
+        Memory-mapped local index, or None if no index path is configured
+    """
+    global _local_index
+
+    if _local_index is None and settings.KNOWLEDGE_INDEX_PATH:
+        _local_index = LocalVectorIndex.load(settings.KNOWLEDGE_INDEX_PATH, mmap=True)
+
+    return _local_index
@@ -1,13 +1,125 @@
 """
 Database models for the Aika AI System.
+
+Models are validated where data enters the system (API requests, Kafka
+messages). Data read back from our own database or write-ahead log is
+trusted and can be built with ``trusted``, which skips validation and only
+performs cheap type coercions. ``MessageRecord`` is a compact tuple-backed
+form of ``Message`` for high-volume streams.
 """
 
+import json
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel, Field
+from pydantic.fields import SHAPE_LIST, ModelField
+
+ModelT = TypeVar("ModelT", bound="TrustedModel")
+
+# Per-model field converters used by ``TrustedModel.trusted``
+_CONVERTERS: Dict[type, Dict[str, Optional[Callable[[Any], Any]]]] = {}
+
+
+def _to_uuid(value: Any) -> Any:
+    return UUID(value) if isinstance(value, str) else value
+
+
+def _to_uuid_or_str(value: Any) -> Any:
+    if isinstance(value, str) and len(value) == 36:
+        try:
+            return UUID(value)
+        except ValueError:
+            pass
+    return value
+
+
+def _to_datetime(value: Any) -> Any:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _to_dict(value: Any) -> Any:
+    # asyncpg returns json/jsonb columns as text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def _field_converter(field: ModelField) -> Optional[Callable[[Any], Any]]:
+    """Pick the coercion for a field, or None if values are used as-is."""
+    type_ = field.type_
+
+    if field.shape == SHAPE_LIST:
+        if isinstance(type_, type) and issubclass(type_, TrustedModel):
+            return lambda values: [type_.trusted(v) if isinstance(v, dict) else v for v in values]
+        return None
+    if get_origin(type_) is Union:
+        return _to_uuid_or_str if UUID in get_args(type_) else None
+    if type_ is UUID:
+        return _to_uuid
+    if type_ is datetime:
+        return _to_datetime
+    if type_ is dict:
+        return _to_dict
+    if isinstance(type_, type) and issubclass(type_, Enum):
+        return type_
+    return None
+
+
+class TrustedModel(BaseModel):
+    """Base model with a validation-free construction path for trusted data."""
+
+    @classmethod
+    def trusted(cls: Type[ModelT], data: Dict[str, Any]) -> ModelT:
+        """
+        Build an instance from trusted data without validating it.
+
+        ISO strings are converted to ``UUID``/``datetime``, enum values to
+        enums, JSON text to dicts and nested dicts to models; everything else
+        is used as-is. Unknown keys are ignored and missing fields get their
+        defaults. Never use this for data from outside the system.
+
+        Args:
+            data: Field values, e.g. a database row
+
+        Returns:
+            Model instance
+        """
+        converters = _CONVERTERS.get(cls)
+        if converters is None:
+            converters = _CONVERTERS[cls] = {
+                name: _field_converter(field) for name, field in cls.__fields__.items()
+            }
+
+        values = {}
+        fields_set = set()
+        for name, convert in converters.items():
+            if name in data:
+                value = data[name]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                values[name] = value
+                fields_set.add(name)
+            else:
+                values[name] = cls.__fields__[name].get_default()
+
+        # Equivalent to ``construct`` without its per-call overhead
+        instance = cls.__new__(cls)
+        object.__setattr__(instance, "__dict__", values)
+        object.__setattr__(instance, "__fields_set__", fields_set)
+        return instance
 
 
 class AgentType(str, Enum):
@@ -30,7 +142,7 @@ class AgentStatus(str, Enum):
     DEPRECATED = "deprecated"
 
 
-class Agent(BaseModel):
+class Agent(TrustedModel):
     """Agent model."""
     id: UUID = Field(default_factory=uuid4)
     name: str
@@ -50,7 +162,7 @@ class ConversationStatus(str, Enum):
     FAILED = "failed"
 
 
-class Message(BaseModel):
+class Message(TrustedModel):
     """Message model."""
     id: UUID = Field(default_factory=uuid4)
     conversation_id: UUID
@@ -61,7 +173,7 @@ class Message(BaseModel):
     metadata: Optional[dict] = None
 
 
-class Conversation(BaseModel):
+class Conversation(TrustedModel):
     """Conversation model."""
     id: UUID = Field(default_factory=uuid4)
     user_id: UUID
@@ -72,7 +184,7 @@ class Conversation(BaseModel):
     messages: List[Message] = []
 
 
-class User(BaseModel):
+class User(TrustedModel):
     """User model."""
     id: UUID = Field(default_factory=uuid4)
     email: str
@@ -80,3 +192,71 @@ class User(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     preferences: Optional[dict] = None
+
+
+class MessageRecord(NamedTuple):
+    """
+    Compact, immutable form of ``Message`` for high-volume streams.
+
+    A tuple with no per-instance ``__dict__`` takes a fraction of the memory
+    of a model instance and is much cheaper to create.
+    """
+    id: UUID
+    conversation_id: UUID
+    sender_id: Union[UUID, str]
+    sender_type: str
+    content: str
+    created_at: datetime
+    metadata: Optional[dict] = None
+
+    @classmethod
+    def trusted(cls, data: Dict[str, Any]) -> "MessageRecord":
+        """
+        Build a record from trusted data without validating it.
+
+        Args:
+            data: Field values, e.g. a database row
+
+        Returns:
+            Message record
+        """
+        metadata = data.get("metadata")
+        return cls(
+            _to_uuid(data["id"]),
+            _to_uuid(data["conversation_id"]),
+            _to_uuid_or_str(data["sender_id"]),
+            data["sender_type"],
+            data["content"],
+            _to_datetime(data["created_at"]),
+            _to_dict(metadata) if metadata is not None else None,
+        )
+
+    @classmethod
+    def from_message(cls, message: Message) -> "MessageRecord":
+        """
+        Convert a message model to a record.
+
+        Args:
+            message: Message model
+
+        Returns:
+            Message record
+        """
+        return cls(
+            message.id,
+            message.conversation_id,
+            message.sender_id,
+            message.sender_type,
+            message.content,
+            message.created_at,
+            message.metadata,
+        )
+
+    def to_message(self) -> Message:
+        """
+        Convert the record to a message model without re-validating it.
+
+        Returns:
+            Message model
+        """
+        return Message.construct(**self._asdict())
@@ -0,0 +1,541 @@
+"""
+Async connection pooling for the Aika AI System database layer.
+
+Two backends are provided:
+
+- ``PostgresPool`` talks to Postgres directly (e.g. the pgvector-enabled
+  ``db`` service from docker-compose) through an ``asyncpg`` pool.
+- ``SupabasePool`` keeps a fixed set of Supabase REST clients and runs their
+  blocking calls on a dedicated thread pool so the event loop never waits on
+  an HTTP round trip.
+
+Both backends enforce per-query timeouts, expose utilization statistics
+through ``get_stats`` and trace every query as a ``db.query`` span.
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
+from ..utils.tracing import start_span
+from .query import Query
+
+# Get logger
+logger = get_logger(__name__)
+
+# Metrics
+QUERY_SECONDS = histogram("aika_db_query_seconds", "Database query latency", ["backend"])
+QUERY_ERRORS = counter("aika_db_query_errors_total", "Failed database queries", ["backend", "kind"])
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query or a pool checkout exceeds its timeout."""
+
+
+def build_select_sql(
+    table: str,
+    columns: str = "*",
+    filters: Optional[Dict[str, Any]] = None,
+    order: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[str, Any]] = None,
+    descending: bool = False,
+) -> Tuple[str, List[Any]]:
+    """
+    Build a parameterized SELECT statement mirroring ``execute_query`` semantics.
+
+    Args:
+        table: Table name
+        columns: Comma-separated columns to select, or ``*``
+        filters: Equality filters (``None`` values become ``IS NULL``)
+        order: Column to order by
+        limit: Result limit
+        after: Keyset position as ``(column, value)``; only rows past it are returned
+        descending: Order descending (and page backwards with ``after``)
+
+    Returns:
+        Tuple of SQL text and positional parameters
+    """
+    return Query.from_params(table, columns, filters, order, limit, after, descending).to_sql()
+
+
+class DatabasePool(ABC):
+    """
+    Base class for async database pools.
+
+    Subclasses implement the backend specific ``open``/``close``/``run_query``
+    operations; this class keeps the utilization counters.
+    """
+
+    backend = "abstract"
+
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        query_timeout: Optional[float] = 10.0,
+        acquire_timeout: Optional[float] = 5.0,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            min_size: Minimum number of open connections
+            max_size: Maximum number of open connections
+            query_timeout: Default per-query timeout in seconds (None disables it)
+            acquire_timeout: Maximum time to wait for a free connection in seconds
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.query_timeout = query_timeout
+        self.acquire_timeout = acquire_timeout
+
+        # Utilization counters
+        self._in_use = 0
+        self._waiting = 0
+        self._acquired_total = 0
+        self._queries_total = 0
+        self._timeouts_total = 0
+        self._errors_total = 0
+        self._wait_time_total = 0.0
+        self._query_time_total = 0.0
+
+    @abstractmethod
+    async def open(self) -> None:
+        """Open the underlying connections."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Close the underlying connections."""
+
+    @abstractmethod
+    async def run_query(self, query: Query, timeout: Optional[float] = None) -> Any:
+        """
+        Run a query built with ``Query``.
+
+        Args:
+            query: Query to run
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            List of rows, or the row count for count-only queries
+        """
+
+    async def select(
+        self,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+        after: Optional[Tuple[str, Any]] = None,
+        descending: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a select query.
+
+        Args:
+            table: Table name
+            columns: Columns to select
+            filters: Equality filters
+            order: Order by column
+            limit: Result limit
+            timeout: Per-query timeout override in seconds
+            after: Keyset position as ``(column, value)``; only rows past it are returned
+            descending: Order descending (and page backwards with ``after``)
+
+        Returns:
+            List of rows
+        """
+        query = Query.from_params(table, columns, filters, order, limit, after, descending)
+        return await self.run_query(query, timeout=timeout)
+
+    def _effective_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Return the timeout to apply to a query."""
+        return self.query_timeout if timeout is None else timeout
+
+    @asynccontextmanager
+    async def _checkout(self, acquire: Callable[[], Awaitable[Any]]) -> AsyncIterator[Any]:
+        """
+        Acquire a connection while tracking utilization statistics.
+
+        Args:
+            acquire: Coroutine function returning a connection
+
+        Yields:
+            The acquired connection (releasing it is up to the caller)
+        """
+        self._waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = await acquire()
+        finally:
+            self._waiting -= 1
+        self._wait_time_total += time.perf_counter() - started
+
+        self._in_use += 1
+        self._acquired_total += 1
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+
+    def _record_query(self, duration: float, error: Optional[BaseException] = None) -> None:
+        """Record the outcome of a query."""
+        self._queries_total += 1
+        self._query_time_total += duration
+        QUERY_SECONDS.labels(self.backend).observe(duration)
+        if isinstance(error, QueryTimeoutError):
+            self._timeouts_total += 1
+            QUERY_ERRORS.labels(self.backend, "timeout").inc()
+        elif error is not None:
+            self._errors_total += 1
+            QUERY_ERRORS.labels(self.backend, "error").inc()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool utilization statistics.
+
+        Returns:
+            Dictionary of pool counters and derived averages
+        """
+        queries = self._queries_total
+        acquired = self._acquired_total
+        return {
+            "backend": self.backend,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "in_use": self._in_use,
+            "idle": max(0, self.size() - self._in_use),
+            "waiting": self._waiting,
+            "utilization": self._in_use / self.max_size,
+            "acquired_total": acquired,
+            "queries_total": queries,
+            "timeouts_total": self._timeouts_total,
+            "errors_total": self._errors_total,
+            "avg_wait_ms": (self._wait_time_total / acquired * 1000) if acquired else 0.0,
+            "avg_query_ms": (self._query_time_total / queries * 1000) if queries else 0.0,
+        }
+
+    def size(self) -> int:
+        """
+        Get the number of currently open connections.
+
+        Returns:
+            Open connection count
+        """
+        return self.max_size
+
+
+class PostgresPool(DatabasePool):
+    """
+    Direct Postgres pool backed by ``asyncpg``.
+    """
+
+    backend = "postgres"
+
+    def __init__(self, dsn: str, **kwargs: Any):
+        """
+        Initialize the pool.
+
+        Args:
+            dsn: Postgres connection string
+            **kwargs: Options forwarded to ``DatabasePool``
+        """
+        super().__init__(**kwargs)
+        self.dsn = dsn
+        self._pool = None
+
+    async def open(self) -> None:
+        """Open the asyncpg pool."""
+        if self._pool is not None:
+            return
+
+        try:
+            import asyncpg
+        except ImportError as e:
+            raise RuntimeError(
+                "asyncpg is not installed. Please install it with 'pip install asyncpg'."
+            ) from e
+
+        logger.info(f"Opening Postgres pool (min={self.min_size}, max={self.max_size})")
+        self._pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            command_timeout=self.query_timeout,
+        )
+
+    async def close(self) -> None:
+        """Close the asyncpg pool."""
+        if self._pool is not None:
+            logger.info("Closing Postgres pool")
+            await self._pool.close()
+            self._pool = None
+
+    def size(self) -> int:
+        """
+        Get the number of currently open connections.
+
+        Returns:
+            Open connection count
+        """
+        return self._pool.get_size() if self._pool is not None else 0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        """
+        Check out a connection from the pool.
+
+        Yields:
+            asyncpg connection
+
+        Raises:
+            QueryTimeoutError: If no connection becomes free in time
+        """
+        if self._pool is None:
+            await self.open()
+
+        async with self._checkout(self._acquire_connection) as conn:
+            try:
+                yield conn
+            finally:
+                await self._pool.release(conn)
+
+    async def _acquire_connection(self) -> Any:
+        """Take a connection from the asyncpg pool within the acquire timeout."""
+        try:
+            return await self._pool.acquire(timeout=self.acquire_timeout)
+        except asyncio.TimeoutError as e:
+            raise QueryTimeoutError("Timed out waiting for a database connection") from e
+
+    async def run(
+        self, fn: Callable[[Any], Awaitable[Any]], timeout: Optional[float] = None
+    ) -> Any:
+        """
+        Run a coroutine function against a checked-out connection.
+
+        Args:
+            fn: Coroutine function receiving an asyncpg connection
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            Return value of ``fn``
+
+        Raises:
+            QueryTimeoutError: If the call does not finish in time
+        """
+        timeout = self._effective_timeout(timeout)
+        started = time.perf_counter()
+        error: Optional[BaseException] = None
+        with start_span("db.query", kind="client", attributes={"db.system": self.backend}):
+            try:
+                async with self.acquire() as conn:
+                    return await asyncio.wait_for(fn(conn), timeout)
+            except asyncio.TimeoutError as e:
+                error = QueryTimeoutError(f"Query exceeded timeout of {timeout}s")
+                raise error from e
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                self._record_query(time.perf_counter() - started, error)
+
+    async def fetch(
+        self, sql: str, *args: Any, timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run a query and return all rows.
+
+        Args:
+            sql: SQL text with ``$n`` placeholders
+            *args: Query parameters
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            List of rows
+        """
+        records = await self.run(lambda conn: conn.fetch(sql, *args), timeout=timeout)
+        return [dict(record) for record in records]
+
+    async def execute(self, sql: str, *args: Any, timeout: Optional[float] = None) -> str:
+        """
+        Run a statement without returning rows.
+
+        Args:
+            sql: SQL text with ``$n`` placeholders
+            *args: Query parameters
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            Command status string
+        """
+        return await self.run(lambda conn: conn.execute(sql, *args), timeout=timeout)
+
+    async def run_query(self, query: Query, timeout: Optional[float] = None) -> Any:
+        """
+        Run a query built with ``Query``.
+
+        Args:
+            query: Query to run
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            List of rows, or the row count for count-only queries
+        """
+        sql, params = query.to_sql()
+        if query.count_mode:
+            return await self.run(lambda conn: conn.fetchval(sql, *params), timeout=timeout)
+        return await self.fetch(sql, *params, timeout=timeout)
+
+
+class SupabasePool(DatabasePool):
+    """
+    Pool of Supabase REST clients used from async code.
+
+    Each client owns its own HTTP connection pool; a checked-out client is
+    used by exactly one worker thread at a time.
+    """
+
+    backend = "supabase"
+
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        client_factory: Optional[Callable[[str, str], Any]] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            url: Supabase project URL
+            key: Supabase service key
+            client_factory: Callable creating a client (defaults to ``supabase.create_client``)
+            **kwargs: Options forwarded to ``DatabasePool``
+        """
+        super().__init__(**kwargs)
+        self.url = url
+        self.key = key
+        self._client_factory = client_factory
+        self._clients: Optional[asyncio.Queue] = None
+        self._created = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _new_client(self) -> Any:
+        """Create a new Supabase client."""
+        if self._client_factory is None:
+            from supabase import create_client
+
+            self._client_factory = create_client
+        self._created += 1
+        return self._client_factory(self.url, self.key)
+
+    async def open(self) -> None:
+        """Create the thread pool and the minimum number of clients."""
+        if self._clients is not None:
+            return
+
+        logger.info(f"Opening Supabase client pool (min={self.min_size}, max={self.max_size})")
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_size, thread_name_prefix="aika-db"
+        )
+        self._clients = asyncio.Queue()
+        for _ in range(self.min_size):
+            self._clients.put_nowait(self._new_client())
+
+    async def close(self) -> None:
+        """Drop all clients and shut down the thread pool."""
+        if self._executor is not None:
+            logger.info("Closing Supabase client pool")
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._clients = None
+        self._created = 0
+
+    def size(self) -> int:
+        """
+        Get the number of currently open clients.
+
+        Returns:
+            Open client count
+        """
+        return self._created
+
+    async def _get_client(self) -> Any:
+        """Take an idle client, growing the pool up to ``max_size``."""
+        if self._clients.empty() and self._created < self.max_size:
+            return self._new_client()
+
+        try:
+            return await asyncio.wait_for(self._clients.get(), self.acquire_timeout)
+        except asyncio.TimeoutError as e:
+            raise QueryTimeoutError("Timed out waiting for a database client") from e
+
+    async def run(self, fn: Callable[[Any], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a blocking client call on the pool's thread pool.
+
+        Args:
+            fn: Callable receiving a Supabase client
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            Return value of ``fn``
+
+        Raises:
+            QueryTimeoutError: If the call does not finish in time
+        """
+        if self._clients is None:
+            await self.open()
+
+        timeout = self._effective_timeout(timeout)
+        started = time.perf_counter()
+        error: Optional[BaseException] = None
+        clients = self._clients
+
+        with start_span("db.query", kind="client", attributes={"db.system": self.backend}):
+            async with self._checkout(self._get_client) as client:
+                loop = asyncio.get_running_loop()
+                future = loop.run_in_executor(self._executor, fn, client)
+                # The client only goes back to the pool once the worker thread is
+                # done with it, even if the caller stopped waiting.
+                future.add_done_callback(lambda _: clients.put_nowait(client))
+                try:
+                    return await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError as e:
+                    error = QueryTimeoutError(f"Query exceeded timeout of {timeout}s")
+                    raise error from e
+                except Exception as e:
+                    error = e
+                    raise
+                finally:
+                    self._record_query(time.perf_counter() - started, error)
+
+    async def run_query(self, query: Query, timeout: Optional[float] = None) -> Any:
+        """
+        Run a query built with ``Query``.
+
+        Args:
+            query: Query to run
+            timeout: Per-query timeout override in seconds
+
+        Returns:
+            List of rows, or the row count for count-only queries
+        """
+
+        def _run(client: Any) -> Any:
+            response = query.apply(client).execute()
+            return response.count if query.count_mode else response.data
+
+        return await self.run(_run, timeout=timeout)
@@ -0,0 +1,492 @@
+"""
+Typed query builder for the Aika AI System.
+
+``Query`` describes a select with projection, filters (equality, ranges,
+row comparisons for keyset pagination, IN-lists, null checks, pattern and
+full-text matches), multi-column ordering,
+limit/offset and count-only mode. Every part is pushed down to the server:
+either as parameterized SQL for a direct Postgres connection or as PostgREST
+filters for the Supabase client.
+
+Compilation depends only on the query's *shape* (table, columns, filter
+operators, ordering and flags), never on its values, so repeated query shapes
+are compiled once and reused. On Postgres the stable SQL text also lets
+asyncpg reuse its prepared statement for the shape.
+"""
+
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Filter operators and their SQL templates ({col} is the quoted column, {p} the next placeholder)
+SQL_OPERATORS: Dict[str, str] = {
+    "eq": "{col} = {p}",
+    "neq": "{col} <> {p}",
+    "gt": "{col} > {p}",
+    "gte": "{col} >= {p}",
+    "lt": "{col} < {p}",
+    "lte": "{col} <= {p}",
+    "in": "{col} = ANY({p})",
+    "is_null": "{col} IS NULL",
+    "not_null": "{col} IS NOT NULL",
+    "like": "{col} LIKE {p}",
+    "ilike": "{col} ILIKE {p}",
+}
+
+# Operators that do not bind a value
+NULLARY_OPERATORS = {"is_null", "not_null"}
+
+# Operators comparing a tuple of columns with a tuple of values
+ROW_OPERATORS = {"row_lt": "<", "row_gt": ">"}
+
+# Full-text search on a text column (``fts``) or a tsvector column (``fts_vector``)
+TEXT_SEARCH_OPERATORS = {"fts", "fts_vector"}
+
+
+def quote_ident(name: str) -> str:
+    """
+    Quote a (possibly schema-qualified) SQL identifier.
+
+    Args:
+        name: Identifier such as ``messages`` or ``public.messages``
+
+    Returns:
+        Quoted identifier safe for interpolation into SQL text
+    """
+    return ".".join('"' + part.replace('"', '""') + '"' for part in name.split("."))
+
+
+class Query:
+    """
+    Builder for server-side filtered and projected select queries.
+
+    Builder methods modify the query in place and return it, so calls can be
+    chained::
+
+        Query("messages")
+            .select("id", "content", "created_at")
+            .eq("conversation_id", conversation_id)
+            .gte("created_at", since)
+            .order_by("created_at", desc=True)
+            .limit(50)
+    """
+
+    def __init__(self, table: str):
+        """
+        Initialize the query.
+
+        Args:
+            table: Table name
+        """
+        self.table = table
+        self.columns: Tuple[str, ...] = ()
+        self.filters: List[Tuple[str, str, Any]] = []
+        self.ordering: List[Tuple[str, bool, bool]] = []
+        self.limit_value: Optional[int] = None
+        self.offset_value: Optional[int] = None
+        self.count_mode = False
+
+    @classmethod
+    def from_params(
+        cls,
+        table: str,
+        columns: str = "*",
+        filters: Optional[Dict[str, Any]] = None,
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[str, Any]] = None,
+        descending: bool = False,
+    ) -> "Query":
+        """
+        Build a query from ``execute_query`` style parameters.
+
+        Args:
+            table: Table name
+            columns: Comma-separated columns to select, or ``*``
+            filters: Equality filters (``None`` values become null checks)
+            order: Column to order by
+            limit: Result limit
+            after: Keyset position as ``(column, value)``
+            descending: Order descending (and page backwards with ``after``)
+
+        Returns:
+            Query instance
+        """
+        query = cls(table)
+        if columns.strip() != "*":
+            query.select(*(c.strip() for c in columns.split(",") if c.strip()))
+
+        for column, value in (filters or {}).items():
+            if value is None:
+                query.is_null(column)
+            else:
+                query.eq(column, value)
+
+        if after is not None:
+            column, value = after
+            query.lt(column, value) if descending else query.gt(column, value)
+
+        if order:
+            query.order_by(order, desc=descending)
+
+        if limit:
+            query.limit(limit)
+
+        return query
+
+    def copy(self) -> "Query":
+        """
+        Copy the query so it can be extended without modifying the original.
+
+        Returns:
+            New query instance
+        """
+        query = Query(self.table)
+        query.columns = self.columns
+        query.filters = list(self.filters)
+        query.ordering = list(self.ordering)
+        query.limit_value = self.limit_value
+        query.offset_value = self.offset_value
+        query.count_mode = self.count_mode
+        return query
+
+    def select(self, *columns: str) -> "Query":
+        """
+        Set the projected columns (all columns if none are given).
+
+        Args:
+            *columns: Column names
+
+        Returns:
+            The query
+        """
+        self.columns = tuple(columns)
+        return self
+
+    def where(self, column: str, operator: str, value: Any = None) -> "Query":
+        """
+        Add a filter.
+
+        Args:
+            column: Column name
+            operator: One of ``SQL_OPERATORS``, ``ROW_OPERATORS`` or ``TEXT_SEARCH_OPERATORS``
+            value: Value to compare against
+
+        Returns:
+            The query
+        """
+        if (
+            operator not in SQL_OPERATORS
+            and operator not in ROW_OPERATORS
+            and operator not in TEXT_SEARCH_OPERATORS
+        ):
+            raise ValueError(f"Unsupported filter operator '{operator}'")
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column = value``."""
+        return self.where(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column <> value``."""
+        return self.where(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column > value``."""
+        return self.where(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column >= value``."""
+        return self.where(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column < value``."""
+        return self.where(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "Query":
+        """Filter rows where ``column <= value``."""
+        return self.where(column, "lte", value)
+
+    def row_lt(self, columns: Sequence[str], values: Sequence[Any]) -> "Query":
+        """Filter rows where ``(columns) < (values)``, e.g. to page back from a keyset cursor."""
+        return self.where(tuple(columns), "row_lt", tuple(values))
+
+    def row_gt(self, columns: Sequence[str], values: Sequence[Any]) -> "Query":
+        """Filter rows where ``(columns) > (values)``, e.g. to page forward from a keyset cursor."""
+        return self.where(tuple(columns), "row_gt", tuple(values))
+
+    def between(self, column: str, start: Any, end: Any) -> "Query":
+        """Filter rows in the half-open range ``start <= column < end`` (e.g. a time window)."""
+        return self.gte(column, start).lt(column, end)
+
+    def in_(self, column: str, values: Sequence[Any]) -> "Query":
+        """Filter rows where ``column`` is one of ``values``."""
+        return self.where(column, "in", list(values))
+
+    def is_null(self, column: str) -> "Query":
+        """Filter rows where ``column`` is null."""
+        return self.where(column, "is_null")
+
+    def not_null(self, column: str) -> "Query":
+        """Filter rows where ``column`` is not null."""
+        return self.where(column, "not_null")
+
+    def like(self, column: str, pattern: str) -> "Query":
+        """Filter rows where ``column`` matches a case-sensitive ``LIKE`` pattern."""
+        return self.where(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "Query":
+        """Filter rows where ``column`` matches a case-insensitive ``LIKE`` pattern."""
+        return self.where(column, "ilike", pattern)
+
+    def text_search(
+        self, column: str, text: str, config: str = "english", tsvector: bool = False
+    ) -> "Query":
+        """
+        Filter rows with a full-text (websearch syntax) match.
+
+        Args:
+            column: Text column, or tsvector column if ``tsvector`` is set
+            text: Search text
+            config: Text search configuration
+            tsvector: Match against the column as is instead of converting it
+                with ``to_tsvector``, so an index on a tsvector column is used
+
+        Returns:
+            The query
+        """
+        return self.where(column, "fts_vector" if tsvector else "fts", (config, text))
+
+    def order_by(self, column: str, desc: bool = False, nulls_first: bool = False) -> "Query":
+        """
+        Add an ordering column; call repeatedly to order on several columns.
+
+        Args:
+            column: Column name
+            desc: Order descending
+            nulls_first: Place nulls first
+
+        Returns:
+            The query
+        """
+        self.ordering.append((column, desc, nulls_first))
+        return self
+
+    def limit(self, limit: int) -> "Query":
+        """Limit the number of returned rows."""
+        self.limit_value = int(limit)
+        return self
+
+    def offset(self, offset: int) -> "Query":
+        """Skip the first ``offset`` rows."""
+        self.offset_value = int(offset)
+        return self
+
+    def count(self) -> "Query":
+        """Return only the number of matching rows."""
+        self.count_mode = True
+        return self
+
+    def shape(self) -> Hashable:
+        """
+        Get the value-independent shape used to cache compiled queries.
+
+        Returns:
+            Hashable shape
+        """
+        return (
+            self.table,
+            self.columns,
+            tuple((column, operator) for column, operator, _ in self.filters),
+            tuple(self.ordering),
+            self.limit_value is not None,
+            self.offset_value is not None,
+            self.count_mode,
+        )
+
+    def params(self) -> List[Any]:
+        """
+        Get the bound values in placeholder order.
+
+        Returns:
+            Parameter list
+        """
+        params: List[Any] = []
+        for _, operator, value in self.filters:
+            if operator in TEXT_SEARCH_OPERATORS or operator in ROW_OPERATORS:
+                params.extend(value)
+            elif operator not in NULLARY_OPERATORS:
+                params.append(value)
+        if not self.count_mode:
+            if self.limit_value is not None:
+                params.append(self.limit_value)
+            if self.offset_value is not None:
+                params.append(self.offset_value)
+        return params
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        """
+        Compile the query to parameterized SQL.
+
+        Returns:
+            Tuple of SQL text and positional parameters
+        """
+        return _compile_sql(self.shape()), self.params()
+
+    def apply(self, client: Any) -> Any:
+        """
+        Build the equivalent PostgREST request on a Supabase client.
+
+        Args:
+            client: Supabase client
+
+        Returns:
+            Request builder ready to ``execute()``
+        """
+        builder = client.table(self.table)
+        params = iter(self.params())
+        for step in _compile_postgrest(self.shape()):
+            builder = step(builder, params)
+        return builder
+
+
+@lru_cache(maxsize=1024)
+def _compile_sql(shape: Hashable) -> str:
+    """Compile a query shape to SQL text."""
+    table, columns, filters, ordering, has_limit, has_offset, count_mode = shape
+    placeholder = 0
+
+    def _next() -> str:
+        nonlocal placeholder
+        placeholder += 1
+        return f"${placeholder}"
+
+    if count_mode:
+        projection = "count(*)"
+    elif columns:
+        projection = ", ".join(quote_ident(c) for c in columns)
+    else:
+        projection = "*"
+
+    sql = f"SELECT {projection} FROM {quote_ident(table)}"
+
+    clauses = []
+    for column, operator in filters:
+        if operator in ROW_OPERATORS:
+            cols = ", ".join(quote_ident(c) for c in column)
+            values = ", ".join(_next() for _ in column)
+            clauses.append(f"({cols}) {ROW_OPERATORS[operator]} ({values})")
+            continue
+        col = quote_ident(column)
+        if operator in TEXT_SEARCH_OPERATORS:
+            config, text = _next(), _next()
+            document = col
+            if operator == "fts":
+                document = f"to_tsvector({config}::regconfig, {col})"
+            clauses.append(f"{document} @@ websearch_to_tsquery({config}::regconfig, {text})")
+        elif operator in NULLARY_OPERATORS:
+            clauses.append(SQL_OPERATORS[operator].format(col=col))
+        else:
+            clauses.append(SQL_OPERATORS[operator].format(col=col, p=_next()))
+
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+
+    if count_mode:
+        return sql
+
+    if ordering:
+        sql += " ORDER BY " + ", ".join(
+            f"{quote_ident(column)}{' DESC' if desc else ''}{' NULLS FIRST' if nulls_first else ''}"
+            for column, desc, nulls_first in ordering
+        )
+
+    if has_limit:
+        sql += f" LIMIT {_next()}"
+
+    if has_offset:
+        sql += f" OFFSET {_next()}"
+
+    return sql
+
+
+PostgrestStep = Callable[[Any, Any], Any]
+
+
+@lru_cache(maxsize=1024)
+def _compile_postgrest(shape: Hashable) -> Tuple[PostgrestStep, ...]:
+    """Compile a query shape to a sequence of PostgREST builder calls."""
+    table, columns, filters, ordering, has_limit, has_offset, count_mode = shape
+    steps: List[PostgrestStep] = []
+
+    projection = ",".join(columns) or "*"
+    if count_mode:
+        steps.append(lambda b, p: b.select(columns[0] if columns else "*", count="exact"))
+    else:
+        steps.append(lambda b, p: b.select(projection))
+
+    for column, operator in filters:
+        if operator == "is_null":
+            steps.append(lambda b, p, c=column: b.is_(c, "null"))
+        elif operator == "not_null":
+            steps.append(lambda b, p, c=column: b.not_.is_(c, "null"))
+        elif operator == "in":
+            steps.append(lambda b, p, c=column: b.in_(c, next(p)))
+        elif operator in TEXT_SEARCH_OPERATORS:
+            # PostgREST converts text columns itself and uses tsvector columns as is
+            steps.append(lambda b, p, c=column: b.filter(c, f"wfts({next(p)})", next(p)))
+        elif operator in ROW_OPERATORS:
+            steps.append(lambda b, p, c=column, op=operator: b.or_(_row_condition(c, op, p)))
+        else:
+            steps.append(lambda b, p, c=column, op=operator: getattr(b, op)(c, next(p)))
+
+    if count_mode:
+        # Only the count header is needed; keep the body to a single row
+        steps.append(lambda b, p: b.limit(1))
+        return tuple(steps)
+
+    if ordering:
+        # PostgREST takes one comma-separated order parameter
+        order = ",".join(
+            f"{column}{'.desc' if desc else ''}{'.nullsfirst' if nulls_first else ''}"
+            for column, desc, nulls_first in ordering
+        )
+        steps.append(lambda b, p: b.order(order))
+
+    if has_offset:
+        if not has_limit:
+            raise ValueError("Offsets require a limit on the Supabase REST API")
+        steps.append(lambda b, p: _range(b, next(p), next(p)))
+    elif has_limit:
+        steps.append(lambda b, p: b.limit(next(p)))
+
+    return tuple(steps)
+
+
+def _row_condition(columns: Tuple[str, ...], operator: str, params: Any) -> str:
+    """
+    Expand a row comparison into a PostgREST ``or`` condition.
+
+    ``(a, b) < (x, y)`` becomes ``a.lt.x,and(a.eq.x,b.lt.y)``.
+    """
+    comparison = "lt" if operator == "row_lt" else "gt"
+    values = ['"' + _postgrest_value(next(params)).replace('"', '\\"') + '"' for _ in columns]
+    terms = []
+    for i, column in enumerate(columns):
+        equal = [f"{c}.eq.{v}" for c, v in zip(columns[:i], values[:i])]
+        condition = f"{column}.{comparison}.{values[i]}"
+        terms.append(f"and({','.join(equal + [condition])})" if equal else condition)
+    return ",".join(terms)
+
+
+def _postgrest_value(value: Any) -> str:
+    """Render a bound value as PostgREST filter text (dates and times as ISO 8601)."""
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def _range(builder: Any, limit: int, offset: int) -> Any:
+    """Apply a limit/offset pair as PostgREST query parameters."""
+    builder = builder.limit(limit)
+    builder.params = builder.params.add("offset", str(offset))
+    return builder
@@ -0,0 +1,183 @@
+"""
+Streaming reads of large tables for the Aika AI System.
+
+Rows are fetched with keyset pagination: each page is
+``WHERE key > last_key ORDER BY key LIMIT page_size`` on an indexed, unique
+column, so every page costs the same no matter how deep into the table it is
+and at most two pages (the current one and the prefetched next one) are held
+in memory at any time.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Type
+
+from ..utils.logging import get_logger
+from .connection import get_database_pool, run_query_sync
+from .pool import DatabasePool
+from .query import Query
+
+# Get logger
+logger = get_logger(__name__)
+
+
+def _projection(columns: str, key: str) -> str:
+    """Make sure the keyset column is part of the projection."""
+    if columns.strip() == "*":
+        return columns
+    selected = [c.strip() for c in columns.split(",")]
+    return columns if key in selected else ",".join(selected + [key])
+
+
+async def stream_rows(
+    table: str,
+    key: str = "id",
+    page_size: int = 1000,
+    columns: str = "*",
+    filters: Optional[Dict[str, Any]] = None,
+    model: Optional[Type[Any]] = None,
+    descending: bool = False,
+    start_after: Any = None,
+    prefetch: bool = True,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+    query: Optional[Query] = None,
+) -> AsyncIterator[Any]:
+    """
+    Stream every matching row of a table page by page.
+
+    Args:
+        table: Table name
+        key: Unique, indexed column to paginate on (e.g. ``id``)
+        page_size: Rows per page
+        columns: Columns to select
+        filters: Equality filters
+        model: Optional model class to yield instances of instead of dicts;
+            rows are built with its ``trusted`` constructor when it has one
+            (e.g. ``Message`` or ``MessageRecord``)
+        descending: Walk the key in descending order
+        start_after: Key value to resume after
+        prefetch: Fetch the next page while the current one is consumed
+        timeout: Per-page timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+        query: Optional base query whose projection and filters (ranges,
+            IN-lists, ...) are applied to every page instead of
+            ``columns``/``filters``; it must not set ordering or a limit
+
+    Yields:
+        Rows as dictionaries, or model instances if ``model`` is given
+    """
+    pool = pool or await get_database_pool()
+    base = _base_query(table, key, columns, filters, query)
+
+    def _fetch(after: Any) -> "asyncio.Future[List[Dict[str, Any]]]":
+        page = _page_query(base, key, page_size, descending, after)
+        return asyncio.ensure_future(pool.run_query(page, timeout=timeout))
+
+    pending = _fetch(start_after)
+    try:
+        while pending is not None:
+            page = await pending
+            pending = None
+
+            if len(page) == page_size:
+                next_after = page[-1][key]
+                if prefetch:
+                    pending = _fetch(next_after)
+            else:
+                next_after = None
+
+            for row in page:
+                yield _build(model, row)
+
+            if pending is None and next_after is not None:
+                pending = _fetch(next_after)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+def _build(model: Optional[Type[Any]], row: Dict[str, Any]) -> Any:
+    """Convert a row to the requested model, skipping validation for trusted models."""
+    if model is None:
+        return row
+    trusted = getattr(model, "trusted", None)
+    return trusted(row) if trusted is not None else model.parse_obj(row)
+
+
+def _page_query(query: Query, key: str, page_size: int, descending: bool, after: Any) -> Query:
+    """Build the query for the keyset page following ``after``."""
+    page = query.copy()
+    if after is not None:
+        page.lt(key, after) if descending else page.gt(key, after)
+    return page.order_by(key, desc=descending).limit(page_size)
+
+
+def _base_query(
+    table: str, key: str, columns: str, filters: Optional[Dict[str, Any]], query: Optional[Query]
+) -> Query:
+    """Build the per-page base query, making sure it selects the keyset column."""
+    if query is None:
+        return Query.from_params(table, _projection(columns, key), filters)
+    if query.columns and key not in query.columns:
+        return query.copy().select(*query.columns, key)
+    return query
+
+
+def iter_rows(
+    table: str,
+    key: str = "id",
+    page_size: int = 1000,
+    columns: str = "*",
+    filters: Optional[Dict[str, Any]] = None,
+    model: Optional[Type[Any]] = None,
+    descending: bool = False,
+    start_after: Any = None,
+    prefetch: bool = True,
+    query: Optional[Query] = None,
+) -> Iterator[Any]:
+    """
+    Iterate over every matching row of a table from synchronous code.
+
+    Uses the Supabase client like ``execute_query``; the next page is fetched
+    on a background thread while the current page is consumed.
+
+    Args:
+        table: Table name
+        key: Unique, indexed column to paginate on (e.g. ``id``)
+        page_size: Rows per page
+        columns: Columns to select
+        filters: Equality filters
+        model: Optional model class to yield instances of instead of dicts;
+            rows are built with its ``trusted`` constructor when it has one
+            (e.g. ``Message`` or ``MessageRecord``)
+        descending: Walk the key in descending order
+        start_after: Key value to resume after
+        prefetch: Fetch the next page while the current one is consumed
+        query: Optional base query used instead of ``columns``/``filters``
+
+    Yields:
+        Rows as dictionaries, or model instances if ``model`` is given
+    """
+    base = _base_query(table, key, columns, filters, query)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="aika-stream") as executor:
+
+        def _fetch(after: Any) -> Any:
+            query = _page_query(base, key, page_size, descending, after)
+            return executor.submit(run_query_sync, query)
+
+        pending = _fetch(start_after)
+        while pending is not None:
+            page = pending.result()
+            pending = None
+
+            next_after = page[-1][key] if len(page) == page_size else None
+            if prefetch and next_after is not None:
+                pending = _fetch(next_after)
+
+            for row in page:
+                yield _build(model, row)
+
+            if pending is None and next_after is not None:
+                pending = _fetch(next_after)
@@ -0,0 +1,421 @@
+"""
+Local vector index for the Aika AI System.
+
+``LocalVectorIndex`` is a NumPy-backed top-k similarity index used when the
+knowledge store is not reachable (offline runs, development, tests). It
+supports two search modes:
+
+- exact: a blocked brute-force scan of every vector, and
+- IVF: vectors are clustered with k-means into ``nlist`` inverted lists
+  stored contiguously, and a query only scans the ``nprobe`` lists whose
+  centroids are closest to it.
+
+Indexes are saved as plain ``.npy`` files so they can be memory-mapped back
+from disk instead of being read into memory. Metadata is kept column-wise so
+equality filters are applied as a boolean mask before any scoring.
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..utils.logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+METRICS = ("cosine", "ip")
+
+# Upper bound on the number of scores materialized per scan block
+BLOCK_ELEMENTS = 1 << 24
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (zero rows are left untouched)."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _merge_topk(
+    best_scores: np.ndarray,
+    best_rows: np.ndarray,
+    scores: np.ndarray,
+    rows: np.ndarray,
+    k: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge a block of candidate scores into the running top-k (unsorted)."""
+    all_scores = np.concatenate([best_scores, scores], axis=1)
+    all_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+    keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(all_scores, keep, axis=1), np.take_along_axis(all_rows, keep, axis=1)
+
+
+class LocalVectorIndex:
+    """
+    In-process exact or IVF vector index with metadata pre-filtering.
+    """
+
+    def __init__(self, dim: int, metric: str = "cosine"):
+        """
+        Initialize an empty index.
+
+        Args:
+            dim: Embedding dimension
+            metric: ``cosine`` (vectors are normalized on insert) or ``ip``
+                (raw inner product)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unsupported metric '{metric}', expected one of {METRICS}")
+
+        self.dim = dim
+        self.metric = metric
+
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._ids = np.empty(0, dtype=str)
+        self._metadata: Dict[str, np.ndarray] = {}
+        self._pending: List[Tuple[np.ndarray, List[str], List[Dict[str, Any]]]] = []
+
+        # IVF layout: rows [offsets[i], offsets[i + 1]) belong to list i and
+        # rows from offsets[-1] onwards were added after the last build
+        self._centroids: Optional[np.ndarray] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._vectors) + sum(len(chunk[1]) for chunk in self._pending)
+
+    @property
+    def nlist(self) -> int:
+        """Number of inverted lists (0 for an exact index)."""
+        return 0 if self._centroids is None else len(self._centroids)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Vector ids in row order."""
+        self._consolidate()
+        return self._ids
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        """
+        Get the metadata stored for a row.
+
+        Args:
+            row: Row index as returned by ``search``
+
+        Returns:
+            Metadata dictionary
+        """
+        self._consolidate()
+        return {
+            key: column[row]
+            for key, column in self._metadata.items()
+            if column[row] is not None
+        }
+
+    def add(
+        self,
+        ids: Sequence[str],
+        vectors: Any,
+        metadata: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        """
+        Add vectors to the index.
+
+        Vectors added after ``build`` are searched exactly until the next
+        build. Ids are not deduplicated.
+
+        Args:
+            ids: Vector ids
+            vectors: Array-like of shape ``(len(ids), dim)``
+            metadata: Optional metadata dictionary per vector
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}")
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if metadata is not None and len(metadata) != len(ids):
+            raise ValueError("metadata and ids must have the same length")
+
+        if self.metric == "cosine":
+            vectors = _normalize(vectors)
+
+        self._pending.append((vectors, [str(i) for i in ids], list(metadata or [{}] * len(ids))))
+
+    def _consolidate(self) -> None:
+        """Append pending chunks to the row arrays."""
+        if not self._pending:
+            return
+
+        chunks, self._pending = self._pending, []
+        start = len(self._vectors)
+        added = sum(len(chunk[1]) for chunk in chunks)
+
+        self._vectors = np.concatenate([self._vectors] + [chunk[0] for chunk in chunks])
+        self._ids = np.concatenate([self._ids, np.array([i for chunk in chunks for i in chunk[1]])])
+
+        rows = [m for chunk in chunks for m in chunk[2]]
+        keys = set(self._metadata).union(*(m.keys() for m in rows))
+        for key in keys:
+            column = np.empty(start + added, dtype=object)
+            if key in self._metadata:
+                column[:start] = self._metadata[key]
+            column[start:] = [m.get(key) for m in rows]
+            self._metadata[key] = column
+
+    def build(
+        self,
+        nlist: int,
+        iterations: int = 10,
+        sample_size: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        """
+        Cluster the vectors into inverted lists for approximate search.
+
+        Args:
+            nlist: Number of inverted lists (roughly ``sqrt(n)`` to ``4 * sqrt(n)``)
+            iterations: k-means iterations
+            sample_size: Vectors used to train the centroids (defaults to
+                ``256 * nlist``)
+            seed: Random seed
+        """
+        self._consolidate()
+        n = len(self._vectors)
+        if nlist < 1 or nlist > n:
+            raise ValueError(f"nlist must be between 1 and the number of vectors ({n})")
+
+        rng = np.random.default_rng(seed)
+        sample_size = min(n, sample_size or 256 * nlist)
+        sample = np.asarray(self._vectors[np.sort(rng.choice(n, sample_size, replace=False))])
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            labels = self._assign(sample, centroids)
+            centroids = self._update_centroids(sample, labels, centroids, rng)
+
+        labels = self._assign(self._vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+
+        self._vectors = np.ascontiguousarray(self._vectors[order])
+        self._ids = self._ids[order]
+        for key in self._metadata:
+            self._metadata[key] = self._metadata[key][order]
+
+        self._centroids = centroids
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(labels, minlength=nlist))])
+        logger.info(f"Built IVF index with {nlist} lists over {n} vectors")
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Assign each vector to its most similar centroid."""
+        labels = np.empty(len(vectors), dtype=np.int64)
+        step = max(1, BLOCK_ELEMENTS // len(centroids))
+        for lo in range(0, len(vectors), step):
+            labels[lo:lo + step] = np.argmax(vectors[lo:lo + step] @ centroids.T, axis=1)
+        return labels
+
+    def _update_centroids(
+        self,
+        sample: np.ndarray,
+        labels: np.ndarray,
+        centroids: np.ndarray,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Recompute centroids as list means, reseeding empty lists."""
+        counts = np.bincount(labels, minlength=len(centroids))
+        order = np.argsort(labels, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)])[filled]
+
+        updated = centroids.copy()
+        updated[filled] = np.add.reduceat(sample[order], starts, axis=0) / counts[filled, None]
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            updated[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+        return _normalize(updated) if self.metric == "cosine" else updated
+
+    def search(
+        self,
+        queries: Any,
+        k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the top-k most similar vectors for a batch of queries.
+
+        Args:
+            queries: Array-like of shape ``(nq, dim)`` (or a single vector)
+            k: Number of neighbours per query
+            filters: Metadata equality filters; a list, tuple or set value
+                matches any of its members
+            nprobe: Inverted lists scanned per query on an IVF index
+                (defaults to all lists, i.e. an exact search)
+
+        Returns:
+            Tuple of ``(scores, rows)`` arrays of shape ``(nq, k)``, best
+            first. Missing results are padded with ``-inf`` and ``-1``.
+        """
+        self._consolidate()
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Expected queries of dimension {self.dim}, got {queries.shape[1]}")
+        if self.metric == "cosine":
+            queries = _normalize(queries)
+
+        nq = len(queries)
+        scores = np.full((nq, k), -np.inf, dtype=np.float32)
+        rows = np.full((nq, k), -1, dtype=np.int64)
+        mask = self._filter_mask(filters)
+
+        if self._centroids is None or nprobe is None or nprobe >= self.nlist:
+            scores, rows = self._scan(queries, k, 0, len(self._vectors), mask, scores, rows)
+        else:
+            scores, rows = self._search_ivf(queries, k, nprobe, mask, scores, rows)
+            # Vectors added since the last build are not in any list
+            tail = int(self._offsets[-1])
+            scores, rows = self._scan(queries, k, tail, len(self._vectors), mask, scores, rows)
+
+        order = np.argsort(-scores, axis=1, kind="stable")
+        return np.take_along_axis(scores, order, axis=1), np.take_along_axis(rows, order, axis=1)
+
+    def _filter_mask(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Build a boolean row mask from metadata equality filters."""
+        if not filters:
+            return None
+
+        mask = np.ones(len(self._vectors), dtype=bool)
+        for key, value in filters.items():
+            column = self._metadata.get(key)
+            if column is None:
+                return np.zeros(len(self._vectors), dtype=bool)
+            if isinstance(value, (list, tuple, set)):
+                matches = np.zeros(len(column), dtype=bool)
+                for member in value:
+                    matches |= column == member
+            else:
+                matches = column == value
+            mask &= matches
+        return mask
+
+    def _scan(
+        self,
+        queries: np.ndarray,
+        k: int,
+        start: int,
+        stop: int,
+        mask: Optional[np.ndarray],
+        scores: np.ndarray,
+        rows: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Exhaustively score rows ``[start, stop)`` in bounded blocks."""
+        step = max(1024, BLOCK_ELEMENTS // len(queries))
+        for lo in range(start, stop, step):
+            hi = min(lo + step, stop)
+            if mask is None:
+                block_rows = np.arange(lo, hi)
+                block = self._vectors[lo:hi]
+            else:
+                block_rows = np.flatnonzero(mask[lo:hi]) + lo
+                if not len(block_rows):
+                    continue
+                block = self._vectors[block_rows]
+            scores, rows = _merge_topk(scores, rows, queries @ block.T, block_rows, k)
+        return scores, rows
+
+    def _search_ivf(
+        self,
+        queries: np.ndarray,
+        k: int,
+        nprobe: int,
+        mask: Optional[np.ndarray],
+        scores: np.ndarray,
+        rows: np.ndarray,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the ``nprobe`` closest lists of each query, one list at a time."""
+        probes = np.argpartition(-(queries @ self._centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+
+        # Group queries by list so each list is read once for the whole batch
+        flat = probes.ravel()
+        order = np.argsort(flat, kind="stable")
+        lists = flat[order]
+        bounds = np.flatnonzero(np.diff(lists)) + 1
+        for group in np.split(order, bounds):
+            list_id = flat[group[0]]
+            members = group // nprobe
+            lo, hi = int(self._offsets[list_id]), int(self._offsets[list_id + 1])
+            if mask is None:
+                block_rows = np.arange(lo, hi)
+                block = self._vectors[lo:hi]
+            else:
+                block_rows = np.flatnonzero(mask[lo:hi]) + lo
+                block = self._vectors[block_rows]
+            if not len(block_rows):
+                continue
+            scores[members], rows[members] = _merge_topk(
+                scores[members], rows[members], queries[members] @ block.T, block_rows, k
+            )
+        return scores, rows
+
+    def save(self, path: str) -> None:
+        """
+        Save the index to a directory.
+
+        Args:
+            path: Directory to write ``vectors.npy``, ``ids.npy`` and the IVF
+                layout to
+        """
+        self._consolidate()
+        os.makedirs(path, exist_ok=True)
+
+        np.save(os.path.join(path, "vectors.npy"), self._vectors)
+        np.save(os.path.join(path, "ids.npy"), self._ids)
+        if self._centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self._centroids)
+            np.save(os.path.join(path, "offsets.npy"), self._offsets)
+
+        with open(os.path.join(path, "index.json"), "w") as f:
+            json.dump({
+                "dim": self.dim,
+                "metric": self.metric,
+                "metadata": {key: column.tolist() for key, column in self._metadata.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "LocalVectorIndex":
+        """
+        Load an index saved with ``save``.
+
+        Args:
+            path: Index directory
+            mmap: Memory-map the vectors read-only instead of reading them
+
+        Returns:
+            Loaded index
+        """
+        with open(os.path.join(path, "index.json")) as f:
+            info = json.load(f)
+
+        mmap_mode = "r" if mmap else None
+        index = cls(info["dim"], info["metric"])
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        index._ids = np.load(os.path.join(path, "ids.npy"), mmap_mode=mmap_mode)
+
+        for key, values in info["metadata"].items():
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            index._metadata[key] = column
+
+        if os.path.exists(os.path.join(path, "centroids.npy")):
+            index._centroids = np.load(os.path.join(path, "centroids.npy"))
+            index._offsets = np.load(os.path.join(path, "offsets.npy"))
+
+        logger.info(f"Loaded vector index with {len(index)} vectors from {path}")
+        return index
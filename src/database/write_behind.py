@@ -0,0 +1,475 @@
+"""
+Write-behind persistence of chat messages for the Aika AI System.
+
+``MessagePersister.persist`` appends a message to a local append-only
+write-ahead log (WAL) and returns immediately. A background task fsyncs the
+log in groups and flushes pending messages to the database in batches with an
+idempotent upsert. The position of the last flushed record is kept in a
+checkpoint file next to the log, so anything not yet flushed is replayed on
+restart. Rows the database rejects are moved to a dead-letter file; rows that
+failed for any other reason (see ``RowFailure.transient``) stay pending and
+are retried with backoff.
+
+Each process holds an exclusive lock on its own log: the first persister
+uses the configured path, further workers sharing it take ``<path>.1``,
+``<path>.2`` and so on. On start a persister also adopts the logs of workers
+that are no longer running, copying their unflushed records into its own log,
+so nothing is lost when the number of workers shrinks.
+"""
+
+import asyncio
+import collections
+import json
+import os
+import re
+import time
+from typing import IO, Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from ..utils.metrics import gauge
+from .models import Message
+from .writes import BulkWriteResult, RowFailure, bulk_upsert
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+# Writer used to flush a batch of messages to the database
+MessageWriter = Callable[[List[Message]], Awaitable[BulkWriteResult]]
+
+# Truncate the WAL once everything is flushed and it has grown past this size
+WAL_COMPACT_BYTES = 64 * 1024 * 1024
+
+
+class MessagePersister:
+    """
+    Persists messages through a local WAL and flushes them in the background.
+    """
+
+    def __init__(
+        self,
+        wal_path: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        writer: Optional[MessageWriter] = None,
+        compact_bytes: int = WAL_COMPACT_BYTES,
+    ):
+        """
+        Initialize the persister.
+
+        Args:
+            wal_path: Path of the write-ahead log file (other workers add a suffix)
+            batch_size: Maximum number of messages per database flush
+            flush_interval: Seconds between fsync/flush cycles
+            writer: Coroutine function writing a batch (defaults to ``bulk_upsert``)
+            compact_bytes: WAL size above which a fully flushed log is truncated
+        """
+        self.base_path = wal_path
+        self._use_path(wal_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self._writer = writer or bulk_upsert
+
+        self._file = None
+        self._lock: Optional[IO[str]] = None
+        self._offset = 0
+        self._checkpoint = 0
+        self._dirty = False
+        self._pending: Deque[Tuple[Message, int, float]] = collections.deque()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        # Metrics
+        self._persisted_total = 0
+        self._replayed_total = 0
+        self._flushed_total = 0
+        self._flush_failures_total = 0
+        self._dead_lettered_total = 0
+        self._fsyncs_total = 0
+        self._last_flush_ms = 0.0
+
+    async def start(self) -> None:
+        """Open the WAL, replay unflushed messages and start the flush task."""
+        if self._task is not None:
+            return
+
+        directory = os.path.dirname(self.wal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._claim()
+        self._checkpoint = self._read_checkpoint(self.checkpoint_path)
+        self._replay()
+        self._file = open(self.wal_path, "ab")
+        self._offset = self._file.tell()
+        await self._adopt_orphans()
+
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Message persister started with {len(self._pending)} messages to replay")
+
+    async def stop(self) -> None:
+        """Flush everything that is pending and stop the flush task."""
+        if self._task is None:
+            return
+
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+        self._file.close()
+        self._file = None
+        self._release(self._lock)
+        self._lock = None
+        logger.info("Message persister stopped")
+
+    def persist(self, message: Message) -> None:
+        """
+        Append a message to the WAL and schedule it for flushing.
+
+        The message is durable after the next group fsync, at most
+        ``flush_interval`` seconds later.
+
+        Args:
+            message: Message to persist
+        """
+        if self._file is None:
+            raise RuntimeError("Message persister is not started")
+
+        line = message.json().encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._offset += len(line)
+        self._dirty = True
+        self._pending.append((message, self._offset, time.monotonic()))
+        self._persisted_total += 1
+
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Fsync the WAL and flush all pending messages to the database."""
+        await self._sync()
+        while self._pending:
+            if not await self._flush_batch():
+                break
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get persister metrics.
+
+        Returns:
+            Dictionary with backlog, lag and throughput counters
+        """
+        lag = time.monotonic() - self._pending[0][2] if self._pending else 0.0
+        return {
+            "backlog": len(self._pending),
+            "lag_seconds": lag,
+            "wal_bytes": self._offset,
+            "unflushed_bytes": self._offset - self._checkpoint,
+            "persisted_total": self._persisted_total,
+            "replayed_total": self._replayed_total,
+            "flushed_total": self._flushed_total,
+            "flush_failures_total": self._flush_failures_total,
+            "dead_lettered_total": self._dead_lettered_total,
+            "fsyncs_total": self._fsyncs_total,
+            "last_flush_ms": self._last_flush_ms,
+        }
+
+    async def _run(self) -> None:
+        """Background loop fsyncing the WAL and flushing batches."""
+        failures = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            await self._sync()
+            while self._pending:
+                if await self._flush_batch():
+                    failures = 0
+                    continue
+                # Back off while the database is unavailable
+                failures += 1
+                if self._stopping:
+                    logger.error(
+                        f"Stopping with {len(self._pending)} unflushed messages in the WAL"
+                    )
+                    return
+                await asyncio.sleep(min(5.0, self.flush_interval * 2 ** failures))
+
+            self._compact()
+
+            if self._stopping:
+                return
+
+    async def _sync(self) -> None:
+        """Fsync the WAL if anything was written since the last sync."""
+        if not self._dirty or self._file is None:
+            return
+
+        self._dirty = False
+        self._file.flush()
+        await asyncio.to_thread(os.fsync, self._file.fileno())
+        self._fsyncs_total += 1
+
+    async def _flush_batch(self) -> bool:
+        """Flush the oldest pending batch, returning False if the write failed."""
+        count = min(self.batch_size, len(self._pending))
+        batch = [self._pending[i] for i in range(count)]
+        started = time.perf_counter()
+
+        try:
+            result = await self._writer([entry[0] for entry in batch])
+        except Exception as e:
+            self._flush_failures_total += 1
+            logger.error(f"Failed to flush {count} messages: {e}")
+            return False
+
+        self._last_flush_ms = (time.perf_counter() - started) * 1000
+
+        # Rows not rejected by the database stay pending and are retried with
+        # everything after them, so the checkpoint never passes an unwritten row
+        transient = [failure.index for failure in result.failures if failure.transient]
+        done = min(transient) if transient else count
+        rejected = [
+            failure for failure in result.failures if not failure.transient and failure.index < done
+        ]
+
+        if rejected:
+            # Rows rejected by the database will never succeed on retry
+            self._dead_letter(batch, rejected)
+
+        for _ in range(done):
+            self._pending.popleft()
+        self._flushed_total += done - len(rejected)
+        if done:
+            self._write_checkpoint(batch[done - 1][1])
+
+        if transient:
+            self._flush_failures_total += 1
+            logger.error(f"Failed to flush {count - done} messages: {result.failures[-1].error}")
+            return False
+        return True
+
+    def _dead_letter(
+        self, batch: List[Tuple[Message, int, float]], failures: List[RowFailure]
+    ) -> None:
+        """Move permanently rejected messages to the dead-letter file."""
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            for failure in failures:
+                message = batch[failure.index][0]
+                record = {"error": failure.error, "message": json.loads(message.json())}
+                f.write(json.dumps(record) + "\n")
+        self._dead_lettered_total += len(failures)
+        logger.error(f"Moved {len(failures)} rejected messages to '{self.dead_letter_path}'")
+
+    def _use_path(self, wal_path: str) -> None:
+        """Point the log, checkpoint and dead-letter files at ``wal_path``."""
+        self.wal_path = wal_path
+        self.checkpoint_path = wal_path + ".ckpt"
+        self.dead_letter_path = wal_path + ".dead"
+
+    def _slot_path(self, slot: int) -> str:
+        """Get the log path of a worker slot."""
+        return self.base_path if slot == 0 else f"{self.base_path}.{slot}"
+
+    def _slot_paths(self) -> List[str]:
+        """List the existing logs of all worker slots."""
+        directory, name = os.path.split(self.base_path)
+        pattern = re.compile(re.escape(name) + r"(\.\d+)?")
+        return sorted(
+            os.path.join(directory, filename)
+            for filename in os.listdir(directory or ".")
+            if pattern.fullmatch(filename)
+        )
+
+    @staticmethod
+    def _try_lock(wal_path: str) -> Optional[IO[str]]:
+        """Take the exclusive lock of a log without waiting, or return None if it is held."""
+        lock = open(wal_path + ".lock", "a")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    @staticmethod
+    def _release(lock: Optional[IO[str]]) -> None:
+        """Release a log lock."""
+        if lock is not None:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+            lock.close()
+
+    def _claim(self) -> None:
+        """Lock the first log no other process holds and use it."""
+        if fcntl is None:
+            # Without locks only a single process may use the log
+            return
+
+        slot = 0
+        while True:
+            self._lock = self._try_lock(self._slot_path(slot))
+            if self._lock is not None:
+                break
+            slot += 1
+        self._use_path(self._slot_path(slot))
+        if slot:
+            logger.info(f"Log '{self.base_path}' is in use, writing to '{self.wal_path}'")
+
+    async def _adopt_orphans(self) -> None:
+        """Move unflushed records from the logs of exited workers into this log."""
+        if fcntl is None:
+            return
+
+        for wal_path in self._slot_paths():
+            if wal_path == self.wal_path:
+                continue
+            lock = self._try_lock(wal_path)
+            if lock is None:
+                # Its worker is still running
+                continue
+            try:
+                checkpoint = self._read_checkpoint(wal_path + ".ckpt")
+                records, _ = self._read_records(wal_path, checkpoint)
+                for line in records:
+                    self._file.write(line)
+                    self._offset += len(line)
+                    self._pending.append(
+                        (Message.trusted(json.loads(line)), self._offset, time.monotonic())
+                    )
+                self._file.flush()
+                await asyncio.to_thread(os.fsync, self._file.fileno())
+
+                # The records are durable here now; the orphaned log can go
+                for path in (wal_path, wal_path + ".ckpt"):
+                    if os.path.exists(path):
+                        os.remove(path)
+            finally:
+                self._release(lock)
+
+            self._replayed_total += len(records)
+            if records:
+                logger.info(f"Adopted {len(records)} unflushed messages from '{wal_path}'")
+
+    @staticmethod
+    def _read_checkpoint(checkpoint_path: str) -> int:
+        """Read the offset of the last flushed WAL record."""
+        try:
+            with open(checkpoint_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_checkpoint(self, offset: int) -> None:
+        """Atomically record the offset of the last flushed WAL record."""
+        self._checkpoint = offset
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    @staticmethod
+    def _read_records(wal_path: str, checkpoint: int) -> Tuple[List[bytes], int]:
+        """Read the complete records after ``checkpoint`` and the offset they end at."""
+        size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        if checkpoint > size:
+            logger.warning(f"Checkpoint is past the end of '{wal_path}', replaying from the start")
+            checkpoint = 0
+
+        records = []
+        offset = checkpoint
+        if size:
+            with open(wal_path, "rb") as f:
+                f.seek(checkpoint)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn write from a crash; drop the partial record
+                        logger.warning(
+                            f"Dropping partial record at offset {offset} in '{wal_path}'"
+                        )
+                        break
+                    offset += len(line)
+                    records.append(line)
+        return records, offset
+
+    def _replay(self) -> None:
+        """Queue WAL records written after the checkpoint."""
+        records, end = self._read_records(self.wal_path, self._checkpoint)
+        offset = end - sum(len(line) for line in records)
+        if offset != self._checkpoint:
+            self._write_checkpoint(offset)
+
+        for line in records:
+            offset += len(line)
+            # Records were validated before they were written
+            self._pending.append((Message.trusted(json.loads(line)), offset, time.monotonic()))
+            self._replayed_total += 1
+
+        if os.path.exists(self.wal_path) and end < os.path.getsize(self.wal_path):
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(end)
+
+    def _compact(self) -> None:
+        """Truncate the WAL once every record in it has been flushed."""
+        if self._pending or self._offset < self.compact_bytes or self._offset != self._checkpoint:
+            return
+
+        self._file.truncate(0)
+        self._file.seek(0)
+        self._offset = 0
+        self._write_checkpoint(0)
+        logger.info(f"Compacted message WAL '{self.wal_path}'")
+
+
+# Singleton instance
+_persister: Optional[MessagePersister] = None
+
+
+def _persister_stat(name: str) -> float:
+    """Read a statistic of the message persister, if it exists."""
+    return _persister.get_stats()[name] if _persister is not None else 0
+
+
+# Metrics
+gauge(
+    "aika_message_wal_backlog", "Persisted messages not yet flushed to the database"
+).set_function(lambda: _persister_stat("backlog"))
+gauge(
+    "aika_message_wal_lag_seconds",
+    "Age of the oldest message not yet flushed",
+    multiprocess_mode="max",
+).set_function(lambda: _persister_stat("lag_seconds"))
+
+
+def get_message_persister() -> MessagePersister:
+    """
+    Get the message persister instance.
+
+    Returns:
+        Message persister instance (call ``start`` before use)
+    """
+    global _persister
+
+    if _persister is None:
+        _persister = MessagePersister(
+            settings.MESSAGE_WAL_PATH,
+            batch_size=settings.MESSAGE_WAL_BATCH_SIZE,
+            flush_interval=settings.MESSAGE_WAL_FLUSH_INTERVAL,
+        )
+
+    return _persister
@@ -0,0 +1,567 @@
+"""
+Bulk write operations for the Aika AI System.
+
+Rows are written in batches through the async database pool. On a direct
+Postgres connection inserts use ``COPY`` and upserts use multi-row
+``INSERT ... ON CONFLICT`` statements; on the Supabase REST API each batch is
+a single request. An upsert batch keeps only the last of several rows with the
+same conflict key, since one statement cannot update a row twice. When a
+batch is rejected because of its data (a constraint violation or invalid
+value) it is retried row by row so that the result can
+report exactly which rows were rejected. Any other error (a lost connection,
+pool or query timeout) stops the write: the remaining rows are reported as
+transient failures without a row-by-row retry, since a timed-out batch may
+still have been committed.
+"""
+
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from ..utils.config import lazy_settings
+from ..utils.logging import get_logger
+from .cache import get_query_cache
+from .connection import get_database_pool
+from .models import Agent, Conversation, Message, User
+from .pool import DatabasePool, PostgresPool
+from .query import quote_ident
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+# Default table for each model
+MODEL_TABLES: Dict[Type[BaseModel], str] = {
+    Agent: "agents",
+    Conversation: "conversations",
+    Message: "messages",
+    User: "users",
+}
+
+# Fields that are not stored as columns
+MODEL_EXCLUDE: Dict[Type[BaseModel], set] = {
+    Conversation: {"messages"},
+}
+
+# Postgres accepts at most this many bind parameters per statement
+POSTGRES_MAX_PARAMS = 32767
+
+# SQLSTATE classes caused by the rows themselves: data exceptions and integrity
+# constraint violations
+ROW_ERROR_SQLSTATE_CLASSES = ("22", "23")
+
+
+class RowFailure(BaseModel):
+    """A row that could not be written."""
+    index: int
+    key: Optional[str] = None
+    error: str
+    # The row was not rejected by the database; retrying it may succeed
+    transient: bool = False
+
+
+class BulkWriteResult(BaseModel):
+    """Outcome of a bulk write operation."""
+    table: str
+    operation: str
+    requested: int = 0
+    succeeded: int = 0
+    batches: int = 0
+    failures: List[RowFailure] = []
+
+    @property
+    def ok(self) -> bool:
+        """Whether every row was written."""
+        return not self.failures
+
+
+def table_for(model: BaseModel) -> str:
+    """
+    Get the default table name for a model instance.
+
+    Args:
+        model: Model instance
+
+    Returns:
+        Table name
+
+    Raises:
+        ValueError: If the model type has no default table
+    """
+    try:
+        return MODEL_TABLES[type(model)]
+    except KeyError:
+        raise ValueError(f"No default table for model '{type(model).__name__}'")
+
+
+def model_to_row(model: BaseModel, json_compatible: bool = False) -> Dict[str, Any]:
+    """
+    Convert a model to a table row.
+
+    Args:
+        model: Model instance
+        json_compatible: Convert values to JSON types (for the REST API)
+
+    Returns:
+        Row dictionary
+    """
+    exclude = MODEL_EXCLUDE.get(type(model))
+
+    if json_compatible:
+        return json.loads(model.json(exclude=exclude))
+
+    row = model.dict(exclude=exclude)
+    for key, value in row.items():
+        if isinstance(value, dict):
+            # asyncpg expects JSON columns as text
+            row[key] = json.dumps(value)
+    return row
+
+
+def optimal_batch_size(
+    pool: DatabasePool, num_columns: int, batch_size: Optional[int] = None
+) -> int:
+    """
+    Choose a batch size for a bulk write.
+
+    Args:
+        pool: Database pool the write will go through
+        num_columns: Number of columns per row
+        batch_size: Requested batch size (defaults to settings.DB_BULK_BATCH_SIZE)
+
+    Returns:
+        Number of rows per batch
+    """
+    size = batch_size or settings.DB_BULK_BATCH_SIZE
+
+    if isinstance(pool, PostgresPool):
+        # Multi-row statements bind one parameter per value
+        size = min(size, POSTGRES_MAX_PARAMS // max(1, num_columns))
+
+    return max(1, size)
+
+
+def is_row_error(error: BaseException) -> bool:
+    """
+    Check whether a write failed because of the rows written.
+
+    Args:
+        error: Exception raised by a write
+
+    Returns:
+        True for constraint violations and invalid data, False for errors of
+        the connection or database that a retry may get past
+    """
+    # asyncpg errors carry ``sqlstate``, PostgREST errors ``code``
+    code = getattr(error, "sqlstate", None) or getattr(error, "code", None)
+    if isinstance(code, str):
+        return code[:2] in ROW_ERROR_SQLSTATE_CLASSES
+    # Values that could not be encoded for the database
+    return isinstance(error, (ValueError, TypeError))
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    """Yield consecutive slices of ``items``."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _row_key(row: Dict[str, Any], key: str) -> Optional[str]:
+    """Get a row's key as a string for failure reports."""
+    value = row.get(key)
+    return None if value is None else str(value)
+
+
+def _values_sql(num_rows: int, num_columns: int) -> str:
+    """Build a ``VALUES`` list of positional placeholders."""
+    groups = []
+    for row in range(num_rows):
+        base = row * num_columns
+        groups.append("(" + ", ".join(f"${base + col + 1}" for col in range(num_columns)) + ")")
+    return ", ".join(groups)
+
+
+def _last_per_key(
+    rows: Sequence[Dict[str, Any]], conflict_columns: Sequence[str]
+) -> Sequence[Dict[str, Any]]:
+    """
+    Drop rows superseded by a later row with the same conflict key.
+
+    ``INSERT ... ON CONFLICT`` cannot affect a row twice (SQLSTATE 21000).
+    Rows with a null key never conflict and are all kept.
+    """
+    keys = [tuple(row.get(c) for c in conflict_columns) for row in rows]
+    latest = {key: index for index, key in enumerate(keys) if None not in key}
+    if len(latest) == len(rows):
+        return rows
+    return [
+        row for index, (row, key) in enumerate(zip(rows, keys))
+        if None in key or latest[key] == index
+    ]
+
+
+def _insert_sql(table: str, columns: List[str], num_rows: int) -> str:
+    """Build a multi-row INSERT statement."""
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    values = _values_sql(num_rows, len(columns))
+    return f"INSERT INTO {quote_ident(table)} ({column_list}) VALUES {values}"
+
+
+def _upsert_sql(
+    table: str, columns: List[str], num_rows: int, conflict_columns: Sequence[str]
+) -> str:
+    """Build a multi-row INSERT ... ON CONFLICT DO UPDATE statement."""
+    updates = [c for c in columns if c not in conflict_columns]
+    conflict = ", ".join(quote_ident(c) for c in conflict_columns)
+    sql = _insert_sql(table, columns, num_rows) + f" ON CONFLICT ({conflict})"
+    if updates:
+        sql += " DO UPDATE SET " + ", ".join(
+            f"{quote_ident(c)} = EXCLUDED.{quote_ident(c)}" for c in updates
+        )
+    else:
+        sql += " DO NOTHING"
+    return sql
+
+
+def _update_sql(table: str, columns: List[str], key: str) -> str:
+    """Build a single-row UPDATE statement keyed on ``key``."""
+    updates = [c for c in columns if c != key]
+    assignments = ", ".join(f"{quote_ident(c)} = ${i + 2}" for i, c in enumerate(updates))
+    return f"UPDATE {quote_ident(table)} SET {assignments} WHERE {quote_ident(key)} = $1"
+
+
+def _flatten(rows: Sequence[Dict[str, Any]], columns: List[str]) -> List[Any]:
+    """Flatten rows into a positional parameter list."""
+    return [row.get(column) for row in rows for column in columns]
+
+
+async def _write_postgres(
+    pool: PostgresPool,
+    operation: str,
+    table: str,
+    rows: Sequence[Dict[str, Any]],
+    columns: List[str],
+    key: str,
+    conflict_columns: Sequence[str],
+    timeout: Optional[float],
+) -> None:
+    """Write one batch on a direct Postgres connection."""
+    if operation == "insert":
+        if len(rows) > 1:
+            records = [tuple(row.get(c) for c in columns) for row in rows]
+            schema_name, _, table_name = table.rpartition(".")
+            await pool.run(
+                lambda conn: conn.copy_records_to_table(
+                    table_name,
+                    records=records,
+                    columns=columns,
+                    schema_name=schema_name or None,
+                ),
+                timeout=timeout,
+            )
+        else:
+            await pool.execute(
+                _insert_sql(table, columns, 1), *_flatten(rows, columns), timeout=timeout
+            )
+    elif operation == "upsert":
+        sql = _upsert_sql(table, columns, len(rows), conflict_columns)
+        await pool.execute(sql, *_flatten(rows, columns), timeout=timeout)
+    elif operation == "update":
+        updates = [c for c in columns if c != key]
+        args = [[row.get(key)] + [row.get(c) for c in updates] for row in rows]
+        sql = _update_sql(table, columns, key)
+
+        async def _update(conn: Any) -> None:
+            async with conn.transaction():
+                await conn.executemany(sql, args)
+
+        await pool.run(_update, timeout=timeout)
+    elif operation == "delete":
+        sql = f"DELETE FROM {quote_ident(table)} WHERE {quote_ident(key)} = ANY($1)"
+        await pool.execute(sql, [row[key] for row in rows], timeout=timeout)
+    else:
+        raise ValueError(f"Unknown bulk operation '{operation}'")
+
+
+async def _write_rest(
+    pool: DatabasePool,
+    operation: str,
+    table: str,
+    rows: Sequence[Dict[str, Any]],
+    key: str,
+    conflict_columns: Sequence[str],
+    timeout: Optional[float],
+) -> None:
+    """Write one batch through the Supabase REST API."""
+
+    def _write(client: Any) -> None:
+        query = client.table(table)
+        if operation == "insert":
+            query.insert(list(rows)).execute()
+        elif operation == "upsert":
+            query.upsert(list(rows), on_conflict=",".join(conflict_columns)).execute()
+        elif operation == "update":
+            # PostgREST has no multi-row update, so rows share one worker round
+            for row in rows:
+                client.table(table).update(row).eq(key, row[key]).execute()
+        elif operation == "delete":
+            query.delete().in_(key, [row[key] for row in rows]).execute()
+        else:
+            raise ValueError(f"Unknown bulk operation '{operation}'")
+
+    await pool.run(_write, timeout=timeout)
+
+
+async def _bulk_write(
+    pool: DatabasePool,
+    operation: str,
+    rows: List[Dict[str, Any]],
+    table: str,
+    key: str = "id",
+    conflict_columns: Sequence[str] = ("id",),
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> BulkWriteResult:
+    """Write rows in batches, isolating failing rows."""
+    result = BulkWriteResult(table=table, operation=operation, requested=len(rows))
+    if not rows:
+        return result
+
+    columns = list(rows[0].keys())
+    size = optimal_batch_size(pool, len(columns), batch_size)
+    is_postgres = isinstance(pool, PostgresPool)
+
+    async def _write(batch: Sequence[Dict[str, Any]]) -> None:
+        if operation == "upsert" and len(batch) > 1:
+            batch = _last_per_key(batch, conflict_columns)
+        if is_postgres:
+            await _write_postgres(
+                pool, operation, table, batch, columns, key, conflict_columns, timeout
+            )
+        else:
+            await _write_rest(pool, operation, table, batch, key, conflict_columns, timeout)
+
+    def _fail_rest(start: int, error: Exception) -> None:
+        logger.warning(
+            f"Bulk {operation} on '{table}' stopped after {result.succeeded} rows, "
+            f"{len(rows) - start} rows left unwritten: {error}"
+        )
+        result.failures.extend(
+            RowFailure(index=index, key=_row_key(row, key), error=str(error), transient=True)
+            for index, row in enumerate(rows[start:], start=start)
+        )
+
+    async def _write_rows(batch: Sequence[Dict[str, Any]], start: int) -> bool:
+        for index, row in enumerate(batch, start=start):
+            try:
+                await _write([row])
+                result.succeeded += 1
+            except Exception as row_error:
+                if not is_row_error(row_error):
+                    _fail_rest(index, row_error)
+                    return False
+                result.failures.append(
+                    RowFailure(index=index, key=_row_key(row, key), error=str(row_error))
+                )
+        return True
+
+    offset = 0
+    for batch in _chunks(rows, size):
+        result.batches += 1
+        try:
+            await _write(batch)
+            result.succeeded += len(batch)
+        except Exception as e:
+            if not is_row_error(e):
+                _fail_rest(offset, e)
+                break
+            logger.warning(
+                f"Bulk {operation} batch of {len(batch)} rows on '{table}' failed, "
+                f"retrying row by row: {e}"
+            )
+            if not await _write_rows(batch, offset):
+                break
+        offset += len(batch)
+
+    if result.failures:
+        logger.error(
+            f"Bulk {operation} on '{table}': {len(result.failures)} of {len(rows)} rows failed"
+        )
+
+    if result.succeeded:
+        await _invalidate_cache(pool, table)
+
+    return result
+
+
+async def _invalidate_cache(pool: DatabasePool, table: str) -> None:
+    """Invalidate cached reads of a table locally and, if configured, in other processes."""
+    get_query_cache().invalidate(table)
+
+    channel = settings.QUERY_CACHE_NOTIFY_CHANNEL
+    if channel and isinstance(pool, PostgresPool):
+        try:
+            await pool.execute("SELECT pg_notify($1, $2)", channel, table)
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation for '{table}': {e}")
+
+
+def _prepare(
+    models: Sequence[BaseModel], table: Optional[str], pool: DatabasePool
+) -> Tuple[str, bool]:
+    """Resolve the table and serialization mode for a list of models."""
+    if table is None:
+        table = table_for(models[0]) if models else ""
+    return table, not isinstance(pool, PostgresPool)
+
+
+async def bulk_insert(
+    models: Sequence[BaseModel],
+    table: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Insert models in batches.
+
+    Args:
+        models: Models to insert (e.g. ``Message`` or ``Conversation`` instances)
+        table: Table name (defaults to the model's table)
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    table, json_compatible = _prepare(models, table, pool)
+    rows = [model_to_row(m, json_compatible) for m in models]
+    return await _bulk_write(pool, "insert", rows, table, batch_size=batch_size, timeout=timeout)
+
+
+async def bulk_upsert(
+    models: Sequence[BaseModel],
+    table: Optional[str] = None,
+    conflict_columns: Sequence[str] = ("id",),
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Insert or update models in batches.
+
+    Args:
+        models: Models to upsert
+        table: Table name (defaults to the model's table)
+        conflict_columns: Columns identifying an existing row
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    table, json_compatible = _prepare(models, table, pool)
+    rows = [model_to_row(m, json_compatible) for m in models]
+    return await bulk_upsert_rows(rows, table, conflict_columns, batch_size, timeout, pool)
+
+
+async def bulk_upsert_rows(
+    rows: List[Dict[str, Any]],
+    table: str,
+    conflict_columns: Sequence[str] = ("id",),
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Insert or update rows that are already serialized for the backend.
+
+    Args:
+        rows: Column values per row, all with the same columns
+        table: Table name
+        conflict_columns: Columns identifying an existing row
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    return await _bulk_write(
+        pool,
+        "upsert",
+        rows,
+        table,
+        key=conflict_columns[0],
+        conflict_columns=conflict_columns,
+        batch_size=batch_size,
+        timeout=timeout,
+    )
+
+
+async def bulk_update(
+    models: Sequence[BaseModel],
+    table: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Update existing rows from models in batches.
+
+    Args:
+        models: Models carrying the new values
+        table: Table name (defaults to the model's table)
+        key: Column identifying the row to update
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    table, json_compatible = _prepare(models, table, pool)
+    rows = [model_to_row(m, json_compatible) for m in models]
+    return await _bulk_write(
+        pool, "update", rows, table, key=key, batch_size=batch_size, timeout=timeout
+    )
+
+
+async def bulk_delete(
+    models: Sequence[BaseModel],
+    table: Optional[str] = None,
+    key: str = "id",
+    batch_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    pool: Optional[DatabasePool] = None,
+) -> BulkWriteResult:
+    """
+    Delete the rows for the given models in batches.
+
+    Args:
+        models: Models whose rows should be deleted
+        table: Table name (defaults to the model's table)
+        key: Column identifying the row to delete
+        batch_size: Rows per batch (defaults to an optimal size for the backend)
+        timeout: Per-batch timeout in seconds
+        pool: Database pool (defaults to the shared pool)
+
+    Returns:
+        Bulk write result with per-row failures
+    """
+    pool = pool or await get_database_pool()
+    table, json_compatible = _prepare(models, table, pool)
+    rows = [{key: model_to_row(m, json_compatible)[key]} for m in models]
+    return await _bulk_write(
+        pool, "delete", rows, table, key=key, batch_size=batch_size, timeout=timeout
+    )
@@ -1,27 +1,65 @@
 """
 Kafka messaging utilities for the Aika AI System.
+
+``confluent_kafka`` is imported when the first client is created, not when
+this module is imported. Messages are JSON objects, encoded with ``orjson``
+when it is installed. The trace context travels in a ``traceparent`` message
+header, so consumers continue the publisher's trace.
 """
 
 import json
-from typing import Any, Callable, Dict, List, Optional
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from confluent_kafka import Consumer, Producer
+    from confluent_kafka.admin import AdminClient
 
-from confluent_kafka import Consumer, Producer
-from confluent_kafka.admin import AdminClient, NewTopic
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-from ..utils.config import get_settings
+from ..utils.config import lazy_settings
 from ..utils.logging import get_logger
+from ..utils.metrics import counter, histogram
+from ..utils.tracing import extract, inject, start_span
 
 # Get logger
 logger = get_logger(__name__)
 
 # Get settings
-settings = get_settings()
+settings = lazy_settings()
 
 # Kafka producer instance
-_producer: Optional[Producer] = None
+_producer: Optional["Producer"] = None
 
 # Kafka consumer instances
-_consumers: Dict[str, Consumer] = {}
+_consumers: Dict[str, "Consumer"] = {}
+
+# Kafka admin client instance
+_admin_client: Optional["AdminClient"] = None
+
+# Metrics
+PUBLISH_SECONDS = histogram(
+    "aika_kafka_publish_seconds", "Time to publish and flush a message", ["topic"]
+)
+PUBLISH_ERRORS = counter(
+    "aika_kafka_publish_errors_total", "Messages that failed to publish", ["topic"]
+)
+CONSUME_LAG_SECONDS = histogram(
+    "aika_kafka_consume_lag_seconds",
+    "Time from message creation to consumption",
+    ["topic"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 60.0, 300.0),
+)
+HANDLE_SECONDS = histogram(
+    "aika_kafka_handle_seconds", "Time spent in consumer callbacks", ["topic"]
+)
+HANDLE_ERRORS = counter(
+    "aika_kafka_handle_errors_total", "Consumer callbacks that raised", ["topic"]
+)
 
 # Required topics
 REQUIRED_TOPICS = [
@@ -29,10 +67,11 @@ REQUIRED_TOPICS = [
     "agent.responses",
     "orchestrator.commands",
     "system.events",
+    "auth.revocations",
 ]
 
 
-def get_producer() -> Producer:
+def get_producer() -> "Producer":
     """
     Get the Kafka producer instance.
     
@@ -42,6 +81,8 @@ def get_producer() -> Producer:
     global _producer
     
     if _producer is None:
+        from confluent_kafka import Producer
+        
         try:
             logger.info("Initializing Kafka producer")
             _producer = Producer({
@@ -56,7 +97,7 @@ def get_producer() -> Producer:
     return _producer
 
 
-def get_consumer(group_id: str) -> Consumer:
+def get_consumer(group_id: str) -> "Consumer":
     """
     Get a Kafka consumer instance for the specified group.
     
@@ -67,6 +108,8 @@ def get_consumer(group_id: str) -> Consumer:
         Kafka consumer
     """
     if group_id not in _consumers:
+        from confluent_kafka import Consumer
+        
         try:
             logger.info(f"Initializing Kafka consumer for group '{group_id}'")
             _consumers[group_id] = Consumer({
@@ -82,10 +125,29 @@ def get_consumer(group_id: str) -> Consumer:
     return _consumers[group_id]
 
 
+def get_admin_client() -> "AdminClient":
+    """
+    Get the Kafka admin client instance.
+    
+    Returns:
+        Kafka admin client
+    """
+    global _admin_client
+    
+    if _admin_client is None:
+        from confluent_kafka.admin import AdminClient
+        
+        _admin_client = AdminClient({"bootstrap.servers": settings.KAFKA_BOOTSTRAP_SERVERS})
+    
+    return _admin_client
+
+
 def ensure_topics_exist() -> None:
     """
     Ensure that all required topics exist.
     """
+    from confluent_kafka.admin import AdminClient, NewTopic
+    
     try:
         logger.info("Ensuring required Kafka topics exist")
         admin_client = AdminClient({"bootstrap.servers": settings.KAFKA_BOOTSTRAP_SERVERS})
@@ -120,6 +182,37 @@ def ensure_topics_exist() -> None:
         raise
 
 
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    Encode a message for publishing.
+    
+    Args:
+        message: Message to encode
+        
+    Returns:
+        UTF-8 JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(message, default=str, option=orjson.OPT_NON_STR_KEYS)
+    text = json.dumps(message, default=str, ensure_ascii=False, separators=(",", ":"))
+    return text.encode("utf-8")
+
+
+def decode_message(value: bytes) -> Dict[str, Any]:
+    """
+    Decode a consumed message.
+    
+    Args:
+        value: UTF-8 JSON bytes
+        
+    Returns:
+        Decoded message
+    """
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
 def publish_message(topic: str, message: Dict[str, Any], key: Optional[str] = None) -> None:
     """
     Publish a message to the specified topic.
@@ -130,24 +223,26 @@ def publish_message(topic: str, message: Dict[str, Any], key: Optional[str] = No
         key: Message key (optional)
     """
     producer = get_producer()
+    started = time.perf_counter()
     
-    try:
-        # Convert message to JSON
-        message_json = json.dumps(message).encode("utf-8")
-        
-        # Publish message
-        producer.produce(
-            topic=topic,
-            value=message_json,
-            key=key.encode("utf-8") if key else None,
-            callback=_delivery_report,
-        )
-        
-        # Flush to ensure message is sent
-        producer.flush()
-    except Exception as e:
-        logger.error(f"Failed to publish message to topic '{topic}': {e}")
-        raise
+    with start_span("kafka.publish", kind="producer", attributes={"messaging.destination": topic}):
+        try:
+            # Publish message
+            producer.produce(
+                topic=topic,
+                value=encode_message(message),
+                key=key.encode("utf-8") if key else None,
+                headers=list(inject({}).items()),
+                callback=_delivery_report,
+            )
+            
+            # Flush to ensure message is sent
+            producer.flush()
+            PUBLISH_SECONDS.labels(topic).observe(time.perf_counter() - started)
+        except Exception as e:
+            PUBLISH_ERRORS.labels(topic).inc()
+            logger.error(f"Failed to publish message to topic '{topic}': {e}")
+            raise
 
 
 def _delivery_report(err, msg) -> None:
@@ -159,9 +254,9 @@ def _delivery_report(err, msg) -> None:
         msg: Message
     """
     if err is not None:
-        logger.error(f"Message delivery failed: {err}")
-    else:
-        logger.debug(f"Message delivered to {msg.topic()} [{msg.partition()}]")
+        logger.error("Message delivery failed: %s", err)
+    elif logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Message delivered to %s [%s]", msg.topic(), msg.partition())
 
 
 def consume_messages(
@@ -181,10 +276,63 @@ def consume_messages(
     """
     consumer = get_consumer(group_id)
     
+    # Subscribe to topics
+    consumer.subscribe(topics)
+    _poll(consumer, callback, timeout)
+
+
+def consume_since(
+    topic: str,
+    since: float,
+    callback: Callable[[Dict[str, Any], str], None],
+    timeout: float = 1.0,
+) -> None:
+    """
+    Consume every partition of a topic, starting at a point in time.
+    
+    Partitions are assigned directly rather than through a consumer group,
+    so every caller receives every message, nothing is committed and no
+    group is left behind when the process exits.
+    
+    Args:
+        topic: Topic name
+        since: Unix timestamp of the oldest message to read
+        callback: Callback function to process messages
+        timeout: Polling timeout in seconds
+    """
+    from confluent_kafka import OFFSET_END, Consumer, TopicPartition
+    
+    # librdkafka requires a group id, but it is never joined or committed to
+    consumer = Consumer({
+        "bootstrap.servers": settings.KAFKA_BOOTSTRAP_SERVERS,
+        "group.id": f"aika-{topic}",
+        "enable.auto.commit": False,
+    })
+    
+    metadata = consumer.list_topics(topic, timeout=10)
+    since_ms = int(since * 1000)
+    partitions = consumer.offsets_for_times(
+        [
+            TopicPartition(topic, partition, since_ms)
+            for partition in metadata.topics[topic].partitions
+        ],
+        timeout=10,
+    )
+    # Partitions with no message since then start at the end
+    consumer.assign([
+        TopicPartition(topic, tp.partition, tp.offset if tp.offset >= 0 else OFFSET_END)
+        for tp in partitions
+    ])
+    _poll(consumer, callback, timeout)
+
+
+def _poll(
+    consumer: "Consumer", callback: Callable[[Dict[str, Any], str], None], timeout: float
+) -> None:
+    """Poll a consumer and pass each message to a callback until interrupted."""
+    from confluent_kafka import TIMESTAMP_NOT_AVAILABLE
+    
     try:
-        # Subscribe to topics
-        consumer.subscribe(topics)
-        
         # Poll for messages
         while True:
             msg = consumer.poll(timeout)
@@ -196,18 +344,32 @@ def consume_messages(
                 logger.error(f"Consumer error: {msg.error()}")
                 continue
                 
-            try:
-                # Parse message value
-                message_json = msg.value().decode("utf-8")
-                message = json.loads(message_json)
-                
-                # Get message key
-                key = msg.key().decode("utf-8") if msg.key() else None
+            topic = msg.topic()
+            timestamp_type, timestamp = msg.timestamp()
+            if timestamp_type != TIMESTAMP_NOT_AVAILABLE:
+                CONSUME_LAG_SECONDS.labels(topic).observe(max(0.0, time.time() - timestamp / 1000))
                 
-                # Process message
-                callback(message, key)
-            except Exception as e:
-                logger.error(f"Failed to process message: {e}")
+            started = time.perf_counter()
+            with start_span(
+                "kafka.consume",
+                kind="consumer",
+                attributes={"messaging.destination": topic, "messaging.partition": msg.partition()},
+                parent=extract(msg.headers()),
+            ) as span:
+                try:
+                    # Parse message value
+                    message = decode_message(msg.value())
+                    
+                    # Get message key
+                    key = msg.key().decode("utf-8") if msg.key() else None
+                    
+                    # Process message
+                    callback(message, key)
+                except Exception as e:
+                    span.record_exception(e)
+                    HANDLE_ERRORS.labels(topic).inc()
+                    logger.error(f"Failed to process message: {e}")
+            HANDLE_SECONDS.labels(topic).observe(time.perf_counter() - started)
     except KeyboardInterrupt:
         logger.info("Stopping consumer")
     finally:
@@ -2,13 +2,22 @@
 Core orchestrator functionality for the Aika AI System.
 """
 
+import time
 from typing import Any, Dict, List, Optional
 
+from ..agents.base import get_agent_registry
 from ..utils.logging import get_logger
+from ..utils.metrics import histogram
+from ..utils.tracing import start_span
 
 # Get logger
 logger = get_logger(__name__)
 
+# Metrics
+REQUEST_SECONDS = histogram(
+    "aika_orchestrator_request_seconds", "Time to handle an orchestrator request", ["status"]
+)
+
 
 class Orchestrator:
     """
@@ -101,12 +110,12 @@ class Orchestrator:
         # Get agent
         agent = self.get_agent(agent_id)
         if agent is None:
-            logger.error(f"Agent '{agent_id}' not found")
+            logger.error("Agent '%s' not found", agent_id)
             return {"error": f"Agent '{agent_id}' not found"}
         
         # Process request with agent
         # In a real implementation, this would send the request to the agent via Kafka
-        logger.info(f"Sending request to agent '{agent_id}'")
+        logger.info("Sending request to agent '%s'", agent_id)
         
         # Placeholder response
         response = {
@@ -116,6 +125,37 @@ class Orchestrator:
         }
         
         return response
+        
+    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Handle a request asynchronously.
+        
+        The request goes to the first registered agent instance that can
+        handle it, falling back to ``process_request``.
+        
+        Args:
+            request: Request data
+            
+        Returns:
+            Response data
+        """
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with start_span("orchestrator.handle_request") as span:
+                with start_span("orchestrator.route"):
+                    agent = await get_agent_registry().find_agent_for_request(request)
+                if agent is not None:
+                    logger.debug("Dispatching request to agent '%s'", agent.agent_id)
+                    span.set_attribute("agent_id", agent.agent_id)
+                    with start_span("agent.process", attributes={"agent_id": agent.agent_id}):
+                        response = await agent.process(request)
+                else:
+                    response = self.process_request(request)
+            status = "ok"
+            return response
+        finally:
+            REQUEST_SECONDS.labels(status).observe(time.perf_counter() - started)
 
 
 # Singleton instance
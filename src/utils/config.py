@@ -15,13 +15,119 @@ class Settings(BaseSettings):
     """
     # API Settings
     DEBUG: bool = Field(False, env="DEBUG")
-    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
     SECRET_KEY: str = Field(..., env="SECRET_KEY")
     ALLOWED_ORIGINS: List[str] = Field(["http://localhost:3000", "http://localhost:8000"], env="ALLOWED_ORIGINS")
     
+    # Logging Settings
+    LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")
+    LOG_QUEUE_SIZE: int = Field(10000, env="LOG_QUEUE_SIZE")
+    LOG_SAMPLE_PER_SECOND: int = Field(100, env="LOG_SAMPLE_PER_SECOND")
+    
+    # Auth Settings
+    AUTH_TOKEN_CACHE_SIZE: int = Field(10000, env="AUTH_TOKEN_CACHE_SIZE")
+    AUTH_USER_CACHE_SIZE: int = Field(10000, env="AUTH_USER_CACHE_SIZE")
+    AUTH_USER_CACHE_TTL: float = Field(60.0, env="AUTH_USER_CACHE_TTL")
+    AUTH_REVOCATION_CAPACITY: int = Field(100000, env="AUTH_REVOCATION_CAPACITY")
+    AUTH_REVOCATION_ERROR_RATE: float = Field(0.01, env="AUTH_REVOCATION_ERROR_RATE")
+    AUTH_REVOCATION_LISTENER: bool = Field(True, env="AUTH_REVOCATION_LISTENER")
+    AUTH_REVOCATION_REPLAY_SECONDS: float = Field(1800.0, env="AUTH_REVOCATION_REPLAY_SECONDS")
+    
+    # Rate Limit Settings
+    RATE_LIMIT_ENABLED: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    RATE_LIMIT_USER: str = Field("10:40", env="RATE_LIMIT_USER")
+    RATE_LIMIT_API_KEY: str = Field("50:200", env="RATE_LIMIT_API_KEY")
+    RATE_LIMIT_ROUTES: str = Field("", env="RATE_LIMIT_ROUTES")
+    RATE_LIMIT_EXEMPT_PATHS: str = Field(
+        "/health,/metrics,/docs,/openapi.json", env="RATE_LIMIT_EXEMPT_PATHS"
+    )
+    # "memory" keeps buckets per worker, so N workers allow N times each limit;
+    # "postgres" shares them between workers
+    RATE_LIMIT_BACKEND: str = Field("memory", env="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_SHARDS: int = Field(64, env="RATE_LIMIT_SHARDS")
+    
+    # Orchestrator Batch Settings
+    ORCHESTRATOR_BATCH_CONCURRENCY: int = Field(32, env="ORCHESTRATOR_BATCH_CONCURRENCY")
+    ORCHESTRATOR_BATCH_MAX_LINE_BYTES: int = Field(1048576, env="ORCHESTRATOR_BATCH_MAX_LINE_BYTES")
+    
+    # Response Settings
+    RESPONSE_COMPRESSION_ENABLED: bool = Field(True, env="RESPONSE_COMPRESSION_ENABLED")
+    RESPONSE_COMPRESSION_MIN_SIZE: int = Field(1024, env="RESPONSE_COMPRESSION_MIN_SIZE")
+    RESPONSE_GZIP_LEVEL: int = Field(6, env="RESPONSE_GZIP_LEVEL")
+    RESPONSE_BROTLI_QUALITY: int = Field(4, env="RESPONSE_BROTLI_QUALITY")
+    RESPONSE_ETAGS_ENABLED: bool = Field(True, env="RESPONSE_ETAGS_ENABLED")
+    
+    # Health Settings
+    HEALTH_PROBE_ENABLED: bool = Field(True, env="HEALTH_PROBE_ENABLED")
+    HEALTH_CHECKS: str = Field("database,kafka,agents", env="HEALTH_CHECKS")
+    HEALTH_PROBE_INTERVAL: float = Field(5.0, env="HEALTH_PROBE_INTERVAL")
+    HEALTH_PROBE_TIMEOUT: float = Field(2.0, env="HEALTH_PROBE_TIMEOUT")
+    HEALTH_DATABASE_TABLE: str = Field("agents", env="HEALTH_DATABASE_TABLE")
+    HEALTH_MIN_AGENTS: int = Field(0, env="HEALTH_MIN_AGENTS")
+    
+    # Metrics Settings
+    METRICS_ENABLED: bool = Field(True, env="METRICS_ENABLED")
+    METRICS_MULTIPROC_DIR: Optional[str] = Field(None, env="METRICS_MULTIPROC_DIR")
+    METRICS_SNAPSHOT_INTERVAL: float = Field(1.0, env="METRICS_SNAPSHOT_INTERVAL")
+    
+    # Admin and Profiler Settings
+    ADMIN_API_KEY: Optional[str] = Field(None, env="ADMIN_API_KEY")
+    PROFILER_INTERVAL: float = Field(0.005, env="PROFILER_INTERVAL")
+    PROFILER_MAX_SECONDS: float = Field(60.0, env="PROFILER_MAX_SECONDS")
+    PROFILER_KEEP: int = Field(20, env="PROFILER_KEEP")
+    
+    # Server Settings
+    SERVER_WORKERS: str = Field("1", env="SERVER_WORKERS")
+    SERVER_LOOP: str = Field("auto", env="SERVER_LOOP")
+    SERVER_HTTP: str = Field("auto", env="SERVER_HTTP")
+    SERVER_MAX_REQUESTS: int = Field(0, env="SERVER_MAX_REQUESTS")
+    SERVER_MAX_REQUESTS_JITTER: int = Field(0, env="SERVER_MAX_REQUESTS_JITTER")
+    SERVER_GRACEFUL_TIMEOUT: float = Field(30.0, env="SERVER_GRACEFUL_TIMEOUT")
+    SERVER_PRELOAD: bool = Field(True, env="SERVER_PRELOAD")
+    
+    # Trace Recording Settings
+    TRACE_RECORD_PATH: Optional[str] = Field(None, env="TRACE_RECORD_PATH")
+    TRACE_RECORD_SAMPLE_RATE: float = Field(1.0, env="TRACE_RECORD_SAMPLE_RATE")
+    TRACE_RECORD_MAX_BODY_BYTES: int = Field(65536, env="TRACE_RECORD_MAX_BODY_BYTES")
+    TRACE_RECORD_BODIES: bool = Field(False, env="TRACE_RECORD_BODIES")
+    TRACE_RECORD_BODY_PATHS: str = Field("", env="TRACE_RECORD_BODY_PATHS")
+    TRACE_RECORD_REDACT_FIELDS: str = Field(
+        "password,token,access_token,refresh_token,secret,api_key,email,phone,ssn,date_of_birth",
+        env="TRACE_RECORD_REDACT_FIELDS",
+    )
+    
+    # Tracing Settings
+    TRACING_EXPORTER: str = Field("none", env="TRACING_EXPORTER")
+    TRACING_FILE_PATH: str = Field("traces.jsonl", env="TRACING_FILE_PATH")
+    TRACING_SAMPLE_RATE: float = Field(0.01, env="TRACING_SAMPLE_RATE")
+    TRACING_TAIL_LATENCY_MS: float = Field(1000.0, env="TRACING_TAIL_LATENCY_MS")
+    TRACING_TAIL_ERRORS: bool = Field(True, env="TRACING_TAIL_ERRORS")
+    TRACING_MAX_SPANS_PER_TRACE: int = Field(256, env="TRACING_MAX_SPANS_PER_TRACE")
+    TRACING_EXPORT_QUEUE_SIZE: int = Field(1024, env="TRACING_EXPORT_QUEUE_SIZE")
+    
     # Database Settings
     SUPABASE_URL: str = Field(..., env="SUPABASE_URL")
     SUPABASE_SERVICE_KEY: str = Field(..., env="SUPABASE_SERVICE_KEY")
+    DATABASE_URL: Optional[str] = Field(None, env="DATABASE_URL")
+    DB_POOL_MIN_SIZE: int = Field(1, env="DB_POOL_MIN_SIZE")
+    DB_POOL_MAX_SIZE: int = Field(10, env="DB_POOL_MAX_SIZE")
+    DB_QUERY_TIMEOUT: float = Field(10.0, env="DB_QUERY_TIMEOUT")
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(5.0, env="DB_POOL_ACQUIRE_TIMEOUT")
+    DB_BULK_BATCH_SIZE: int = Field(500, env="DB_BULK_BATCH_SIZE")
+    QUERY_CACHE_TABLES: str = Field("", env="QUERY_CACHE_TABLES")
+    QUERY_CACHE_MAX_ENTRIES: int = Field(1024, env="QUERY_CACHE_MAX_ENTRIES")
+    QUERY_CACHE_NOTIFY_CHANNEL: Optional[str] = Field(None, env="QUERY_CACHE_NOTIFY_CHANNEL")
+    MESSAGE_WAL_PATH: str = Field("data/messages.wal", env="MESSAGE_WAL_PATH")
+    MESSAGE_WAL_BATCH_SIZE: int = Field(500, env="MESSAGE_WAL_BATCH_SIZE")
+    MESSAGE_WAL_FLUSH_INTERVAL: float = Field(0.05, env="MESSAGE_WAL_FLUSH_INTERVAL")
+    KNOWLEDGE_TABLE: str = Field("knowledge", env="KNOWLEDGE_TABLE")
+    KNOWLEDGE_MATCH_FUNCTION: str = Field("match_knowledge", env="KNOWLEDGE_MATCH_FUNCTION")
+    KNOWLEDGE_INDEX_PATH: Optional[str] = Field(None, env="KNOWLEDGE_INDEX_PATH")
+    KNOWLEDGE_NPROBE: int = Field(16, env="KNOWLEDGE_NPROBE")
+    HISTORY_MAX_MESSAGES: int = Field(50, env="HISTORY_MAX_MESSAGES")
+    HISTORY_MAX_TOKENS: int = Field(8000, env="HISTORY_MAX_TOKENS")
+    HISTORY_PAGE_SIZE: int = Field(50, env="HISTORY_PAGE_SIZE")
+    HISTORY_SUMMARY_MAX_TOKENS: int = Field(512, env="HISTORY_SUMMARY_MAX_TOKENS")
     
     # Kafka Settings
     KAFKA_BOOTSTRAP_SERVERS: str = Field("localhost:9092", env="KAFKA_BOOTSTRAP_SERVERS")
@@ -34,6 +140,29 @@ class Settings(BaseSettings):
     REASONER_MODEL: str = Field("claude-3-sonnet-20240229", env="REASONER_MODEL")
     SUMMARIZER_MODEL: str = Field("claude-3-haiku-20240307", env="SUMMARIZER_MODEL")
     
+    # LLM Client Settings
+    LLM_BASE_URL: str = Field("https://api.anthropic.com", env="LLM_BASE_URL")
+    LLM_API_VERSION: str = Field("2023-06-01", env="LLM_API_VERSION")
+    LLM_TIMEOUT: float = Field(60.0, env="LLM_TIMEOUT")
+    LLM_MAX_CONNECTIONS: int = Field(64, env="LLM_MAX_CONNECTIONS")
+    LLM_KEEPALIVE_EXPIRY: float = Field(30.0, env="LLM_KEEPALIVE_EXPIRY")
+    LLM_MAX_CONCURRENCY: int = Field(32, env="LLM_MAX_CONCURRENCY")
+    LLM_MAX_CONCURRENCY_PER_MODEL: int = Field(16, env="LLM_MAX_CONCURRENCY_PER_MODEL")
+    LLM_REQUESTS_PER_MINUTE: float = Field(0.0, env="LLM_REQUESTS_PER_MINUTE")
+    LLM_TOKENS_PER_MINUTE: float = Field(0.0, env="LLM_TOKENS_PER_MINUTE")
+    LLM_MAX_RETRIES: int = Field(3, env="LLM_MAX_RETRIES")
+    LLM_RETRY_BASE_DELAY: float = Field(0.5, env="LLM_RETRY_BASE_DELAY")
+    LLM_RETRY_MAX_DELAY: float = Field(8.0, env="LLM_RETRY_MAX_DELAY")
+    LLM_RETRY_BUDGET_RATIO: float = Field(0.1, env="LLM_RETRY_BUDGET_RATIO")
+    LLM_RETRY_BUDGET_MIN_PER_SECOND: float = Field(1.0, env="LLM_RETRY_BUDGET_MIN_PER_SECOND")
+    LLM_HEDGE_AFTER_MS: float = Field(0.0, env="LLM_HEDGE_AFTER_MS")
+    MODEL_ROUTER_LATENCY_SLO_MS: float = Field(0.0, env="MODEL_ROUTER_LATENCY_SLO_MS")
+    MODEL_ROUTER_CASCADE: bool = Field(True, env="MODEL_ROUTER_CASCADE")
+    MODEL_ROUTER_CONFIDENCE_THRESHOLD: float = Field(0.7, env="MODEL_ROUTER_CONFIDENCE_THRESHOLD")
+    MODEL_ROUTER_MISSING_CONFIDENCE: Optional[float] = Field(
+        None, env="MODEL_ROUTER_MISSING_CONFIDENCE"
+    )
+    
     # LangSmith Settings (optional)
     LANGCHAIN_TRACING_V2: bool = Field(False, env="LANGCHAIN_TRACING_V2")
     LANGCHAIN_ENDPOINT: Optional[str] = Field(None, env="LANGCHAIN_ENDPOINT")
@@ -63,3 +192,39 @@ def get_settings() -> Settings:
         Settings instance
     """
     return Settings()
+
+
+class _LazySettings:
+    """
+    Proxy that resolves the settings on first attribute access.
+    
+    Assignments (including ``unittest.mock.patch.object``) go to the real
+    settings instance.
+    """
+    
+    __slots__ = ()
+    
+    def __getattr__(self, name: str):
+        return getattr(get_settings(), name)
+        
+    def __setattr__(self, name: str, value) -> None:
+        setattr(get_settings(), name, value)
+        
+    def __delattr__(self, name: str) -> None:
+        delattr(get_settings(), name)
+        
+    def __repr__(self) -> str:
+        return f"<lazy {get_settings()!r}>"
+
+
+def lazy_settings() -> Settings:
+    """
+    Get the settings without resolving them until first use.
+    
+    Modules bind this at import time so that importing them neither reads the
+    environment nor fails when required settings are missing.
+    
+    Returns:
+        Settings proxy
+    """
+    return _LazySettings()
@@ -1,15 +1,33 @@
 """
 Logging utilities for the Aika AI System.
+
+``configure_logging`` installs a non-blocking pipeline on the root logger:
+
+- Log calls only put the record on a bounded queue. Formatting and the write
+  to stdout happen on a listener thread, never on the event loop. Messages
+  should use lazy arguments (``logger.info("Sent %s", key)``) so that nothing
+  is formatted for disabled levels; arguments are formatted later, on the
+  listener thread, so they should not be mutated after the call.
+- Records are written as one JSON object per line (``LOG_FORMAT=json``) with
+  any ``extra`` fields, or as plain text (``LOG_FORMAT=text``).
+- Records at INFO and below are sampled per call site: at most
+  ``LOG_SAMPLE_PER_SECOND`` per second each, with the number suppressed
+  attached to the next one let through. Warnings and errors are never sampled.
+- When the queue is full, records are dropped rather than blocking the caller.
+  Drops are counted (``get_logging_stats``, ``aika_log_records_dropped``) and
+  reported in a warning once the queue has room again.
 """
 
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
-from typing import Optional
-
-from .config import get_settings
-
-# Get settings
-settings = get_settings()
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
 
 # Define log levels
 LOG_LEVELS = {
@@ -20,44 +38,268 @@ LOG_LEVELS = {
     "CRITICAL": logging.CRITICAL,
 }
 
+# Attributes of every LogRecord; anything else was passed as ``extra``
+_RECORD_ATTRIBUTES = frozenset(
+    [*vars(logging.LogRecord("", 0, "", 0, "", (), None)), "message", "asctime"]
+)
+
+# Running pipeline
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.fromtimestamp(record.created, timezone.utc)
+        entry: Dict[str, Any] = {
+            "ts": created.isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most ``per_second`` records per call site and second.
+
+    Only records at or below ``max_level`` are sampled. The number of records
+    suppressed since the last one let through is attached to it as
+    ``suppressed``.
+    """
+
+    def __init__(self, per_second: int, max_level: int = logging.INFO):
+        """
+        Initialize the filter.
+
+        Args:
+            per_second: Records per call site and second (0 disables sampling)
+            max_level: Highest level that is sampled
+        """
+        super().__init__()
+        self.per_second = per_second
+        self.max_level = max_level
+        self.sampled = 0
+        # (logger, file, line) -> [window start, records in window, suppressed]
+        self._sites: Dict[Tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.per_second or record.levelno > self.max_level:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.pathname, record.lineno)
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None:
+                site = self._sites[key] = [now, 0, 0]
+            if now - site[0] >= 1.0:
+                site[0], site[1] = now, 0
+            if site[1] >= self.per_second:
+                site[2] += 1
+                self.sampled += 1
+                return False
+            site[1] += 1
+            suppressed, site[2] = site[2], 0
+
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that drops records instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue: "queue.Queue[Any]"):
+        """
+        Initialize the handler.
+
+        Args:
+            log_queue: Bounded queue read by the listener
+        """
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+        self.dropped_by_level: Dict[str, int] = {}
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike QueueHandler.prepare, leave formatting to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self._unreported:
+                self._report_drops()
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+                level = record.levelname
+                self.dropped_by_level[level] = self.dropped_by_level.get(level, 0) + 1
+
+    def _report_drops(self) -> None:
+        """Queue a warning about records dropped since the last report."""
+        with self._lock:
+            count, self._unreported = self._unreported, 0
+        warning = logging.LogRecord(
+            __name__, logging.WARNING, __file__, 0,
+            "Dropped %d log records under backpressure", (count,), None,
+        )
+        warning.dropped = count
+        try:
+            self.queue.put_nowait(warning)
+        except queue.Full:
+            with self._lock:
+                self._unreported += count
+
+
 # Configure root logger
-def configure_logging(log_level: Optional[str] = None) -> None:
+def configure_logging(
+    log_level: Optional[str] = None,
+    log_format: Optional[str] = None,
+    queue_size: Optional[int] = None,
+    sample_per_second: Optional[int] = None,
+    stream: Any = None,
+) -> None:
     """
-    Configure the root logger.
-    
+    Configure the root logger with the non-blocking pipeline.
+
+    Reconfiguring replaces the previous pipeline after writing out its queue.
+
     Args:
         log_level: Log level (defaults to settings.LOG_LEVEL)
+        log_format: ``json`` or ``text`` (defaults to settings.LOG_FORMAT)
+        queue_size: Records buffered before dropping (defaults to settings.LOG_QUEUE_SIZE)
+        sample_per_second: Records per call site and second at INFO and below,
+            0 for all (defaults to settings.LOG_SAMPLE_PER_SECOND)
+        stream: Output stream (defaults to stdout)
     """
+    global _listener, _queue_handler
+
+    # Imported here so that get_logger() does not pull in pydantic
+    from .config import get_settings
+
+    settings = get_settings()
     if log_level is None:
         log_level = settings.LOG_LEVEL
-        
+    if log_format is None:
+        log_format = settings.LOG_FORMAT
+    if queue_size is None:
+        queue_size = settings.LOG_QUEUE_SIZE
+    if sample_per_second is None:
+        sample_per_second = settings.LOG_SAMPLE_PER_SECOND
+
     level = LOG_LEVELS.get(log_level.upper(), logging.INFO)
-    
+
+    shutdown_logging()
+
+    # Output handler, run by the listener thread
+    output = logging.StreamHandler(stream or sys.stdout)
+    if log_format == "json":
+        output.setFormatter(JSONFormatter())
+    else:
+        output.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+
     # Configure root logger
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-        ]
-    )
-    
+    _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    _queue_handler.addFilter(SamplingFilter(sample_per_second))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, output)
+    _listener.start()
+
     # Set log levels for third-party libraries
     logging.getLogger("uvicorn").setLevel(level)
     logging.getLogger("fastapi").setLevel(level)
-    
+
     # Set lower log level for noisy libraries
     if level <= logging.INFO:
         logging.getLogger("kafka").setLevel(logging.WARNING)
 
+    from .metrics import gauge
+    gauge(
+        "aika_log_records_dropped", "Log records dropped because the log queue was full"
+    ).set_function(lambda: get_logging_stats()["dropped"])
+
+
+@atexit.register
+def shutdown_logging() -> None:
+    """
+    Stop the logging pipeline, writing out everything queued.
+    """
+    global _listener, _queue_handler
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """
+    Get statistics of the logging pipeline.
+
+    Returns:
+        Dictionary with queued, dropped and sampled record counts
+    """
+    handler = _queue_handler
+    if handler is None:
+        return {
+            "enabled": False,
+            "enqueued": 0,
+            "dropped": 0,
+            "dropped_by_level": {},
+            "sampled": 0,
+            "queued": 0,
+        }
+
+    sampled = sum(f.sampled for f in handler.filters if isinstance(f, SamplingFilter))
+    return {
+        "enabled": True,
+        "enqueued": handler.enqueued,
+        "dropped": handler.dropped,
+        "dropped_by_level": dict(handler.dropped_by_level),
+        "sampled": sampled,
+        "queued": handler.queue.qsize(),
+    }
+
 
 def get_logger(name: str) -> logging.Logger:
     """
     Get a logger with the specified name.
-    
+
     Args:
         name: Logger name
-        
+
     Returns:
         Logger instance
     """
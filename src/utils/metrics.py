@@ -0,0 +1,739 @@
+"""
+In-process metrics for the Aika AI System.
+
+Counters, gauges and fixed-bucket histograms, optionally labelled, rendered
+in the Prometheus text exposition format. Metrics are declared once at module
+level and updated on hot paths::
+
+    PUBLISH_SECONDS = histogram("aika_kafka_publish_seconds", "Publish latency", ["topic"])
+    PUBLISH_SECONDS.labels(topic).observe(elapsed)
+
+Counters and histograms keep one value array per thread, so an update is a
+few list writes with no lock; the arrays are only summed when the metrics are
+collected. Gauges hold a single value, or read it from a callback at
+collection time.
+
+With several worker processes, set ``METRICS_MULTIPROC_DIR``: every worker
+periodically writes a snapshot of its metrics there, and ``/metrics`` on any
+worker aggregates the snapshots of all workers with its own live values.
+Counters and histograms from exited workers are kept so totals never go
+backwards; their gauges are dropped. Snapshots of exited workers are folded
+into a single ``metrics-exited.json`` so that the directory does not grow
+with every worker restart.
+"""
+
+import bisect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Default histogram buckets in seconds, suited to request and query latency
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+GAUGE_MODES = ("sum", "max", "min", "all")
+
+# Snapshot file accumulating the counters and histograms of exited workers
+EXITED_SNAPSHOT = "metrics-exited.json"
+
+LabelValues = Tuple[str, ...]
+
+
+class _ThreadCells:
+    """
+    Per-thread value arrays; each thread only ever writes its own.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._cells: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def cell(self) -> List[float]:
+        """Get the calling thread's array, creating it on first use."""
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = [0.0] * self._size
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def totals(self) -> List[float]:
+        """Sum the arrays of every thread."""
+        with self._lock:
+            cells = list(self._cells)
+        totals = [0.0] * self._size
+        for cell in cells:
+            for i, value in enumerate(cell):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    """A counter for one combination of label values."""
+
+    def __init__(self):
+        self._cells = _ThreadCells(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+        """
+        try:
+            self._cells._local.cell[0] += amount
+        except AttributeError:
+            self._cells.cell()[0] += amount
+
+    def get(self) -> float:
+        """Get the current value."""
+        return self._cells.totals()[0]
+
+
+class _GaugeChild:
+    """A gauge for one combination of label values."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the gauge."""
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the gauge."""
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Read the gauge from a callback at collection time.
+
+        Args:
+            function: Callback returning the current value
+        """
+        self._function = function
+
+    def get(self) -> float:
+        """Get the current value."""
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class _HistogramChild:
+    """A histogram for one combination of label values."""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # One count per bucket, one for +Inf, then the sum
+        self._cells = _ThreadCells(len(buckets) + 2)
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+        """
+        try:
+            cell = self._cells._local.cell
+        except AttributeError:
+            cell = self._cells.cell()
+        cell[bisect.bisect_left(self._buckets, value)] += 1
+        cell[-1] += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Observe the duration of a block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+    def get(self) -> List[float]:
+        """Get per-bucket (non-cumulative) counts followed by the sum."""
+        return self._cells.totals()
+
+
+class Metric:
+    """
+    A named metric family with optional labels.
+
+    Unlabelled metrics can be updated directly; labelled ones through
+    ``labels(...)``, whose children are cached and can be kept by callers.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+        # Children by the values callers pass (e.g. an int status), for the fast path
+        self._lookup: Dict[Tuple[Any, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._lookup[()] = self._new_child()
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any) -> Any:
+        """
+        Get the child for a combination of label values.
+
+        Args:
+            *values: Label values in ``labelnames`` order
+
+        Returns:
+            Metric child
+        """
+        child = self._lookup.get(values)
+        if child is None:
+            key = tuple(str(v) for v in values)
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"Metric '{self.name}' expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+                self._lookup[values] = child
+        return child
+
+    def children(self) -> List[Tuple[LabelValues, Any]]:
+        """List the children with their label values."""
+        with self._lock:
+            return list(self._children.items())
+
+
+class Counter(Metric):
+    """Monotonically increasing counter."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the unlabelled counter."""
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ):
+        """
+        Initialize the gauge.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            multiprocess_mode: How live workers' values combine: sum, max, min or all
+                (one series per pid)
+        """
+        if multiprocess_mode not in GAUGE_MODES:
+            raise ValueError(f"Unknown gauge mode '{multiprocess_mode}'")
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        """Set the unlabelled gauge."""
+        self._default.set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increase the unlabelled gauge."""
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrease the unlabelled gauge."""
+        self._default.dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Read the unlabelled gauge from a callback."""
+        self._default.set_function(function)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Increasing upper bounds (+Inf is implied)
+        """
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        """Record an observation on the unlabelled histogram."""
+        self._default.observe(value)
+
+    def time(self) -> Any:
+        """Observe the duration of a block on the unlabelled histogram."""
+        return self._default.time()
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Format a label set."""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics with Prometheus text rendering.
+    """
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+        self._snapshot_dir: Optional[str] = None
+        self._snapshot_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _register(self, metric_class: type, name: str, *args: Any, **kwargs: Any) -> Any:
+        """Get a metric by name, creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.type}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """
+        Get or create a counter.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+
+        Returns:
+            Counter
+        """
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        multiprocess_mode: str = "sum",
+    ) -> Gauge:
+        """
+        Get or create a gauge.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            multiprocess_mode: How live workers' values combine: sum, max, min or all
+
+        Returns:
+            Gauge
+        """
+        return self._register(
+            Gauge, name, documentation, labelnames, multiprocess_mode=multiprocess_mode
+        )
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Get or create a histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Increasing upper bounds
+
+        Returns:
+            Histogram
+        """
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Capture the current values of every metric.
+
+        Returns:
+            JSON-serializable snapshot keyed by metric name
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        snapshot = {}
+        for metric in metrics:
+            entry: Dict[str, Any] = {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "samples": [[list(labels), child.get()] for labels, child in metric.children()],
+            }
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+            if isinstance(metric, Gauge):
+                entry["mode"] = metric.multiprocess_mode
+            snapshot[metric.name] = entry
+        return snapshot
+
+    def collect(self) -> Dict[str, Any]:
+        """
+        Capture the current values of every metric across workers.
+
+        In multi-process mode the snapshots of all workers are aggregated;
+        otherwise this is the same as ``snapshot``.
+
+        Returns:
+            JSON-serializable snapshot keyed by metric name
+        """
+        snapshot = self.snapshot()
+        if self._snapshot_dir:
+            snapshot = _merge_snapshots(self._read_peer_snapshots(), snapshot)
+        return snapshot
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        return _render_snapshot(self.collect())
+
+    def start_multiprocess(self, directory: str, interval: float = 1.0) -> None:
+        """
+        Share this worker's metrics through snapshot files.
+
+        Args:
+            directory: Directory shared by every worker (cleared by the process manager on start)
+            interval: Seconds between snapshots
+        """
+        if self._snapshot_thread is not None:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        self._snapshot_dir = directory
+        self._stop.clear()
+
+        def _run() -> None:
+            while not self._stop.wait(interval):
+                self.write_snapshot()
+
+        self._snapshot_thread = threading.Thread(target=_run, name="aika-metrics", daemon=True)
+        self._snapshot_thread.start()
+        logger.info(f"Sharing metrics through '{directory}' every {interval}s")
+
+    def stop_multiprocess(self) -> None:
+        """Stop sharing metrics, writing a final snapshot."""
+        if self._snapshot_thread is None:
+            return
+        self._stop.set()
+        self._snapshot_thread.join()
+        self._snapshot_thread = None
+        self.write_snapshot()
+
+    def write_snapshot(self) -> None:
+        """Atomically write this worker's snapshot file."""
+        if not self._snapshot_dir:
+            return
+        path = os.path.join(self._snapshot_dir, f"metrics-{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "w") as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def _read_peer_snapshots(self) -> List[Tuple[bool, Dict[str, Any]]]:
+        """Read other workers' snapshots, flagging whether each worker is alive."""
+        with self._snapshot_lock():
+            self._fold_exited_snapshots()
+
+            peers = []
+            own = f"metrics-{os.getpid()}.json"
+            for filename in os.listdir(self._snapshot_dir):
+                if filename == own or not filename.startswith("metrics-"):
+                    continue
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self._snapshot_dir, filename)) as f:
+                        metrics = json.load(f)
+                    if filename == EXITED_SNAPSHOT:
+                        peers.append((False, {"pid": 0, "metrics": metrics}))
+                        continue
+                    pid = int(filename[len("metrics-"):-len(".json")])
+                    peers.append((_process_alive(pid), {"pid": pid, "metrics": metrics}))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Skipping metrics snapshot '{filename}': {e}")
+            return peers
+
+    @contextmanager
+    def _snapshot_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on the snapshot directory, where supported."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._snapshot_dir, "metrics.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _fold_exited_snapshots(self) -> None:
+        """Merge the snapshots of exited workers into one file and remove them (lock held)."""
+        if fcntl is None:
+            # Without a lock concurrent folds could count a worker twice
+            return
+
+        exited = []
+        for filename in os.listdir(self._snapshot_dir):
+            if not filename.startswith("metrics-") or not filename.endswith(".json"):
+                continue
+            try:
+                pid = int(filename[len("metrics-"):-len(".json")])
+            except ValueError:
+                continue
+            if not _process_alive(pid):
+                exited.append(filename)
+        if not exited:
+            return
+
+        path = os.path.join(self._snapshot_dir, EXITED_SNAPSHOT)
+        snapshots = []
+        for filename in [EXITED_SNAPSHOT] + exited:
+            try:
+                with open(os.path.join(self._snapshot_dir, filename)) as f:
+                    snapshots.append((False, {"pid": 0, "metrics": json.load(f)}))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics snapshot '{filename}': {e}")
+
+        # Only counters and histograms outlive their worker
+        merged = _merge_snapshots(snapshots, {})
+        folded = {name: entry for name, entry in merged.items() if entry["type"] != "gauge"}
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "w") as f:
+                json.dump(folded, f)
+            os.replace(temporary, path)
+            for filename in exited:
+                os.remove(os.path.join(self._snapshot_dir, filename))
+        except OSError as e:
+            logger.error(f"Failed to fold exited workers' metrics snapshots: {e}")
+
+
+def _process_alive(pid: int) -> bool:
+    """Check whether a process exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merge_snapshots(
+    peers: List[Tuple[bool, Dict[str, Any]]], own: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Combine this worker's snapshot with its peers'."""
+    workers = [(True, {"pid": os.getpid(), "metrics": own})] + peers
+    merged: Dict[str, Any] = {}
+
+    for alive, worker in workers:
+        for name, entry in worker["metrics"].items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {**entry, "samples": {}}
+                if entry["type"] == "gauge" and entry.get("mode") == "all":
+                    target["labelnames"] = entry["labelnames"] + ["pid"]
+            if entry["type"] == "gauge" and not alive:
+                continue
+
+            mode = entry.get("mode", "sum")
+            samples = target["samples"]
+            for labels, value in entry["samples"]:
+                if entry["type"] == "gauge" and mode == "all":
+                    samples[tuple(labels) + (str(worker["pid"]),)] = value
+                    continue
+
+                key = tuple(labels)
+                if key not in samples:
+                    samples[key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    samples[key] = [a + b for a, b in zip(samples[key], value)]
+                elif entry["type"] == "gauge" and mode == "max":
+                    samples[key] = max(samples[key], value)
+                elif entry["type"] == "gauge" and mode == "min":
+                    samples[key] = min(samples[key], value)
+                else:
+                    samples[key] = samples[key] + value
+
+    for entry in merged.values():
+        entry["samples"] = [[list(k), v] for k, v in entry["samples"].items()]
+    return merged
+
+
+def _render_snapshot(snapshot: Dict[str, Any]) -> str:
+    """Render a snapshot as exposition text."""
+    lines = []
+    for name in sorted(snapshot):
+        entry = snapshot[name]
+        names = entry["labelnames"]
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+
+        for labels, value in entry["samples"]:
+            if entry["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+
+            cumulative = 0.0
+            bounds = [_format_value(b) for b in entry["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(names + ["le"], labels + [bound])
+                lines.append(f"{name}_bucket{bucket_labels} {_format_value(cumulative)}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+# Singleton instance
+_metrics_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    Get the metrics registry instance.
+
+    Returns:
+        Metrics registry instance
+    """
+    global _metrics_registry
+
+    if _metrics_registry is None:
+        _metrics_registry = MetricsRegistry()
+
+    return _metrics_registry
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Get or create a counter in the default registry."""
+    return get_metrics_registry().counter(name, documentation, labelnames)
+
+
+def gauge(
+    name: str, documentation: str, labelnames: Sequence[str] = (), multiprocess_mode: str = "sum"
+) -> Gauge:
+    """Get or create a gauge in the default registry."""
+    return get_metrics_registry().gauge(name, documentation, labelnames, multiprocess_mode)
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Get or create a histogram in the default registry."""
+    return get_metrics_registry().histogram(name, documentation, labelnames, buckets)
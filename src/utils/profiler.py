@@ -0,0 +1,272 @@
+"""
+Statistical sampling profiler for live workers.
+
+``SamplingProfiler`` runs a background thread that periodically captures:
+
+- the stack of every thread (``sys._current_frames``), and
+- the await chain of every suspended asyncio task on the worker's event
+  loop, rooted at the task and ending in what it waits on, so that time spent
+  waiting on I/O, locks or pools is attributed to the awaiting code.
+
+Samples are aggregated into collapsed stacks (``frame;frame;frame count``),
+the input format of flamegraph.pl, speedscope and similar tools. Nothing is
+installed in the interpreter (no trace or profile hooks), so a worker pays
+nothing while no profiler is running and only the sampling thread's cost
+while one is.
+
+Profiling can also be narrowed to a single task, which is how one slow
+request is profiled in isolation.
+"""
+
+import asyncio
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from .logging import get_logger
+
+# Get logger
+logger = get_logger(__name__)
+
+# Shortest allowed sampling interval; sampling every thread and task more
+# often than this would take the GIL away from the worker most of the time
+MIN_INTERVAL = 0.001
+
+
+def _frame_label(frame: Any) -> str:
+    """Describe a frame as ``function (file:line)``."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _thread_stack(frame: Any) -> List[str]:
+    """List a thread's frames from the outermost call inwards."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def _await_chain(coro: Any) -> List[str]:
+    """List the frames of a suspended coroutine and everything it awaits, outermost first."""
+    labels = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            # Reached a future, a finished coroutine or a C-level awaitable
+            labels.append(f"[{type(coro).__name__}]")
+            break
+        labels.append(_frame_label(frame))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return labels
+
+
+class Profile:
+    """
+    Aggregated samples from one profiling session.
+    """
+
+    def __init__(self, stacks: Dict[str, int], samples: int, duration: float, interval: float):
+        """
+        Initialize the profile.
+
+        Args:
+            stacks: Sample counts by collapsed stack
+            samples: Number of sampling rounds
+            duration: Seconds profiled
+            interval: Seconds between samples
+        """
+        self.stacks = stacks
+        self.samples = samples
+        self.duration = duration
+        self.interval = interval
+
+    def collapsed(self) -> str:
+        """
+        Render the profile as collapsed stacks, heaviest first.
+
+        Returns:
+            One ``stack count`` line per distinct stack
+        """
+        ordered = sorted(self.stacks.items(), key=lambda item: -item[1])
+        lines = [f"{stack} {count}" for stack, count in ordered]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get profile statistics.
+
+        Returns:
+            Dictionary with sample counts and duration
+        """
+        return {
+            "samples": self.samples,
+            "stacks": len(self.stacks),
+            "duration": round(self.duration, 3),
+            "interval": self.interval,
+        }
+
+
+class SamplingProfiler:
+    """
+    Samples thread and asyncio task stacks from a background thread.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        task: Optional[asyncio.Task] = None,
+        include_threads: bool = True,
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+            loop: Event loop whose tasks are sampled (defaults to the running loop at start)
+            task: Only sample this task (and the loop thread while it runs)
+            include_threads: Sample threads other than the event loop's
+
+        Raises:
+            ValueError: If the interval is shorter than ``MIN_INTERVAL``
+        """
+        if interval < MIN_INTERVAL:
+            raise ValueError(f"Sampling interval must be at least {MIN_INTERVAL}s, got {interval}s")
+        self.interval = interval
+        self.loop = loop
+        self.task = task
+        self.include_threads = include_threads
+
+        self._stacks: Dict[str, int] = collections.defaultdict(int)
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._loop_thread_id: Optional[int] = None
+        self._started = 0.0
+
+    @property
+    def running(self) -> bool:
+        """Whether the profiler is sampling."""
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Start sampling."""
+        if self._thread is not None:
+            raise RuntimeError("Profiler is already running")
+
+        if self.loop is None:
+            try:
+                self.loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.loop = None
+        if self.loop is not None:
+            self._loop_thread_id = threading.get_ident()
+
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="aika-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Profile:
+        """
+        Stop sampling.
+
+        Returns:
+            Collected profile
+        """
+        if self._thread is None:
+            raise RuntimeError("Profiler is not running")
+
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        duration = time.perf_counter() - self._started
+        return Profile(dict(self._stacks), self._samples, duration, self.interval)
+
+    async def stop_async(self) -> Profile:
+        """
+        Stop sampling without blocking the event loop on the sampling thread.
+
+        Returns:
+            Collected profile
+        """
+        return await asyncio.to_thread(self.stop)
+
+    async def profile_for(self, seconds: float) -> Profile:
+        """
+        Profile the running event loop for a period.
+
+        Args:
+            seconds: Seconds to profile
+
+        Returns:
+            Collected profile
+        """
+        self.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile = await self.stop_async()
+        return profile
+
+    def _run(self) -> None:
+        """Sample until stopped."""
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            try:
+                self._sample(own)
+            except Exception as e:
+                logger.debug("Profiler sample failed: %s", e)
+
+    def _sample(self, own: int) -> None:
+        """Take one sample of every thread and suspended task."""
+        frames = sys._current_frames()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        running = asyncio.current_task(self.loop) if self.loop is not None else None
+        stacks = self._stacks
+
+        if self.task is not None:
+            # Single-task mode: the loop thread while the task runs, its await chain otherwise
+            if self.task.done():
+                return
+            if running is self.task:
+                frame = frames.get(self._loop_thread_id)
+                if frame is not None:
+                    stacks[";".join([f"task:{self.task.get_name()}"] + _thread_stack(frame))] += 1
+            else:
+                stacks[self._task_stack(self.task)] += 1
+            self._samples += 1
+            return
+
+        for ident, frame in frames.items():
+            if ident == own or (not self.include_threads and ident != self._loop_thread_id):
+                continue
+            root = f"thread:{names.get(ident, ident)}"
+            stacks[";".join([root] + _thread_stack(frame))] += 1
+
+        if self.loop is not None:
+            for task in self._tasks():
+                if task is not running and not task.done():
+                    stacks[self._task_stack(task)] += 1
+        self._samples += 1
+
+    def _tasks(self) -> List[asyncio.Task]:
+        """List the loop's tasks from the sampling thread."""
+        for _ in range(3):
+            try:
+                return list(asyncio.all_tasks(self.loop))
+            except RuntimeError:
+                # The task set changed while it was being copied
+                continue
+        return []
+
+    @staticmethod
+    def _task_stack(task: asyncio.Task) -> str:
+        """Collapse a suspended task's await chain."""
+        return ";".join([f"task:{task.get_name()}"] + _await_chain(task.get_coro()))
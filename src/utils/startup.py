@@ -0,0 +1,145 @@
+"""
+Startup-time profiling for the Aika AI System.
+
+Imports a module in a fresh interpreter with ``python -X importtime`` and
+reports where the time went, so that slow imports on the cold-start path of
+``aika`` and the API workers can be found and deferred.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Default module profiled by ``aika startup-profile``
+DEFAULT_MODULE = "src.api.main"
+
+
+class ImportTiming:
+    """
+    Time spent importing one module.
+    """
+
+    def __init__(self, module: str, self_us: int, cumulative_us: int, depth: int):
+        """
+        Initialize the timing.
+
+        Args:
+            module: Dotted module name
+            self_us: Microseconds spent in the module itself
+            cumulative_us: Microseconds including the module's own imports
+            depth: Nesting depth in the import tree (0 for top-level imports)
+        """
+        self.module = module
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the timing to a dictionary.
+
+        Returns:
+            Dictionary with times in milliseconds
+        """
+        return {
+            "module": self.module,
+            "self_ms": round(self.self_us / 1000, 2),
+            "cumulative_ms": round(self.cumulative_us / 1000, 2),
+            "depth": self.depth,
+        }
+
+
+def parse_importtime(output: str) -> List[ImportTiming]:
+    """
+    Parse the output of ``python -X importtime``.
+
+    Args:
+        output: Standard error of the interpreter
+
+    Returns:
+        Timings in import order
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # Header line
+            continue
+        name = fields[2].rstrip()
+        stripped = name.lstrip()
+        depth = (len(name) - len(stripped) - 1) // 2
+        timings.append(ImportTiming(stripped, int(fields[0]), int(fields[1]), depth))
+    return timings
+
+
+def profile_imports(
+    module: str = DEFAULT_MODULE, env: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter and time every import.
+
+    Args:
+        module: Dotted name of the module to import
+        env: Environment for the interpreter (defaults to the current one)
+
+    Returns:
+        Dictionary with the wall time, the total import time, the time to
+        import the module itself and per-module timings
+
+    Raises:
+        RuntimeError: If the module fails to import
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env if env is not None else dict(os.environ),
+    )
+    wall = time.perf_counter() - started
+
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        reason = error[-1] if error else result.returncode
+        raise RuntimeError(f"Importing {module} failed: {reason}")
+
+    timings = parse_importtime(result.stderr)
+    total_us = sum(t.cumulative_us for t in timings if t.depth == 0)
+    module_us = next((t.cumulative_us for t in timings if t.depth == 0 and t.module == module), 0)
+    return {
+        "module": module,
+        "wall_ms": round(wall * 1000, 2),
+        "import_ms": round(total_us / 1000, 2),
+        "module_ms": round(module_us / 1000, 2),
+        "modules": timings,
+    }
+
+
+def format_report(report: Dict[str, Any], top: int = 20) -> str:
+    """
+    Format a startup profile as a table of the slowest imports.
+
+    Args:
+        report: Result of ``profile_imports``
+        top: Number of modules to list
+
+    Returns:
+        Printable report
+    """
+    slowest = sorted(report["modules"], key=lambda t: -t.cumulative_us)[:top]
+    lines = [
+        f"Startup profile of {report['module']}",
+        f"  interpreter wall time: {report['wall_ms']:.1f} ms",
+        f"  import time:           {report['import_ms']:.1f} ms ({len(report['modules'])} modules)",
+        f"  of which {report['module']}: {report['module_ms']:.1f} ms",
+        "",
+        f"  {'cumulative ms':>13}  {'self ms':>8}  module",
+    ]
+    for timing in slowest:
+        cumulative_ms, self_ms = timing.cumulative_us / 1000, timing.self_us / 1000
+        lines.append(f"  {cumulative_ms:>13.1f}  {self_ms:>8.1f}  {timing.module}")
+    return "\n".join(lines)
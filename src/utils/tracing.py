@@ -0,0 +1,656 @@
+"""
+Distributed tracing for the Aika AI System.
+
+A trace follows one request across the API, the orchestrator, Kafka and the
+agents. Code opens spans with ``start_span``; the current span is kept in a
+context variable, so a span opened while another is active becomes its
+child, across ``await`` and in tasks created inside it::
+
+    with start_span("orchestrator.route") as span:
+        agent = await registry.find_agent_for_request(request)
+        span.set_attribute("agent_id", agent.agent_id)
+
+The context crosses process boundaries as a W3C ``traceparent`` header:
+``inject`` adds it to HTTP or Kafka headers and ``extract`` reads it back.
+
+Sampling keeps the overhead small:
+
+- Head-based: ``TRACING_SAMPLE_RATE`` of new traces are kept, decided when
+  the trace starts. Traces continued from a ``traceparent`` follow its
+  sampled flag.
+- Tail-based: spans of the other traces are buffered in memory until the
+  local root span ends, and the trace is kept anyway if it took longer than
+  ``TRACING_TAIL_LATENCY_MS`` or a span failed (``TRACING_TAIL_ERRORS``).
+  With both disabled, spans of unsampled traces only carry the context.
+
+Kept traces are exported from a background thread, one JSON span per line
+(``TRACING_EXPORTER=stdout`` or ``file``). With ``TRACING_EXPORTER=none``
+nothing is recorded, but trace context received is still passed on.
+"""
+
+import json
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .config import lazy_settings
+from .logging import get_logger
+from .metrics import counter
+
+# Get logger
+logger = get_logger(__name__)
+
+# Get settings
+settings = lazy_settings()
+
+# Header carrying the trace context
+TRACEPARENT = "traceparent"
+
+# Metrics
+SPANS_EXPORTED = counter("aika_trace_spans_exported_total", "Spans handed to the trace exporter")
+SPANS_DROPPED = counter(
+    "aika_trace_spans_dropped_total", "Spans of kept traces dropped before export", ["reason"]
+)
+TRACES_KEPT = counter("aika_traces_kept_total", "Traces kept by the sampler", ["reason"])
+
+Headers = Union[Dict[str, Any], Iterable[Tuple[str, Any]], None]
+
+
+class SpanContext:
+    """
+    Identifies a span within a trace, as carried in ``traceparent``.
+    """
+
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        """
+        Initialize the context.
+
+        Args:
+            trace_id: 32 hex digit trace ID
+            span_id: 16 hex digit span ID
+            sampled: Whether the trace was sampled up front
+        """
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        """
+        Format the context as a ``traceparent`` header value.
+
+        Returns:
+            Header value
+        """
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def __repr__(self) -> str:
+        return f"SpanContext({self.to_traceparent()!r})"
+
+
+def parse_traceparent(value: Union[str, bytes]) -> Optional[SpanContext]:
+    """
+    Parse a ``traceparent`` header value.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Span context, or None if the value is malformed
+    """
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    parts = value.strip().split("-")
+    version = parts[0]
+    if len(parts) < 4 or len(version) != 2 or version == "ff":
+        return None
+    if version == "00" and len(parts) != 4:
+        return None
+
+    version, trace_id, span_id, flags = parts[:4]
+    if len(trace_id) != 32 or len(span_id) != 16 or len(flags) != 2:
+        return None
+    try:
+        if not int(trace_id, 16) or not int(span_id, 16):
+            return None
+        sampled = bool(int(flags, 16) & 1)
+        int(version, 16)
+    except ValueError:
+        return None
+    return SpanContext(trace_id.lower(), span_id.lower(), sampled)
+
+
+def _new_trace_id() -> str:
+    return "%032x" % random.getrandbits(128)
+
+
+def _new_span_id() -> str:
+    return "%016x" % random.getrandbits(64)
+
+
+# Span active in the current context
+_current_span: ContextVar[Optional["NonRecordingSpan"]] = ContextVar(
+    "aika_current_span", default=None
+)
+
+
+class NonRecordingSpan:
+    """
+    Span that only carries its context.
+
+    Used for traces that are not sampled and when tracing is disabled; all
+    recording methods do nothing.
+    """
+
+    is_recording = False
+    _buffer: Optional["_TraceBuffer"] = None
+
+    def __init__(self, context: Optional[SpanContext]):
+        """
+        Initialize the span.
+
+        Args:
+            context: Span context (None outside any trace)
+        """
+        self.context = context
+        self._token: Optional[Token] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute of the span.
+
+        Args:
+            key: Attribute name
+            value: JSON-serializable value
+        """
+
+    def set_error(self, message: str) -> None:
+        """
+        Mark the span as failed.
+
+        Args:
+            message: Error description
+        """
+
+    def record_exception(self, exc: BaseException) -> None:
+        """
+        Mark the span as failed by an exception.
+
+        Args:
+            exc: Exception raised
+        """
+        self.set_error(f"{type(exc).__name__}: {exc}")
+
+    def end(self) -> None:
+        """End the span (spans used as context managers end on exit)."""
+
+    def __enter__(self) -> "NonRecordingSpan":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        self.end()
+
+
+class _TraceBuffer:
+    """Spans of one trace recorded in this process, awaiting the sampling decision."""
+
+    __slots__ = ("sampled", "spans", "error", "closed", "keep")
+
+    def __init__(self, sampled: bool):
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+        self.error = False
+        self.closed = False
+        self.keep = False
+
+
+class Span(NonRecordingSpan):
+    """
+    Span recording its timing, attributes and status.
+    """
+
+    is_recording = True
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_id: Optional[str],
+        kind: str,
+        attributes: Optional[Dict[str, Any]],
+        buffer: "_TraceBuffer",
+        local_root: bool,
+    ):
+        """
+        Initialize the span.
+
+        Args:
+            tracer: Tracer that created the span
+            name: Operation name
+            context: Span context
+            parent_id: Span ID of the parent span
+            kind: ``server``, ``client``, ``producer``, ``consumer`` or ``internal``
+            attributes: Initial attributes
+            buffer: Buffer of the trace in this process
+            local_root: Whether the parent span is not in this process
+        """
+        super().__init__(context)
+        self.name = name
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start_time = time.time()
+        self.duration: Optional[float] = None
+        self._started = time.perf_counter()
+        self._tracer = tracer
+        self._buffer = buffer
+        self._local_root = local_root
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, message: str) -> None:
+        self.status = "error"
+        self.error = message
+
+    def end(self) -> None:
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._started
+            self._tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the span to its exported form.
+
+        Returns:
+            Dictionary representation of the span
+        """
+        entry: Dict[str, Any] = {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.start_time, 6),
+            "duration_ms": round((self.duration or 0.0) * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "pid": os.getpid(),
+        }
+        if self.error is not None:
+            entry["error"] = self.error
+        return entry
+
+
+def _encode_spans(spans: List[Dict[str, Any]]) -> str:
+    """Encode spans as JSON lines."""
+    return "".join(json.dumps(span, default=str, separators=(",", ":")) + "\n" for span in spans)
+
+
+class SpanExporter(ABC):
+    """
+    Base class for span exporters, called from the export thread.
+    """
+
+    @abstractmethod
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        """
+        Export a batch of spans.
+
+        Args:
+            spans: Spans in their exported form
+        """
+
+    def shutdown(self) -> None:
+        """Release the exporter's resources."""
+
+
+class StreamExporter(SpanExporter):
+    """
+    Writes spans as JSON lines to a stream (stdout by default).
+    """
+
+    def __init__(self, stream: Any = None):
+        """
+        Initialize the exporter.
+
+        Args:
+            stream: Output stream (defaults to stdout)
+        """
+        self.stream = stream
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        stream = self.stream or sys.stdout
+        stream.write(_encode_spans(spans))
+        stream.flush()
+
+
+class FileExporter(SpanExporter):
+    """
+    Appends spans as JSON lines to a file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+
+        Args:
+            path: File to append to
+        """
+        self.path = path
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(_encode_spans(spans))
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    Keeps exported spans in a list, for tests and benchmarks.
+    """
+
+    def __init__(self):
+        """Initialize the exporter."""
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        self.spans.extend(spans)
+
+
+class Tracer:
+    """
+    Creates spans, samples traces and hands kept ones to the exporter.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter],
+        sample_rate: float = 0.01,
+        tail_latency_ms: float = 0.0,
+        tail_errors: bool = True,
+        max_spans_per_trace: int = 256,
+        queue_size: int = 1024,
+    ):
+        """
+        Initialize the tracer.
+
+        Args:
+            exporter: Span exporter (None disables recording)
+            sample_rate: Fraction of new traces kept up front
+            tail_latency_ms: Keep traces whose local root span took at least this long (0 disables)
+            tail_errors: Keep traces with a failed span
+            max_spans_per_trace: Spans buffered per trace; further spans are dropped
+            queue_size: Traces waiting for export; further traces are dropped
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.tail_latency_ms = tail_latency_ms
+        self.tail_errors = tail_errors
+        self.max_spans_per_trace = max_spans_per_trace
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded."""
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        kind: str = "internal",
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+    ) -> NonRecordingSpan:
+        """
+        Start a span, to be used as a context manager or ended with ``end()``.
+
+        Args:
+            name: Operation name
+            kind: ``server``, ``client``, ``producer``, ``consumer`` or ``internal``
+            attributes: Initial attributes
+            parent: Remote parent context from ``extract`` (defaults to the current span)
+
+        Returns:
+            The span, recording or not depending on sampling
+        """
+        current = _current_span.get() if parent is None else None
+        if current is not None:
+            parent = current.context
+
+        if not self.enabled:
+            # Pass the received context on unchanged
+            return NonRecordingSpan(parent)
+
+        if parent is None:
+            sampled = random.random() < self.sample_rate
+            context = SpanContext(_new_trace_id(), _new_span_id(), sampled)
+        else:
+            context = SpanContext(parent.trace_id, _new_span_id(), parent.sampled)
+
+        if current is not None:
+            buffer = current._buffer
+            if buffer is None:
+                # The trace was not recorded from its local root on
+                return NonRecordingSpan(context)
+        elif context.sampled or self.tail_errors or self.tail_latency_ms > 0:
+            buffer = _TraceBuffer(context.sampled)
+        else:
+            return NonRecordingSpan(context)
+
+        parent_id = parent.span_id if parent else None
+        return Span(self, name, context, parent_id, kind, attributes, buffer, current is None)
+
+    def _finish(self, span: Span) -> None:
+        """Buffer an ended span, deciding whether to keep its trace when the local root ends."""
+        buffer = span._buffer
+        with self._lock:
+            if buffer.closed:
+                # Ended after its local root, e.g. in a background task
+                kept = [span] if buffer.keep else []
+            else:
+                if span.status == "error":
+                    buffer.error = True
+                if len(buffer.spans) < self.max_spans_per_trace:
+                    buffer.spans.append(span)
+                else:
+                    SPANS_DROPPED.labels("trace_limit").inc()
+                if not span._local_root:
+                    return
+
+                buffer.closed = True
+                if buffer.sampled:
+                    reason = "head"
+                elif self.tail_errors and buffer.error:
+                    reason = "error"
+                elif self.tail_latency_ms > 0 and span.duration * 1000 >= self.tail_latency_ms:
+                    reason = "latency"
+                else:
+                    buffer.spans = []
+                    return
+                buffer.keep = True
+                kept, buffer.spans = buffer.spans, []
+                span.attributes["sampling.reason"] = reason
+                TRACES_KEPT.labels(reason).inc()
+
+        if kept:
+            self._export(kept)
+
+    def _export(self, spans: List[Span]) -> None:
+        """Queue spans for the export thread."""
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="aika-trace-exporter", daemon=True
+                    )
+                    self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            SPANS_DROPPED.labels("queue_full").inc(len(spans))
+
+    def _run(self) -> None:
+        """Export queued spans until shut down."""
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            spans = [span.to_dict() for span in batch]
+            try:
+                self.exporter.export(spans)
+                SPANS_EXPORTED.inc(len(spans))
+            except Exception as e:
+                SPANS_DROPPED.labels("export_error").inc(len(spans))
+                logger.error("Failed to export %d spans: %s", len(spans), e)
+
+    def shutdown(self) -> None:
+        """Export queued spans and stop the export thread."""
+        thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+            self._thread = None
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def create_exporter(name: str) -> Optional[SpanExporter]:
+    """
+    Create a span exporter by name.
+
+    Args:
+        name: ``none``, ``stdout`` or ``file`` (writing settings.TRACING_FILE_PATH)
+
+    Returns:
+        Exporter, or None for ``none``
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name == "none":
+        return None
+    if name == "stdout":
+        return StreamExporter()
+    if name == "file":
+        return FileExporter(settings.TRACING_FILE_PATH)
+    raise ValueError(f"Unknown trace exporter '{name}'")
+
+
+def current_span() -> Optional[NonRecordingSpan]:
+    """
+    Get the span active in the current context.
+
+    Returns:
+        Current span or None
+    """
+    return _current_span.get()
+
+
+def start_span(
+    name: str,
+    kind: str = "internal",
+    attributes: Optional[Dict[str, Any]] = None,
+    parent: Optional[SpanContext] = None,
+) -> NonRecordingSpan:
+    """
+    Start a span with the application tracer (see ``Tracer.start_span``).
+
+    Args:
+        name: Operation name
+        kind: ``server``, ``client``, ``producer``, ``consumer`` or ``internal``
+        attributes: Initial attributes
+        parent: Remote parent context from ``extract`` (defaults to the current span)
+
+    Returns:
+        The span
+    """
+    return get_tracer().start_span(name, kind, attributes, parent)
+
+
+def inject(headers: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add the current trace context to outgoing headers.
+
+    Args:
+        headers: Headers to add ``traceparent`` to
+
+    Returns:
+        The same headers
+    """
+    span = _current_span.get()
+    if span is not None and span.context is not None:
+        headers[TRACEPARENT] = span.context.to_traceparent()
+    return headers
+
+
+def extract(headers: Headers) -> Optional[SpanContext]:
+    """
+    Read the trace context from incoming headers.
+
+    Args:
+        headers: Header mapping or ``(name, value)`` pairs, values as str or bytes
+            (as returned by Kafka messages and ASGI scopes)
+
+    Returns:
+        Remote parent context, or None if there is none or it is malformed
+    """
+    if not headers:
+        return None
+    items = headers.items() if isinstance(headers, dict) else headers
+    for name, value in items:
+        if isinstance(name, bytes):
+            name = name.decode("latin-1")
+        if name.lower() == TRACEPARENT and value:
+            return parse_traceparent(value)
+    return None
+
+
+# Singleton instance
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """
+    Get the application tracer, configured from the settings.
+
+    Returns:
+        Tracer instance
+    """
+    global _tracer
+
+    if _tracer is None:
+        _tracer = Tracer(
+            create_exporter(settings.TRACING_EXPORTER),
+            sample_rate=settings.TRACING_SAMPLE_RATE,
+            tail_latency_ms=settings.TRACING_TAIL_LATENCY_MS,
+            tail_errors=settings.TRACING_TAIL_ERRORS,
+            max_spans_per_trace=settings.TRACING_MAX_SPANS_PER_TRACE,
+            queue_size=settings.TRACING_EXPORT_QUEUE_SIZE,
+        )
+
+    return _tracer
+
+
+def _reset_after_fork() -> None:
+    """Give a forked worker its own tracer and export thread."""
+    global _tracer
+    _tracer = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
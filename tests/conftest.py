@@ -8,7 +8,16 @@ from unittest.mock import patch
 import pytest
 from fastapi.testclient import TestClient
 
-from src.api.main import app
+# Required settings must exist before application modules are imported
+for _key, _value in {
+    "SECRET_KEY": "test_secret_key",
+    "SUPABASE_URL": "https://test.supabase.co",
+    "SUPABASE_SERVICE_KEY": "test_service_key",
+    "ANTHROPIC_API_KEY": "test_anthropic_key",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from src.api.main import app  # noqa: E402
 
 
 @pytest.fixture
@@ -54,7 +63,7 @@ def mock_supabase_client():
     Yields:
         MagicMock: Mocked Supabase client
     """
-    with patch("src.database.connection.create_client") as mock_create_client:
+    with patch("supabase.create_client") as mock_create_client:
         mock_client = mock_create_client.return_value
         mock_table = mock_client.table.return_value
         mock_select = mock_table.select.return_value
@@ -0,0 +1,145 @@
+"""
+Unit tests for authentication.
+"""
+
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from src.auth.cache import ExpiringLRUCache, get_token_cache
+from src.auth.jwt import create_access_token, get_current_user, revoke_token_async
+from src.auth.revocation import RevocationList, get_revocation_list
+
+
+@pytest.mark.auth
+def test_repeated_calls_verify_token_once():
+    """Test that a verified token is served from the cache."""
+    token = create_access_token({"sub": "alice"})
+    get_token_cache().clear()
+
+    with patch.object(jwt, "decode", wraps=jwt.decode) as decode:
+        users = [asyncio.run(get_current_user(token)) for _ in range(3)]
+
+    assert users == [{"username": "alice"}] * 3
+    assert decode.call_count == 1
+
+
+@pytest.mark.auth
+def test_invalid_and_expired_tokens_are_rejected():
+    """Test that invalid tokens are never cached."""
+    expired = create_access_token({"sub": "bob"}, expires_delta=timedelta(seconds=-1))
+
+    for token in ("not-a-token", expired):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(get_current_user(token))
+        assert exc.value.status_code == 401
+
+
+@pytest.mark.auth
+def test_expiring_lru_cache_bounds_and_expiry():
+    """Test LRU eviction and per-entry expiry."""
+    cache = ExpiringLRUCache(max_entries=2)
+    now = time.time()
+
+    cache.put("a", 1, now + 60)
+    cache.put("b", 2, now + 60)
+    cache.get("a")
+    cache.put("c", 3, now + 60)
+    cache.put("expired", 4, now - 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("expired") is None
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.mark.auth
+def test_revoked_token_is_rejected_even_when_cached():
+    """Test that revocation takes effect for tokens already in the cache."""
+    token = create_access_token({"sub": "carol"})
+    claims = jwt.get_unverified_claims(token)
+    asyncio.run(get_current_user(token))
+
+    get_revocation_list().revoke(claims["jti"], claims["exp"])
+
+    with pytest.raises(HTTPException):
+        asyncio.run(get_current_user(token))
+
+
+@pytest.mark.auth
+def test_revocation_list_confirms_filter_positives_and_prunes():
+    """Test that filter false positives are not treated as revocations."""
+    revocations = RevocationList(capacity=4, prune_interval=3600)
+    now = time.time()
+
+    for i in range(50):
+        revocations.revoke(f"jti-{i}", now + 60)
+    revocations.revoke("expired", now - 1)
+
+    assert all(revocations.is_revoked(f"jti-{i}") for i in range(50))
+    assert not any(revocations.is_revoked(f"other-{i}") for i in range(1000))
+    assert not revocations.is_revoked(None)
+    assert revocations.get_stats()["revoked"] == 50
+
+
+@pytest.mark.auth
+def test_revocation_listener_replays_only_the_token_lifetime():
+    """Test that the listener reads every partition from the replay window without a group."""
+    from confluent_kafka import OFFSET_END, TIMESTAMP_NOT_AVAILABLE, TopicPartition
+
+    from src.messaging.kafka import encode_message
+
+    message = MagicMock()
+    message.error.return_value = None
+    message.topic.return_value = "auth.revocations"
+    message.timestamp.return_value = (TIMESTAMP_NOT_AVAILABLE, 0)
+    message.value.return_value = encode_message({"jti": "replayed", "exp": time.time() + 60})
+    message.key.return_value = b"replayed"
+    message.headers.return_value = None
+
+    consumer = MagicMock()
+    consumer.list_topics.return_value.topics = {
+        "auth.revocations": MagicMock(partitions={0: None, 1: None})
+    }
+    consumer.offsets_for_times.return_value = [
+        TopicPartition("auth.revocations", 0, 42),
+        TopicPartition("auth.revocations", 1, -1),
+    ]
+    consumer.poll.side_effect = [message, KeyboardInterrupt()]
+    revocations = RevocationList()
+
+    with patch("confluent_kafka.Consumer", return_value=consumer) as create:
+        started = time.time()
+        revocations.start_listener(replay_seconds=600)
+        revocations._listener.join(timeout=5)
+
+    assert create.call_args.args[0]["enable.auto.commit"] is False
+    consumer.subscribe.assert_not_called()
+    requested = consumer.offsets_for_times.call_args.args[0]
+    assert abs(requested[0].offset / 1000 - (started - 600)) < 5
+    assigned = consumer.assign.call_args.args[0]
+    assert [(tp.partition, tp.offset) for tp in assigned] == [(0, 42), (1, OFFSET_END)]
+    assert revocations.is_revoked("replayed")
+
+
+@pytest.mark.auth
+def test_revoke_token_async_publishes_off_the_event_loop():
+    """Test that publishing a revocation does not block the event loop thread."""
+    token = create_access_token({"sub": "alice"})
+    claims = jwt.get_unverified_claims(token)
+    threads = []
+
+    def publish(*args, **kwargs):
+        threads.append(threading.get_ident())
+
+    with patch("src.messaging.kafka.publish_message", publish):
+        asyncio.run(revoke_token_async(token))
+
+    assert threads and threads[0] != threading.get_ident()
+    assert get_revocation_list().is_revoked(claims["jti"])
@@ -0,0 +1,62 @@
+"""
+Unit tests for the benchmark suite.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from src.bench import suite
+from src.messaging.kafka import decode_message, encode_message
+
+
+@pytest.mark.messaging
+def test_message_codec_round_trip():
+    """Test that encoded messages decode to the original."""
+    value = encode_message(suite.SAMPLE_MESSAGE)
+
+    assert isinstance(value, bytes)
+    assert decode_message(value) == suite.SAMPLE_MESSAGE
+
+
+@pytest.mark.unit
+def test_suite_runs_micro_and_macro_benchmarks():
+    """Test a scaled-down run of benchmarks of both kinds."""
+    names = suite.select(["kafka.*", "api.*"])
+    results = asyncio.run(suite.run(names, repeat=2, scale=0.01))
+
+    assert list(results["benchmarks"]) == [
+        "kafka.publish", "api.health", "api.orchestrator_request"
+    ]
+    for result in results["benchmarks"].values():
+        assert result["median_us"] > 0
+        assert result["ops_per_sec"] > 0
+    json.dumps(results)
+
+
+@pytest.mark.unit
+def test_compare_flags_regressions(tmp_path, capsys):
+    """Test comparing stored results against a baseline."""
+    def results(**medians):
+        benchmarks = {name.replace("_", "."): {"median_us": us} for name, us in medians.items()}
+        return {"benchmarks": benchmarks}
+
+    baseline = results(codec_encode=1.0, codec_decode=2.0, auth_verify=10.0)
+    current = results(codec_encode=1.05, codec_decode=2.5, models_message=30.0)
+
+    rows = {row["name"]: row["status"] for row in suite.compare(baseline, current, threshold=0.1)}
+    assert rows == {
+        "codec.encode": "unchanged",
+        "codec.decode": "regression",
+        "auth.verify": "missing",
+        "models.message": "new",
+    }
+
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+    (tmp_path / "current.json").write_text(json.dumps(current))
+    code = suite.main([
+        "--results", str(tmp_path / "current.json"), "--baseline", str(tmp_path / "baseline.json"),
+    ])
+    assert code == 1
+    assert "codec.decode" in capsys.readouterr().out.splitlines()[-1]
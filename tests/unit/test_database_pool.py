@@ -0,0 +1,251 @@
+"""
+Unit tests for the async database pool.
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from pydantic import BaseModel
+
+from src.database.pool import QueryTimeoutError, SupabasePool, build_select_sql
+from src.database.streaming import iter_rows, stream_rows
+
+ROWS = [{"id": i, "kind": "odd" if i % 2 else "even"} for i in range(1, 11)]
+
+COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "gt": lambda a, b: a > b,
+    "lt": lambda a, b: a < b,
+}
+
+
+class FakeQuery:
+    """Minimal postgrest query builder stand-in."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = []
+
+    def select(self, columns):
+        self.calls.append(("select", columns))
+        return self
+
+    def eq(self, key, value):
+        self.calls.append(("eq", key, value))
+        return self
+
+    def order(self, column, desc=False):
+        self.calls.append(("order", column, desc))
+        return self
+
+    def limit(self, limit):
+        self.calls.append(("limit", limit))
+        return self
+
+    def execute(self):
+        time.sleep(self.latency)
+        return type("Response", (), {"data": [{"id": "test_id"}]})()
+
+
+class FakeClient:
+    """Minimal Supabase client stand-in."""
+
+    def __init__(self, latency: float = 0.0):
+        self.query = FakeQuery(latency)
+
+    def table(self, name):
+        return self.query
+
+
+def serve(query):
+    """Answer a ``Query`` from ``ROWS``."""
+    rows = ROWS
+    for column, operator, value in query.filters:
+        rows = [row for row in rows if COMPARISONS[operator](row[column], value)]
+    for column, desc, _ in reversed(query.ordering):
+        rows = sorted(rows, key=lambda row: row[column], reverse=desc)
+    return rows[:query.limit_value]
+
+
+class FakeTablePool:
+    """Pool stand-in serving ``ROWS``, optionally stalling after some pages."""
+
+    def __init__(self, stall_after=None):
+        self.stall_after = stall_after
+        self.queries = []
+        self.cancelled = 0
+
+    async def run_query(self, query, timeout=None):
+        self.queries.append(query)
+        if self.stall_after is not None and len(self.queries) > self.stall_after:
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return serve(query)
+
+
+class Row(BaseModel):
+    """Model without a trusted constructor."""
+    id: int
+    kind: str
+
+
+@pytest.mark.database
+def test_build_select_sql():
+    """Test that select statements are parameterized and identifiers quoted."""
+    sql, params = build_select_sql(
+        "public.messages",
+        columns="id, content",
+        filters={"conversation_id": "abc", "metadata": None},
+        order="created_at",
+        limit=10,
+    )
+
+    assert sql == (
+        'SELECT "id", "content" FROM "public"."messages" '
+        'WHERE "conversation_id" = $1 AND "metadata" IS NULL '
+        'ORDER BY "created_at" LIMIT $2'
+    )
+    assert params == ["abc", 10]
+
+
+@pytest.mark.database
+def test_supabase_pool_select_and_stats():
+    """Test that the Supabase pool runs queries off the event loop and tracks usage."""
+    pool = SupabasePool(
+        "https://test.supabase.co",
+        "test_service_key",
+        client_factory=lambda url, key: FakeClient(latency=0.01),
+        min_size=1,
+        max_size=4,
+    )
+
+    async def run():
+        results = await asyncio.gather(
+            *(pool.select("agents", filters={"id": 1}) for _ in range(8))
+        )
+        return results, pool.get_stats()
+
+    results, stats = asyncio.run(run())
+
+    assert all(rows == [{"id": "test_id"}] for rows in results)
+    assert stats["queries_total"] == 8
+    assert stats["acquired_total"] == 8
+    assert stats["in_use"] == 0
+    assert pool.size() <= 4
+
+
+@pytest.mark.database
+def test_supabase_pool_query_timeout():
+    """Test that slow queries raise QueryTimeoutError."""
+    pool = SupabasePool(
+        "https://test.supabase.co",
+        "test_service_key",
+        client_factory=lambda url, key: FakeClient(latency=0.2),
+        max_size=1,
+        query_timeout=0.01,
+    )
+
+    with pytest.raises(QueryTimeoutError):
+        asyncio.run(pool.select("agents"))
+
+    assert pool.get_stats()["timeouts_total"] == 1
+
+
+@pytest.mark.database
+def test_build_keyset_sql():
+    """Test that keyset pages filter past the last key in the walk direction."""
+    sql, params = build_select_sql(
+        "messages", filters={"conversation_id": "abc"}, order="id", limit=100,
+        after=("id", 42), descending=True,
+    )
+
+    assert sql == (
+        'SELECT * FROM "messages" WHERE "conversation_id" = $1 AND "id" < $2 '
+        'ORDER BY "id" DESC LIMIT $3'
+    )
+    assert params == ["abc", 42, 100]
+
+
+@pytest.mark.database
+def test_stream_rows_chains_keyset_pages():
+    """Test that pages follow the last key and a short page ends the stream."""
+    pool = FakeTablePool()
+
+    async def collect(**options):
+        return [row async for row in stream_rows("items", pool=pool, **options)]
+
+    rows = asyncio.run(collect(page_size=4))
+    assert [row["id"] for row in rows] == list(range(1, 11))
+    assert [(q.filters, q.limit_value) for q in pool.queries] == [
+        ([], 4), ([("id", "gt", 4)], 4), ([("id", "gt", 8)], 4)
+    ]
+
+    # A full last page costs one more, empty, page
+    pool.queries.clear()
+    assert len(asyncio.run(collect(page_size=5))) == 10
+    assert len(pool.queries) == 3
+
+    rows = asyncio.run(collect(
+        page_size=3, descending=True, start_after=8, filters={"kind": "odd"}, model=Row
+    ))
+    assert rows == [Row(id=7, kind="odd"), Row(id=5, kind="odd"), Row(id=3, kind="odd"),
+                    Row(id=1, kind="odd")]
+    assert pool.queries[-1].ordering == [("id", True, False)]
+
+
+@pytest.mark.database
+def test_stream_rows_cancels_prefetch_when_consumer_stops():
+    """Test that the prefetched page is cancelled when the consumer stops early."""
+    pool = FakeTablePool(stall_after=1)
+
+    async def consume():
+        stream = stream_rows("items", page_size=4, pool=pool)
+        first = [await stream.__anext__() for _ in range(2)]
+        # Let the prefetch of the second page start
+        await asyncio.sleep(0)
+        await stream.aclose()
+        return first
+
+    assert [row["id"] for row in asyncio.run(consume())] == [1, 2]
+    assert len(pool.queries) == 2
+    assert pool.cancelled == 1
+
+    # Without prefetching the next page is only requested once it is needed
+    pool = FakeTablePool()
+
+    async def first_page():
+        stream = stream_rows("items", page_size=4, prefetch=False, pool=pool)
+        rows = [await stream.__anext__() for _ in range(4)]
+        queries = len(pool.queries)
+        await stream.aclose()
+        return rows, queries
+
+    assert asyncio.run(first_page())[1] == 1
+
+
+@pytest.mark.database
+def test_iter_rows_pages_from_sync_code():
+    """Test synchronous keyset iteration, resuming, ordering, models and early stops."""
+    queries = []
+
+    def run_query_sync(query):
+        queries.append(query)
+        return serve(query)
+
+    with patch("src.database.streaming.run_query_sync", side_effect=run_query_sync):
+        assert [row["id"] for row in iter_rows("items", page_size=3)] == list(range(1, 11))
+        assert len(queries) == 4
+
+        rows = list(iter_rows("items", page_size=4, descending=True, start_after=5, model=Row))
+        assert rows == [Row(id=i, kind="odd" if i % 2 else "even") for i in (4, 3, 2, 1)]
+
+        queries.clear()
+        iterator = iter_rows("items", page_size=2, prefetch=False)
+        assert [next(iterator)["id"] for _ in range(3)] == [1, 2, 3]
+        iterator.close()
+        assert len(queries) == 2
@@ -0,0 +1,162 @@
+"""
+Unit tests for bulk database writes.
+"""
+
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from src.database.models import Message
+from src.database.pool import PostgresPool, QueryTimeoutError, SupabasePool
+from src.database.writes import (
+    _last_per_key,
+    _upsert_sql,
+    bulk_insert,
+    bulk_upsert,
+    optimal_batch_size,
+)
+
+
+class CardinalityViolation(Exception):
+    """PostgREST error for an upsert affecting a row twice."""
+    code = "21000"
+
+
+class RecordingTable:
+    """Postgrest table stand-in that records writes and rejects marked rows."""
+
+    def __init__(self, log):
+        self.log = log
+        self.rows = None
+
+    def insert(self, rows):
+        self.rows = rows
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        if len({row["id"] for row in rows}) < len(rows):
+            raise CardinalityViolation(
+                "ON CONFLICT DO UPDATE command cannot affect row a second time"
+            )
+        self.rows = rows
+        return self
+
+    def execute(self):
+        if any(row["content"] == "bad" for row in self.rows):
+            raise ValueError("violates check constraint")
+        if any(row["content"] == "slow" for row in self.rows):
+            raise QueryTimeoutError("Query exceeded 5s timeout")
+        self.log.append(len(self.rows))
+
+
+class RecordingClient:
+    """Supabase client stand-in sharing one write log."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def table(self, name):
+        return RecordingTable(self.log)
+
+
+def make_pool(log):
+    """Create a REST pool whose client records requests in ``log``."""
+    return SupabasePool(
+        "https://test.supabase.co", "key", client_factory=lambda u, k: RecordingClient(log)
+    )
+
+
+def make_messages(contents):
+    """Create messages for a single conversation."""
+    conversation_id = uuid4()
+    return [
+        Message(conversation_id=conversation_id, sender_id="user", sender_type="user", content=c)
+        for c in contents
+    ]
+
+
+@pytest.mark.database
+def test_bulk_insert_batches_and_reports_failures():
+    """Test that failing rows are isolated and reported by index."""
+    log = []
+    pool = make_pool(log)
+    messages = make_messages(["a", "b", "bad", "c", "d"])
+
+    result = asyncio.run(bulk_insert(messages, batch_size=2, pool=pool))
+
+    assert result.table == "messages"
+    assert result.batches == 3
+    assert result.succeeded == 4
+    assert [f.index for f in result.failures] == [2]
+    assert result.failures[0].key == str(messages[2].id)
+    # Two full batches, then the failed batch retried row by row, then the last row
+    assert log == [2, 1, 1]
+
+
+@pytest.mark.database
+def test_bulk_insert_stops_on_transient_error():
+    """Test that a timed-out batch is not retried row by row."""
+    log = []
+    pool = make_pool(log)
+    messages = make_messages(["a", "b", "slow", "c", "d"])
+
+    result = asyncio.run(bulk_insert(messages, batch_size=2, pool=pool))
+
+    assert result.succeeded == 2
+    assert [f.index for f in result.failures] == [2, 3, 4]
+    assert all(f.transient for f in result.failures)
+    # The batch may have been committed, so nothing is written after it
+    assert log == [2]
+
+
+@pytest.mark.database
+def test_bulk_upsert_all_rows():
+    """Test that an upsert of valid rows succeeds in one batch."""
+    log = []
+    pool = make_pool(log)
+
+    result = asyncio.run(bulk_upsert(make_messages(["a", "b", "c"]), pool=pool))
+
+    assert result.ok
+    assert result.succeeded == 3
+    assert log == [3]
+
+
+@pytest.mark.database
+def test_bulk_upsert_keeps_last_row_per_key():
+    """Test that duplicate conflict keys in a batch do not fail the upsert."""
+    log = []
+    pool = make_pool(log)
+    first, second, third = make_messages(["a", "b", "c"])
+    updated = third.copy(update={"content": "c2"})
+
+    result = asyncio.run(bulk_upsert([first, third, second, updated], pool=pool))
+
+    assert result.ok
+    assert result.succeeded == 4
+    # One request with the newer of the two versions of the third message
+    assert log == [3]
+
+    rows = [{"id": 1, "v": "a"}, {"id": None, "v": "b"}, {"id": 1, "v": "c"}, {"id": None}]
+    assert _last_per_key(rows, ["id"]) == rows[1:]
+
+
+@pytest.mark.database
+def test_postgres_batch_size_respects_parameter_limit():
+    """Test that multi-row statements stay under the bind parameter limit."""
+    pool = PostgresPool("postgresql://localhost/aika")
+
+    assert optimal_batch_size(pool, num_columns=7, batch_size=10000) == 32767 // 7
+    assert optimal_batch_size(pool, num_columns=7, batch_size=100) == 100
+
+
+@pytest.mark.database
+def test_upsert_sql():
+    """Test multi-row upsert statement generation."""
+    sql = _upsert_sql("messages", ["id", "content"], 2, ["id"])
+
+    assert sql == (
+        'INSERT INTO "messages" ("id", "content") VALUES ($1, $2), ($3, $4) '
+        'ON CONFLICT ("id") DO UPDATE SET "content" = EXCLUDED."content"'
+    )
@@ -0,0 +1,92 @@
+"""
+Unit tests for the cached health probes.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.health import HealthProber
+from src.utils.config import get_settings
+
+
+async def _ok():
+    return {"detail": 1}
+
+
+async def _fail():
+    raise RuntimeError("broker down")
+
+
+async def _hang():
+    await asyncio.sleep(1)
+
+
+@pytest.mark.api
+def test_prober_caches_results_and_latency():
+    """Test that a probe round caches health, errors and latency per check."""
+    prober = HealthProber({"db": _ok, "kafka": _fail, "slow": _hang}, interval=1, timeout=0.05)
+
+    ready, body = prober.readiness()
+    assert not ready
+    assert json.loads(body)["status"] == "starting"
+
+    results = asyncio.run(prober.probe())
+    ready, body = prober.readiness()
+    data = json.loads(body)
+
+    assert not ready
+    assert data["status"] == "not_ready"
+    assert data["checks"]["db"]["healthy"] is True
+    assert data["checks"]["db"]["details"] == {"detail": 1}
+    assert data["checks"]["kafka"]["error"] == "broker down"
+    assert data["checks"]["slow"]["error"].startswith("Timed out")
+    assert results["slow"].latency_ms >= 50
+
+
+@pytest.mark.api
+def test_prober_reports_stale_results():
+    """Test that readiness is withdrawn when results are not refreshed."""
+    prober = HealthProber({"db": _ok}, interval=1, stale_after=0)
+    asyncio.run(prober.probe())
+    prober._updated -= 1
+
+    ready, body = prober.readiness()
+    assert not ready
+    assert json.loads(body)["status"] == "stale"
+
+
+@pytest.mark.api
+def test_liveness_and_readiness_endpoints(test_client: TestClient):
+    """Test the probe endpoints before the prober has run."""
+    live = test_client.get("/health/live")
+    ready = test_client.get("/health/ready")
+
+    assert live.status_code == 200
+    assert live.json() == {"status": "alive"}
+    assert ready.status_code == 503
+    assert ready.json()["status"] == "starting"
+    assert ready.headers["cache-control"] == "no-store"
+
+
+@pytest.mark.api
+def test_readiness_checks_on_demand_without_background_prober(test_client: TestClient):
+    """Test that readiness is probed per interval when the background prober is disabled."""
+    calls = []
+
+    async def _counted():
+        calls.append(1)
+        return {}
+
+    prober = HealthProber({"counted": _counted}, interval=60)
+    with patch.object(get_settings(), "HEALTH_PROBE_ENABLED", False), \
+            patch.object(main, "get_health_prober", return_value=prober):
+        responses = [test_client.get("/health/ready") for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200] * 3
+    assert responses[0].json()["status"] == "ready"
+    assert len(calls) == 1
@@ -0,0 +1,137 @@
+"""
+Unit tests for windowed conversation history.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.database.history import ConversationHistory, ModelSummarizer, TruncatingSummarizer
+from src.database.models import Message
+
+
+class FakePool:
+    """Pool stand-in serving messages from memory."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def run_query(self, query, timeout=None):
+        self.queries.append(query)
+        # Compare typed values as Postgres does; strings would not bind to timestamptz
+        def key(row):
+            return datetime.fromisoformat(row["created_at"]), UUID(row["id"])
+
+        rows = sorted(self.rows, key=key, reverse=True)
+        for column, operator, value in query.filters:
+            if operator == "row_lt":
+                assert column == ("created_at", "id")
+                rows = [r for r in rows if key(r) < value]
+        return rows[:query.limit_value]
+
+
+def _rows(conversation_id, count):
+    start = datetime(2024, 1, 1)
+    return [
+        {
+            "id": str(uuid4()),
+            "conversation_id": str(conversation_id),
+            "sender_id": "user-1",
+            "sender_type": "user" if i % 2 == 0 else "agent",
+            "content": f"message {i:03d}",
+            "created_at": (start + timedelta(seconds=i)).isoformat(),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.mark.database
+def test_load_window_and_page_older():
+    """Test that only the newest messages load and older pages come in on demand."""
+    conversation_id = uuid4()
+    pool = FakePool(_rows(conversation_id, 25))
+    history = ConversationHistory(
+        conversation_id, max_messages=10, page_size=10, summarizer=TruncatingSummarizer(), pool=pool
+    )
+
+    async def run():
+        await history.load()
+        return await history.load_older(), await history.load_older(), await history.load_older()
+
+    first, second, third = asyncio.run(run())
+
+    assert [m.content for m in history.messages] == [f"message {i:03d}" for i in range(15, 25)]
+    assert [m.content for m in first] == [f"message {i:03d}" for i in range(5, 15)]
+    assert [m.content for m in second] == [f"message {i:03d}" for i in range(5)]
+    assert third == []
+    assert not history.has_older
+
+    _, params = pool.queries[-1].to_sql()
+    assert isinstance(params[1], datetime) and isinstance(params[2], UUID)
+
+
+@pytest.mark.database
+def test_paging_keeps_messages_sharing_a_timestamp():
+    """Test that a page boundary inside a run of equal timestamps skips nothing."""
+    conversation_id = uuid4()
+    rows = _rows(conversation_id, 12)
+    for row in rows:
+        row["created_at"] = datetime(2024, 1, 1).isoformat()
+    pool = FakePool(rows)
+    history = ConversationHistory(
+        conversation_id, max_messages=5, page_size=5, summarizer=TruncatingSummarizer(), pool=pool
+    )
+
+    async def run():
+        await history.load()
+        return await history.load_older(), await history.load_older()
+
+    first, second = asyncio.run(run())
+
+    loaded = history.messages + first + second
+    assert sorted(str(m.id) for m in loaded) == sorted(row["id"] for row in rows)
+    assert pool.queries[-1].ordering == [("created_at", True, False), ("id", True, False)]
+
+
+@pytest.mark.database
+def test_token_budget_evicts_into_summary():
+    """Test that messages beyond the token budget are folded into the summary."""
+    conversation_id = uuid4()
+    history = ConversationHistory(
+        conversation_id,
+        max_messages=100,
+        max_tokens=20,
+        summarizer=TruncatingSummarizer(),
+        pool=FakePool([]),
+    )
+
+    for i in range(10):
+        history.add(Message(
+            conversation_id=conversation_id, sender_id="u", sender_type="user", content="x" * 20
+        ))
+
+    context = asyncio.run(history.get_context())
+
+    assert history.tokens <= 20
+    assert len(context.messages) == 3
+    assert context.summary.count("user: ") == 7
+    first = context.to_prompt_messages()[0]
+    assert first["content"].startswith("Summary of the earlier conversation")
+
+
+@pytest.mark.database
+def test_model_summarizer_falls_back_on_error():
+    """Test that a failing model call falls back to truncation."""
+
+    class FailingClient:
+        async def create_message(self, **kwargs):
+            raise RuntimeError("unavailable")
+
+    client = FailingClient()
+    summarizer = ModelSummarizer(client=client, max_tokens=100)
+    message = Message(conversation_id=uuid4(), sender_id="u", sender_type="user", content="hello")
+
+    assert asyncio.run(summarizer.summarize("earlier", [message])) == "earlier\nuser: hello"
@@ -0,0 +1,175 @@
+"""
+Unit tests for the knowledge store and local vector index.
+"""
+
+import asyncio
+import json
+import os
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from src.database.knowledge import (
+    KnowledgeItem,
+    search_knowledge_batch,
+    upsert_embeddings,
+    vector_literal,
+)
+from src.database.pool import DatabasePool, PostgresPool
+from src.database.vector_index import LocalVectorIndex
+
+# Filter and expected matches shared by the local and database backends
+LIST_FILTER = {"tenant": "a", "lang": ["en", "de"]}
+METADATA = [
+    {"tenant": "a", "lang": "en"},
+    {"tenant": "a", "lang": "de"},
+    {"tenant": "a", "lang": "fr"},
+    {"tenant": "b", "lang": "en"},
+    {"tenant": "a"},
+]
+EXPECTED_IDS = {"0", "1"}
+
+
+def _dataset(n=2000, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def _brute_force(vectors, queries, k):
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+
+@pytest.mark.database
+def test_exact_search_matches_brute_force():
+    """Test that exact search returns the true nearest neighbours in order."""
+    vectors, queries = _dataset(), _dataset(20, seed=1)
+    index = LocalVectorIndex(16)
+    index.add([str(i) for i in range(1500)], vectors[:1500])
+    index.add([str(i) for i in range(1500, len(vectors))], vectors[1500:])
+
+    scores, rows = index.search(queries, k=5)
+
+    assert (rows == _brute_force(vectors, queries, 5)).all()
+    assert (np.diff(scores, axis=1) <= 0).all()
+
+
+@pytest.mark.database
+def test_ivf_search_recall_and_tail():
+    """Test IVF search with every list probed, and vectors added after build."""
+    vectors, queries = _dataset(), _dataset(20, seed=1)
+    index = LocalVectorIndex(16)
+    index.add([str(i) for i in range(1800)], vectors[:1800])
+    index.build(nlist=16)
+    index.add([str(i) for i in range(1800, 2000)], vectors[1800:])
+
+    _, rows = index.search(queries, k=5, nprobe=16)
+    _, approx = index.search(queries, k=5, nprobe=4)
+    expected = _brute_force(vectors, queries, 5)
+
+    assert [list(index.ids[r]) for r in rows] == [[str(i) for i in e] for e in expected]
+    assert approx.shape == (20, 5)
+
+
+@pytest.mark.database
+def test_metadata_prefilter_and_mmap_roundtrip(tmp_path):
+    """Test that filters restrict candidates and saved indexes load memory-mapped."""
+    vectors = _dataset(200)
+    index = LocalVectorIndex(16)
+    index.add(
+        [str(i) for i in range(200)],
+        vectors,
+        [{"tenant": "a" if i % 2 else "b", "content": f"doc {i}"} for i in range(200)],
+    )
+    index.build(nlist=4)
+    index.save(str(tmp_path))
+
+    loaded = LocalVectorIndex.load(str(tmp_path), mmap=True)
+    _, rows = loaded.search(vectors[:3], k=10, filters={"tenant": "a"}, nprobe=4)
+    _, none = loaded.search(vectors[:1], k=3, filters={"missing": 1})
+
+    assert isinstance(loaded._vectors, np.memmap)
+    assert all(loaded.metadata(r)["tenant"] == "a" for r in rows.ravel())
+    assert (none == -1).all()
+
+    matches = asyncio.run(search_knowledge_batch(vectors[1:2], k=1, index=loaded))
+    assert matches[0][0].id == "1"
+    assert matches[0][0].content == "doc 1"
+    assert matches[0][0].metadata == {"tenant": "a"}
+
+
+@pytest.mark.database
+def test_vector_literal():
+    """Test the pgvector text format."""
+    assert vector_literal([1, 0.5, -2]) == "[1.0,0.5,-2.0]"
+
+
+@pytest.mark.database
+def test_list_filters_match_any_member_on_every_backend():
+    """Test that a list filter value matches any of its members on each backend."""
+    vectors = _dataset(len(METADATA), dim=4)
+    index = LocalVectorIndex(4)
+    index.add([str(i) for i in range(len(METADATA))], vectors, METADATA)
+
+    local = asyncio.run(search_knowledge_batch(vectors[:1], k=5, filters=LIST_FILTER, index=index))
+    assert {match.id for match in local[0]} == EXPECTED_IDS
+
+    # Postgres: single values by containment, lists as accepted values
+    postgres = MagicMock(spec=PostgresPool)
+    postgres.fetch = AsyncMock(return_value=[])
+    asyncio.run(search_knowledge_batch(vectors[:1], k=5, filters=LIST_FILTER, pool=postgres))
+    sql, _, equal, k, any_of = postgres.fetch.call_args.args
+    assert "jsonb_each($4::jsonb)" in sql
+    assert json.loads(equal) == {"tenant": "a"}
+    assert json.loads(any_of) == {"lang": ["en", "de"]}
+    assert k == 5
+
+    # REST: the match function receives the accepted values of every key
+    rest = MagicMock(spec=DatabasePool)
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value.data = []
+    rest.run = AsyncMock(side_effect=lambda fn, timeout=None: fn(client))
+    asyncio.run(search_knowledge_batch(vectors[:1], k=5, filters=LIST_FILTER, pool=rest))
+    assert client.rpc.call_args.args[1]["filter"] == {"tenant": ["a"], "lang": ["en", "de"]}
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+def test_list_filters_against_database():
+    """Test that pgvector search applies list filters like the local index."""
+    pytest.importorskip("asyncpg")
+    table = f"knowledge_test_{uuid4().hex[:8]}"
+    vectors = _dataset(len(METADATA), dim=4)
+
+    async def run():
+        pool = PostgresPool(os.environ["TEST_DATABASE_URL"])
+        await pool.open()
+        try:
+            await pool.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await pool.execute(
+                f"CREATE TABLE {table} (id text PRIMARY KEY, content text NOT NULL, "
+                "metadata jsonb NOT NULL DEFAULT '{}', embedding vector(4) NOT NULL)"
+            )
+            try:
+                items = [
+                    KnowledgeItem(
+                        id=str(i), content=f"doc {i}", metadata=metadata,
+                        embedding=vectors[i].tolist(),
+                    )
+                    for i, metadata in enumerate(METADATA)
+                ]
+                await upsert_embeddings(items, table=table, pool=pool)
+                return await search_knowledge_batch(
+                    vectors[:1], k=5, filters=LIST_FILTER, table=table, pool=pool
+                )
+            finally:
+                await pool.execute(f"DROP TABLE {table}")
+        finally:
+            await pool.close()
+
+    matches = asyncio.run(run())
+
+    assert {match.id for match in matches[0]} == EXPECTED_IDS
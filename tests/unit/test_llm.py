@@ -0,0 +1,137 @@
+"""
+Unit tests for the shared LLM client.
+"""
+
+import asyncio
+import time
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from src.agents.llm import LLMClient, LLMError, RetryBudget, TokenBucket
+from src.bench.llm_stub import create_app
+from src.database.history import ModelSummarizer
+from src.database.models import Message
+
+MODEL = "claude-3-haiku-20240307"
+REPLY = {
+    "id": "msg_1",
+    "model": MODEL,
+    "content": [{"type": "text", "text": "hello"}],
+    "stop_reason": "end_turn",
+    "usage": {"input_tokens": 3, "output_tokens": 1},
+}
+BUSY = {"error": {"message": "busy"}}
+
+
+def make_client(transport, **kwargs):
+    """Create a client with fast retries against a transport."""
+    options = {
+        "api_key": "test", "retry_base_delay": 0.001, "hedge_after": 0, "transport": transport
+    }
+    options.update(kwargs)
+    return LLMClient(**options)
+
+
+def ask(client, **kwargs):
+    """Send one message."""
+    messages = [{"role": "user", "content": "hi"}]
+    return client.create_message(MODEL, messages, max_tokens=16, **kwargs)
+
+
+@pytest.mark.unit
+def test_concurrency_is_capped_per_model():
+    """Test that no more requests than allowed are in flight against the stub."""
+    app = create_app(latency="constant:0.02")
+    client = make_client(
+        httpx.ASGITransport(app=app), max_concurrency=10, max_concurrency_per_model=2
+    )
+
+    async def run():
+        return await asyncio.gather(*(ask(client) for _ in range(6)))
+
+    responses = asyncio.run(run())
+
+    assert [response.text for response in responses] == ["Stub reply: hi"] * 6
+    assert app.state.stats["requests"] == 6
+    assert app.state.stats["max_in_flight"] == 2
+
+
+@pytest.mark.unit
+def test_retryable_errors_are_retried_within_budget():
+    """Test retries of overload errors and their limit by the retry budget."""
+    statuses = iter([529, 429, 200])
+
+    def handler(request):
+        status = next(statuses)
+        return httpx.Response(status, json=REPLY if status == 200 else BUSY)
+
+    response = asyncio.run(ask(make_client(httpx.MockTransport(handler))))
+    assert (response.text, response.attempts) == ("hello", 3)
+    assert 0 < response.service_seconds < 1
+
+    # No budget: the first failure is final
+    failing = make_client(
+        httpx.MockTransport(lambda request: httpx.Response(529, json=BUSY)),
+        retry_budget=RetryBudget(ratio=0.0, min_per_second=0.0),
+    )
+    with pytest.raises(LLMError) as error:
+        asyncio.run(ask(failing))
+    assert error.value.status == 529
+
+    # Client errors are not retried
+    calls = []
+    rejecting = make_client(
+        httpx.MockTransport(lambda request: calls.append(1) or httpx.Response(400, json={}))
+    )
+    with pytest.raises(LLMError):
+        asyncio.run(ask(rejecting))
+    assert len(calls) == 1
+
+
+@pytest.mark.unit
+def test_slow_requests_are_hedged():
+    """Test that a hedge overtakes a slow first request."""
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1.0)
+        return httpx.Response(200, json=REPLY)
+
+    started = time.perf_counter()
+    response = asyncio.run(ask(make_client(httpx.MockTransport(handler)), hedge_after=0.02))
+
+    assert response.hedged is True
+    assert len(calls) == 2
+    assert time.perf_counter() - started < 0.5
+
+
+@pytest.mark.unit
+def test_token_bucket_paces_requests():
+    """Test that a token bucket spaces out requests beyond its burst."""
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    async def run():
+        return [await bucket.acquire() for _ in range(3)]
+
+    started = time.perf_counter()
+    waits = asyncio.run(run())
+
+    assert waits[0] < 0.005
+    assert waits[2] > 0.01
+    assert time.perf_counter() - started >= 0.035
+
+
+@pytest.mark.database
+def test_model_summarizer_uses_llm_client():
+    """Test summarizing through the shared client against the stub."""
+    client = make_client(httpx.ASGITransport(app=create_app(latency="constant:0")))
+    summarizer = ModelSummarizer(client=client, max_tokens=100)
+    message = Message(conversation_id=uuid4(), sender_id="u", sender_type="user", content="hello")
+
+    summary = asyncio.run(summarizer.summarize(None, [message]))
+
+    assert summary.startswith("Stub reply: Update the running summary")
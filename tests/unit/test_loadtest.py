@@ -0,0 +1,153 @@
+"""
+Unit tests for trace recording and the trace-replay load generator.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from src.api.recorder import TraceRecorder, TraceRecorderMiddleware
+from src.bench import loadtest
+
+
+@pytest.mark.api
+def test_recorder_writes_replayable_trace(tmp_path):
+    """Test that recorded requests load back as a trace without credentials."""
+    path = tmp_path / "trace.jsonl"
+    recorder = TraceRecorder(str(path))
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(payload: dict):
+        return payload
+
+    app.add_middleware(
+        TraceRecorderMiddleware,
+        recorder=recorder,
+        sample_rate=1.0,
+        max_body_bytes=1024,
+        record_bodies=True,
+    )
+    client = TestClient(app)
+    client.post("/echo?x=1", json={"type": "quote"}, headers={"Authorization": "Bearer secret"})
+    client.post("/echo", content=b"x" * 2048, headers={"Content-Type": "application/json"})
+    recorder.close()
+
+    first, second = loadtest.load_trace(str(path))
+    request = (first["method"], first["path"], first["query"], first["status"])
+    assert request == ("POST", "/echo", "x=1", 200)
+    assert json.loads(first["body"]) == {"type": "quote"}
+    assert "authorization" not in first["headers"]
+    assert second["body_truncated"] is True and "body" not in second
+
+
+@pytest.mark.api
+def test_recorder_omits_or_redacts_bodies(tmp_path):
+    """Test that bodies are off by default and redacted by field when enabled."""
+    def record(**options):
+        path = tmp_path / f"trace-{len(options)}.jsonl"
+        recorder = TraceRecorder(str(path))
+        app = FastAPI()
+
+        @app.post("/{name}")
+        async def accept(request: Request):
+            await request.body()
+            return {}
+
+        app.add_middleware(TraceRecorderMiddleware, recorder=recorder, sample_rate=1.0, **options)
+        client = TestClient(app)
+        client.post("/claims", json={"type": "claim", "claimant": {"email": "a@b.c", "name": "A"}})
+        client.post("/token", data={"username": "alice", "password": "hunter2"})
+        client.post("/claims", content=b"free text", headers={"Content-Type": "text/plain"})
+        client.post("/other", json={"type": "quote"})
+        client.post("/other?access_token=abc&email=a%40b.c&page=2")
+        recorder.close()
+        return loadtest.load_trace(str(path))
+
+    entries = record()
+    assert not any("body" in entry for entry in entries)
+    # Query parameters are redacted even when bodies are not recorded
+    assert entries[-1]["query"] == "access_token=%5BREDACTED%5D&email=%5BREDACTED%5D&page=2"
+    assert entries[-2]["query"] == ""
+
+    claim, token, text, other, _ = record(record_bodies=True, body_paths=["/claims", "/token"])
+    assert json.loads(claim["body"]) == {
+        "type": "claim", "claimant": {"email": "[REDACTED]", "name": "A"}
+    }
+    assert token["body"] == "username=alice&password=%5BREDACTED%5D"
+    assert text["body_dropped"] is True and "body" not in text
+    assert "body" not in other
+
+
+@pytest.mark.unit
+def test_schedule_distributions_and_percentiles():
+    """Test trace and Poisson schedules, latency specs and nearest-rank percentiles."""
+    entries = [
+        {"ts": 100.0, "method": "GET", "path": "/a"},
+        {"ts": 102.0, "method": "GET", "path": "/b"},
+    ]
+
+    assert [offset for offset, _ in loadtest.build_schedule(entries, time_scale=0.5)] == [0.0, 1.0]
+    poisson = loadtest.build_schedule(entries, rate=1000, duration=1.0, seed=1)
+    assert 900 < len(poisson) < 1100
+    assert all(a[0] < b[0] for a, b in zip(poisson, poisson[1:]))
+
+    assert loadtest.LatencyDistribution("constant:0.25").sample() == 0.25
+    assert 0.1 <= loadtest.LatencyDistribution("uniform:0.1,0.2", seed=1).sample() <= 0.2
+    with pytest.raises(ValueError):
+        loadtest.LatencyDistribution("lognormal:0.8")
+
+    values = [float(v) for v in range(1, 1001)]
+    percentiles = [loadtest.percentile(values, p) for p in (50, 99, 99.9, 100)]
+    assert percentiles == [500.0, 990.0, 999.0, 1000.0]
+
+
+@pytest.mark.api
+def test_replay_in_process_with_stub_agents(tmp_path):
+    """Test replaying a trace against the app with stub agents."""
+    path = tmp_path / "trace.jsonl"
+    body = json.dumps({"type": "quote", "query": "cover?"})
+    with open(path, "w") as f:
+        for i in range(20):
+            entry = {"ts": i * 0.001, "method": "GET", "path": "/health"}
+            if i % 2:
+                entry = {**entry, "method": "POST", "path": "/orchestrator/request", "body": body,
+                         "headers": {"content-type": "application/json"}}
+            f.write(json.dumps(entry) + "\n")
+
+    report = asyncio.run(loadtest.run(
+        str(path), time_scale=0.0, concurrency=4, users=10, agent_latency="constant:0.001", seed=1,
+    ))
+
+    assert report["requests"] == 20
+    assert report["errors"] == 0 and report["statuses"] == {"200": 20}
+    assert report["throughput"] > 0
+    latency = report["latency_ms"]
+    assert 0 < latency["p50"] <= latency["p99.9"] <= latency["max"]
+
+
+@pytest.mark.api
+def test_replay_skips_or_fills_requests_recorded_without_bodies(tmp_path):
+    """Test that body-less POSTs are skipped, or sent with the default body."""
+    path = tmp_path / "trace.jsonl"
+    with open(path, "w") as f:
+        for entry in [
+            {"ts": 0.0, "method": "GET", "path": "/health"},
+            {"ts": 0.001, "method": "POST", "path": "/orchestrator/request"},
+        ]:
+            f.write(json.dumps(entry) + "\n")
+
+    def replay(**options):
+        return asyncio.run(loadtest.run(
+            str(path), time_scale=0.0, users=1, agent_latency="constant:0", seed=1, **options
+        ))
+
+    report = replay()
+    assert (report["requests"], report["skipped"], report["statuses"]) == (1, 1, {"200": 1})
+    assert "skipped:     1 POST/PUT/PATCH requests" in loadtest.format_report(report)
+
+    report = replay(default_body=json.dumps({"type": "quote", "query": "cover?"}))
+    assert (report["requests"], report["skipped"], report["statuses"]) == (2, 0, {"200": 2})
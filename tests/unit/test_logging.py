@@ -0,0 +1,112 @@
+"""
+Unit tests for the non-blocking logging pipeline.
+"""
+
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from src.utils.logging import (
+    DroppingQueueHandler,
+    SamplingFilter,
+    configure_logging,
+    get_logging_stats,
+    shutdown_logging,
+)
+
+
+@pytest.fixture
+def stream():
+    """Configure the pipeline writing to a buffer, restoring logging afterwards."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    buffer = io.StringIO()
+    yield buffer
+    shutdown_logging()
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+@pytest.mark.unit
+def test_records_are_written_as_json_with_extras(stream):
+    """Test JSON output, lazy arguments and extra fields."""
+    configure_logging(
+        log_level="INFO", log_format="json", queue_size=100, sample_per_second=0, stream=stream
+    )
+    logger = logging.getLogger("aika.test")
+
+    logger.info("Routed to %s", "summarizer", extra={"request_id": "r1"})
+    logger.debug("Not written %s", "at INFO")
+    shutdown_logging()
+
+    entries = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(entries) == 1
+    assert entries[0]["message"] == "Routed to summarizer"
+    assert entries[0]["level"] == "INFO"
+    assert entries[0]["request_id"] == "r1"
+
+
+@pytest.mark.unit
+def test_sampling_suppresses_per_call_site():
+    """Test that repeated records from one call site are sampled but warnings are not."""
+    sampler = SamplingFilter(per_second=2)
+
+    def make(level, lineno):
+        return logging.LogRecord("aika.test", level, __file__, lineno, "message", (), None)
+
+    passed = [sampler.filter(make(logging.INFO, 1)) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert sampler.sampled == 3
+
+    assert sampler.filter(make(logging.INFO, 2))
+    assert all(sampler.filter(make(logging.WARNING, 1)) for _ in range(5))
+
+    # The next record let through carries the suppressed count
+    sampler._sites[("aika.test", __file__, 1)][0] -= 1.0
+    record = make(logging.INFO, 1)
+    assert sampler.filter(record)
+    assert record.suppressed == 3
+
+
+@pytest.mark.unit
+def test_full_queue_drops_and_reports():
+    """Test that a full queue drops records without blocking and reports them."""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    logger = logging.Logger("aika.test")
+    logger.addHandler(handler)
+
+    for i in range(5):
+        logger.error("Record %d", i)
+
+    assert (handler.enqueued, handler.dropped) == (2, 3)
+    assert handler.dropped_by_level == {"ERROR": 3}
+
+    # Once the queue has room the drops are reported ahead of the next record
+    handler.queue.get_nowait()
+    handler.queue.get_nowait()
+    logger.error("After")
+    warning = handler.queue.get_nowait()
+    assert warning.getMessage() == "Dropped 3 log records under backpressure"
+    assert handler.queue.get_nowait().getMessage() == "After"
+
+
+@pytest.mark.unit
+def test_logging_stats(stream):
+    """Test pipeline statistics."""
+    assert get_logging_stats()["enabled"] is False
+
+    configure_logging(
+        log_level="INFO", log_format="text", queue_size=100, sample_per_second=1, stream=stream
+    )
+    logger = logging.getLogger("aika.test")
+    for _ in range(3):
+        logger.info("Repeated")
+
+    stats = get_logging_stats()
+    assert stats["enabled"] is True
+    assert stats["sampled"] == 2
+    assert stats["dropped"] == 0
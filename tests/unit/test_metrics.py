@@ -0,0 +1,116 @@
+"""
+Unit tests for the metrics registry and /metrics exposition.
+"""
+
+import json
+import os
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.utils import metrics
+from src.utils.metrics import MetricsRegistry, _merge_snapshots, _render_snapshot
+
+
+@pytest.mark.unit
+def test_counter_histogram_and_gauge_rendering():
+    """Test values and Prometheus text for each metric type."""
+    registry = MetricsRegistry()
+    requests = registry.counter("test_requests_total", "Requests", ["route"])
+    latency = registry.histogram("test_latency_seconds", "Latency", buckets=(0.1, 1.0))
+    in_use = registry.gauge("test_in_use", "In use")
+
+    requests.labels("/a").inc()
+    requests.labels("/a").inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    in_use.set_function(lambda: 7)
+
+    text = registry.render()
+
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{route="/a"} 3' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "test_latency_seconds_sum 5.55" in text
+    assert "test_latency_seconds_count 3" in text
+    assert "test_in_use 7" in text
+    assert registry.counter("test_requests_total", "Requests", ["route"]) is requests
+
+
+@pytest.mark.unit
+def test_counter_is_exact_across_threads():
+    """Test that per-thread cells add up without lost updates."""
+    registry = MetricsRegistry()
+    total = registry.counter("test_threads_total", "Increments")
+
+    def _work():
+        for _ in range(10000):
+            total.inc()
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert total.labels().get() == 80000
+
+
+@pytest.mark.unit
+def test_worker_snapshots_are_aggregated():
+    """Test merging of live and exited workers' snapshots."""
+    registry = MetricsRegistry()
+    registry.counter("test_jobs_total", "Jobs").inc(2)
+    registry.gauge("test_queue", "Queue").set(3)
+    own = registry.snapshot()
+
+    peer = MetricsRegistry()
+    peer.counter("test_jobs_total", "Jobs").inc(5)
+    peer.gauge("test_queue", "Queue").set(4)
+    live = {"pid": os.getpid() + 1, "metrics": peer.snapshot()}
+    exited = {"pid": os.getpid() + 2, "metrics": peer.snapshot()}
+
+    text = _render_snapshot(_merge_snapshots([(True, live), (False, exited)], own))
+
+    # Counters from every worker, gauges only from live ones
+    assert "test_jobs_total 12" in text
+    assert "test_queue 7" in text
+
+
+@pytest.mark.unit
+def test_exited_worker_snapshots_are_folded(tmp_path):
+    """Test that snapshots of exited workers are merged into one file and removed."""
+    peer = MetricsRegistry()
+    peer.counter("test_jobs_total", "Jobs").inc(5)
+    peer.gauge("test_queue", "Queue").set(4)
+    for pid in (999991, 999992):
+        (tmp_path / f"metrics-{pid}.json").write_text(json.dumps(peer.snapshot()))
+
+    registry = MetricsRegistry()
+    registry.counter("test_jobs_total", "Jobs").inc(2)
+    registry._snapshot_dir = str(tmp_path)
+
+    with patch.object(metrics, "_process_alive", return_value=False):
+        first = registry.render()
+        (tmp_path / "metrics-999993.json").write_text(json.dumps(peer.snapshot()))
+        second = registry.render()
+
+    assert "test_jobs_total 12" in first
+    assert "test_jobs_total 17" in second
+    assert "test_queue 4" not in second
+    assert sorted(p.name for p in tmp_path.glob("metrics-*.json")) == ["metrics-exited.json"]
+
+
+@pytest.mark.api
+def test_metrics_endpoint_reports_http_requests(test_client: TestClient):
+    """Test that handled requests show up at /metrics."""
+    test_client.get("/")
+    response = test_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'aika_http_request_seconds_count{method="GET",route="/",status="200"}' in response.text
@@ -0,0 +1,123 @@
+"""
+Unit tests for tiered model selection.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from src.agents.llm import LLMClient, LLMResponse
+from src.agents.model_router import ModelRouter, parse_confidence
+from src.utils.config import get_settings
+
+QUESTION = [{"role": "user", "content": "Covered?"}]
+
+
+def make_router(replies, requests=None, **kwargs):
+    """Create a router whose models answer with ``replies[model]``."""
+    def handler(request):
+        body = json.loads(request.content)
+        if requests is not None:
+            requests.append(body)
+        return httpx.Response(200, json={
+            "id": "msg", "model": body["model"], "stop_reason": "end_turn",
+            "content": [{"type": "text", "text": replies[body["model"]]}],
+            "usage": {"input_tokens": 10, "output_tokens": 5},
+        })
+
+    client = LLMClient(api_key="test", hedge_after=0, transport=httpx.MockTransport(handler))
+    kwargs.setdefault("latency_slo", 0)
+    kwargs.setdefault("cascade", True)
+    kwargs.setdefault("confidence_threshold", 0.7)
+    return ModelRouter(client=client, **kwargs)
+
+
+@pytest.mark.unit
+def test_select_by_task_and_latency_slo():
+    """Test tier selection from the task type, prompt size and latency SLO."""
+    router = make_router({}, cascade=False)
+
+    assert router.select("classification", 200, 16).tier == "small"
+    assert router.select("analysis", 200, 512).tier == "medium"
+    assert router.select("planning", 200, 512).tier == "large"
+
+    # The large tier cannot produce 500 tokens within 10s; the medium one can
+    decision = router.select("planning", 2000, 500, latency_slo=10.0)
+    assert (decision.tier, decision.reason) == ("medium", "slo")
+
+    # A long prompt moves the SLO out of reach of every tier
+    decision = router.select("planning", 1_000_000, 500, latency_slo=1.0)
+    assert (decision.tier, decision.reason) == ("small", "slo_unreachable")
+
+
+@pytest.mark.unit
+def test_cascade_escalates_on_low_confidence():
+    """Test that the small tier answers first and escalates when unsure."""
+    settings = get_settings()
+    requests = []
+    router = make_router({
+        settings.SUMMARIZER_MODEL: "Probably A\nConfidence: 0.3",
+        settings.REASONER_MODEL: "A, because of clause 4",
+    }, requests)
+
+    routed = asyncio.run(router.complete("analysis", QUESTION, max_tokens=64))
+
+    assert routed.tiers_tried == ["small", "medium"]
+    assert (routed.tier, routed.text) == ("medium", "A, because of clause 4")
+    assert "Confidence" in requests[0]["system"]
+    assert "system" not in requests[1]
+
+    stats = router.get_stats()
+    assert stats["small"]["escalations"] == 1
+    assert stats["medium"]["requests"] == 1
+    assert stats["medium"]["output_tokens"] == 5
+
+
+@pytest.mark.unit
+def test_cascade_stops_when_confident():
+    """Test that a confident small-tier answer is returned without its confidence line."""
+    router = make_router({get_settings().SUMMARIZER_MODEL: "Yes\nConfidence: 0.92"})
+
+    routed = asyncio.run(router.complete("analysis", QUESTION, max_tokens=64))
+
+    assert (routed.tier, routed.text, routed.confidence) == ("small", "Yes", 0.92)
+    assert router.get_stats()["medium"]["requests"] == 0
+
+
+@pytest.mark.unit
+def test_confidence_parsing_and_latency_correction():
+    """Test confidence parsing and learning tier latency from observed calls."""
+    def response(text, stop_reason="end_turn", service_seconds=0.0):
+        return LLMResponse(
+            id="m", model="m", text=text, content=[], stop_reason=stop_reason,
+            output_tokens=100, service_seconds=service_seconds,
+        )
+
+    assert parse_confidence(response("Answer")) == ("Answer", None)
+    assert parse_confidence(response("Answer\nconfidence: 1")) == ("Answer", 1.0)
+    assert parse_confidence(response("Cut off\nConfidence: 0.9", "max_tokens"))[1] == 0.0
+
+    router = make_router({})
+    before = router.predict_seconds("small", 0, 100)
+    router._record("small", before * 3, response("slow"))
+    assert router.predict_seconds("small", 0, 100) > before
+
+    # Time spent pacing or retrying does not count against the tier
+    router = make_router({})
+    router._record("small", before * 10, response("paced", service_seconds=before))
+    assert router.predict_seconds("small", 0, 100) == pytest.approx(before)
+
+
+@pytest.mark.unit
+def test_cascade_keeps_answers_without_confidence_line():
+    """Test that a missing confidence line does not escalate unless configured to."""
+    settings = get_settings()
+    replies = {settings.SUMMARIZER_MODEL: "Yes", settings.REASONER_MODEL: "Yes, clause 4"}
+    routed = asyncio.run(make_router(replies).complete("analysis", QUESTION, max_tokens=64))
+    assert (routed.tier, routed.text, routed.confidence) == ("small", "Yes", None)
+
+    strict = make_router(replies, missing_confidence=0.0)
+    routed = asyncio.run(strict.complete("analysis", QUESTION, max_tokens=64))
+    assert routed.tiers_tried == ["small", "medium"]
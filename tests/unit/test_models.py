@@ -0,0 +1,68 @@
+"""
+Unit tests for trusted model construction.
+"""
+
+import json
+from uuid import UUID, uuid4
+
+import pytest
+
+from src.database.models import Agent, AgentType, Conversation, Message, MessageRecord
+
+
+def _row(**overrides):
+    row = {
+        "id": str(uuid4()),
+        "conversation_id": str(uuid4()),
+        "sender_id": str(uuid4()),
+        "sender_type": "agent",
+        "content": "hello",
+        "created_at": "2024-01-01T12:00:00+00:00",
+        "metadata": {"turn": 1},
+        "unknown_column": True,
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.mark.database
+def test_trusted_message_matches_validated():
+    """Test that the trusted path produces the same model as validation."""
+    row = _row()
+
+    trusted = Message.trusted(row)
+
+    assert trusted == Message.parse_obj(row)
+    assert isinstance(trusted.sender_id, UUID)
+    assert Message.trusted(_row(sender_id="user-1")).sender_id == "user-1"
+    assert Message.trusted(_row(metadata='{"turn": 2}')).metadata == {"turn": 2}
+
+
+@pytest.mark.database
+def test_trusted_defaults_enums_and_nested_models():
+    """Test default factories, enum coercion and nested model lists."""
+    agent = Agent.trusted({
+        "name": "a",
+        "description": "d",
+        "type": "risk_assessment",
+        "capabilities": [],
+        "model_name": "m",
+    })
+    conversation = Conversation.trusted({"user_id": str(uuid4()), "messages": [_row()]})
+
+    assert agent.type is AgentType.RISK_ASSESSMENT
+    assert isinstance(agent.id, UUID)
+    assert agent.__fields_set__ == {"name", "description", "type", "capabilities", "model_name"}
+    assert isinstance(conversation.messages[0], Message)
+    assert conversation.dict()["messages"][0]["content"] == "hello"
+
+
+@pytest.mark.database
+def test_message_record_roundtrip():
+    """Test conversion between the compact record and the model."""
+    message = Message.parse_obj(_row())
+
+    record = MessageRecord.from_message(message)
+
+    assert record == MessageRecord.trusted(json.loads(message.json()))
+    assert record.to_message() == message
@@ -0,0 +1,156 @@
+"""
+Unit tests for the NDJSON orchestrator batch endpoint.
+"""
+
+import asyncio
+import json
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.routers import orchestrator
+from src.auth.jwt import create_access_token
+
+
+class _SlowOrchestrator:
+    """Orchestrator stub that sleeps per item and records peak concurrency."""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.users = []
+
+    async def handle_request(self, request):
+        self.users.append(request.get("user"))
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if request.get("fail"):
+                raise RuntimeError("agent failed")
+            await asyncio.sleep(request.get("delay", 0))
+            return {"echo": request["value"]}
+        finally:
+            self.active -= 1
+
+
+def _client():
+    app = FastAPI()
+    app.include_router(orchestrator.router, prefix="/orchestrator")
+    return TestClient(app)
+
+
+def _auth():
+    return {"Authorization": f"Bearer {create_access_token({'sub': 'alice'})}"}
+
+
+@pytest.mark.api
+def test_batch_streams_results_in_completion_order():
+    """Test that results stream back with ids as items finish."""
+    stub = _SlowOrchestrator()
+    items = [
+        {"id": "slow", "value": 1, "delay": 0.2},
+        {"id": "fast", "value": 2},
+        {"value": 3, "fail": True},
+    ]
+
+    def body():
+        for item in items:
+            yield (json.dumps(item) + "\n").encode()
+        yield b"not json\n"
+
+    with patch.object(orchestrator, "get_orchestrator", return_value=stub):
+        response = _client().post("/orchestrator/batch", content=body(), headers=_auth())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    by_id = {r["id"]: r for r in results}
+
+    assert results[-1]["id"] == "slow"
+    assert by_id["fast"] == {"id": "fast", "status": "ok", "result": {"echo": 2}}
+    assert by_id[2]["status"] == "error"
+    assert by_id[3]["error"].startswith("Invalid item")
+
+
+@pytest.mark.api
+def test_batch_respects_concurrency_cap():
+    """Test that no more than the configured number of items run at once."""
+    stub = _SlowOrchestrator()
+    body = "".join(json.dumps({"value": i, "delay": 0.01}) + "\n" for i in range(40))
+
+    with patch.object(orchestrator, "get_orchestrator", return_value=stub), \
+            patch.object(orchestrator.settings, "ORCHESTRATOR_BATCH_CONCURRENCY", 4):
+        response = _client().post("/orchestrator/batch", content=body, headers=_auth())
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["id"] for r in results) == list(range(40))
+    assert all(r["status"] == "ok" for r in results)
+    assert stub.peak == 4
+
+
+@pytest.mark.api
+def test_batch_requires_authentication():
+    """Test that anonymous batches are rejected."""
+    response = _client().post("/orchestrator/batch", content=b"{}\n")
+    assert response.status_code == 401
+
+
+@pytest.mark.api
+def test_requests_run_as_the_authenticated_user():
+    """Test that a client cannot submit requests on behalf of another user."""
+    stub = _SlowOrchestrator()
+    item = {"value": 1, "user": "mallory"}
+
+    with patch.object(orchestrator, "get_orchestrator", return_value=stub):
+        client = _client()
+        client.post("/orchestrator/request", json=item, headers=_auth())
+        client.post("/orchestrator/batch", content=json.dumps(item) + "\n", headers=_auth())
+
+    assert stub.users == ["alice", "alice"]
+
+
+@pytest.mark.api
+def test_batch_items_are_cancelled_on_disconnect():
+    """Test that items still running are cancelled when the client goes away."""
+    cancelled = []
+
+    class _HangingOrchestrator:
+        async def handle_request(self, request):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(request["value"])
+                raise
+
+    app = FastAPI()
+    app.include_router(orchestrator.router, prefix="/orchestrator")
+    app.dependency_overrides[orchestrator.get_current_user] = lambda: {"username": "alice"}
+    body = "".join(json.dumps({"value": i}) + "\n" for i in range(3)).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/orchestrator/batch", "raw_path": b"/orchestrator/batch",
+        "root_path": "", "query_string": b"", "headers": [],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+
+    async def run():
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            # The client hangs up while the items are running
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            pass
+
+        await asyncio.wait_for(app(scope, receive, send), timeout=2)
+
+    with patch.object(orchestrator, "get_orchestrator", return_value=_HangingOrchestrator()):
+        asyncio.run(run())
+
+    assert sorted(cancelled) == [0, 1, 2]
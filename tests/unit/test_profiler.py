@@ -0,0 +1,130 @@
+"""
+Unit tests for the sampling profiler and the admin profiling endpoints.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.profiling import RequestProfilingMiddleware
+from src.api.routers import admin
+from src.utils.config import get_settings
+from src.utils.profiler import MIN_INTERVAL, SamplingProfiler
+
+
+async def _wait_for_data():
+    await asyncio.sleep(0.1)
+
+
+async def _handler():
+    await _wait_for_data()
+
+
+@pytest.mark.unit
+def test_profiler_samples_suspended_task_await_chains():
+    """Test that suspended tasks are sampled through their await chain."""
+
+    async def main():
+        task = asyncio.create_task(_handler(), name="request")
+        profiler = SamplingProfiler(interval=0.002)
+        profiler.start()
+        await task
+        return profiler.stop()
+
+    profile = asyncio.run(main())
+    collapsed = profile.collapsed()
+
+    assert profile.samples > 0
+    assert any(
+        line.startswith("task:request;_handler") and "_wait_for_data" in line
+        for line in collapsed.splitlines()
+    )
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await _wait_for_data()
+        return {"ok": True}
+
+    app.include_router(admin.router, prefix="/admin")
+    app.add_middleware(RequestProfilingMiddleware, interval=0.002)
+    return TestClient(app)
+
+
+@pytest.mark.api
+def test_admin_profile_requires_key():
+    """Test that profiling is unavailable without, or with a wrong, admin key."""
+    client = _client()
+
+    with patch.object(get_settings(), "ADMIN_API_KEY", None):
+        assert client.post("/admin/profile?seconds=0.01").status_code == 404
+    with patch.object(get_settings(), "ADMIN_API_KEY", "secret"):
+        wrong = client.post("/admin/profile?seconds=0.01", headers={"X-Admin-Key": "wrong"})
+        assert wrong.status_code == 403
+        response = client.post("/admin/profile?seconds=0.05", headers={"X-Admin-Key": "secret"})
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Aika-Profile-Samples"]) > 0
+    assert "thread:" in response.text
+
+
+@pytest.mark.api
+def test_request_profiling_header():
+    """Test profiling a single request selected by header."""
+    client = _client()
+
+    with patch.object(get_settings(), "ADMIN_API_KEY", "secret"):
+        plain = client.get("/slow")
+        profiled = client.get("/slow", headers={"X-Aika-Profile": "secret"})
+        profile_id = profiled.headers["X-Aika-Profile-Id"]
+        profile = client.get(
+            f"/admin/profile/requests/{profile_id}", headers={"X-Admin-Key": "secret"}
+        )
+
+    assert "X-Aika-Profile-Id" not in plain.headers
+    assert profile.status_code == 200
+    assert "_wait_for_data" in profile.text
+
+
+@pytest.mark.unit
+def test_profiler_rejects_short_intervals_and_stops_off_loop():
+    """Test the minimum sampling interval and stopping without blocking the loop."""
+    with pytest.raises(ValueError):
+        SamplingProfiler(interval=MIN_INTERVAL / 2)
+
+    async def main():
+        profiler = SamplingProfiler(interval=0.05)
+        profiler.start()
+        await asyncio.sleep(0.01)
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(1)
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        ticks.clear()
+        profile = await profiler.stop_async()
+        ticker.cancel()
+        return profile, len(ticks)
+
+    profile, ticks = asyncio.run(main())
+
+    assert profile.samples >= 0
+    assert ticks > 0
+
+    client = _client()
+    with patch.object(get_settings(), "ADMIN_API_KEY", "secret"):
+        response = client.post(
+            "/admin/profile?seconds=0.01&interval=0.0001", headers={"X-Admin-Key": "secret"}
+        )
+    assert response.status_code == 422
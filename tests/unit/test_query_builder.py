@@ -0,0 +1,101 @@
+"""
+Unit tests for the query builder.
+"""
+
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+
+from src.database.query import Query, _compile_sql
+
+
+@pytest.mark.database
+def test_query_compiles_to_parameterized_sql():
+    """Test that every query part is pushed down into the SQL."""
+    query = (
+        Query("messages")
+        .select("id", "content")
+        .in_("sender_type", ["user", "agent"])
+        .between("created_at", "2024-01-01", "2024-02-01")
+        .not_null("metadata")
+        .order_by("created_at", desc=True)
+        .order_by("id")
+        .limit(50)
+    )
+
+    sql, params = query.to_sql()
+
+    assert sql == (
+        'SELECT "id", "content" FROM "messages" '
+        'WHERE "sender_type" = ANY($1) AND "created_at" >= $2 AND "created_at" < $3 '
+        'AND "metadata" IS NOT NULL ORDER BY "created_at" DESC, "id" LIMIT $4'
+    )
+    assert params == [["user", "agent"], "2024-01-01", "2024-02-01", 50]
+
+
+@pytest.mark.database
+def test_row_comparison_for_keyset_cursors():
+    """Test that row comparisons compile to SQL tuples and PostgREST or-conditions."""
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    message_id = UUID("00000000-0000-0000-0000-000000000001")
+    query = Query("messages").row_lt(("created_at", "id"), (created_at, message_id)).limit(10)
+
+    sql, params = query.to_sql()
+    client = MagicMock()
+    query.apply(client)
+
+    # asyncpg binds timestamptz and uuid parameters from native values only
+    assert sql == 'SELECT * FROM "messages" WHERE ("created_at", "id") < ($1, $2) LIMIT $3'
+    assert params == [created_at, message_id, 10]
+    timestamp, uuid = '"2024-01-01T00:00:00+00:00"', f'"{message_id}"'
+    client.table.return_value.select.return_value.or_.assert_called_once_with(
+        f"created_at.lt.{timestamp},and(created_at.eq.{timestamp},id.lt.{uuid})"
+    )
+
+
+@pytest.mark.database
+def test_text_search_on_text_and_tsvector_columns():
+    """Test that only text columns are converted with to_tsvector."""
+    text_sql, params = Query("knowledge").text_search("content", "rate limits").to_sql()
+    vector_sql, _ = Query("knowledge").text_search("search", "rate limits", tsvector=True).to_sql()
+
+    assert text_sql == (
+        'SELECT * FROM "knowledge" WHERE to_tsvector($1::regconfig, "content") '
+        "@@ websearch_to_tsquery($1::regconfig, $2)"
+    )
+    assert vector_sql == (
+        'SELECT * FROM "knowledge" WHERE "search" @@ websearch_to_tsquery($1::regconfig, $2)'
+    )
+    assert params == ["english", "rate limits"]
+
+
+@pytest.mark.database
+def test_count_only_query():
+    """Test that count queries ignore ordering and limits."""
+    query = Query("conversations").eq("status", "active").order_by("id").limit(10)
+    sql, params = query.count().to_sql()
+
+    assert sql == 'SELECT count(*) FROM "conversations" WHERE "status" = $1'
+    assert params == ["active"]
+
+
+@pytest.mark.database
+def test_query_shapes_are_compiled_once():
+    """Test that queries differing only in values share compiled SQL."""
+    _compile_sql.cache_clear()
+
+    for conversation_id in ("a", "b", "c"):
+        Query("messages").eq("conversation_id", conversation_id).limit(10).to_sql()
+
+    info = _compile_sql.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
+
+
+@pytest.mark.database
+def test_unsupported_operator():
+    """Test that unknown operators are rejected."""
+    with pytest.raises(ValueError):
+        Query("messages").where("content", "regex", ".*")
@@ -0,0 +1,138 @@
+"""
+Unit tests for the read-through query cache.
+"""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.database.cache import (
+    CACHE_EVICTIONS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    QueryCache,
+    parse_table_ttls,
+)
+from src.database.connection import execute_query
+from src.utils.metrics import get_metrics_registry
+
+
+@pytest.mark.database
+def test_parse_table_ttls():
+    """Test parsing of per-table TTL settings."""
+    assert parse_table_ttls("agents:300, policies:600,") == {"agents": 300.0, "policies": 600.0}
+    assert parse_table_ttls("") == {}
+
+
+@pytest.mark.database
+def test_only_configured_tables_are_cached():
+    """Test that tables without a TTL bypass the cache."""
+    cache = QueryCache({"agents": 60})
+    key = cache.make_key("messages")
+
+    cache.put(key, [{"id": 1}])
+
+    assert cache.get(key) == (False, None)
+    assert not cache.is_cacheable("messages")
+
+
+@pytest.mark.database
+def test_lru_eviction_and_ttl_expiry():
+    """Test that the least recently used entry is evicted and TTLs expire."""
+    cache = QueryCache({"agents": 60, "policies": 0.01}, max_entries=2)
+    first = cache.make_key("agents", filters={"id": 1})
+    second = cache.make_key("agents", filters={"id": 2})
+    third = cache.make_key("agents", filters={"id": 3})
+
+    cache.put(first, "first")
+    cache.put(second, "second")
+    cache.get(first)
+    cache.put(third, "third")
+
+    assert cache.get(first) == (True, "first")
+    assert cache.get(second) == (False, None)
+    assert cache.get_stats()["evictions"] == 1
+
+    expiring = cache.make_key("policies")
+    cache.put(expiring, "policy")
+    time.sleep(0.02)
+    assert cache.get(expiring) == (False, None)
+
+
+@pytest.mark.database
+def test_concurrent_misses_share_one_load():
+    """Test the stampede guard."""
+    cache = QueryCache({"agents": 60})
+    key = cache.make_key("agents")
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return [{"id": 1}]
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load(key, loader) for _ in range(10)))
+
+    results = asyncio.run(run())
+
+    assert len(loads) == 1
+    assert all(r == [{"id": 1}] for r in results)
+    assert cache.get_stats()["coalesced"] == 9
+
+
+@pytest.mark.database
+def test_invalidation_during_load_discards_result():
+    """Test that a write racing a load does not leave stale rows cached."""
+    cache = QueryCache({"agents": 60})
+    key = cache.make_key("agents")
+
+    async def loader():
+        cache.invalidate("agents")
+        return "stale"
+
+    assert asyncio.run(cache.get_or_load(key, loader)) == "stale"
+    assert cache.get(key) == (False, None)
+
+
+@pytest.mark.database
+def test_invalidation_during_sync_query_discards_result():
+    """Test that execute_query does not cache rows loaded across an invalidation."""
+    cache = QueryCache({"agents": 60})
+    client = MagicMock()
+
+    def execute():
+        cache.invalidate("agents")
+        return "stale"
+
+    client.table.return_value.select.return_value.execute.side_effect = execute
+    with patch("src.database.connection.get_supabase_client", return_value=client), \
+            patch("src.database.connection.get_query_cache", return_value=cache):
+        assert execute_query("agents") == "stale"
+        client.table.return_value.select.return_value.execute.side_effect = None
+        client.table.return_value.select.return_value.execute.return_value = "fresh"
+        assert execute_query("agents") == "fresh"
+
+    assert cache.get(cache.make_key("agents", namespace="response")) == (True, "fresh")
+
+
+@pytest.mark.database
+def test_cache_counts_are_exported_as_metrics():
+    """Test that hits, misses and evictions reach the metrics registry."""
+    cache = QueryCache({"agents": 60}, max_entries=1)
+
+    def counts():
+        hits, misses = CACHE_HITS.labels("agents").get(), CACHE_MISSES.labels("agents").get()
+        return hits, misses, CACHE_EVICTIONS.labels().get()
+
+    before = counts()
+
+    cache.put(cache.make_key("agents", filters={"id": 1}), [{"id": 1}])
+    cache.put(cache.make_key("agents", filters={"id": 2}), [{"id": 2}])
+    cache.get(cache.make_key("agents", filters={"id": 2}))
+    cache.get(cache.make_key("agents", filters={"id": 1}))
+
+    assert [a - b for a, b in zip(counts(), before)] == [1, 1, 1]
+    assert "aika_query_cache_hits_total" in get_metrics_registry().render()
@@ -0,0 +1,142 @@
+"""
+Unit tests for the rate limiting middleware.
+"""
+
+import asyncio
+import os
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.rate_limit import (
+    MemoryRateLimitBackend,
+    PostgresRateLimitBackend,
+    RateLimit,
+    RateLimitMiddleware,
+    parse_route_limits,
+)
+from src.auth.jwt import create_access_token
+from src.database.pool import PostgresPool
+
+
+def _client(**kwargs):
+    app = FastAPI()
+
+    @app.get("/orchestrator/request")
+    async def request():
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    options = {
+        "user_limit": RateLimit(rate=0.001, burst=3),
+        "api_key_limit": None,
+        "route_limits": {},
+        **kwargs,
+    }
+    app.add_middleware(
+        RateLimitMiddleware, backend=MemoryRateLimitBackend(), exempt_paths=["/health"], **options
+    )
+    return TestClient(app)
+
+
+@pytest.mark.api
+def test_token_bucket_refill():
+    """Test that buckets drain, report the wait and refill over time."""
+    backend = MemoryRateLimitBackend(shards=4)
+    limit = RateLimit(rate=1000, burst=2)
+
+    assert backend.try_acquire("k", limit) == 0
+    assert backend.try_acquire("k", limit) == 0
+    assert 0 < backend.try_acquire("k", limit) <= 0.001
+    assert RateLimit.parse("5") == RateLimit(rate=5, burst=5)
+    assert parse_route_limits("/a=1:2, /b=3:4")["/b"] == RateLimit(rate=3, burst=4)
+
+
+@pytest.mark.api
+def test_user_limit_returns_429_with_retry_after():
+    """Test per-user limits, keyed on the authenticated user."""
+    client = _client()
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob'})}"}
+
+    statuses = [client.get("/orchestrator/request", headers=alice).status_code for _ in range(4)]
+    limited = client.get("/orchestrator/request", headers=alice)
+
+    assert statuses == [200, 200, 200, 429]
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert limited.json()["scope"] == "user"
+    assert client.get("/orchestrator/request", headers=bob).status_code == 200
+    assert all(client.get("/health").status_code == 200 for _ in range(5))
+
+
+@pytest.mark.api
+def test_route_and_api_key_limits():
+    """Test that route limits apply alongside API key limits and are reported first."""
+    client = _client(
+        user_limit=None,
+        api_key_limit=RateLimit(rate=0.001, burst=5),
+        route_limits={"/orchestrator": RateLimit(rate=0.001, burst=1)},
+    )
+
+    assert client.get("/orchestrator/request", headers={"X-API-Key": "k1"}).status_code == 200
+    limited = client.get("/orchestrator/request", headers={"X-API-Key": "k1"})
+
+    assert limited.status_code == 429
+    assert limited.json()["scope"] == "route"
+
+
+@pytest.mark.api
+def test_rejected_request_is_refunded():
+    """Test that a request rejected by one bucket does not drain the others."""
+    client = _client(
+        user_limit=RateLimit(rate=0.001, burst=1), api_key_limit=RateLimit(rate=0.001, burst=2)
+    )
+    alice = {"Authorization": f"Bearer {create_access_token({'sub': 'alice'})}"}
+    bob = {"Authorization": f"Bearer {create_access_token({'sub': 'bob'})}"}
+    alice["X-API-Key"] = bob["X-API-Key"] = "shared"
+
+    assert client.get("/orchestrator/request", headers=alice).status_code == 200
+    # Alice's user bucket rejects these after the shared API key bucket was charged
+    limited = [client.get("/orchestrator/request", headers=alice) for _ in range(3)]
+    assert [r.json()["scope"] for r in limited] == ["user"] * 3
+
+    assert client.get("/orchestrator/request", headers=bob).status_code == 200
+
+
+@pytest.mark.integration
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL is not set")
+def test_postgres_backend_against_database():
+    """Test the Postgres bucket statements against a real database."""
+    pytest.importorskip("asyncpg")
+    limit = RateLimit(rate=0.001, burst=2)
+    key = f"test:{uuid4()}"
+
+    async def run():
+        pool = PostgresPool(os.environ["TEST_DATABASE_URL"])
+        await pool.open()
+        try:
+            await pool.execute(
+                "CREATE UNLOGGED TABLE IF NOT EXISTS rate_limits "
+                "(key text PRIMARY KEY, tokens double precision NOT NULL, "
+                "updated_at double precision NOT NULL)"
+            )
+            backend = PostgresRateLimitBackend(pool)
+            waits = [await backend.acquire(key, limit) for _ in range(3)]
+            await backend.refund(key, limit)
+            waits.append(await backend.acquire(key, limit))
+            await pool.execute("DELETE FROM rate_limits WHERE key = $1", key)
+            return waits
+        finally:
+            await pool.close()
+
+    waits = asyncio.run(run())
+
+    assert waits[:2] == [0, 0]
+    assert waits[2] > 0
+    assert waits[3] == 0
@@ -0,0 +1,87 @@
+"""
+Unit tests for response encoding, compression and conditional GETs.
+"""
+
+import json
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.api.responses import (
+    CompressionMiddleware,
+    ETagMiddleware,
+    FastJSONResponse,
+    choose_encoding,
+)
+
+
+def _client():
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    @app.get("/items")
+    async def items():
+        return [{"id": i, "name": f"item-{i}"} for i in range(200)]
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            for i in range(3):
+                yield json.dumps({"i": i}) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(CompressionMiddleware, minimum_size=500, gzip_level=6, brotli_quality=4)
+    return TestClient(app)
+
+
+@pytest.mark.api
+def test_fast_json_response_renders_common_types():
+    """Test rendering of UUIDs, datetimes and non-string keys."""
+    value = uuid.uuid4()
+    body = json.loads(FastJSONResponse({"id": value, "at": datetime(2024, 1, 2), 1: "x"}).body)
+
+    assert body == {"id": str(value), "at": "2024-01-02T00:00:00", "1": "x"}
+
+
+@pytest.mark.api
+def test_compression_threshold_and_exclusions():
+    """Test that large bodies are compressed and small or streamed ones are not."""
+    client = _client()
+    headers = {"Accept-Encoding": "gzip"}
+
+    large = client.get("/items", headers=headers)
+    small = client.get("/small", headers=headers)
+    stream = client.get("/stream", headers=headers)
+
+    assert large.headers["content-encoding"] == "gzip"
+    assert large.headers["vary"] == "Accept-Encoding"
+    assert len(large.json()) == 200
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in stream.headers
+    assert choose_encoding(b"gzip;q=0, identity") is None
+
+
+@pytest.mark.api
+def test_etag_returns_304_when_unchanged():
+    """Test conditional GETs with If-None-Match."""
+    client = _client()
+    first = client.get("/items")
+    etag = first.headers["etag"]
+
+    not_modified = client.get("/items", headers={"If-None-Match": etag})
+    changed = client.get("/items", headers={"If-None-Match": 'W/"other"'})
+
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "no-cache"
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == etag
+    assert changed.status_code == 200
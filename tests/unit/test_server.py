@@ -0,0 +1,107 @@
+"""
+Unit tests for the multi-worker server configuration and worker statistics.
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import server
+from src.api.routers import admin
+from src.api.workers import WorkerStatsMiddleware, get_worker_stats
+from src.utils.config import get_settings
+from src.utils.metrics import MetricsRegistry
+
+
+@pytest.mark.unit
+def test_resolve_workers():
+    """Test sizing workers from the CPU count."""
+    with patch.object(server, "usable_cpus", return_value=6):
+        assert server.resolve_workers("auto") == 6
+    assert server.resolve_workers("3") == 3
+
+    with pytest.raises(ValueError):
+        server.resolve_workers("0")
+
+
+@pytest.mark.unit
+def test_build_config_prefers_command_line_and_installed_implementations():
+    """Test precedence of command-line values and the loop/parser choice."""
+    with patch.object(get_settings(), "SERVER_MAX_REQUESTS", 1000), \
+            patch("importlib.util.find_spec", return_value=None):
+        config = server.build_config(workers="4", max_requests_jitter=50)
+        reloading = server.build_config(workers="4", reload=True)
+
+    assert (config.workers, config.max_requests, config.max_requests_jitter) == (4, 1000, 50)
+    assert (config.loop, config.http) == ("asyncio", "h11")
+    assert reloading.workers == 1
+
+
+@pytest.mark.unit
+def test_build_config_warns_about_per_worker_rate_limits(caplog):
+    """Test the startup warning that in-memory rate limits multiply with workers."""
+    with patch.object(get_settings(), "RATE_LIMIT_ENABLED", True), \
+            patch.object(get_settings(), "RATE_LIMIT_BACKEND", "memory"):
+        server.build_config(workers="1")
+        assert "per worker" not in caplog.text
+        server.build_config(workers="4")
+
+    assert "4 workers allow 4 times the configured limits" in caplog.text
+
+
+@pytest.mark.unit
+def test_build_config_warns_about_per_worker_revocations(caplog):
+    """Test the startup warning that revocations stay per worker without the listener."""
+    with patch.object(get_settings(), "AUTH_REVOCATION_LISTENER", True):
+        server.build_config(workers="4")
+        assert "AUTH_REVOCATION_LISTENER" not in caplog.text
+    with patch.object(get_settings(), "AUTH_REVOCATION_LISTENER", False):
+        server.build_config(workers="1")
+        assert "AUTH_REVOCATION_LISTENER" not in caplog.text
+        server.build_config(workers="4")
+
+    assert "stays valid on the other 3 workers" in caplog.text
+
+
+@pytest.mark.api
+def test_admin_workers_reports_every_worker(tmp_path):
+    """Test that worker statistics include peers sharing the metrics directory."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app.include_router(admin.router, prefix="/admin")
+    app.add_middleware(WorkerStatsMiddleware)
+    client = TestClient(app)
+
+    # A peer worker (the parent process stands in for a live pid)
+    peer = os.getppid()
+    with open(tmp_path / f"metrics-{peer}.json", "w") as f:
+        json.dump({
+            "aika_worker_requests": {
+                "type": "gauge", "help": "", "labelnames": [], "mode": "all", "samples": [[[], 7]],
+            },
+        }, f)
+
+    registry = MetricsRegistry()
+    registry._snapshot_dir = str(tmp_path)
+    registry.gauge("aika_worker_requests", "", multiprocess_mode="all").set_function(
+        lambda: get_worker_stats().requests
+    )
+
+    before = get_worker_stats().requests
+    with patch.object(get_settings(), "ADMIN_API_KEY", "secret"), \
+            patch("src.api.workers.get_metrics_registry", return_value=registry):
+        client.get("/ping")
+        response = client.get("/admin/workers", headers={"X-Admin-Key": "secret"})
+
+    workers = {worker["pid"]: worker for worker in response.json()}
+    assert response.status_code == 200
+    assert workers[os.getpid()]["requests"] == before + 2
+    assert workers[peer] == {"pid": peer, "requests": 7}
@@ -0,0 +1,76 @@
+"""
+Unit tests for the cold-start import budget of the aika entry points.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.utils.startup import parse_importtime, profile_imports
+
+# Modules that must only be imported on first use
+HEAVY_MODULES = ("confluent_kafka", "supabase", "jose")
+
+# Generous cold-import budgets (ms) so that only real regressions fail; timings
+# depend on the machine, so the budget test is marked slow and can be
+# deselected on shared CI runners with -m "not slow"
+IMPORT_BUDGETS_MS = {
+    "src.cli": 100,
+    "src.utils.logging": 100,
+    "src.messaging.kafka": 500,
+    "src.database.connection": 500,
+    "src.auth.jwt": 1000,
+}
+
+
+def _bare_env():
+    """Environment without any Aika settings."""
+    return {
+        key: value for key, value in os.environ.items() if key not in ("SECRET_KEY", "SUPABASE_URL")
+    }
+
+
+@pytest.mark.unit
+def test_entry_points_import_without_settings_or_heavy_dependencies():
+    """Test that importing the entry points neither resolves settings nor loads heavy clients."""
+    modules = list(IMPORT_BUDGETS_MS)
+    code = (
+        f"import sys\nfor m in {modules!r}: __import__(m)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=_bare_env()
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("module", list(IMPORT_BUDGETS_MS))
+def test_cold_import_budget(module):
+    """Test that each entry point imports within its cold-start budget."""
+    report = profile_imports(module, env=_bare_env())
+
+    assert 0 < report["module_ms"] <= IMPORT_BUDGETS_MS[module]
+
+
+@pytest.mark.unit
+def test_parse_importtime():
+    """Test parsing nested ``-X importtime`` output."""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       743 |       1073 |     json.scanner\n"
+        "import time:       734 |       1807 |   json.decoder\n"
+        "import time:       527 |       3161 | json\n"
+    )
+
+    timings = parse_importtime(output)
+
+    assert [(t.module, t.depth, t.cumulative_us) for t in timings] == [
+        ("json.scanner", 2, 1073),
+        ("json.decoder", 1, 1807),
+        ("json", 0, 3161),
+    ]
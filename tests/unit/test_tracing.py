@@ -0,0 +1,160 @@
+"""
+Unit tests for distributed tracing.
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from confluent_kafka import TIMESTAMP_NOT_AVAILABLE
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import main
+from src.api.tracing import TracingMiddleware
+from src.messaging import kafka
+from src.utils import tracing
+from src.utils.tracing import InMemoryExporter, Tracer, extract, parse_traceparent, start_span
+
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def use_tracer(exporter, **kwargs):
+    """Patch in an application tracer exporting to ``exporter``."""
+    return patch.object(tracing, "_tracer", Tracer(exporter, **kwargs))
+
+
+@pytest.mark.unit
+def test_traceparent_round_trip():
+    """Test parsing and formatting W3C trace context."""
+    context = parse_traceparent(TRACEPARENT.encode())
+
+    assert context.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+    assert context.span_id == "00f067aa0ba902b7"
+    assert context.sampled is True
+    assert context.to_traceparent() == TRACEPARENT
+    headers = [("other", b"x"), ("traceparent", TRACEPARENT.encode())]
+    assert extract(headers).span_id == "00f067aa0ba902b7"
+
+    for value in ("", "00-abc-def-01", "ff" + TRACEPARENT[2:], TRACEPARENT.replace("4bf9", "zzzz"),
+                  "00-00000000000000000000000000000000-00f067aa0ba902b7-01"):
+        assert parse_traceparent(value) is None
+
+
+@pytest.mark.unit
+def test_spans_nest_across_await():
+    """Test that spans opened in awaited code and tasks are children of the current span."""
+    exporter = InMemoryExporter()
+
+    async def child(name):
+        await asyncio.sleep(0)
+        with start_span(name):
+            await asyncio.sleep(0)
+
+    async def handle():
+        with start_span("root", parent=parse_traceparent(TRACEPARENT)):
+            await asyncio.gather(child("a"), child("b"))
+
+    with use_tracer(exporter, sample_rate=0.0) as tracer:
+        asyncio.run(handle())
+        tracer.shutdown()
+
+    spans = {span["name"]: span for span in exporter.spans}
+    assert set(spans) == {"root", "a", "b"}
+    assert {span["trace_id"] for span in spans.values()} == {"4bf92f3577b34da6a3ce929d0e0e4736"}
+    assert spans["root"]["parent_id"] == "00f067aa0ba902b7"
+    assert spans["a"]["parent_id"] == spans["b"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["root"]["attributes"]["sampling.reason"] == "head"
+
+
+@pytest.mark.unit
+def test_tail_sampling_keeps_failed_and_slow_traces():
+    """Test that unsampled traces are exported only when they fail or are slow."""
+    exporter = InMemoryExporter()
+
+    with use_tracer(exporter, sample_rate=0.0, tail_latency_ms=20, tail_errors=True) as tracer:
+        with start_span("fast"):
+            with start_span("fast.child"):
+                pass
+
+        with pytest.raises(RuntimeError):
+            with start_span("failing"):
+                with start_span("failing.child"):
+                    raise RuntimeError("boom")
+
+        with start_span("slow") as span:
+            span._started -= 0.05
+
+        tracer.shutdown()
+
+    spans = {span["name"]: span for span in exporter.spans}
+    assert set(spans) == {"failing", "failing.child", "slow"}
+    assert spans["failing.child"]["error"] == "RuntimeError: boom"
+    assert spans["failing"]["attributes"]["sampling.reason"] == "error"
+    assert spans["slow"]["attributes"]["sampling.reason"] == "latency"
+
+
+@pytest.mark.unit
+def test_disabled_tracer_passes_context_on():
+    """Test that without an exporter nothing is recorded but context still propagates."""
+    with use_tracer(None):
+        with start_span("outside") as span:
+            assert not span.is_recording
+            assert tracing.inject({}) == {}
+
+        with start_span("continued", parent=parse_traceparent(TRACEPARENT)):
+            assert tracing.inject({}) == {"traceparent": TRACEPARENT}
+
+
+@pytest.mark.api
+def test_api_passes_context_on_without_exporter():
+    """Test that the API continues received traces when tracing is disabled."""
+    app = FastAPI()
+
+    @app.get("/echo")
+    async def echo():
+        return tracing.inject({})
+
+    app.add_middleware(TracingMiddleware)
+
+    with use_tracer(None):
+        response = TestClient(app).get("/echo", headers={"traceparent": TRACEPARENT})
+
+    assert response.json() == {"traceparent": TRACEPARENT}
+    assert any(middleware.cls is TracingMiddleware for middleware in main.app.user_middleware)
+
+
+@pytest.mark.messaging
+def test_kafka_messages_carry_the_trace():
+    """Test that consumers continue the trace of the publisher."""
+    exporter = InMemoryExporter()
+    producer = MagicMock()
+
+    with use_tracer(exporter, sample_rate=1.0) as tracer, \
+            patch.object(kafka, "_producer", producer):
+        with start_span("request"):
+            kafka.publish_message("agent.requests", {"id": 1}, key="1")
+
+        headers = producer.produce.call_args.kwargs["headers"]
+        message = MagicMock()
+        message.error.return_value = None
+        message.topic.return_value = "agent.requests"
+        message.timestamp.return_value = (TIMESTAMP_NOT_AVAILABLE, 0)
+        message.value.return_value = kafka.encode_message({"id": 1})
+        message.key.return_value = None
+        message.headers.return_value = [(name, value.encode()) for name, value in headers]
+        consumer = MagicMock()
+        consumer.poll.side_effect = [message, KeyboardInterrupt()]
+
+        received = []
+        with patch.dict(kafka._consumers, {"agents": consumer}):
+            kafka.consume_messages(
+                ["agent.requests"], "agents", lambda value, key: received.append(value)
+            )
+        tracer.shutdown()
+
+    spans = {span["name"]: span for span in exporter.spans}
+    assert received == [{"id": 1}]
+    assert spans["kafka.publish"]["parent_id"] == spans["request"]["span_id"]
+    assert spans["kafka.consume"]["parent_id"] == spans["kafka.publish"]["span_id"]
+    assert spans["kafka.consume"]["trace_id"] == spans["request"]["trace_id"]
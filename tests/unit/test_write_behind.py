@@ -0,0 +1,204 @@
+"""
+Unit tests for write-behind message persistence.
+"""
+
+import asyncio
+import json
+import os
+import time
+from uuid import uuid4
+
+import pytest
+
+from src.database import write_behind
+from src.database.models import Message
+from src.database.write_behind import MessagePersister
+from src.database.writes import BulkWriteResult, RowFailure
+from src.utils.metrics import get_metrics_registry
+
+
+class CollectingWriter:
+    """Writer stand-in that records flushed messages."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.written = []
+
+    async def __call__(self, messages):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.written.extend(messages)
+        return BulkWriteResult(
+            table="messages", operation="upsert", requested=len(messages), succeeded=len(messages)
+        )
+
+
+class TransientWriter:
+    """Writer stand-in that rejects "bad" rows and times out from the first "slow" row on."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, messages):
+        self.calls.append([m.content for m in messages])
+        failures = []
+        for index, message in enumerate(messages):
+            if message.content == "slow" and len(self.calls) == 1:
+                failures.extend(
+                    RowFailure(index=i, error="Query exceeded 5s timeout", transient=True)
+                    for i in range(index, len(messages))
+                )
+                break
+            if message.content == "bad":
+                failures.append(RowFailure(index=index, error="violates check constraint"))
+        return BulkWriteResult(
+            table="messages", operation="upsert", requested=len(messages),
+            succeeded=len(messages) - len(failures), failures=failures,
+        )
+
+
+def make_message(content: str) -> Message:
+    """Create a test message."""
+    return Message(conversation_id=uuid4(), sender_id="user", sender_type="user", content=content)
+
+
+@pytest.mark.database
+def test_persist_flushes_in_background(tmp_path):
+    """Test that persisted messages reach the writer and the checkpoint advances."""
+    writer = CollectingWriter()
+    persister = MessagePersister(str(tmp_path / "messages.wal"), flush_interval=0.01, writer=writer)
+
+    async def run():
+        await persister.start()
+        for i in range(5):
+            persister.persist(make_message(f"message {i}"))
+        await asyncio.sleep(0.05)
+        stats = persister.get_stats()
+        await persister.stop()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert [m.content for m in writer.written] == [f"message {i}" for i in range(5)]
+    assert stats["backlog"] == 0
+    assert stats["unflushed_bytes"] == 0
+    assert stats["fsyncs_total"] >= 1
+
+
+@pytest.mark.database
+def test_unflushed_messages_replay_on_restart(tmp_path):
+    """Test that messages not flushed before shutdown are replayed."""
+    wal_path = str(tmp_path / "messages.wal")
+
+    async def crash():
+        persister = MessagePersister(
+            wal_path, flush_interval=0.01, writer=CollectingWriter(fail=True)
+        )
+        await persister.start()
+        persister.persist(make_message("first"))
+        persister.persist(make_message("second"))
+        await persister.stop()
+        return persister.get_stats()
+
+    stats = asyncio.run(crash())
+    assert stats["backlog"] == 2
+    assert stats["flush_failures_total"] >= 1
+
+    writer = CollectingWriter()
+
+    async def restart():
+        persister = MessagePersister(wal_path, flush_interval=0.01, writer=writer)
+        await persister.start()
+        await persister.flush()
+        stats = persister.get_stats()
+        await persister.stop()
+        return stats
+
+    stats = asyncio.run(restart())
+
+    assert [m.content for m in writer.written] == ["first", "second"]
+    assert stats["replayed_total"] == 2
+    assert stats["backlog"] == 0
+
+
+@pytest.mark.database
+def test_transient_failures_stay_pending(tmp_path):
+    """Test that only rejected rows are dead-lettered and transient ones are retried."""
+    wal_path = str(tmp_path / "messages.wal")
+    writer = TransientWriter()
+    persister = MessagePersister(wal_path, flush_interval=10, writer=writer)
+
+    async def run():
+        await persister.start()
+        for content in ["a", "bad", "slow", "b"]:
+            persister.persist(make_message(content))
+        await persister.flush()
+        first = persister.get_stats()
+        checkpoint = persister._checkpoint
+        await persister.flush()
+        await persister.stop()
+        return first, checkpoint, persister.get_stats()
+
+    first, checkpoint, stats = asyncio.run(run())
+
+    # The first flush stops at the timed-out row without passing it
+    assert first["backlog"] == 2
+    assert first["dead_lettered_total"] == 1
+    assert first["flush_failures_total"] == 1
+    assert 0 < checkpoint < os.path.getsize(wal_path)
+    assert writer.calls == [["a", "bad", "slow", "b"], ["slow", "b"]]
+    assert stats["backlog"] == 0
+    assert stats["flushed_total"] == 3
+
+    with open(wal_path + ".dead", encoding="utf-8") as f:
+        assert [json.loads(line)["message"]["content"] for line in f] == ["bad"]
+
+
+@pytest.mark.database
+@pytest.mark.skipif(write_behind.fcntl is None, reason="requires file locks")
+def test_workers_use_separate_logs_and_adopt_orphans(tmp_path):
+    """Test that concurrent persisters never share a log and exited workers' logs are adopted."""
+    wal_path = str(tmp_path / "messages.wal")
+
+    async def two_workers():
+        first = MessagePersister(wal_path, flush_interval=0.01, writer=CollectingWriter(fail=True))
+        second = MessagePersister(wal_path, flush_interval=0.01, writer=CollectingWriter(fail=True))
+        await first.start()
+        await second.start()
+        first.persist(make_message("first"))
+        second.persist(make_message("second"))
+        await first.stop()
+        await second.stop()
+        return first.wal_path, second.wal_path
+
+    assert asyncio.run(two_workers()) == (wal_path, wal_path + ".1")
+
+    writer = CollectingWriter()
+
+    async def restart():
+        persister = MessagePersister(wal_path, flush_interval=0.01, writer=writer)
+        await persister.start()
+        await persister.flush()
+        stats = persister.get_stats()
+        await persister.stop()
+        return stats
+
+    stats = asyncio.run(restart())
+
+    assert sorted(m.content for m in writer.written) == ["first", "second"]
+    assert stats["replayed_total"] == 2
+    assert not os.path.exists(wal_path + ".1")
+
+
+@pytest.mark.database
+def test_backlog_is_exported_as_gauges(tmp_path, monkeypatch):
+    """Test that the persister backlog and lag appear in the metrics registry."""
+    persister = MessagePersister(str(tmp_path / "messages.wal"), writer=CollectingWriter(fail=True))
+    monkeypatch.setattr(write_behind, "_persister", persister)
+    persister._pending.append((make_message("waiting"), 0, time.monotonic() - 2.0))
+
+    output = get_metrics_registry().render()
+
+    values = dict(line.split(" ", 1) for line in output.splitlines() if not line.startswith("#"))
+    assert float(values["aika_message_wal_backlog"]) == 1
+    assert float(values["aika_message_wal_lag_seconds"]) >= 2.0